@@ -754,9 +754,9 @@ def conf_docs(output_format):
     config_logger = logging.getLogger('sdcm.sct_config')
     config_logger.setLevel(logging.ERROR)
     if output_format == 'markdown':
-        click.secho(SCTConfiguration().dump_help_config_markdown())
+        click.secho(SCTConfiguration(resolve=False).dump_help_config_markdown())
     elif output_format == 'yaml':
-        click.secho(SCTConfiguration().dump_help_config_yaml())
+        click.secho(SCTConfiguration(resolve=False).dump_help_config_yaml())
 
 
 @cli.command("perf-regression-report", help="Generate and send performance regression report")
@@ -33,7 +33,7 @@ from pathlib import Path
 from typing import List, Optional, Dict, Union, Set, Iterable, ContextManager
 from datetime import datetime
 from textwrap import dedent
-from functools import cached_property, wraps
+from functools import cached_property, partial, wraps
 from collections import defaultdict
 from collections.abc import Iterator
 from dataclasses import dataclass
@@ -67,7 +67,7 @@ from sdcm.provision.scylla_yaml.cluster_builder import ScyllaYamlClusterAttrBuil
 from sdcm.provision.scylla_yaml.scylla_yaml import ScyllaYaml
 from sdcm.provision.helpers.certificate import install_client_certificate, install_encryption_at_rest_files
 from sdcm.remote import RemoteCmdRunnerBase, LOCALRUNNER, NETWORK_EXCEPTIONS, shell_script_cmd
-from sdcm.remote.remote_file import remote_file, yaml_file_to_dict, dict_to_yaml_file
+from sdcm.remote.remote_file import remote_file, remote_files, yaml_file_to_dict, dict_to_yaml_file
 from sdcm import wait, mgmt
 from sdcm.sct_config import SCTConfiguration
 from sdcm.sct_events.continuous_event import ContinuousEventsRegistry
@@ -105,8 +105,10 @@ from sdcm.sct_events.system import TestFrameworkEvent, INSTANCE_STATUS_EVENTS_PA
 from sdcm.sct_events.grafana import set_grafana_url
 from sdcm.sct_events.database import SYSTEM_ERROR_EVENTS_PATTERNS, ScyllaHelpErrorEvent
 from sdcm.sct_events.nodetool import NodetoolEvent
-from sdcm.sct_events.decorators import raise_event_on_failure
 from sdcm.utils.auto_ssh import AutoSshContainerMixin
+from sdcm.utils.backtrace_decoder import BacktraceDecoder, DECODING_BATCH_SIZE
+from sdcm.utils.node_setup import NodeSetupPhase, NodeSetupScheduler
+from sdcm.utils.topology_snapshot import TopologySnapshotCache
 from sdcm.monitorstack.ui import AlternatorDashboard
 from sdcm.logcollector import GrafanaSnapshot, GrafanaScreenShot, PrometheusSnapshots, upload_archive_to_s3
 from sdcm.utils.ldap import LDAP_SSH_TUNNEL_LOCAL_PORT, LDAP_BASE_OBJECT, LDAP_PASSWORD, LDAP_USERS, \
@@ -369,7 +371,8 @@ class BaseNode(AutoSshContainerMixin, WebDriverContainerMixin):  # pylint: disab
 
     @property
     def host_id(self):
-        full_nodetool_status = self.parent_cluster.get_nodetool_status(verification_node=self)
+        full_nodetool_status = self.parent_cluster.topology_snapshot.get(
+            "nodetool_status", self, partial(self.parent_cluster.get_nodetool_status, verification_node=self))
         for data_center in full_nodetool_status:
             if self.ip_address in full_nodetool_status[data_center]:
                 return full_nodetool_status[data_center][self.ip_address]['host_id']
@@ -1480,27 +1483,28 @@ class BaseNode(AutoSshContainerMixin, WebDriverContainerMixin):  # pylint: disab
         self._decoding_backtraces_thread.start()
 
     def decode_backtrace(self):
-        scylla_debug_file = None
-        while True:
-            event = None
-            obj = None
+        decoder = BacktraceDecoder(node=self)
+        stopped = False
+        while not stopped:
+            items = []
             try:
-                obj = self.test_config.DECODING_QUEUE.get(timeout=5)
-                if obj is None:
-                    break
-                event = obj["event"]
-                if not scylla_debug_file:
-                    scylla_debug_file = self.copy_scylla_debug_info(obj["node"], obj["debug_file"])
-                output = self.decode_raw_backtrace(scylla_debug_file, " ".join(event.raw_backtrace.split('\n')))
-                event.backtrace = output.stdout
+                items.append(self.test_config.DECODING_QUEUE.get(timeout=5))
+                # Take all pending backtraces to decode them at once.
+                while items[-1] is not None and len(items) < DECODING_BATCH_SIZE:
+                    items.append(self.test_config.DECODING_QUEUE.get_nowait())
             except queue.Empty:
                 pass
+            if items and items[-1] is None:
+                stopped = True
+                items.pop()
+            try:
+                decoder.decode(items)
             except Exception as details:  # pylint: disable=broad-except
                 self.log.error("failed to decode backtrace %s", details)
             finally:
-                if event:
-                    event.ready_to_publish()
-                    event.publish()
+                for item in items:
+                    item["event"].ready_to_publish()
+                    item["event"].publish()
 
             if self.termination_event.is_set() and self.test_config.DECODING_QUEUE.empty():
                 break
@@ -1591,24 +1595,29 @@ class BaseNode(AutoSshContainerMixin, WebDriverContainerMixin):  # pylint: disab
 
     @contextlib.contextmanager
     def remote_scylla_yaml(self) -> ContextManager[ScyllaYaml]:
-        with self._remote_yaml(path=self.add_install_prefix(abs_path=SCYLLA_YAML_PATH)) as scylla_yaml:
-            new_scylla_yaml = ScyllaYaml(**scylla_yaml)
-            old_scylla_yaml = new_scylla_yaml.copy()
+        with self._remote_yaml(path=self.add_install_prefix(abs_path=SCYLLA_YAML_PATH)) as scylla_yaml, \
+                self._edit_scylla_yaml(scylla_yaml) as new_scylla_yaml:
             yield new_scylla_yaml
-            diff = old_scylla_yaml.diff(new_scylla_yaml)
-            if not diff:
-                LOGGER.debug("%s: scylla.yaml hasn't been changed", self)
-                return
-            scylla_yaml.clear()
-            scylla_yaml.update(
-                new_scylla_yaml.dict(
-                    exclude_none=True, exclude_unset=True, exclude_defaults=True,
-                    # NOTE: explicit fields included into yaml no matter what,
-                    #  they are needed for nodetool to operate properly
-                    explicit=['partitioner', 'commitlog_sync', 'commitlog_sync_period_in_ms', 'endpoint_snitch']
-                )
+
+    @contextlib.contextmanager
+    def _edit_scylla_yaml(self, scylla_yaml: dict) -> ContextManager[ScyllaYaml]:
+        new_scylla_yaml = ScyllaYaml(**scylla_yaml)
+        old_scylla_yaml = new_scylla_yaml.copy()
+        yield new_scylla_yaml
+        diff = old_scylla_yaml.diff(new_scylla_yaml)
+        if not diff:
+            LOGGER.debug("%s: scylla.yaml hasn't been changed", self)
+            return
+        scylla_yaml.clear()
+        scylla_yaml.update(
+            new_scylla_yaml.dict(
+                exclude_none=True, exclude_unset=True, exclude_defaults=True,
+                # NOTE: explicit fields included into yaml no matter what,
+                #  they are needed for nodetool to operate properly
+                explicit=['partitioner', 'commitlog_sync', 'commitlog_sync_period_in_ms', 'endpoint_snitch']
             )
-            LOGGER.debug("%s: scylla.yaml will be updated to:\n%s", self, scylla_yaml)
+        )
+        LOGGER.debug("%s: scylla.yaml will be updated to:\n%s", self, scylla_yaml)
 
     def remote_manager_yaml(self):
         return self._remote_yaml(path=SCYLLA_MANAGER_YAML_PATH)
@@ -2638,9 +2647,10 @@ class BaseNode(AutoSshContainerMixin, WebDriverContainerMixin):  # pylint: disab
                     raise
 
     def node_health_events(self) -> Iterator[ClusterHealthValidatorEvent]:
-        nodes_status = self.get_nodes_status()
-        peers_details = self.get_peers_info() or {}
-        gossip_info = self.get_gossip_info() or {}
+        topology_snapshot = self.parent_cluster.topology_snapshot
+        nodes_status = topology_snapshot.get("nodes_status", self, self.get_nodes_status)
+        peers_details = topology_snapshot.get("peers_info", self, self.get_peers_info) or {}
+        gossip_info = topology_snapshot.get("gossip_info", self, self.get_gossip_info) or {}
 
         return itertools.chain(
             check_nodes_status(
@@ -3159,6 +3169,11 @@ class BaseCluster:  # pylint: disable=too-many-instance-attributes,too-many-publ
     def node_setup(self, node, verbose=False, timeout=3600):
         raise NotImplementedError("Derived class must implement 'node_setup' method!")
 
+    def node_setup_phases(self, **setup_kwargs) -> List[NodeSetupPhase]:
+        """Phases of `node_setup()' for `NodeSetupScheduler': by default, one phase which runs on all nodes at once."""
+
+        return [NodeSetupPhase(name="setup", func=partial(self.node_setup, **setup_kwargs))]
+
     def get_node_ips_param(self, public_ip=True):
         raise NotImplementedError("Derived class must implement 'get_node_ips_param' method!")
 
@@ -3489,7 +3504,8 @@ class NodeSetupTimeout(Exception):
 def wait_for_init_wrap(method):  # pylint: disable=too-many-statements
     """
     Wraps wait_for_init class method.
-    Run setup of nodes simultaneously and wait for all the setups finished.
+    Run setup of nodes simultaneously (phases which can't be run in parallel, like starting Scylla, are run
+    node by node) and wait for all the setups finished.
     Raise exception if setup failed or timeout expired.
     """
     @wraps(method)
@@ -3502,24 +3518,14 @@ def wait_for_init_wrap(method):  # pylint: disable=too-many-statements
         # remove all arguments which is not supported by BaseScyllaCluster.node_setup method
         setup_kwargs = {k: v for k, v in kwargs.items() if k not in ["node_list", "check_node_health"]}
 
-        _queue = queue.Queue()
-
-        @raise_event_on_failure
-        def node_setup(_node: BaseNode):
-            exception_details = None
-            try:
-                cl_inst.node_setup(_node, **setup_kwargs)
-                _node.argus_resource_set_shards()
-                ArgusTestRun.get().save()
-            except Exception as ex:  # pylint: disable=broad-except
-                exception_details = (str(ex), traceback.format_exc())
-            _queue.put((_node, exception_details))
-            _queue.task_done()
+        def update_argus(_node: BaseNode):
+            _node.argus_resource_set_shards()
+            ArgusTestRun.get().save()
 
         def verify_node_setup(start_time):
             time_elapsed = time.perf_counter() - start_time
             try:
-                node, setup_exception = _queue.get(block=True, timeout=5)
+                node, setup_exception = scheduler.results.get(block=True, timeout=5)
                 if setup_exception:
                     raise NodeSetupFailed(node=node, error_msg=setup_exception[0], traceback_str=setup_exception[1])
                 results.append(node)
@@ -3534,7 +3540,6 @@ def wait_for_init_wrap(method):  # pylint: disable=too-many-statements
                 raise NodeSetupTimeout(msg)
 
         start_time = time.perf_counter()
-        init_nodes = []
         results = []
 
         if isinstance(cl_inst, BaseScyllaCluster):
@@ -3542,25 +3547,16 @@ def wait_for_init_wrap(method):  # pylint: disable=too-many-statements
             cl_inst.update_db_binary(node_list, start_service=False)
             cl_inst.update_db_packages(node_list, start_service=False)
 
-        for node in node_list:
-            if isinstance(cl_inst, BaseScyllaCluster) \
-                    and not getattr(cl_inst, 'params', {}).get('use_legacy_cluster_init'):
-                init_nodes.append(node)
-                start_time = time.perf_counter()
-                node_setup(node)
-                verify_node_setup(start_time)
-            else:
-                setup_thread = threading.Thread(target=node_setup, name='NodeSetupThread',
-                                                args=(node,), daemon=True)
-                setup_thread.start()
-                if isinstance(cl_inst, BaseScyllaCluster):
-                    cl_inst.log.info("Wait 120 seconds before next node setup")
-                    time.sleep(120)
-
+        scheduler = NodeSetupScheduler(
+            nodes=node_list,
+            phases=cl_inst.node_setup_phases(**setup_kwargs) + [NodeSetupPhase(name="argus", func=update_argus)])
+        scheduler.start()
         while len(results) != len(node_list):
             verify_node_setup(start_time)
+        cl_inst.log.debug("Node setup phases: %s", scheduler.timings_summary())
 
         if isinstance(cl_inst, BaseScyllaCluster):
+            cl_inst.topology_snapshot.invalidate()
             cl_inst.wait_for_nodes_up_and_normal(nodes=node_list, verification_node=node_list[0])
 
         time_elapsed = time.perf_counter() - start_time
@@ -3603,6 +3599,12 @@ class BaseScyllaCluster:  # pylint: disable=too-many-public-methods, too-many-in
     def get_rack_nodes(self, rack: int) -> list:
         return sorted([node for node in self.nodes if node.rack == rack], key=lambda n: n.name)
 
+    @cached_property
+    def topology_snapshot(self) -> TopologySnapshotCache:
+        """Cached results of topology queries for node health checks, invalidated on topology changes."""
+
+        return TopologySnapshotCache()
+
     @cached_property
     def proposed_scylla_yaml(self) -> ScyllaYaml:
         """
@@ -3838,9 +3840,32 @@ class BaseScyllaCluster:  # pylint: disable=too-many-public-methods, too-many-in
         time_elapsed = time.time() - start_time
         self.log.debug('Update DB packages duration -> %s s', int(time_elapsed))
 
+    @contextlib.contextmanager
+    def remote_scylla_yamls(self, nodes: Optional[List[BaseNode]] = None) -> ContextManager[Dict[BaseNode, ScyllaYaml]]:
+        """Edit scylla.yaml of many nodes at once: files are read from all nodes in parallel and written back
+        in parallel.
+
+        Nodes which have own way to edit scylla.yaml (e.g., K8S pods) are handled one by one.
+        """
+        nodes = self.nodes if nodes is None else nodes
+        with contextlib.ExitStack() as stack:
+            if all(type(node).remote_scylla_yaml is BaseNode.remote_scylla_yaml for node in nodes):
+                self.log.debug("Update scylla.yaml on %d nodes", len(nodes))
+                files = stack.enter_context(remote_files(
+                    files=[(node.remoter, node.add_install_prefix(abs_path=SCYLLA_YAML_PATH)) for node in nodes],
+                    serializer=dict_to_yaml_file,
+                    deserializer=yaml_file_to_dict,
+                    sudo=True))
+                # pylint: disable=protected-access
+                scylla_yamls = {node: stack.enter_context(node._edit_scylla_yaml(scylla_yaml))
+                                for node, scylla_yaml in zip(nodes, files)}
+            else:
+                scylla_yamls = {node: stack.enter_context(node.remote_scylla_yaml()) for node in nodes}
+            yield scylla_yamls
+
     def update_seed_provider(self):
-        for node in self.nodes:
-            with node.remote_scylla_yaml() as scylla_yml:
+        with self.remote_scylla_yamls() as scylla_yamls:
+            for node, scylla_yml in scylla_yamls.items():
                 scylla_yml.seed_provider = node.proposed_scylla_yaml.seed_provider
 
     def update_db_binary(self, node_list=None, start_service=True):
@@ -4159,7 +4184,26 @@ class BaseScyllaCluster:  # pylint: disable=too-many-public-methods, too-many-in
                                     dst='/tmp/')
             node.remoter.run('sudo mv /tmp/{0} /etc/scylla.d/{0}'.format(conf))
 
-    def node_setup(self, node: BaseNode, verbose: bool = False, timeout: int = 3600):  # pylint: disable=too-many-branches,too-many-statements
+    def node_setup(self, node: BaseNode, verbose: bool = False, timeout: int = 3600):
+        for phase in self.node_setup_phases(verbose=verbose, timeout=timeout):
+            phase.func(node)
+
+    def node_setup_phases(self, verbose: bool = False, timeout: int = 3600) -> List[NodeSetupPhase]:
+        """Install and configure Scylla on all nodes at once, and start it node by node (to join the ring.)"""
+
+        if type(self).node_setup is not BaseScyllaCluster.node_setup:
+            # A custom `node_setup()' can't be split to phases, so nodes are set up one by one.
+            return [NodeSetupPhase(name="setup", func=partial(self.node_setup, verbose=verbose, timeout=timeout),
+                                   exclusive=True)]
+        return [
+            NodeSetupPhase(name="prepare", func=partial(self.node_setup_prepare, verbose=verbose, timeout=timeout)),
+            NodeSetupPhase(name="join", func=partial(self.node_setup_join, verbose=verbose, timeout=timeout),
+                           exclusive=True),
+            NodeSetupPhase(name="finalize", func=self.node_setup_finalize),
+        ]
+
+    # pylint: disable=too-many-branches
+    def node_setup_prepare(self, node: BaseNode, verbose: bool = False, timeout: int = 3600):
         node.wait_ssh_up(verbose=verbose, timeout=timeout)
         if node.distro.is_centos8 or node.distro.is_rhel8 or node.distro.is_oel8 or node.distro.is_rocky8:
             node.remoter.sudo('systemctl stop iptables', ignore_status=True)
@@ -4173,58 +4217,54 @@ class BaseScyllaCluster:  # pylint: disable=too-many-public-methods, too-many-in
         if self.params.get("use_preinstalled_scylla") and node.is_scylla_installed(raise_if_not_installed=True):
             install_scylla = False
 
-        if not self.test_config.REUSE_CLUSTER:
-            node.disable_daily_triggered_services()
-            nic_devname = node.get_nic_devices()[0]
-            if install_scylla:
-                self._scylla_install(node)
-            else:
-                self.log.info("Waiting for preinstalled Scylla")
-                self._wait_for_preinstalled_scylla(node)
-                self.log.info("Done waiting for preinstalled Scylla")
-                if self.params.get('workaround_kernel_bug_for_iotune'):
-                    self.copy_preconfigured_iotune_files(node)
-            if node.is_nonroot_install:
-                self.scylla_configure_non_root_installation(node=node, devname=nic_devname,
-                                                            verbose=verbose, timeout=timeout)
-                return
-
-            if self.test_config.BACKTRACE_DECODING:
-                node.install_scylla_debuginfo()
-
-            if self.test_config.MULTI_REGION:
-                node.datacenter_setup(self.datacenter)  # pylint: disable=no-member
-            node.config_setup(append_scylla_args=self.get_scylla_args())
+        if self.test_config.REUSE_CLUSTER:
+            return
 
-            self._scylla_post_install(node, install_scylla, nic_devname)
+        node.disable_daily_triggered_services()
+        nic_devname = node.get_nic_devices()[0]
+        if install_scylla:
+            self._scylla_install(node)
+        else:
+            self.log.info("Waiting for preinstalled Scylla")
+            self._wait_for_preinstalled_scylla(node)
+            self.log.info("Done waiting for preinstalled Scylla")
+            if self.params.get('workaround_kernel_bug_for_iotune'):
+                self.copy_preconfigured_iotune_files(node)
+        if node.is_nonroot_install:
+            return
 
-            # prepare and start saslauthd service
-            if self.params.get('prepare_saslauthd'):
-                prepare_and_start_saslauthd_service(node)
+        if self.test_config.BACKTRACE_DECODING:
+            node.install_scylla_debuginfo()
 
-            if self.node_setup_requires_scylla_restart:
-                node.stop_scylla_server(verify_down=False)
-                node.clean_scylla_data()
-                node.remoter.sudo(cmd="rm -f /etc/scylla/ami_disabled", ignore_status=True)
+        if self.test_config.MULTI_REGION:
+            node.datacenter_setup(self.datacenter)  # pylint: disable=no-member
+        node.config_setup(append_scylla_args=self.get_scylla_args())
 
-                if self.is_additional_data_volume_used():
-                    result = node.remoter.sudo(cmd="scylla_io_setup")
-                    if result.ok:
-                        self.log.info("Scylla_io_setup result: %s", result.stdout)
+        self._scylla_post_install(node, install_scylla, nic_devname)
 
-                node.start_scylla_server(verify_up=False)
+        # prepare and start saslauthd service
+        if self.params.get('prepare_saslauthd'):
+            prepare_and_start_saslauthd_service(node)
 
-            # code to increase java heap memory to scylla-jmx (because of #7609)
-            if jmx_memory := self.params.get("jmx_heap_memory"):
-                node.increase_jmx_heap_memory(jmx_memory)
-                node.restart_scylla_jmx()
+        if self.node_setup_requires_scylla_restart:
+            node.stop_scylla_server(verify_down=False)
+            node.clean_scylla_data()
+            node.remoter.sudo(cmd="rm -f /etc/scylla/ami_disabled", ignore_status=True)
 
-            self.log.debug('io.conf right after reboot: %s', node.remoter.sudo('cat /etc/scylla.d/io.conf').stdout)
+            if self.is_additional_data_volume_used():
+                result = node.remoter.sudo(cmd="scylla_io_setup")
+                if result.ok:
+                    self.log.info("Scylla_io_setup result: %s", result.stdout)
 
-            if self.params.get('use_mgmt'):
-                self.install_scylla_manager(node)
-        else:
+    def node_setup_join(self, node: BaseNode, verbose: bool = False, timeout: int = 3600):
+        if self.test_config.REUSE_CLUSTER:
             self._reuse_cluster_setup(node)
+        elif node.is_nonroot_install:
+            self.scylla_configure_non_root_installation(node=node, devname=node.get_nic_devices()[0],
+                                                        verbose=verbose, timeout=timeout)
+            return
+        elif self.node_setup_requires_scylla_restart:
+            node.start_scylla_server(verify_up=False)
 
         node.wait_db_up(verbose=verbose, timeout=timeout)
         nodes_status = node.get_nodes_status()
@@ -4232,6 +4272,20 @@ class BaseScyllaCluster:  # pylint: disable=too-many-public-methods, too-many-in
 
         self.clean_replacement_node_ip(node)
 
+    def node_setup_finalize(self, node: BaseNode):
+        if self.test_config.REUSE_CLUSTER or node.is_nonroot_install:
+            return
+
+        # code to increase java heap memory to scylla-jmx (because of #7609)
+        if jmx_memory := self.params.get("jmx_heap_memory"):
+            node.increase_jmx_heap_memory(jmx_memory)
+            node.restart_scylla_jmx()
+
+        self.log.debug('io.conf right after reboot: %s', node.remoter.sudo('cat /etc/scylla.d/io.conf').stdout)
+
+        if self.params.get('use_mgmt'):
+            self.install_scylla_manager(node)
+
     def install_scylla_manager(self, node):
         pkgs_url = self.params.get("scylla_mgmt_pkg")
         pkg_path = None
@@ -4428,6 +4482,7 @@ class BaseScyllaCluster:  # pylint: disable=too-many-public-methods, too-many-in
 
     def decommission(self, node):
         node.run_nodetool("decommission")
+        self.topology_snapshot.invalidate()
         self.verify_decommission(node)
 
     @property
@@ -271,7 +271,7 @@ class ScyllaDockerCluster(cluster.BaseScyllaCluster, DockerCluster):  # pylint:
                          n_nodes=n_nodes,
                          params=params)
 
-    def node_setup(self, node, verbose=False, timeout=3600):
+    def node_setup_prepare(self, node, verbose=False, timeout=3600):
         node.wait_ssh_up(verbose=verbose)
 
         node.is_scylla_installed(raise_if_not_installed=True)
@@ -285,6 +285,8 @@ class ScyllaDockerCluster(cluster.BaseScyllaCluster, DockerCluster):  # pylint:
 
         node.stop_scylla_server(verify_down=False)
         node.remoter.sudo('rm -Rf /var/lib/scylla/data/*')  # Clear data folder to drop wrong cluster name data.
+
+    def node_setup_join(self, node, verbose=False, timeout=3600):
         node.start_scylla_server(verify_up=False)
 
         node.wait_db_up(verbose=verbose, timeout=timeout)
@@ -294,6 +296,9 @@ class ScyllaDockerCluster(cluster.BaseScyllaCluster, DockerCluster):  # pylint:
             event.publish()
         self.clean_replacement_node_ip(node)
 
+    def node_setup_finalize(self, node):
+        pass
+
     @staticmethod
     def check_aio_max_nr(node: DockerNode, recommended_value: int = AIO_MAX_NR_RECOMMENDED_VALUE):
         """Verify that sysctl key `fs.aio-max-nr' set to recommended value.
@@ -14,6 +14,7 @@
 import os
 import re
 import time
+import shlex
 from abc import abstractmethod
 from typing import List, Optional, Dict
 from datetime import datetime
@@ -22,7 +23,6 @@ from threading import Thread, Event
 from dataclasses import dataclass
 
 from sdcm.log import SDCMAdapter
-from sdcm.remote import NETWORK_EXCEPTIONS
 from sdcm.utils.decorators import timeout
 from sdcm.sct_events.system import CoreDumpEvent
 from sdcm.sct_events.decorators import raise_event_on_failure
@@ -86,6 +86,10 @@ class CoredumpThreadBase(Thread):  # pylint: disable=too-many-instance-attribute
     lookup_period = 30
     upload_retry_limit = 3
     max_coredump_thread_exceptions = 10
+    compressed_extensions = ('.lz4', '.zst', '.xz', '.zip', '.gz', '.gzip')
+    compressor = 'pigz --fast'
+    upload_bucket = 'upload.scylladb.com'
+    upload_endpoint = 'https://upload.scylladb.com'
 
     def __init__(self, node: 'BaseNode', max_core_upload_limit: int):
         self.node = node
@@ -198,18 +202,51 @@ class CoredumpThreadBase(Thread):  # pylint: disable=too-many-instance-attribute
             output.append(new_core_info)
         return output
 
+    def _upload_cmd(self, coredump: str, upload_url: str, compress: bool) -> str:
+        """Command which uploads a coredump by a single PUT request.
+
+        If the coredump should be compressed, it's streamed through the compressor to `curl', so the upload doesn't
+        wait for the compression of the whole coredump.  The compressed stream is saved to `<coredump>.gz' on the way
+        (`tee' keeps writing it even if `curl' fails), so a retry uploads this file instead of compressing the
+        coredump again.  The file is removed once it's uploaded.
+        """
+        upload = "curl --request PUT --fail --show-error --upload-file"
+        if not compress:
+            return f"sudo {upload} '{coredump}' '{upload_url}'"
+        compressed = f"{coredump}.gz"
+        script = "\n".join((
+            f'if [ -f "{compressed}" ]; then',
+            f'    {upload} "{compressed}" "{upload_url}" && rm -f "{compressed}"',
+            '    exit',
+            'fi',
+            f'{self.compressor} --stdout "{coredump}" | tee --output-error=warn-nopipe "{compressed}.part" | '
+            f'{upload} - "{upload_url}"',
+            'statuses="${PIPESTATUS[*]}"',
+            'case "$statuses" in',
+            f'    "0 0 0") rm -f "{compressed}.part" ;;',
+            f'    "0 0 "*) mv "{compressed}.part" "{compressed}" ;;',
+            f'    *) rm -f "{compressed}.part" ;;',
+            'esac',
+            '[ "$statuses" = "0 0 0" ]',
+        ))
+        return f"sudo bash -c {shlex.quote(script)}"
+
     # @retrying(n=10, sleep_time=20, allowed_exceptions=NETWORK_EXCEPTIONS, message="Retrying on uploading coredump")
     def _upload_coredump(self, core_info: CoreDumpInfo):
         coredump = core_info.corefile
-        coredump = self._pack_coredump(coredump)
-        coredump_id = os.path.basename(coredump)[:-3]
-        upload_url = f'upload.scylladb.com/{coredump_id}/{os.path.basename(coredump)}'
+        compress = not coredump.endswith(self.compressed_extensions)
+        if compress and not self._is_pigz_installed:
+            self._install_pigz()
+        uploaded_coredump = coredump + ".gz" if compress else coredump
+        coredump_id = os.path.basename(uploaded_coredump)[:-3]
+        upload_path = f'{coredump_id}/{os.path.basename(uploaded_coredump)}'
+        upload_url = f'{self.upload_bucket}/{upload_path}'
         self.log.info('Uploading coredump %s to %s', coredump, upload_url)
-        self.node.remoter.run("sudo curl --request PUT --fail --show-error --upload-file "
-                              "'%s' 'https://%s'" % (coredump, upload_url))
+        self.node.remoter.run(self._upload_cmd(
+            coredump=coredump, upload_url=f'{self.upload_endpoint}/{upload_path}', compress=compress))
         download_url = 'https://storage.cloud.google.com/%s' % upload_url
         self.log.info("You can download it by %s (available for ScyllaDB employee)", download_url)
-        download_instructions = 'gsutil cp gs://%s .\ngunzip %s' % (upload_url, coredump)
+        download_instructions = 'gsutil cp gs://%s .\ngunzip %s' % (upload_url, uploaded_coredump)
         core_info.download_url, core_info.download_instructions = download_url, download_instructions
 
     def upload_coredump(self, core_info: CoreDumpInfo):
@@ -246,23 +283,6 @@ class CoredumpThreadBase(Thread):  # pylint: disable=too-many-instance-attribute
         else:
             raise RuntimeError("Distro is not supported")
 
-    def _pack_coredump(self, coredump: str) -> str:
-        extensions = ['.lz4', '.zip', '.gz', '.gzip']
-        for extension in extensions:
-            if coredump.endswith(extension):
-                return coredump
-        if not self._is_pigz_installed:
-            self._install_pigz()
-        try:  # pylint: disable=unreachable
-            if not self.node.remoter.run(f'sudo ls {coredump}.gz', verbose=False, ignore_status=True).ok:
-                self.node.remoter.run(f'sudo pigz --fast --keep {coredump}')
-            coredump += '.gz'
-        except NETWORK_EXCEPTIONS:  # pylint: disable=try-except-raise
-            raise
-        except Exception as ex:  # pylint: disable=broad-except
-            self.log.warning("Failed to compress coredump '%s': %s", coredump, ex)
-        return coredump
-
     def log_coredump(self, core_info: CoreDumpInfo):
         if not core_info.coredump_info:
             return
@@ -17,6 +17,7 @@ import json
 import logging
 import os
 import re
+import time
 from functools import cached_property
 from multiprocessing import Process, Event, Queue
 from typing import Optional
@@ -26,6 +27,13 @@ from sdcm.sct_events.base import LogEvent
 from sdcm.sct_events.database import get_pattern_to_event_to_func_mapping, BACKTRACE_RE
 from sdcm.sct_events.decorators import raise_event_on_failure
 from sdcm.utils.common import make_threads_be_daemonic_by_default
+from sdcm.utils.inotify import FileChangesWatcher
+from sdcm.utils.multi_pattern_matcher import MultiPatternMatcher
+
+READ_BUFFER_SIZE = 1024 * 1024
+READ_INTERVAL = 0.1  # don't read the log more often, to process appended lines in batches
+WATCH_TIMEOUT = 0.5  # how often to check the terminate event if the log doesn't change
+PARTIAL_LINE_TIMEOUT = 2  # seconds; process a line with no ending if it's not finished during this time
 
 LOGGER = logging.getLogger(__name__)
 
@@ -68,96 +76,181 @@ class DbLogReader(Process):
         self._last_line_no = -1
         self._last_log_position = 0
         self._remoter = remoter
-        self._skipped_end_line = 0
+        self._db_file = None
+        self._db_file_inode = None
+        self._partial_line = b""
+        self._partial_line_deadline = None
+        self._buffer = None
+        self._scylla_build_id = None
+        self._scylla_debuginfo_files = {}  # build id -> path to the scylla debug information
         super().__init__(name=self.__class__.__name__, daemon=True)
 
     @cached_property
     def _continuous_event_patterns(self):
         return get_pattern_to_event_to_func_mapping(node=self._node_name)
 
-    def _read_and_publish_events(self) -> None:
-        """Search for all known patterns listed in `sdcm.sct_events.database.SYSTEM_ERROR_EVENTS'."""
+    @cached_property
+    def _patterns_matcher(self) -> MultiPatternMatcher:
+        return MultiPatternMatcher(patterns=(
+            BACKTRACE_RE,
+            *(item.pattern for item in self._continuous_event_patterns),
+            *(pattern for pattern, _ in self._system_event_patterns),
+        ))
+
+    def _open_system_log(self) -> bool:
+        if self._db_file is None:
+            try:
+                self._db_file = open(self._system_log, "rb", buffering=0)  # pylint: disable=consider-using-with
+            except FileNotFoundError:
+                return False
+            self._db_file_inode = os.fstat(self._db_file.fileno()).st_ino
+            self._db_file.seek(self._last_log_position)
+            if self._buffer is None:
+                self._buffer = bytearray(READ_BUFFER_SIZE)
+        return True
+
+    def _close_system_log(self) -> None:
+        if self._db_file is not None:
+            self._db_file.close()
+            self._db_file = None
+
+    def _is_system_log_rotated(self) -> bool:
+        try:
+            return os.stat(self._system_log).st_ino != self._db_file_inode
+        except FileNotFoundError:
+            return False
 
-        # pylint: disable=too-many-branches,too-many-locals,too-many-statements
+    def _read_appended_lines(self, backtraces: list, flush_partial_line: bool = False) -> None:
+        """Read lines appended to the log since the previous call and process them in batches.
 
-        backtraces = []
-        index = 0
+        A line with no ending is postponed in case if only a part of it is written to the disk yet.  It's processed
+        if it's not finished during PARTIAL_LINE_TIMEOUT seconds, or right away if `flush_partial_line' is True.
+        """
 
-        if not os.path.exists(self._system_log):
-            return
+        if os.fstat(self._db_file.fileno()).st_size < self._last_log_position:
+            LOGGER.debug("%s was truncated, read it from the beginning", self._system_log)
+            self._db_file.seek(0)
+            self._last_log_position = 0
+            self._partial_line = b""
+
+        while read_bytes := self._db_file.readinto(self._buffer):
+            self._last_log_position += read_bytes
+            chunk = memoryview(self._buffer)[:read_bytes]
+            if (end := self._buffer.rfind(b"\n", 0, read_bytes)) < 0:
+                self._partial_line += chunk
+                continue
+            if self._partial_line:
+                text = (self._partial_line + chunk[:end]).decode(errors="replace")
+            else:
+                text = str(chunk[:end], "utf-8", "replace")
+            self._partial_line = bytes(chunk[end + 1:])
+            self._partial_line_deadline = None
+            self._process_lines(text.split("\n"), backtraces)
+
+        if not self._partial_line:
+            self._partial_line_deadline = None
+        elif flush_partial_line or self._is_partial_line_expired():
+            self._flush_partial_line(backtraces)
+        elif self._partial_line_deadline is None:
+            self._partial_line_deadline = time.perf_counter() + PARTIAL_LINE_TIMEOUT
+
+    def _is_partial_line_expired(self) -> bool:
+        return self._partial_line_deadline is not None and time.perf_counter() >= self._partial_line_deadline
+
+    def _flush_partial_line(self, backtraces: list) -> None:
+        if self._partial_line:
+            self._process_lines([self._partial_line.decode(errors="replace")], backtraces)
+        self._partial_line = b""
+        self._partial_line_deadline = None
+
+    def _watch_timeout(self) -> float:
+        if self._partial_line_deadline is None:
+            return WATCH_TIMEOUT
+        return max(0., min(WATCH_TIMEOUT, self._partial_line_deadline - time.perf_counter()))
+
+    def _process_lines(self, lines: list[str], backtraces: list) -> None:
+        # pylint: disable=too-many-branches
+        index = self._last_line_no
+        for index, line in enumerate(lines, start=self._last_line_no + 1):
+            try:
+                json_log = None
+                if line.startswith('{'):
+                    try:
+                        json_log = json.loads(line)
+                    except Exception:  # pylint: disable=broad-except
+                        pass
+
+                if self._log_lines:
+                    line = line.strip()
+                    for pattern in self.EXCLUDE_FROM_LOGGING:
+                        if pattern in line:
+                            break
+                    else:
+                        LOGGER.debug(line)
 
-        with open(self._system_log, encoding="utf-8") as db_file:
-            if self._last_log_position:
-                db_file.seek(self._last_log_position)
-            for index, line in enumerate(db_file, start=self._last_line_no + 1):
-                # Postpone processing line with no ending in case if half of line is written to the disc
-                if line[-1] == '\n' or self._skipped_end_line > 20:
-                    self._skipped_end_line = 0
-                else:
-                    self._skipped_end_line += 1
+                if json_log:
                     continue
-                try:
-                    json_log = None
-                    if line[0] == '{':
-                        try:
-                            json_log = json.loads(line)
-                        except Exception:  # pylint: disable=broad-except
-                            pass
-
-                    if self._log_lines:
-                        line = line.strip()
-                        for pattern in self.EXCLUDE_FROM_LOGGING:
-                            if pattern in line:
-                                break
-                        else:
-                            LOGGER.debug(line)
-
-                    if json_log:
-                        continue
-
-                    match = BACKTRACE_RE.search(line)
-                    one_line_backtrace = []
-                    if match and backtraces:
-                        data = match.groupdict()
-                        if data['other_bt']:
-                            backtraces[-1]['backtrace'] += [data['other_bt'].strip()]
-                        if data['scylla_bt']:
-                            backtraces[-1]['backtrace'] += [data['scylla_bt'].strip()]
-                    elif "backtrace:" in line.lower() and "0x" in line:
-                        # This part handles the backtrases are printed in one line.
-                        # Example:
-                        # [shard 2] seastar - Exceptional future ignored: exceptions::mutation_write_timeout_exception
-                        # (Operation timed out for system.paxos - received only 0 responses from 1 CL=ONE.),
-                        # backtrace:   0x3316f4d#012  0x2e2d177#012  0x189d397#012  0x2e76ea0#012  0x2e770af#012
-                        # 0x2eaf065#012  0x2ebd68c#012  0x2e48d5d#012  /opt/scylladb/libreloc/libpthread.so.0+0x94e1#012
-                        splitted_line = re.split("backtrace:", line, flags=re.IGNORECASE)
-                        for trace_line in splitted_line[1].split():
-                            if trace_line.startswith('0x') or 'scylladb/lib' in trace_line:
-                                one_line_backtrace.append(trace_line)
-
-                    # for each line, if it matches a continuous event pattern,
-                    # call the appropriate function with the class tied to that pattern
-                    for item in self._continuous_event_patterns:
-                        if event_match := item.pattern.search(line):
-                            item.period_func(match=event_match)
-                            break
 
-                    # for each line use all regexes to match, and if found send an event
-                    for pattern, event in self._system_event_patterns:
-                        if pattern.search(line):
-                            cloned_event = event.clone().add_info(node=self._node_name, line_number=index, line=line)
-                            backtraces.append(dict(event=cloned_event, backtrace=[]))
-                            break  # Stop iterating patterns to avoid creating two events for one line of the log
+                # Run only regexes which have all required literals in the line.
+                candidates = self._patterns_matcher.candidates(line)
+
+                match = BACKTRACE_RE.search(line) if BACKTRACE_RE in candidates else None
+                one_line_backtrace = []
+                if match and backtraces:
+                    data = match.groupdict()
+                    if data['other_bt']:
+                        backtraces[-1]['backtrace'] += [data['other_bt'].strip()]
+                    if data['scylla_bt']:
+                        backtraces[-1]['backtrace'] += [data['scylla_bt'].strip()]
+                elif "backtrace:" in line.lower() and "0x" in line:
+                    # This part handles the backtrases are printed in one line.
+                    # Example:
+                    # [shard 2] seastar - Exceptional future ignored: exceptions::mutation_write_timeout_exception
+                    # (Operation timed out for system.paxos - received only 0 responses from 1 CL=ONE.),
+                    # backtrace:   0x3316f4d#012  0x2e2d177#012  0x189d397#012  0x2e76ea0#012  0x2e770af#012
+                    # 0x2eaf065#012  0x2ebd68c#012  0x2e48d5d#012  /opt/scylladb/libreloc/libpthread.so.0+0x94e1#012
+                    splitted_line = re.split("backtrace:", line, flags=re.IGNORECASE)
+                    for trace_line in splitted_line[1].split():
+                        if trace_line.startswith('0x') or 'scylladb/lib' in trace_line:
+                            one_line_backtrace.append(trace_line)
+
+                # for each line, if it matches a continuous event pattern,
+                # call the appropriate function with the class tied to that pattern
+                for item in self._continuous_event_patterns:
+                    if item.pattern in candidates and (event_match := item.pattern.search(line)):
+                        item.period_func(match=event_match)
+                        break
+
+                # for each line use all regexes to match, and if found send an event
+                for pattern, event in self._system_event_patterns:
+                    if pattern in candidates and pattern.search(line):
+                        cloned_event = event.clone().add_info(node=self._node_name, line_number=index, line=line)
+                        backtraces.append(dict(event=cloned_event, backtrace=[]))
+                        break  # Stop iterating patterns to avoid creating two events for one line of the log
+
+                if one_line_backtrace and backtraces:
+                    backtraces[-1]['backtrace'] = one_line_backtrace
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception('Processing of %s line of %s failed, line content:\n%s',
+                                 index, self._system_log, line)
 
-                    if one_line_backtrace and backtraces:
-                        backtraces[-1]['backtrace'] = one_line_backtrace
-                except Exception:  # pylint: disable=broad-except
-                    LOGGER.exception('Processing of %s line of %s failed, line content:\n%s',
-                                     index, self._system_log, line)
+        self._last_line_no = index
+
+    def _read_and_publish_events(self, flush_partial_line: bool = False) -> None:
+        """Search for all known patterns listed in `sdcm.sct_events.database.SYSTEM_ERROR_EVENTS'."""
 
-            if index:
-                self._last_line_no = index
-                self._last_log_position = db_file.tell() + 1
+        if not self._open_system_log():
+            return
+
+        backtraces = []
+        self._read_appended_lines(backtraces, flush_partial_line=flush_partial_line)
+        if self._is_system_log_rotated():
+            LOGGER.debug("%s was rotated, read the new file from the beginning", self._system_log)
+            self._close_system_log()
+            self._last_log_position = 0
+            self._flush_partial_line(backtraces)  # the last line of the rotated file
+            if self._open_system_log():
+                self._read_appended_lines(backtraces, flush_partial_line=flush_partial_line)
 
         traces_count = 0
         for backtrace in backtraces:
@@ -170,13 +263,16 @@ class DbLogReader(Process):
             self._last_error = None
             backtraces = list(filter(self.filter_backtraces, backtraces))
 
+        scylla_debug_info = None
         for backtrace in backtraces:
             if self._decoding_queue and backtrace["event"].raw_backtrace:
-                scylla_debug_info = self.get_scylla_debuginfo_file()
-                LOGGER.debug("Debug info file %s", scylla_debug_info)
+                if scylla_debug_info is None:  # look it up once for all backtraces read at once
+                    scylla_debug_info = self.get_scylla_debuginfo_file()
+                    LOGGER.debug("Debug info file %s", scylla_debug_info)
                 self._decoding_queue.put({
                     "node": self._node_name,
                     "debug_file": scylla_debug_info,
+                    "build_id": self._scylla_build_id,
                     "event": backtrace["event"],
                 })
             else:
@@ -185,19 +281,36 @@ class DbLogReader(Process):
     @raise_event_on_failure
     def run(self):
         """
-        Keep reporting new events from db log, every 30 seconds.
+        Keep reporting new events from db log, when new lines are appended to it.
         """
         LOGGER.debug('Logging for node %s is started with following configuration:\nsystem_log=%s'
                      '\nlog_lines=%s\ndecoding_queue=%s',
                      self._node_name, self._system_log, self._log_lines, self._decoding_queue is not None)
         make_threads_be_daemonic_by_default()
-        while not self._terminate_event.wait(0.1):
-            try:
-                self._read_and_publish_events()
-            except (SystemExit, KeyboardInterrupt) as ex:
-                LOGGER.debug("db_log_reader_thread() stopped by %s", ex.__class__.__name__)
-            except Exception:  # pylint: disable=broad-except
-                LOGGER.exception("failed to read db log")
+        watcher = FileChangesWatcher(self._system_log)
+        terminated = False
+        try:
+            while True:
+                try:
+                    # On termination, process the last line even if it has no ending (e.g., if scylla crashed.)
+                    self._read_and_publish_events(flush_partial_line=terminated)
+                except (SystemExit, KeyboardInterrupt) as ex:
+                    LOGGER.debug("db_log_reader_thread() stopped by %s", ex.__class__.__name__)
+                except Exception:  # pylint: disable=broad-except
+                    LOGGER.exception("failed to read db log")
+                if terminated:
+                    break
+                terminated = self._terminate_event.wait(READ_INTERVAL)
+                # Sleep until the log is changed (or rotated), or a line with no ending waits for too long, but wake
+                # up from time to time to check the terminate event.  Without inotify, `watcher.wait()' just sleeps
+                # and the log is polled.
+                while not terminated and not watcher.wait(timeout=self._watch_timeout()):
+                    terminated = self._terminate_event.is_set()
+                    if self._is_partial_line_expired():
+                        break
+        finally:
+            watcher.close()
+            self._close_system_log()
 
     def filter_backtraces(self, backtrace):
         # A filter function to attach the backtrace to the correct error and not to the backtraces.
@@ -226,9 +339,20 @@ class DbLogReader(Process):
         """
         Lookup the scylla debug information, in various places it can be.
 
+        The result is cached per build id of scylla, so it's looked up again only if scylla is upgraded.
+
         :return the path to the scylla debug information
         :rtype str
         """
+        self._scylla_build_id = build_id = self.get_scylla_build_id()
+        if build_id in self._scylla_debuginfo_files:
+            return self._scylla_debuginfo_files[build_id]
+        scylla_debug_info = self._find_scylla_debuginfo_file(build_id)
+        if build_id:
+            self._scylla_debuginfo_files[build_id] = scylla_debug_info
+        return scylla_debug_info
+
+    def _find_scylla_debuginfo_file(self, build_id: str | None) -> str:
         # first try default location
         scylla_debug_info = '/usr/lib/debug/bin/scylla.debug'
         results = self._remoter.run('[[ -f {} ]]'.format(scylla_debug_info), ignore_status=True)
@@ -241,7 +365,7 @@ class DbLogReader(Process):
             return results.stdout.strip()
 
         # then look it up base on the build id
-        if build_id := self.get_scylla_build_id():
+        if build_id:
             scylla_debug_info = "/usr/lib/debug/.build-id/{0}/{1}.debug".format(build_id[:2], build_id[2:])
             results = self._remoter.run('[[ -f {} ]]'.format(scylla_debug_info), ignore_status=True)
             if results.ok:
@@ -18,13 +18,16 @@ import os
 import platform
 import logging
 import json
+import math
+import threading
 import urllib.parse
 
 from textwrap import dedent
 from math import sqrt
-from typing import Optional
+from typing import Optional, Dict, List, Tuple, Hashable, Iterable
 from functools import cached_property
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import Future
 
 import yaml
 import requests
@@ -33,12 +36,19 @@ from sdcm.es import ES
 from sdcm.test_config import TestConfig
 from sdcm.utils.common import normalize_ipv6_url
 from sdcm.utils.git import get_git_commit_id
+from sdcm.utils.hdrhistogram import HdrHistogramsAggregator
 from sdcm.utils.decorators import retrying
 from sdcm.sct_events.system import ElasticsearchEvent
 from sdcm.utils.ci_tools import get_job_name, get_job_url
 
 LOGGER = logging.getLogger(__name__)
 
+PROMETHEUS_QUERY_CACHE_SIZE = 256  # number of cached range query results
+PROMETHEUS_QUERY_FINAL_AFTER = 120  # seconds; newer samples can still be changed by late scrapes
+PROMETHEUS_QUERY_INDEX_LABEL = "sct_query_index"
+
+CacheKey = Tuple[Hashable, Tuple[float, float]]
+
 
 class CassandraStressCmdParseError(Exception):
     def __init__(self, cmd, ex):
@@ -191,7 +201,73 @@ def get_cdcreader_cmd_params(cmd):
     return get_raw_cmd_params(cmd)
 
 
+class PrometheusQueryCache:
+    """Results of Prometheus range queries shared between all PrometheusDBStats instances.
+
+    Keys are pairs of a query key and a time range: a cached result of a query is used for any range which is
+    covered by the cached one.  Results are stored as completed futures.  A future of a query which is in progress
+    is available for other threads too, so concurrent identical queries wait for a single HTTP request.
+    """
+
+    def __init__(self, max_size: int = PROMETHEUS_QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        self._results: OrderedDict[CacheKey, Tuple[Optional[float], Future]] = OrderedDict()
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_cached(self, key: CacheKey, now: float) -> Optional[Future]:
+        query_key, (start, end) = key
+        for cached_key, (expires_at, future) in reversed(self._results.items()):
+            if expires_at is not None and expires_at <= now:
+                continue
+            cached_query_key, (cached_start, cached_end) = cached_key
+            if cached_query_key == query_key and cached_start <= start and end <= cached_end:
+                self._results.move_to_end(cached_key)
+                return future
+        return None
+
+    def lookup(self, keys: Iterable[CacheKey]) -> Tuple[Dict[CacheKey, Future], List[CacheKey]]:
+        """Return futures for all keys and a list of keys which should be fetched and resolved by the caller."""
+
+        futures = {}
+        to_fetch = []
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                if key in futures:
+                    continue
+                if (cached := self._get_cached(key, now)) is not None:
+                    futures[key] = cached
+                elif key in self._inflight:
+                    futures[key] = self._inflight[key]
+                else:
+                    futures[key] = self._inflight[key] = Future()
+                    to_fetch.append(key)
+        return futures, to_fetch
+
+    def resolve(self, key: CacheKey, result=None, exception: Optional[BaseException] = None,
+                expires_at: Optional[float] = None, store: bool = True) -> None:
+        with self._lock:
+            future = self._inflight.pop(key)
+            if exception is None and store:
+                self._results[key] = (expires_at, future)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_size:
+                    self._results.popitem(last=False)
+        if exception is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exception)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
 class PrometheusDBStats():
+    session = requests.Session()
+    query_cache = PrometheusQueryCache()
+
     def __init__(self, host, port=9090, alternator=None):
         self.host = host
         self.port = port
@@ -203,13 +279,13 @@ class PrometheusDBStats():
     def scylla_scrape_interval(self):
         return int(self.config["scrape_configs"]["scylla"]["scrape_interval"][:-1])
 
-    @staticmethod
+    @classmethod
     @retrying(n=5, sleep_time=7, allowed_exceptions=(requests.ConnectionError, requests.HTTPError))
-    def request(url, post=False):
+    def request(cls, url, post=False):
         if post:
-            response = requests.post(url)
+            response = cls.session.post(url)
         else:
-            response = requests.get(url)
+            response = cls.session.get(url)
         response.raise_for_status()
 
         result = json.loads(response.content)
@@ -241,18 +317,76 @@ class PrometheusDBStats():
                   values: [[linux_timestamp1, value1], [linux_timestamp2, value2]...[linux_timestampN, valueN]]
                  }
         """
-        url = "http://{}:{}/api/v1/query_range?query=".format(normalize_ipv6_url(self.host), self.port)
+        return self.query_many([query], start=start, end=end, scrap_metrics_step=scrap_metrics_step)[0]
+
+    def query_many(self, queries, start, end, scrap_metrics_step=None):
+        """Run several range queries with the same time range and step.
+
+        Results are cached by the query and the time range aligned to the step, and sliced back to the requested
+        range.  All queries which are not in the cache are sent to Prometheus in one request.
+
+        :return: list of results in the same order as `queries' (see `query()' for the format.)
+        """
         if not scrap_metrics_step:
             scrap_metrics_step = self.scylla_scrape_interval
+        if isinstance(start, (int, float)) and isinstance(end, (int, float)):
+            aligned = (math.floor(start / scrap_metrics_step) * scrap_metrics_step,
+                       math.ceil(end / scrap_metrics_step) * scrap_metrics_step)
+        else:  # RFC 3339 timestamps are passed as is
+            aligned = None
+        cache = aligned is not None
+        keys = [((self.range_query_url, query, scrap_metrics_step, cache), aligned or (start, end))
+                for query in queries]
+        futures, to_fetch = self.query_cache.lookup(keys)
+        if to_fetch:
+            self._fetch(to_fetch, step=scrap_metrics_step, cache=cache)
+        results = [futures[key].result() for key in keys]
+        if aligned:
+            results = [self._slice(result, start, end) for result in results]
+        return results
+
+    def _fetch(self, keys, step, cache):
+        queries = [query for (_, query, _, _), _ in keys]
+        _, (start, end) = keys[0]
+        if len(queries) == 1:
+            query = queries[0]
+        else:
+            # Add a label with the index of a query to its series and get all of them in one response.
+            query = " or ".join(f'label_replace({query}, "{PROMETHEUS_QUERY_INDEX_LABEL}", "{index}", "", "")'
+                                for index, query in enumerate(queries))
         _query = "{url}{query}&start={start}&end={end}&step={scrap_metrics_step}".format(
-            url=url, query=query, start=start, end=end, scrap_metrics_step=scrap_metrics_step)
+            url=self.range_query_url, query=query, start=start, end=end, scrap_metrics_step=step)
         LOGGER.debug("Query to PrometheusDB: %s", _query)
-        result = self.request(url=_query)
-        if result:
-            return result["data"]["result"]
+        try:
+            result = self.request(url=_query)
+            if not result:
+                LOGGER.error("Prometheus query unsuccessful!")
+                results, cache = [[] for _ in keys], False
+            elif len(keys) == 1:
+                results = [result["data"]["result"]]
+            else:
+                results = [[] for _ in keys]
+                for series in result["data"]["result"]:
+                    results[int(series["metric"].pop(PROMETHEUS_QUERY_INDEX_LABEL))].append(series)
+        except BaseException as exc:  # pylint: disable=broad-except
+            for key in keys:
+                self.query_cache.resolve(key, exception=exc)
+            raise
+        if cache and end > time.time() - PROMETHEUS_QUERY_FINAL_AFTER:
+            expires_at = time.time() + step
         else:
-            LOGGER.error("Prometheus query unsuccessful!")
-            return []
+            expires_at = None
+        for key, key_result in zip(keys, results):
+            self.query_cache.resolve(key, result=key_result, expires_at=expires_at, store=cache)
+
+    @staticmethod
+    def _slice(result, start, end):
+        sliced = []
+        for series in result:
+            values = [value for value in series.get("values", []) if start <= value[0] <= end]
+            if values:
+                sliced.append({**series, "values": values})
+        return sliced
 
     @staticmethod
     def _check_start_end_time(start_time, end_time):
@@ -396,7 +530,7 @@ class Stats:
             LOGGER.error("Failed to create test stats: ES connection is not created (doc_id=%s)", self._test_id)
             return
         try:
-            self.elasticsearch.create_doc(
+            self.elasticsearch.bulk_writer.upsert(
                 index=self._test_index,
                 doc_type=self._es_doc_type,
                 doc_id=self._test_id,
@@ -411,7 +545,7 @@ class Stats:
             LOGGER.error("Failed to update test stats: ES connection is not created (doc_id=%s)", self._test_id)
             return
         try:
-            self.elasticsearch.update_doc(
+            self.elasticsearch.bulk_writer.update(
                 index=self._test_index,
                 doc_type=self._es_doc_type,
                 doc_id=self._test_id,
@@ -421,11 +555,23 @@ class Stats:
             LOGGER.exception("Failed to update test stats (doc_id=%s)", self._test_id)
             ElasticsearchEvent(doc_id=self._test_id, error=str(exc)).publish()
 
+    def flush_stats(self) -> None:
+        """Send buffered changes of the test stats to Elasticsearch (e.g., before the document is read.)"""
+
+        if "elasticsearch" not in self.__dict__ or not self.elasticsearch:
+            return
+        try:
+            self.elasticsearch.bulk_writer.flush()
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.exception("Failed to flush test stats (doc_id=%s)", self._test_id)
+            ElasticsearchEvent(doc_id=self._test_id, error=str(exc)).publish()
+
     def exists(self) -> Optional[bool]:
         if not self.elasticsearch:
             LOGGER.error("Failed to check for test stats existence: ES connection is not created (doc_id=%s)",
                          self._test_id)
             return None
+        self.flush_stats()
         try:
             return self.elasticsearch.exists(
                 index=self._test_index,
@@ -657,6 +803,22 @@ class TestStatsMixin(Stats):
             self.calculate_stats_total()
         self.update(dict(results=self._stats['results']))
 
+    def update_latency_histograms(self, histograms: HdrHistogramsAggregator | None) -> None:
+        """Merge latency histograms of a stress run into the ones stored in the stats document."""
+
+        if not histograms:
+            return
+        merged = histograms
+        if stored := self._stats['results'].get('latency_histograms'):
+            try:
+                merged = HdrHistogramsAggregator.from_dict(stored)
+            except (ValueError, KeyError) as exc:
+                LOGGER.warning("Failed to decode stored latency histograms, replace them: %s", exc)
+            else:
+                merged.merge(histograms)
+        self._stats['results']['latency_histograms'] = merged.to_dict()
+        self.update(dict(results=self._stats['results']))
+
     def _convert_stat(self, stat, stress_result):
         if stat not in stress_result or stress_result[stat] == 'NaN':
             self.log.warning("Stress stat not found: '%s'", stat)
@@ -771,12 +933,14 @@ class TestStatsMixin(Stats):
                          if not any(tag in key for tag in sysctl_excludes)})
 
         self.update(update_data)
+        self.flush_stats()
 
     def get_doc_data(self, key) -> Optional[dict]:
         if self.create_stats and self._test_index and self._test_id:
             if not self.elasticsearch:
                 LOGGER.error("Failed to get test stats: ES connection is not created (doc_id=%s)", self._test_id)
                 return None
+            self.flush_stats()
             try:
                 result = self.elasticsearch.get_doc(
                     index=self._test_index,
@@ -1,4 +1,8 @@
+import time
 import logging
+import threading
+from typing import Optional, List, Set, Tuple, Any
+from functools import cached_property
 
 import elasticsearch
 
@@ -6,6 +10,200 @@ from sdcm.keystore import KeyStore
 
 LOGGER = logging.getLogger(__name__)
 
+ES_BULK_MAX_ACTIONS = 500  # flush when this number of actions is buffered
+ES_BULK_FLUSH_INTERVAL = 10  # seconds; flush actions which wait longer
+ES_BULK_MAX_PENDING = 10_000  # drop the oldest actions if the cluster rejects writes for too long
+ES_BULK_MAX_RETRIES = 5
+ES_BULK_INITIAL_BACKOFF = 2  # seconds; doubled on each retry
+ES_BULK_RETRY_STATUSES = frozenset((429, 502, 503, 504, ))
+
+
+class ESBulkError(Exception):
+    """Elasticsearch rejected some actions of a bulk request."""
+
+    def __init__(self, errors: List[Tuple[tuple, Any]]):
+        self.errors = errors  # (action, error) pairs
+        action, error = errors[0]
+        super().__init__(f"Elasticsearch rejected {len(errors)} actions, first one is {action[0]}: {error}")
+
+
+class ESBulkWriter:
+    """Buffer writes of documents and send them using `_bulk' API.
+
+    Actions are sent in the order they were added when `max_actions' are buffered, by a background thread once in
+    `flush_interval' seconds, and on an explicit `flush()'.  A request which fails because of a connection error or
+    an overloaded cluster is retried with an exponential backoff; the thread which added an action waits for it
+    meanwhile, so producers are slowed down instead of growing the buffer.  Actions which Elasticsearch rejects for
+    other reasons (e.g., a mapping error) can't be retried, they are reported by the next `flush()' call.
+    """
+
+    _instances: Set["ESBulkWriter"] = set()
+
+    def __init__(self,
+                 client: elasticsearch.Elasticsearch,
+                 max_actions: int = ES_BULK_MAX_ACTIONS,
+                 flush_interval: float = ES_BULK_FLUSH_INTERVAL,
+                 max_pending: int = ES_BULK_MAX_PENDING,
+                 max_retries: int = ES_BULK_MAX_RETRIES,
+                 initial_backoff: float = ES_BULK_INITIAL_BACKOFF):
+        self.client = client
+        self.max_actions = max_actions
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+
+        self._pending: List[tuple] = []
+        self._failed: List[Tuple[tuple, Any]] = []
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()  # keep the order of actions between concurrent flushes
+        self._flush_needed = threading.Event()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name=self.__class__.__name__, daemon=True)
+        self._flusher.start()
+        self._instances.add(self)
+
+    @classmethod
+    def flush_all(cls) -> None:
+        for writer in list(cls._instances):
+            try:
+                writer.flush()
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Failed to flush buffered Elasticsearch actions")
+
+    @classmethod
+    def close_all(cls) -> None:
+        for writer in list(cls._instances):
+            try:
+                writer.close()
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Failed to flush buffered Elasticsearch actions")
+
+    def close(self) -> None:
+        """Stop the background thread and send all buffered actions.
+
+        The writer can be used after that, but it doesn't buffer actions anymore: each one is sent right away.
+        """
+
+        self._closed.set()
+        self._flush_needed.set()  # wake up the background thread, so it sees that the writer is closed.
+        self._flusher.join()
+        self._instances.discard(self)
+        self.flush()
+
+    def upsert(self, index: str, doc_type: Optional[str], doc_id: str, body: dict) -> None:
+        """Same as `ES.create_doc()': update the document if it exists or create it otherwise."""
+
+        self._add(index, doc_type, doc_id, {"update": {}}, {"doc": body, "doc_as_upsert": True})
+
+    def update(self, index: str, doc_type: Optional[str], doc_id: str, body: dict) -> None:
+        """Same as `ES.update_doc()': update the existing document with partial data."""
+
+        self._add(index, doc_type, doc_id, {"update": {}}, {"doc": body})
+
+    def index(self, index: str, doc_type: Optional[str], body: dict, doc_id: Optional[str] = None) -> None:
+        self._add(index, doc_type, doc_id, {"index": {}}, body)
+
+    def _add(self, index, doc_type, doc_id, action, source) -> None:
+        meta = next(iter(action.values()))
+        meta["_index"] = index
+        if doc_type:
+            meta["_type"] = doc_type
+        if doc_id is not None:
+            meta["_id"] = doc_id
+        with self._pending_lock:
+            self._pending.append((action, source))
+            if not self._flush_needed.is_set():
+                self._flush_needed.set()
+            if len(self._pending) < self.max_actions and not self._closed.is_set():
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Send all buffered actions.
+
+        Raise the last error if the cluster is not reachable after all retries.  Actions which were not sent are
+        kept in the buffer and will be sent on a next flush.  Raise ESBulkError if Elasticsearch rejected some
+        actions since the previous flush, including ones sent by the background thread.
+        """
+
+        self._send_pending()
+        with self._pending_lock:
+            errors, self._failed = self._failed, []
+        if errors:
+            raise ESBulkError(errors)
+
+    def _send_pending(self) -> None:
+        with self._send_lock:
+            while True:
+                with self._pending_lock:
+                    actions, self._pending = self._pending[:self.max_actions], self._pending[self.max_actions:]
+                    if not self._pending:
+                        self._flush_needed.clear()
+                if not actions:
+                    return
+                try:
+                    errors = self._send(actions)
+                except Exception:
+                    self._requeue(actions)
+                    raise
+                if errors:
+                    with self._pending_lock:
+                        self._failed.extend(errors)
+
+    def _requeue(self, actions: List[tuple]) -> None:
+        with self._pending_lock:
+            self._pending[:0] = actions
+            self._flush_needed.set()
+            if (dropped := len(self._pending) - self.max_pending) > 0:
+                LOGGER.error("Elasticsearch bulk buffer is full: drop %s oldest actions", dropped)
+                del self._pending[:dropped]
+
+    def _send(self, actions: List[tuple]) -> List[Tuple[tuple, Any]]:
+        """Send actions and return (action, error) pairs for ones which were rejected and can't be retried."""
+
+        errors = []
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.initial_backoff * 2 ** (attempt - 1))
+            try:
+                response = self.client.bulk(body=[line for action in actions for line in action])
+            except elasticsearch.ConnectionError as exc:
+                error = exc
+            except elasticsearch.TransportError as exc:
+                if exc.status_code not in ES_BULK_RETRY_STATUSES:
+                    raise
+                error = exc
+            else:
+                if not response.get("errors"):
+                    return errors
+                retry = []
+                for action, item in zip(actions, response["items"]):
+                    result = next(iter(item.values()))
+                    if result.get("status") in ES_BULK_RETRY_STATUSES:
+                        retry.append((action, result.get("error")))
+                    elif "error" in result:
+                        LOGGER.error("Failed to write %s to Elasticsearch: %s", action[0], result["error"])
+                        errors.append((action, result["error"]))
+                if not retry:
+                    return errors
+                actions[:] = [action for action, _ in retry]  # the caller requeues only actions which are not sent yet
+                error = ESBulkError(retry)
+            LOGGER.warning("Failed to send %s actions to Elasticsearch [try #%s]: %s", len(actions), attempt, error)
+        with self._pending_lock:
+            self._failed.extend(errors)
+        raise error
+
+    def _flush_periodically(self) -> None:
+        while True:
+            self._flush_needed.wait()
+            if self._closed.wait(timeout=self.flush_interval):
+                return
+            try:
+                self._send_pending()
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Failed to flush buffered Elasticsearch actions")
+
 
 class ES(elasticsearch.Elasticsearch):
     """
@@ -17,6 +215,10 @@ class ES(elasticsearch.Elasticsearch):
         super().__init__(hosts=[self._conf["es_url"]], verify_certs=False,
                          http_auth=(self._conf["es_user"], self._conf["es_password"]))
 
+    @cached_property
+    def bulk_writer(self) -> ESBulkWriter:
+        return ESBulkWriter(client=self)
+
     def get_conf(self):
         self.key_store = KeyStore()
         return self.key_store.get_elasticsearch_credentials()
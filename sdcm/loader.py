@@ -16,7 +16,7 @@ import re
 from abc import abstractmethod, ABCMeta
 import time
 import logging
-from typing import NamedTuple
+from typing import List, NamedTuple
 
 from sdcm.prometheus import NemesisMetrics
 from sdcm.utils.common import FileFollowerThread, convert_metric_to_ms
@@ -35,6 +35,20 @@ class MetricsPosition(NamedTuple):
     errors: int
 
 
+# Converters of metric values from stress tools output, by metric name.
+METRICS_CONVERTERS = dict(
+    ops=float,
+    lat_mean=convert_metric_to_ms,
+    lat_med=convert_metric_to_ms,
+    lat_perc_95=convert_metric_to_ms,
+    lat_perc_99=convert_metric_to_ms,
+    lat_perc_999=convert_metric_to_ms,
+    lat_max=convert_metric_to_ms,
+    errors=int,
+)
+STRESS_LOG_READ_INTERVAL = 1  # gauges are updated with the latest values once per interval
+
+
 # pylint: disable=too-many-instance-attributes
 class StressExporter(FileFollowerThread, metaclass=ABCMeta):
     METRICS_GAUGES = {}
@@ -52,6 +66,10 @@ class StressExporter(FileFollowerThread, metaclass=ABCMeta):
         self.loader_idx = loader_idx
         self.cpu_idx = cpu_idx
         self.metrics_positions = self.merics_position_in_log()
+        # Precompiled map of the metrics to columns of the stress output: [(metric name, position, converter), ...]
+        self.metrics_columns = [(name, position, METRICS_CONVERTERS[name])
+                                for name, position in self.metrics_positions._asdict().items()
+                                ] if self.metrics_positions else []
         self.keyspace = ''
 
     @abstractmethod
@@ -67,7 +85,7 @@ class StressExporter(FileFollowerThread, metaclass=ABCMeta):
 
     def clear_metrics(self) -> None:
         if self.stress_metric:
-            for metric_name in self.metrics_positions._fields:
+            for metric_name, _, _ in self.metrics_columns:
                 self.set_metric(metric_name, 0.0)
 
     @staticmethod
@@ -80,14 +98,31 @@ class StressExporter(FileFollowerThread, metaclass=ABCMeta):
     def split_line(line: str) -> list:
         ...
 
-    def get_metric_value(self, columns: list, metric_name: str) -> str:
-        try:
-            value = columns[getattr(self.metrics_positions, metric_name)]
-        except (ValueError, IndexError) as exc:
-            value = ''
-            LOGGER.warning("Faile to get %s metric value. Error: %s", metric_name, str(exc))
+    def find_keyspace(self, lines: List[str]) -> str:  # pylint: disable=unused-argument,no-self-use
+        return ''
+
+    def set_metrics(self, columns: list) -> None:
+        for metric_name, position, convert in self.metrics_columns:
+            try:
+                value = columns[position]
+            except IndexError as exc:
+                LOGGER.warning("Failed to get %s metric value. Error: %s", metric_name, str(exc))
+                continue
+            if value:
+                self.set_metric(metric_name, convert(value))
 
-        return value
+    def process_lines(self, lines: List[str]) -> None:
+        """Set gauges to the values from the last line with metrics.
+
+        Values from the previous lines would be overwritten before anyone could scrape them anyway.
+        """
+
+        if not self.keyspace:
+            self.keyspace = self.find_keyspace(lines)
+        for line in reversed(lines):
+            if not self.skip_line(line=line):
+                self.set_metrics(self.split_line(line=line))
+                break
 
     def run(self):
         while not self.stopped():
@@ -96,24 +131,8 @@ class StressExporter(FileFollowerThread, metaclass=ABCMeta):
                 time.sleep(0.5)
                 continue
 
-            for line in self.follow_file(self.stress_log_filename):
-                if self.stopped():
-                    break
-
-                if self.skip_line(line=line):
-                    continue
-
-                cols = self.split_line(line=line)
-
-                for metric in ['lat_mean', 'lat_med', 'lat_perc_95', 'lat_perc_99', 'lat_perc_999', 'lat_max']:
-                    if metric_value := self.get_metric_value(columns=cols, metric_name=metric):
-                        self.set_metric(metric, convert_metric_to_ms(metric_value))
-
-                if ops := self.get_metric_value(columns=cols, metric_name='ops'):
-                    self.set_metric('ops', float(ops))
-
-                if errors := cols[self.metrics_positions.errors]:
-                    self.set_metric('errors', int(errors))
+            for lines in self.follow_file_chunks(self.stress_log_filename, interval=STRESS_LOG_READ_INTERVAL):
+                self.process_lines(lines)
 
 
 class CassandraStressExporter(StressExporter):
@@ -138,10 +157,14 @@ class CassandraStressExporter(StressExporter):
         return MetricsPosition(ops=2, lat_mean=5, lat_med=6, lat_perc_95=7, lat_perc_99=8, lat_perc_999=9,
                                lat_max=10, errors=13)
 
-    def skip_line(self, line: str) -> bool:
-        if not self.keyspace:
+    def find_keyspace(self, lines: List[str]) -> str:
+        for line in lines:
             if 'Keyspace:' in line:
-                self.keyspace = self.keyspace_regex.match(line).groups()[0]
+                return self.keyspace_regex.match(line).groups()[0]
+        return ''
+
+    @staticmethod
+    def skip_line(line: str) -> bool:
         # If line starts with 'total,' - skip this line
         return not 'total,' in line
 
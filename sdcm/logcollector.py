@@ -13,6 +13,7 @@
 
 #  pylint: disable=too-many-lines
 import os
+import gzip
 import json
 import time
 import shutil
@@ -21,6 +22,7 @@ import logging
 import datetime
 import tarfile
 import tempfile
+import threading
 import traceback
 from collections import OrderedDict
 from typing import Optional
@@ -57,6 +59,9 @@ from sdcm.utils.remotewebbrowser import RemoteBrowser, WebDriverContainerMixin
 
 LOGGER = logging.getLogger(__name__)
 
+LOG_COLLECTOR_MAX_WORKERS = 16
+ARCHIVE_COMPRESS_LEVEL = 6
+
 
 class CollectingNode(AutoSshContainerMixin, WebDriverContainerMixin):
     # pylint: disable=too-few-public-methods,too-many-instance-attributes
@@ -596,6 +601,66 @@ class GrafanaSnapshot(GrafanaEntity):
         self.destory_webdriver_container()
 
 
+class _TarFragment(tarfile.TarFile):
+    """Tar entries without the end-of-archive marker, to be concatenated with other fragments."""
+
+    def close(self):
+        self.closed = True
+
+
+class ParallelTarGzArchive:
+    """A .tar.gz archive which parts can be added from several threads at once.
+
+    Each part is a sequence of tar entries compressed to a separate gzip member, and the archive is a concatenation
+    of the parts followed by the end-of-archive marker.  Because gzip allows multiple members in one file, the result
+    is a regular .tar.gz archive for `tar' and `tarfile'.
+    """
+
+    def __init__(self, archive_name: str, compresslevel: int = ARCHIVE_COMPRESS_LEVEL):
+        self.archive_name = archive_name
+        self.compresslevel = compresslevel
+        self.parts = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def add(self, src_path: str, arcname: str) -> None:
+        """Compress the file or the directory (recursively) to a new part of the archive."""
+
+        fd, part_name = tempfile.mkstemp(prefix=f"{os.path.basename(self.archive_name)}.",
+                                         suffix=".part",
+                                         dir=os.path.dirname(os.path.abspath(self.archive_name)))
+        try:
+            with os.fdopen(fd, "wb") as part, \
+                    gzip.GzipFile(filename="", mode="wb", fileobj=part, compresslevel=self.compresslevel) as gz_part, \
+                    _TarFragment(fileobj=gz_part, mode="w") as tar:
+                tar.add(src_path, arcname=arcname)
+            with self._lock:
+                if self.closed:
+                    raise ValueError(f"Archive {self.archive_name} is closed already")
+                self.parts.append(part_name)
+        except Exception:
+            os.remove(part_name)
+            raise
+
+    def close(self) -> str:
+        with self._lock:
+            self.closed = True
+        with open(self.archive_name, "wb") as archive:
+            for part_name in self.parts:
+                with open(part_name, "rb") as part:
+                    shutil.copyfileobj(part, archive, length=1024 * 1024)
+                os.remove(part_name)
+            with gzip.GzipFile(filename="", mode="wb", fileobj=archive, compresslevel=self.compresslevel) as gz_part:
+                gz_part.write(tarfile.NUL * tarfile.BLOCKSIZE * 2)
+        return self.archive_name
+
+    def abort(self) -> None:
+        with self._lock:
+            self.closed = True
+        for part_name in self.parts:
+            os.remove(part_name)
+
+
 class LogCollector:
     """Base class for LogCollector types
 
@@ -625,6 +690,7 @@ class LogCollector:
         self.nodes = nodes
         self.local_dir = self.create_local_storage_dir(storage_dir)
         self.params = params
+        self.collect_times = {}  # (node name, log entity name) -> seconds
         for entity in self.log_entities:
             if self.params:
                 entity.set_params(self.params)
@@ -690,15 +756,26 @@ class LogCollector:
         return local_dir
 
     def collect_logs(self, local_search_path: Optional[str] = None) -> list[str]:
+        archive = ParallelTarGzArchive(f"{os.path.basename(self.local_dir)}.tar.gz")
+
         def collect_logs_per_node(node):
             LOGGER.info('Collecting logs on host: %s', node.name)
             remote_node_dir = self.create_remote_storage_dir(node)
             local_node_dir = os.path.join(self.local_dir, node.name)
             for log_entity in self.log_entities:
+                start_time = time.perf_counter()
                 try:
                     log_entity.collect(node, local_node_dir, remote_node_dir, local_search_path=local_search_path)
                 except Exception as details:  # pylint: disable=unused-variable, broad-except
                     LOGGER.error("Error occured during collecting on host: %s\n%s", node.name, details)
+                self.collect_times[(node.name, log_entity.name)] = time.perf_counter() - start_time
+
+            # Compress logs of the node while other nodes are still being collected, and don't keep both copies.
+            if os.path.isdir(local_node_dir):
+                start_time = time.perf_counter()
+                archive.add(local_node_dir, arcname=os.path.join(os.path.basename(self.local_dir), node.name))
+                self.collect_times[(node.name, "archive")] = time.perf_counter() - start_time
+                remove_files(local_node_dir)
 
         LOGGER.debug("Nodes list %s", [node.name for node in self.nodes])
 
@@ -707,25 +784,40 @@ class LogCollector:
             return []
         if self.nodes:
             try:
-                workers_number = int(len(self.nodes) / 2)
-                workers_number = len(self.nodes) if workers_number < 2 else workers_number
+                workers_number = min(len(self.nodes), LOG_COLLECTOR_MAX_WORKERS)
                 ParallelObject(self.nodes, num_workers=workers_number, timeout=self.collect_timeout).run(
                     collect_logs_per_node, ignore_exceptions=True)
             except Exception as details:  # pylint: disable=broad-except
                 LOGGER.error('Error occured during collecting logs %s', details)
+            self.log_collect_times()
 
-        if not os.listdir(self.local_dir):
+        try:
+            if os.listdir(self.local_dir) or archive.parts:
+                # Add the rest: logs of inactive nodes and of nodes which were not archived because of an error.
+                archive.add(self.local_dir, arcname=os.path.basename(self.local_dir))
+        except Exception as details:  # pylint: disable=broad-except
+            LOGGER.error("Error during archive creation. Details: \n%s", details)
+
+        if not archive.parts:
+            archive.abort()
             LOGGER.warning('Directory %s is empty', self.local_dir)
             return []
 
-        final_archive = self.archive_to_tarfile(self.local_dir)
-        if not final_archive:
-            return []
+        final_archive = archive.close()
         s3_link = upload_archive_to_s3(final_archive, f"{self.test_id}/{self.current_run}")
         remove_files(self.local_dir)
         remove_files(final_archive)
         return [s3_link]
 
+    def log_collect_times(self) -> None:
+        entities_times = {}
+        for (_, entity_name), collect_time in self.collect_times.items():
+            entities_times[entity_name] = entities_times.get(entity_name, 0) + collect_time
+        LOGGER.info("Time spent on collecting logs of %s per entity (for all nodes): %s",
+                    self.cluster_log_type,
+                    ", ".join(f"{name}={collect_time:.1f}s" for name, collect_time in
+                              sorted(entities_times.items(), key=lambda item: item[1], reverse=True)))
+
     def collect_logs_for_inactive_nodes(self, local_search_path=None):
         node_names = {node.name for node in self.nodes}
         if not local_search_path:
@@ -754,14 +846,14 @@ class LogCollector:
             if extension in ['.log', '.json']:
                 src_name = src_name.replace(extension, f"-{self.test_id.split('-')[0]}{extension}")
 
-        archive_name = f"{src_name}.tar.gz"
+        archive = ParallelTarGzArchive(f"{src_name}.tar.gz")
         try:
-            with tarfile.open(archive_name, "w:gz") as tar:
-                tar.add(src_path, arcname=src_name)
+            archive.add(src_path, arcname=src_name)
+            return archive.close()
         except Exception as details:  # pylint: disable=broad-except
             LOGGER.error("Error during archive creation. Details: \n%s", details)
+            archive.abort()
             return None
-        return archive_name
 
 
 class ScyllaLogCollector(LogCollector):
@@ -3475,8 +3475,8 @@ class Nemesis:  # pylint: disable=too-many-instance-attributes,too-many-public-m
         self._switch_to_network_replication_strategy(self.cluster.get_test_keyspaces() + system_keyspaces)
         with temporary_replication_strategy_setter(node) as replication_strategy_setter:
             new_node = self._add_new_node_in_new_dc()
-            datacenters = list(self.tester.db_cluster.get_nodetool_status().keys())
             status = self.tester.db_cluster.get_nodetool_status()
+            datacenters = list(status.keys())
             new_dc_list = [dc for dc in list(status.keys()) if dc.endswith("_nemesis_dc")]
             assert new_dc_list, "new datacenter was not registered"
             new_dc_name = new_dc_list[0]
@@ -3623,6 +3623,7 @@ def disrupt_method_wrapper(method):  # pylint: disable=too-many-statements
                                 f"{err}")
         args[0].log.info(f"log_info: {log_info}")
         nemesis_event.duration = time_elapsed
+        args[0].cluster.topology_snapshot.invalidate()  # the disruption could change the cluster topology
         args[0].cluster.check_cluster_health()
         num_nodes_after = len(args[0].cluster.nodes)
         if num_nodes_before != num_nodes_after:
@@ -18,6 +18,7 @@ import sys
 
 from elasticsearch import Elasticsearch
 
+from sdcm.es import ESBulkWriter
 from sdcm.keystore import KeyStore
 
 LOGGER = logging.getLogger(__name__)
@@ -26,6 +27,7 @@ LOGGER = logging.getLogger(__name__)
 class NemesisElasticSearchPublisher:
     index_name = 'nemesis_data'
     es: Elasticsearch
+    es_writer: ESBulkWriter
     error_message_size_limit_mb = 100
 
     def __init__(self, tester):
@@ -36,6 +38,7 @@ class NemesisElasticSearchPublisher:
         es_conf = ks.get_elasticsearch_credentials()
         self.es = Elasticsearch(hosts=[es_conf["es_url"]], verify_certs=False,  # pylint: disable=invalid-name
                                 http_auth=(es_conf["es_user"], es_conf["es_password"]))
+        self.es_writer = ESBulkWriter(client=self.es)
 
     @cached_property
     def stats(self):
@@ -99,5 +102,4 @@ class NemesisElasticSearchPublisher:
                 failure_message=data['error']
             ))
 
-        res = self.es.index(index=self.index_name, doc_type='nemesis', body=new_nemesis_data)
-        LOGGER.debug(res)
+        self.es_writer.index(index=self.index_name, doc_type='nemesis', body=new_nemesis_data)
@@ -16,13 +16,19 @@ import json
 import logging
 import re
 import sys
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
-from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 from enum import Enum
 from jinja2 import Environment, FileSystemLoader
 
+try:
+    from orjson import loads as json_loads  # pylint: disable=no-name-in-module
+except ImportError:
+    json_loads = json.loads
+
 
 LOGGER = logging.getLogger(__name__)
 
@@ -31,6 +37,10 @@ env = Environment(
     autoescape=True
 )
 
+# Max number of segments on one line of the chart.  Events which don't fit are merged with their neighbours.
+MAX_LANE_SEGMENTS = 2000
+MIN_BUCKET_WIDTH = 1000  # ms
+
 
 class EventGroup(Enum):
     NODES_RELATED_EVENTS = ["ScyllaServerStatusEvent", "RepairEvent", "JMXServiceEvent", "DatabaseLogEvent",
@@ -41,189 +51,259 @@ class EventGroup(Enum):
     STRESS_EVENTS = ["CassandraStressEvent", "CassandraStressLogEvent"]
 
 
-# pylint: disable=too-many-instance-attributes
-@dataclass
-class Event:
-    event_dict: dict
-    base: str = field(init=False)
-    event_id: str = field(init=False)
-    original_node_name: str = field(init=False)
-    period_type: str = field(init=False)
-    shard: int = field(init=False)
-    nemesis_name: str = field(init=False)
-    alert_name: str = field(init=False)
-    stress_cmd: str = field(init=False)
-    message: str = field(init=False)
-    nodetool_command: str = field(init=False)
-    type: str = field(init=False)
-    table: str = field(init=False)
-    begin_timestamp: float = field(init=False)
-    end_timestamp: float = field(init=False)
-    node_name: str = field(init=False)
-    cluster_name: str = field(init=False)
-    chart_label: str = field(init=False)
-    chart_value: str = field(init=False)
-
-    def __post_init__(self):
-        self.base = self.event_dict["base"]
-        self.event_id = self.event_dict["event_id"]
-        self.original_node_name = self.event_dict.get("node")
-        self.period_type = self.event_dict.get("period_type")
-        self.shard = self.event_dict.get("shard")
-        self.nemesis_name = self.event_dict.get("nemesis_name")
-        self.alert_name = self.event_dict.get("alert_name")
-        self.stress_cmd = self.event_dict.get("stress_cmd")
-        self.message = self.event_dict.get("message")
-        self.nodetool_command = self.event_dict.get("nodetool_command")
-        self.type = self.event_dict["type"]
-        self.table = self.event_dict.get("table")
-        if self.event_dict.get("period_type") in ["begin", "end"]:
-            event_begin_timestamp = self._convert_to_milliseconds(timestamp=self.event_dict.get("begin_timestamp"))
-            event_end_timestamp = self._convert_to_milliseconds(timestamp=self.event_dict.get("end_timestamp"))
-        else:
-            event_begin_timestamp = self._convert_to_milliseconds(timestamp=self.event_dict.get("event_timestamp"))
-            event_end_timestamp = event_begin_timestamp
-        self.begin_timestamp = event_begin_timestamp
-        self.end_timestamp = event_end_timestamp
-        self.node_name, self.cluster_name = self._parse_node_name(name_to_parse=self.event_dict.get("node"))
-        self.chart_label = self._create_chart_label()
-        self.chart_value = self._create_chart_value()
-
-    @staticmethod
-    def _convert_to_milliseconds(timestamp: float | None) -> float | None:
-        return timestamp * 1000 if timestamp else timestamp
-
-    @staticmethod
-    def _parse_node_name(name_to_parse: str | None) -> tuple[str, str] | tuple[None, None]:
-        """
-        The node names may look like this
-        'Node longevity-100gb-4h-master-db-node-6fb3995d-3 [13.49.80.25 | 10.0.1.221] (seed: True)'
-        or this
-        'longevity-100gb-4h-master-db-node-6fb3995d-3'
-        They are split with regex into 3 groups:
-        1) is skipped
-        2) 'longevity-100gb-4h-master-db-node-6fb3995d' becomes the cluster name
-        3) '-3' is used to create new node name like this: 'node-3'
-        """
-        if name_to_parse:
-            if result := re.match(r"(.*\s)?(.*)(-\d+)", name_to_parse):
-                node_name = f"node{result.group(3)}"
-                cluster_name = result.group(2).replace("node", "cluster")
-                return node_name, cluster_name
-        return name_to_parse, None
-
-    def _create_chart_label(self) -> str:
-        """
-        Creates labels for the chart
-        """
-        if self.event_dict["base"] in ["RepairEvent", "CompactionEvent"]:
-            label_string = f"{self.event_dict['base']}, shard: {self.event_dict['shard']}"
-        elif self.event_dict["base"] == "DisruptionEvent":
-            label_string = f"{self.event_dict['base']}, nemesis: {self.event_dict['nemesis_name']}"
-        elif self.event_dict["base"] == "PrometheusAlertManagerEvent":
-            label_string = f"node: {self.event_dict['node']}, alert: {self.event_dict['alert_name']}"
-        elif self.event_dict["base"] == "CassandraStressEvent":
-            label_string = f"cmd: {self.event_dict['stress_cmd']}, node: {self.event_dict['node']}"
-        elif self.event_dict["base"] == "CassandraStressLogEvent":
-            label_string = self.event_dict['node']
-        else:
-            label_string = self.event_dict['base']
-        return label_string
+EVENT_GROUPS = {base: group for group in EventGroup for base in group.value}
+GROUP_NAMES = {
+    EventGroup.PROMETHEUS_EVENTS: "Prometheus events",
+    EventGroup.SCT_EVENTS: "SCT events",
+    EventGroup.STRESS_EVENTS: "Stress events",
+}
+# Timeline group of node-related events without a node.
+NO_NODE_GROUP_NAME = "no node"
+# Continuous events without `end' record which last till the end of the test.
+ENDLESS_EVENTS = ("ScyllaServerStatusEvent", "JMXServiceEvent")
+
+
+def convert_to_milliseconds(timestamp: float | None) -> float | None:
+    return timestamp * 1000 if timestamp else timestamp
+
+
+@lru_cache(maxsize=None)
+def parse_node_name(name_to_parse: str | None) -> tuple[str, str] | tuple[None, None]:
+    """
+    The node names may look like this
+    'Node longevity-100gb-4h-master-db-node-6fb3995d-3 [13.49.80.25 | 10.0.1.221] (seed: True)'
+    or this
+    'longevity-100gb-4h-master-db-node-6fb3995d-3'
+    They are split with regex into 3 groups:
+    1) is skipped
+    2) 'longevity-100gb-4h-master-db-node-6fb3995d' becomes the cluster name
+    3) '-3' is used to create new node name like this: 'node-3'
+    """
+    if name_to_parse:
+        if result := re.match(r"(.*\s)?(.*)(-\d+)", name_to_parse):
+            node_name = f"node{result.group(3)}"
+            cluster_name = result.group(2).replace("node", "cluster")
+            return node_name, cluster_name
+    return name_to_parse, None
+
+
+def chart_label(event: dict) -> str:
+    """
+    Creates labels for the chart
+    """
+    if event["base"] in ["RepairEvent", "CompactionEvent"]:
+        label_string = f"{event['base']}, shard: {event['shard']}"
+    elif event["base"] == "DisruptionEvent":
+        label_string = f"{event['base']}, nemesis: {event['nemesis_name']}"
+    elif event["base"] == "PrometheusAlertManagerEvent":
+        label_string = f"node: {event['node']}, alert: {event['alert_name']}"
+    elif event["base"] == "CassandraStressEvent":
+        label_string = f"cmd: {event['stress_cmd']}, node: {event['node']}"
+    elif event["base"] == "CassandraStressLogEvent":
+        label_string = event['node']
+    else:
+        label_string = event['base']
+    return label_string
+
+
+def chart_value(event: dict) -> str:
+    """
+    Creates values for chart's tooltips
+    """
+    if event["base"] == "InfoEvent":
+        label_string = f"message: {event['message']}"
+    elif event["base"] == "NodetoolEvent":
+        label_string = f"nodetool_command: {event['nodetool_command']}"
+    elif event["base"] == "DisruptionEvent":
+        label_string = f"nemesis: {event['nemesis_name']}"
+    elif event["base"] in ["DatabaseLogEvent", "InstanceStatusEvent"]:
+        label_string = f"type: {event['type']}"
+    elif event["base"] == "CompactionEvent":
+        label_string = f"table: {event['table']}"
+    else:
+        label_string = event['base']
+    return label_string
+
+
+def lane_sort_key(event: dict, group: EventGroup) -> tuple:
+    """Order of lines in a group of the chart."""
+
+    if group is EventGroup.PROMETHEUS_EVENTS:
+        return event.get("node") or "", event.get("alert_name") or ""
+    if group is EventGroup.STRESS_EVENTS:
+        return event["base"], event.get("node") or "", event.get("stress_cmd") or ""
+    return (event["base"], )
+
+
+class TimelineLane:
+    """One line of the chart: time ranges of events with the same label.
+
+    Events with the same value (color of a segment) which start in the same time bucket are merged into one
+    segment.  When a lane has more than `max_segments' segments, the bucket width is doubled, so the number of
+    segments stays bounded however long the test is.
+    """
+
+    def __init__(self, label: str, sort_key: tuple, max_segments: int = MAX_LANE_SEGMENTS):
+        self.label = label
+        self.sort_key = sort_key
+        self.max_segments = max_segments
+        self.bucket_width = MIN_BUCKET_WIDTH
+        self.events_count = 0
+        self._segments: Dict[Tuple[str, int], List[float]] = {}  # (value, bucket) -> [begin, end]
+
+    def add(self, begin: float, end: float, value: str) -> None:
+        self.events_count += 1
+        key = (value, int(begin // self.bucket_width))
+        if segment := self._segments.get(key):
+            if begin < segment[0]:
+                segment[0] = begin
+            if end > segment[1]:
+                segment[1] = end
+            return
+        self._segments[key] = [begin, end]
+        while len(self._segments) > self.max_segments:
+            self._downsample()
+
+    def _downsample(self) -> None:
+        self.bucket_width *= 2
+        segments = {}
+        for (value, bucket), (begin, end) in self._segments.items():
+            if segment := segments.get(key := (value, bucket // 2)):
+                segment[0], segment[1] = min(segment[0], begin), max(segment[1], end)
+            else:
+                segments[key] = [begin, end]
+        self._segments = segments
 
-    def _create_chart_value(self) -> str:
-        """
-        Creates values for chart's tooltips
-        """
-        if self.event_dict["base"] == "InfoEvent":
-            label_string = f"message: {self.event_dict['message']}"
-        elif self.event_dict["base"] == "NodetoolEvent":
-            label_string = f"nodetool_command: {self.event_dict['nodetool_command']}"
-        elif self.event_dict["base"] == "DisruptionEvent":
-            label_string = f"nemesis: {self.event_dict['nemesis_name']}"
-        elif self.event_dict["base"] in ["DatabaseLogEvent", "InstanceStatusEvent"]:
-            label_string = f"type: {self.event_dict['type']}"
-        elif self.event_dict["base"] == "CompactionEvent":
-            label_string = f"table: {self.event_dict['table']}"
-        else:
-            label_string = self.event_dict['base']
-        return label_string
+    def chart_data(self) -> dict:
+        return {"label": self.label,
+                "data": [{"timeRange": segment, "val": value}
+                         for (value, _), segment in sorted(self._segments.items(), key=lambda item: item[1][0])]}
+
+
+class TimelineGroup:
+    def __init__(self, name: str, sort_key: tuple):
+        self.name = name
+        self.sort_key = sort_key
+        self.lanes: Dict[str, TimelineLane] = {}
+        self.stats = Counter()
+
+    def lane(self, event: dict, group: EventGroup) -> TimelineLane:
+        label = chart_label(event)
+        if (lane := self.lanes.get(label)) is None:
+            lane = self.lanes[label] = TimelineLane(label=label, sort_key=(lane_sort_key(event, group),
+                                                                           len(self.lanes)))
+        return lane
+
+    def chart_data(self) -> dict:
+        return {"group": self.name,
+                "data": [lane.chart_data() for lane in sorted(self.lanes.values(), key=lambda lane: lane.sort_key)]}
 
 
 # pylint: disable=too-many-instance-attributes
 class ParallelTimelinesReportGenerator:
+    """Build a parallel timelines chart of SCT events from raw_events.log.
+
+    The file is read as a stream, and only a bounded number of segments is kept for each line of the chart (see
+    `TimelineLane'), so memory usage doesn't depend on the length of the test.  The report is rendered to the file
+    group by group.
+    """
+
     def __init__(self, events_file):
         self.events_file = Path(events_file)
         self.test_id = ""
         self.cluster_name = ""
         self.max_end_timestamp = 0
-        self.events = []
-        self.chart_data = []
+        self.events_count = 0
+        self.groups: Dict[str, TimelineGroup] = {}
         self.template = "pt_report_template.html"
         self.default_report_file_name = "parallel-timelines-report.html"
+        # event_id -> (group, lane, base, begin timestamp, value) of continuous events which have no `end' record yet
+        self._begin_events: Dict[str, Tuple[TimelineGroup, TimelineLane, str, float, str]] = {}
 
     def read_events_file(self) -> None:
         if not self.events_file.exists():
             LOGGER.critical("File \"%s\" not found!", self.events_file)
             sys.exit(1)
         LOGGER.info("Starting to read file \"%s\"...", self.events_file)
-        with self.events_file.open(encoding="utf-8") as file:
+        with self.events_file.open("rb") as file:
             for line in file:
-                event = Event(event_dict=json.loads(line))
-                if event.end_timestamp and event.end_timestamp > self.max_end_timestamp:
-                    self.max_end_timestamp = event.end_timestamp
-                if not self.cluster_name and event.cluster_name:
-                    self.cluster_name = event.cluster_name
-                # Getting test_id from the line like this "test_id=fe9c9218-367f-47ba-b59f-0d06c0e81c30"
-                if not self.test_id and event.base == "InfoEvent" and "TEST_START" in event.message:
-                    self.test_id = event.message.split("=")[-1]
-                self.events.append(event)
-            LOGGER.info("File \"%s\" has been read successfully. %d rows have been processed.",
-                        self.events_file, len(self.events))
-
-    def prepare_scylla_nodes_event_data(self) -> None:
-        scylla_nodes_events = self._process_raw_data(events_to_process=EventGroup.NODES_RELATED_EVENTS.value)
-        if scylla_nodes_events:
-            LOGGER.info("Preparing Scylla node-related event data...")
-            scylla_nodes_events_sorted = sorted(scylla_nodes_events,
-                                                key=lambda x: (int(x.node_name.split("-")[1]), x.base))
-
-            group_dict = {}
-            stat_dict = {}
-            for event in scylla_nodes_events_sorted:
-                group_dict.setdefault(event.node_name, []).append(event)
-                stat_dict[event.base] = stat_dict.setdefault(event.base, 0) + 1
-
-            for key, value in group_dict.items():
-                self._process_chart_data(event_list=value, group_name=key)
-            stat_string = ', '.join([f"{key}={value}" for key, value in stat_dict.items()])
-            LOGGER.info("All Scylla node-related event data have been successfully prepared")
-            LOGGER.info("Total number of node-related events processed: %s", stat_string)
-
-    def prepare_prometheus_event_data(self) -> None:
-        prometheus_events_data = self._process_raw_data(events_to_process=EventGroup.PROMETHEUS_EVENTS.value)
-        if prometheus_events_data:
-            prometheus_events_data_sorted = sorted(prometheus_events_data, key=lambda x: (x.original_node_name,
-                                                                                          x.alert_name))
-            self._process_chart_data(event_list=prometheus_events_data_sorted, group_name="Prometheus events")
-
-    def prepare_sct_event_data(self) -> None:
-        sct_events_data = self._process_raw_data(events_to_process=EventGroup.SCT_EVENTS.value)
-        if sct_events_data:
-            sct_events_data_sorted = sorted(sct_events_data,
-                                            key=lambda x: (x.base, x.original_node_name, x.nemesis_name))
-            self._process_chart_data(event_list=sct_events_data_sorted, group_name="SCT events")
-
-    def prepare_stress_event_data(self) -> None:
-        stress_events_data = self._process_raw_data(events_to_process=EventGroup.STRESS_EVENTS.value)
-        if stress_events_data:
-            stress_events_data_sorted = sorted(stress_events_data, key=lambda x: (x.base, x.original_node_name,
-                                                                                  x.stress_cmd))
-            self._process_chart_data(event_list=stress_events_data_sorted, group_name="Stress events")
-
-    def _process_chart_data(self, event_list: List[Event], group_name: str) -> None:
+                self.process_event(json_loads(line))
+        self._process_endless_events()
+        LOGGER.info("File \"%s\" has been read successfully. %d rows have been processed.",
+                    self.events_file, self.events_count)
+        for group in sorted(self.groups.values(), key=lambda group: group.sort_key):
+            LOGGER.info("Number of %s events processed: %s",
+                        group.name, ', '.join(f"{key}={value}" for key, value in group.stats.items()))
+
+    def process_event(self, event: dict) -> None:
+        self.events_count += 1
+        base = event["base"]
+        period_type = event.get("period_type")
+        if period_type in ("begin", "end"):
+            begin_timestamp = convert_to_milliseconds(timestamp=event.get("begin_timestamp"))
+            end_timestamp = convert_to_milliseconds(timestamp=event.get("end_timestamp"))
+        else:
+            begin_timestamp = end_timestamp = convert_to_milliseconds(timestamp=event.get("event_timestamp"))
+        if end_timestamp and end_timestamp > self.max_end_timestamp:
+            self.max_end_timestamp = end_timestamp
+        node_name, cluster_name = parse_node_name(event.get("node"))
+        if not self.cluster_name and cluster_name:
+            self.cluster_name = cluster_name
+        # Getting test_id from the line like this "test_id=fe9c9218-367f-47ba-b59f-0d06c0e81c30"
+        if not self.test_id and base == "InfoEvent" and "TEST_START" in (event.get("message") or ""):
+            self.test_id = event["message"].split("=")[-1]
+
+        if (group := EVENT_GROUPS.get(base)) is None:
+            return
+        # Exclude DisruptionEvents with nemesis=RunUniqueSequence from processing
+        if base == "DisruptionEvent" and event.get("nemesis_name") == "RunUniqueSequence":
+            return
+        if not begin_timestamp:
+            LOGGER.warning("Empty begin_timestamp for event name=%s, id=%s", base, event["event_id"])
+            return
+        if not end_timestamp and period_type == "end":
+            LOGGER.warning("Empty end_timestamp when period_type=end for event name=%s, id=%s", base,
+                           event["event_id"])
+            return
+
+        timeline_group = self._timeline_group(group=group, node_name=node_name)
+        lane = timeline_group.lane(event=event, group=group)
+        value = chart_value(event)
+        if period_type == "begin":
+            # Continuous event: only `end' record is shown if there is one.
+            self._begin_events[event["event_id"]] = (timeline_group, lane, base, begin_timestamp, value)
+            return
+        if period_type == "end":
+            self._begin_events.pop(event["event_id"], None)
+        timeline_group.stats[base] += 1
+        lane.add(begin=begin_timestamp, end=end_timestamp, value=value)
+
+    def _timeline_group(self, group: EventGroup, node_name: str | None) -> TimelineGroup:
+        if group is EventGroup.NODES_RELATED_EVENTS:
+            name = node_name or NO_NODE_GROUP_NAME
+            node_index = node_name.split("-")[-1] if node_name else ""
+            sort_key = (0, int(node_index) if node_index.isdigit() else sys.maxsize)
+        else:
+            name = GROUP_NAMES[group]
+            sort_key = (1 + list(GROUP_NAMES).index(group), 0)
+        if (timeline_group := self.groups.get(name)) is None:
+            timeline_group = self.groups[name] = TimelineGroup(name=name, sort_key=sort_key)
+        return timeline_group
+
+    def _process_endless_events(self) -> None:
+        """Evaluate `end_timestamp' for continuous events with `begin' records only."""
+
+        for timeline_group, lane, base, begin_timestamp, value in self._begin_events.values():
+            timeline_group.stats[base] += 1
+            if base in ENDLESS_EVENTS:
+                lane.add(begin=begin_timestamp, end=self.max_end_timestamp, value=value)
+            else:
+                lane.add(begin=begin_timestamp, end=begin_timestamp, value=value)
+        self._begin_events.clear()
+
+    def chart_data(self) -> Iterator[dict]:
         """
-        The structure of self.chart_data should look like this:
-        [
+        Yields groups of the chart one by one, the structure of a group looks like this:
             {group: "group1name",
              data: [
                      {label: "label1name",
@@ -237,84 +317,10 @@ class ParallelTimelinesReportGenerator:
                      {label: "label2name",
                       data: [...]},
                      (...)
-                   ]},
-            {group: "group2name",
-             data: [...]},
-             (...)
-        ]
-        Firstly, we create here an appropriate structure of self.chart_data for the given group of events.
-        Then we populate created group structure with events' data by calling append_group_data().
+                   ]}
         """
-        LOGGER.info("Preparing %s data...", group_name)
-        stat_dict = {}
-
-        # Prepare self.chart_data structure. Add new group dictionary.
-        self.chart_data.append({"group": group_name,
-                                "data": []})
-        current_chart_group = self.chart_data[-1]["data"]
-
-        # Fill self.chart_data with data
-        for event in event_list:
-            if event.chart_label not in [item["label"] for item in current_chart_group]:
-                current_chart_group.append({"label": event.chart_label,
-                                            "data": []})
-            self._append_group_data(group_name=group_name,
-                                    event_data=event)
-            stat_dict[event.base] = stat_dict.setdefault(event.base, 0) + 1
-        stat_string = ', '.join([f"{key}={value}" for key, value in stat_dict.items()])
-        LOGGER.info("All %s data have been successfully prepared.", group_name)
-        LOGGER.info("Number of events processed: %s", stat_string)
-
-    def _append_group_data(self, group_name: str, event_data: Event) -> None:
-        group_by_name_list = list(filter(lambda x: x['group'] == group_name, self.chart_data))
-        for data in group_by_name_list[0]["data"]:
-            if event_data.chart_label == data["label"]:
-                data["data"].append({"timeRange": [event_data.begin_timestamp,
-                                                   event_data.end_timestamp],
-                                     "val": event_data.chart_value})
-
-    def _process_raw_data(self, events_to_process: list) -> List[Event]:
-        """
-        Finds continuous events with 'begin' records only and evaluates 'end_timestamp' for them.
-        If continuous event has both 'begin' and 'end' records, then only 'end' record will be processed.
-        """
-        processed_events = []
-        end_event_id_set = set()
-        begin_event_id_set = set()
-        begin_events = []
-        events_string = ', '.join(events_to_process)
-        LOGGER.info("Processing raw data for events: %s.", events_string)
-        selected_events = list(filter(lambda x: x.base in events_to_process, self.events))
-        for event in selected_events:
-            # Exclude DisruptionEvents with nemesis=RunUniqueSequence from processing
-            if event.base == "DisruptionEvent" and event.nemesis_name == "RunUniqueSequence":
-                continue
-            if not event.begin_timestamp:
-                LOGGER.warning("Empty begin_timestamp for event name=%s, id=%s", event.base, event.event_id)
-            elif not event.end_timestamp and event.period_type == 'end':
-                LOGGER.warning("Empty end_timestamp when period_type=end for event name=%s, id=%s", event.base,
-                               event.event_id)
-            # Processing of event records with period_type = None or period_type in ["end", "one-time"]
-            elif event.period_type != "begin":
-                if event.period_type == "end":
-                    end_event_id_set.add(event.event_id)
-                processed_events.append(event)
-            # Save the continuous events with period_type = "begin" and their IDs
-            else:
-                begin_event_id_set.add(event.event_id)
-                begin_events.append(event)
-        # Check if there are event IDs with period_type = "begin" and without period_type = "end"
-        endless_event_id_set = begin_event_id_set.difference(end_event_id_set)
-        if endless_event_id_set:
-            # If endless events exist, evaluate end_timestamp for them
-            endless_events = list(filter(lambda x: x.event_id in endless_event_id_set, begin_events))
-            for event in endless_events:
-                if event.base in ["ScyllaServerStatusEvent", "JMXServiceEvent"]:
-                    event.end_timestamp = self.max_end_timestamp
-                else:
-                    event.end_timestamp = event.begin_timestamp
-                processed_events.append(event)
-        return processed_events
+        for group in sorted(self.groups.values(), key=lambda group: group.sort_key):
+            yield group.chart_data()
 
     def create_report_file(self) -> None:
         if self.cluster_name:
@@ -324,24 +330,17 @@ class ParallelTimelinesReportGenerator:
         report_file = self.events_file.parent / report_file_name
         LOGGER.info("Creating report file \"%s\"", report_file)
         max_line_height = 20
-        label_count = 0
-        for group in self.chart_data:
-            label_count += len(group["data"])
+        label_count = sum(len(group.lanes) for group in self.groups.values())
         max_height = max_line_height * label_count + 200
         template = env.get_template(self.template)
-        rendered_template = template.render(chart_data=self.chart_data, max_height=max_height,
-                                            max_line_height=max_line_height, test_id=self.test_id,
-                                            cluster_name=self.cluster_name)
         with report_file.open("w", encoding="utf-8") as file:
-            file.write(rendered_template)
+            file.writelines(template.generate(chart_data=self.chart_data(), max_height=max_height,
+                                              max_line_height=max_line_height, test_id=self.test_id,
+                                              cluster_name=self.cluster_name))
         LOGGER.info("Report file has been successfully created")
 
     def generate_full_report(self):
         self.read_events_file()
-        self.prepare_scylla_nodes_event_data()
-        self.prepare_prometheus_event_data()
-        self.prepare_sct_event_data()
-        self.prepare_stress_event_data()
         self.create_report_file()
 
 
@@ -0,0 +1,150 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import logging
+import threading
+from typing import Dict, List, Iterator, Callable, Hashable, Tuple, Type
+from contextlib import contextmanager
+
+SSH_MAX_CHANNELS_PER_CONNECTION = 8  # sshd allows 10 sessions per connection by default (`MaxSessions')
+SSH_MAX_IDLE_CONNECTIONS = 8  # per remoter
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PooledConnection:  # pylint: disable=too-few-public-methods
+    def __init__(self, connection, generation: int):
+        self.connection = connection
+        self.generation = generation
+        self.channels = 0
+        self.retired = False
+        self.opened = False
+        self.open_lock = threading.Lock()
+
+    def close(self) -> None:
+        try:
+            self.connection.close()
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.debug("Failed to close SSH connection: %s", exc)
+
+
+class SSHConnectionPool:
+    """Share SSH connections of an owner (a remoter) between threads.
+
+    A command leases a connection and runs in a new channel of it, so up to `max_channels' commands from any threads
+    are multiplexed over one transport.  If all connections of the owner are busy, a new one is opened; when the
+    load goes down, idle connections above `max_idle' are closed.
+
+    A connection which failed to open or raised one of the `retryable' exceptions is retired: no new channels are
+    leased on it, and it's closed when the last running command on it completes.  Connections of an older generation
+    are retired too (see `RemoteCmdRunnerBase.run(change_context=True)'.)
+    """
+
+    def __init__(self, max_channels: int = SSH_MAX_CHANNELS_PER_CONNECTION, max_idle: int = SSH_MAX_IDLE_CONNECTIONS):
+        self.max_channels = max_channels
+        self.max_idle = max_idle
+        self.opened = 0  # number of connections opened by the pool, i.e., SSH handshakes
+        self._connections: Dict[Hashable, List[PooledConnection]] = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._forget_all)
+
+    @contextmanager
+    def lease(self,
+              owner: Hashable,
+              generation: int,
+              create_connection: Callable,
+              retryable: Tuple[Type[Exception], ...] = ()) -> Iterator:
+        pooled = self._acquire(owner, generation, create_connection)
+        try:
+            with pooled.open_lock:
+                if not pooled.opened:
+                    try:
+                        pooled.connection.open()
+                    except Exception:
+                        self._retire(owner, pooled)
+                        raise
+                    pooled.opened = True
+                    with self._lock:
+                        self.opened += 1
+            try:
+                yield pooled.connection
+            except retryable:
+                self._retire(owner, pooled)
+                raise
+        finally:
+            self._release(owner, pooled)
+
+    def _acquire(self, owner: Hashable, generation: int, create_connection: Callable) -> PooledConnection:
+        to_close = []
+        with self._lock:
+            connections = self._connections.setdefault(owner, [])
+            for pooled in [pooled for pooled in connections if pooled.generation != generation]:
+                connections.remove(pooled)
+                if self._mark_retired(pooled):
+                    to_close.append(pooled)
+            # Fill the busiest connection first to keep the number of transports low.
+            available = [pooled for pooled in connections if pooled.channels < self.max_channels]
+            if available:
+                pooled = max(available, key=lambda item: item.channels)
+            else:
+                pooled = PooledConnection(create_connection(), generation=generation)
+                connections.append(pooled)
+            pooled.channels += 1
+        for retired in to_close:
+            retired.close()
+        return pooled
+
+    def _release(self, owner: Hashable, pooled: PooledConnection) -> None:
+        with self._lock:
+            pooled.channels -= 1
+            if not pooled.retired and not pooled.channels:
+                connections = self._connections.get(owner, [])
+                if sum(1 for item in connections if not item.channels) > self.max_idle:
+                    connections.remove(pooled)
+                    pooled.retired = True
+            close = pooled.retired and not pooled.channels
+        if close:
+            pooled.close()
+
+    @staticmethod
+    def _mark_retired(pooled: PooledConnection) -> bool:
+        """Mark the connection as retired and return True if it's not used and should be closed."""
+
+        pooled.retired = True
+        return not pooled.channels
+
+    def _retire(self, owner: Hashable, pooled: PooledConnection) -> None:
+        with self._lock:
+            if not pooled.retired:
+                self._connections.get(owner, []).remove(pooled)
+                pooled.retired = True
+
+    def retire_all(self, owner: Hashable) -> None:
+        """Retire all connections of the owner: new commands will run on new connections."""
+
+        with self._lock:
+            connections = self._connections.pop(owner, [])
+            to_close = [pooled for pooled in connections if self._mark_retired(pooled)]
+        for pooled in to_close:
+            pooled.close()
+
+    def _forget_all(self) -> None:
+        # Connections of a parent process can't be used by a child process, and closing them would break them for
+        # the parent too.
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def connections_count(self, owner: Hashable) -> int:
+        with self._lock:
+            return len(self._connections.get(owner, []))
@@ -12,14 +12,13 @@
 # Copyright (c) 2020 ScyllaDB
 
 from abc import abstractmethod
-from typing import Type, Tuple, List, Optional
+from typing import Type, Tuple, List, Optional, ContextManager
 from shlex import quote
 import glob
 import os
 import shutil
 import tempfile
 import time
-import threading
 
 from invoke.watchers import StreamWatcher
 from invoke.runners import Result
@@ -27,6 +26,7 @@ from invoke.runners import Result
 from sdcm.utils.decorators import retrying
 
 from .base import RetryableNetworkException, CommandRunner
+from .connection_pool import SSHConnectionPool
 from .local_cmd_runner import LocalCmdRunner
 
 
@@ -43,7 +43,7 @@ class RemoteCmdRunnerBase(CommandRunner):  # pylint: disable=too-many-instance-a
     exception_unexpected: Type[Exception] = None
     exception_failure: Type[Exception] = None
     exception_retryable: Tuple[Type[Exception]] = None
-    connection_thread_map = threading.local()
+    connection_pool = SSHConnectionPool()
     default_run_retry = 3
 
     def __init__(self, hostname: str, user: str = 'root',  # pylint: disable=too-many-arguments
@@ -63,18 +63,13 @@ class RemoteCmdRunnerBase(CommandRunner):  # pylint: disable=too-many-instance-a
         self._context_generation = 0
         super().__init__(hostname=hostname, user=user, password=password)
 
-    @property
-    def connection(self):
-        """
-        Map connection to current thread.
-        If there is no such thread, create it.
-        """
-        connection = getattr(self.connection_thread_map, str(id(self)), None)
-        if connection is None:
-            connection = self._create_connection()
-            setattr(self.connection_thread_map, str(id(self)), connection)
-            self._bind_generation_to_connection(connection)
-        return connection
+    def _lease_connection(self) -> ContextManager:
+        """Get a connection from the pool to run a command in a new channel of it."""
+
+        return self.connection_pool.lease(owner=id(self),
+                                          generation=self._context_generation,
+                                          create_connection=self._create_connection,
+                                          retryable=self.exception_retryable or ())
 
     @classmethod
     def get_retryable_exceptions(cls) -> Tuple[Type[Exception]]:
@@ -118,21 +113,15 @@ class RemoteCmdRunnerBase(CommandRunner):  # pylint: disable=too-many-instance-a
     def _create_connection(self):
         pass
 
-    def _bind_generation_to_connection(self, connection: object):
-        setattr(connection, '_context_generation', self._context_generation)
-
-    def _is_connection_generation_ok(self, connection: object):
-        return getattr(connection, '_context_generation', self._context_generation) == self._context_generation
-
     def stop(self):
         self._close_connection()
 
     def _close_connection(self):
-        if self.connection:
-            self.connection.close()
+        self.connection_pool.retire_all(owner=id(self))
 
     def _open_connection(self):
-        self.connection.open()
+        with self._lease_connection():
+            pass
 
     def __del__(self):
         self.stop()
@@ -141,8 +130,7 @@ class RemoteCmdRunnerBase(CommandRunner):  # pylint: disable=too-many-instance-a
     def _reconnect(self):
         """
             Close and reopen connection to the remote endpoint.
-            It is done only for connection specific for given thread.
-            Connections for other threads are not affected.
+            Commands which are running already are not affected and complete on the old connections.
         """
         self.log.debug("Reconnecting to '%s'", self.hostname)
         self._close_connection()
@@ -529,12 +517,8 @@ class RemoteCmdRunnerBase(CommandRunner):  # pylint: disable=too-many-instance-a
             with self._create_connection() as connection:
                 result = connection.run(**command_kwargs)
         else:
-            connection = self.connection
-            if not self._is_connection_generation_ok(connection):
-                connection.close()
-                connection.open()
-                self._bind_generation_to_connection(connection)
-            result = connection.run(**command_kwargs)
+            with self._lease_connection() as connection:
+                result = connection.run(**command_kwargs)
         result.duration = time.perf_counter() - start_time
         result.exit_status = result.exited
         return result
@@ -12,16 +12,25 @@
 # Copyright (c) 2020 ScyllaDB
 
 import os
+import shlex
+import base64
+import shutil
 import logging
 import tempfile
 import contextlib
 from io import StringIO
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 
 import yaml
 
 from sdcm import wait
 
 
+# Bigger content is sent using `send_files()' because length of a command line argument is limited to 128KiB.
+INLINE_CONTENT_LIMIT = 64 * 1024
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -29,59 +38,135 @@ def read_to_stringio(fobj):
     return StringIO(fobj.read())
 
 
-# pylint: disable=too-many-locals,too-many-arguments
-@contextlib.contextmanager
-def remote_file(remoter, remote_path, serializer=StringIO.getvalue, deserializer=read_to_stringio, sudo=False,
-                preserve_ownership=True, preserve_permissions=True):
-    filename = os.path.basename(remote_path)
-    local_tempfile = os.path.join(tempfile.mkdtemp(prefix='sct'), filename)
-    if preserve_ownership:
-        ownership = remoter.sudo(cmd='stat -c "%U:%G" ' + remote_path).stdout.strip()
-    if preserve_permissions:
-        permissions = remoter.sudo(cmd='stat -c "%a" ' + remote_path).stdout.strip()
-
-    wait.wait_for(remoter.receive_files,
-                  step=10,
-                  text=f"Waiting for copying `{remote_path}' from {remoter.hostname}",
-                  timeout=300,
-                  throw_exc=True,
-                  src=remote_path,
-                  dst=local_tempfile)
-    with open(local_tempfile, encoding="utf-8") as fobj:
-        parsed_data = deserializer(fobj)
-        original_content = serializer(parsed_data)
-    yield parsed_data
-
-    content = serializer(parsed_data)
-
-    if original_content == content:
-        LOGGER.debug("Content of '%s' wasn't changed", remote_path)
-    else:
-        with open(local_tempfile, "w", encoding="utf-8") as fobj:
-            fobj.write(content)
+def _run_with_retries(remoter, cmd, sudo, text):
+    return wait.wait_for(remoter.sudo if sudo else remoter.run,
+                         step=10,
+                         text=text,
+                         timeout=300,
+                         throw_exc=True,
+                         cmd=cmd,
+                         verbose=False)
+
+
+def _read_remote_file(remoter, remote_path: str, sudo: bool) -> Tuple[str, str, str, str]:
+    """Return content, ownership and permissions of a remote file and ownership of new files, using one command."""
+
+    path = shlex.quote(remote_path)
+    script = f'stat -c %U:%G:%a {path} && echo "$(id -un):$(id -gn)" && base64 {path}'
+    result = _run_with_retries(remoter=remoter,
+                               cmd=f"sh -c {shlex.quote(script)}",
+                               sudo=sudo,
+                               text=f"Waiting for reading of `{remote_path}' from {remoter.hostname}")
+    metadata, _, output = result.stdout.partition("\n")
+    new_files_ownership, _, encoded_content = output.partition("\n")
+    ownership, _, permissions = metadata.strip().rpartition(":")
+    return base64.b64decode(encoded_content).decode("utf-8"), ownership, permissions, new_files_ownership.strip()
 
-        LOGGER.debug("New content of `%s':\n%s", remote_path, content)
 
-        remote_tempfile = remoter.run("mktemp").stdout.strip()
-        remote_tempfile_move_cmd = f"mv '{remote_tempfile}' '{remote_path}'"
+def _write_remote_file(remoter, remote_path: str, content: str, sudo: bool,  # pylint: disable=too-many-arguments
+                       ownership: Optional[str], permissions: Optional[str]) -> None:
+    """Replace a remote file with new content, ownership and permissions, using one command.
+
+    The new file is created next to the original one and renamed over it, so it's never seen half-written.
+    """
+
+    path = shlex.quote(remote_path)
+    encoded_content = base64.b64encode(content.encode("utf-8")).decode()
+    if len(encoded_content) <= INLINE_CONTENT_LIMIT:
+        fill_tempfile = f'echo {encoded_content} | base64 -d > "$tmp"'
+        cleanup = ""
+    else:
+        remote_src = f"/tmp/sct-remote-file-{uuid4().hex}"
+        local_tmp_dir = tempfile.mkdtemp(prefix='sct')
+        local_src = os.path.join(local_tmp_dir, "content")
+        with open(local_src, "w", encoding="utf-8") as fobj:
+            fobj.write(content)
         wait.wait_for(remoter.send_files,
                       step=10,
                       text=f"Waiting for updating of `{remote_path}' on {remoter.hostname}",
                       timeout=300,
                       throw_exc=True,
-                      src=local_tempfile,
-                      dst=remote_tempfile)
-        if sudo:
-            remoter.sudo(remote_tempfile_move_cmd)
-        else:
-            remoter.run(remote_tempfile_move_cmd)
-
-        if preserve_ownership:
-            remoter.sudo(f"chown {ownership} {remote_path}")
-        if preserve_permissions:
-            remoter.sudo(f"chmod {permissions} {remote_path}")
-
-    os.unlink(local_tempfile)
+                      src=local_src,
+                      dst=remote_src)
+        shutil.rmtree(local_tmp_dir)
+        fill_tempfile = f'cat {shlex.quote(remote_src)} > "$tmp"'
+        cleanup = f" && rm -f {shlex.quote(remote_src)}"
+
+    script = [f"tmp=$(mktemp {path}.XXXXXX)", fill_tempfile]
+    if ownership:
+        script.append(f'chown {shlex.quote(ownership)} "$tmp"')
+    if permissions:
+        script.append(f'chmod {shlex.quote(permissions)} "$tmp"')
+    script.append(f"mv -f \"$tmp\" {path}{cleanup} || {{ rm -f \"$tmp\"; false; }}")
+    _run_with_retries(remoter=remoter,
+                      cmd=f"sh -c {shlex.quote(' && '.join(script))}",
+                      sudo=sudo,
+                      text=f"Waiting for updating of `{remote_path}' on {remoter.hostname}")
+
+
+def _map_parallel(func, items):
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=len(items), thread_name_prefix="RemoteFile") as executor:
+        return list(executor.map(func, items))
+
+
+# pylint: disable=too-many-locals,too-many-arguments
+@contextlib.contextmanager
+def remote_files(files, serializer=StringIO.getvalue, deserializer=read_to_stringio, sudo=False,
+                 preserve_ownership=True, preserve_permissions=True):
+    """Edit a file on many hosts at once.
+
+    `files' is a sequence of (remoter, remote_path) pairs.  All files are read in parallel and the list of
+    deserialized data is yielded.  Changed files are written back in parallel.  Each file takes two commands: one
+    to read it with its metadata and one to replace it.
+
+    Commands run with sudo if `sudo' is set or if ownership of a file should be preserved and it's not the user's one.
+    """
+
+    files = list(files)
+
+    def read(file):
+        remoter, remote_path = file
+        content, ownership, permissions, new_files_ownership = \
+            _read_remote_file(remoter=remoter, remote_path=remote_path, sudo=sudo)
+        parsed_data = deserializer(StringIO(content))
+        return parsed_data, serializer(parsed_data), ownership, permissions, new_files_ownership
+
+    originals = _map_parallel(read, files)
+    parsed_data_list = [parsed_data for parsed_data, *_ in originals]
+    yield parsed_data_list
+
+    def write(args):
+        (remoter, remote_path), (_, original_content, ownership, permissions, new_files_ownership), parsed_data = args
+        content = serializer(parsed_data)
+        if original_content == content:
+            LOGGER.debug("Content of '%s' wasn't changed", remote_path)
+            return
+        LOGGER.debug("New content of `%s':\n%s", remote_path, content)
+
+        # The new file is owned by the user who writes it, and only root can give it to another user.
+        chown = preserve_ownership and ownership != new_files_ownership
+        _write_remote_file(remoter=remoter,
+                           remote_path=remote_path,
+                           content=content,
+                           sudo=sudo or chown,
+                           ownership=ownership if chown else None,
+                           permissions=permissions if preserve_permissions else None)
+
+    _map_parallel(write, list(zip(files, originals, parsed_data_list)))
+
+
+@contextlib.contextmanager
+def remote_file(remoter, remote_path, serializer=StringIO.getvalue, deserializer=read_to_stringio, sudo=False,
+                preserve_ownership=True, preserve_permissions=True):
+    with remote_files(files=[(remoter, remote_path)],
+                      serializer=serializer,
+                      deserializer=deserializer,
+                      sudo=sudo,
+                      preserve_ownership=preserve_ownership,
+                      preserve_permissions=preserve_permissions) as (parsed_data, ):
+        yield parsed_data
 
 
 def yaml_file_to_dict(fobj):
@@ -20,17 +20,16 @@ from .libssh2_client.exceptions import AuthenticationException, UnknownHostExcep
     FailedToReadCommandOutput, CommandTimedOut, FailedToRunCommand, OpenChannelTimeout, SocketRecvError, \
     UnexpectedExit, Failure
 from .base import RetryableNetworkException
+from .connection_pool import SSHConnectionPool
 from .remote_base import RemoteCmdRunnerBase
 
 
 class RemoteLibSSH2CmdRunner(RemoteCmdRunnerBase, ssh_transport='libssh2'):  # pylint: disable=too-many-instance-attributes
     """Remoter that mimic RemoteCmdRunner, under the hood it runs libssh2 client, instead of paramiko
-    Main problem in libssh2 - is that it is not thread safe, we mitigate this problem by having
-      _connection_thread_map - a dictionary in which we bind thread to the libssh2 session.
-    Whenever remoter read self.connection, we return value from _connection_thread_map associated with current thread,
-      And if it is not there, we create it.
+    Main problem in libssh2 - is that it is not thread safe, we mitigate this problem by leasing each libssh2 session
+      from the connection pool to one command at a time.  Sessions are still reused by all threads.
     """
-    connection: LibSSH2Client
+    connection_pool = SSHConnectionPool(max_channels=1)
     exception_unexpected = UnexpectedExit
     exception_failure = Failure
     exception_retryable = (
@@ -52,28 +51,17 @@ class RemoteLibSSH2CmdRunner(RemoteCmdRunnerBase, ssh_transport='libssh2'):  # p
         end_time = time.perf_counter() + timeout
         while time.perf_counter() <= end_time:
             try:
-                if self.connection.check_if_alive(timeout):
-                    return True
+                with self._lease_connection() as connection:
+                    if connection.check_if_alive(timeout):
+                        return True
             except Exception:  # pylint: disable=broad-except
-                try:
-                    self.connection.close()
-                    self.connection.open(timeout)
-                except Exception:  # pylint: disable=broad-except
-                    pass
+                # Failed connection is retired by the pool and a new one will be opened on the next try.
+                pass
         return False
 
     def _run_on_retryable_exception(self, exc: Exception, new_session: bool) -> bool:
         self.log.error(exc)
-        if isinstance(exc, FailedToRunCommand) and not new_session:
-            self.log.debug('Reestablish the session...')
-            try:
-                self.connection.disconnect()
-            except Exception:  # pylint: disable=broad-except
-                pass
-            try:
-                self.connection.connect()
-            except Exception:  # pylint: disable=broad-except
-                pass
+        # A session which failed to run the command is retired by the connection pool already.
         if self._is_error_retryable(str(exc)) or isinstance(exc, self.exception_retryable):
             raise RetryableNetworkException(str(exc), original=exc)
         return True
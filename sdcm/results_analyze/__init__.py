@@ -17,6 +17,7 @@ import os
 import math
 import pprint
 import logging
+import functools
 import collections
 
 from datetime import datetime
@@ -32,6 +33,7 @@ from sdcm.sct_events import Severity
 from sdcm.utils.es_queries import QueryFilter, PerformanceFilterYCSB, PerformanceFilterScyllaBench, \
     PerformanceFilterCS, CDCQueryFilterCS, LatencyWithNemesisQueryFilter
 from test_lib.utils import MagicList, get_data_by_path
+from .results_cache import ResultsCache, ResultsTable
 from .test import TestResultClass
 
 
@@ -560,6 +562,73 @@ class PerformanceResultsAnalyzer(BaseResultsAnalyzer):
                     param, src[param], dst[param], version_dst))
         return cmp_res
 
+    def _best_results_per_version(self, results: ResultsTable, rows=None, exclude_test_id=None):
+        """
+        Group results by Scylla version and find the best and the latest results of each version
+        :param results: table of test documents, as filtered by `_query_filter()'
+        :param rows: rows of the table to use (all rows by default)
+        :param exclude_test_id: test id to skip (the current test)
+        :return: dictionary with the best results, ids of the best tests and the latest results for each version
+
+        Example:
+        group_by_version = {
+            "2.3.rc1": {
+                "stats_best": {
+                    "op rate": 15034.3,
+                    "latency mean": 1.3,
+                },
+                "best_test_id": {
+                    "op rate": {"commit": "9b4a0a287", "date": "2020-02-02"},
+                    "latency mean": {"commit": "9b4a0a287", "date": "2020-02-02"},
+                },
+                "latest": {
+                    "test_stats": {"op rate": 14034.3, "latency mean": 1.4},
+                    "version": {"op rate": {"commit": "1a2b3c4d5", "date": "2020-02-10"}, ...},
+                },
+            }
+        }
+        """
+        versions = results.coalesce(("versions", "scylla-server", "version"),
+                                    ("versions", "scylla-enterprise-server", "version"),
+                                    ("versions", "version"))
+        dates = results.coalesce(("versions", "scylla-server", "date"),
+                                 ("versions", "scylla-enterprise-server", "date"),
+                                 ("versions", "date"))
+        commits = results.coalesce(("versions", "scylla-server", "commit_id"),
+                                   ("versions", "scylla-enterprise-server", "commit_id"),
+                                   ("versions", "commit_id"))
+        stats_average = [results.column("results", "stats_average", param) for param in self.PARAMS]
+        # same as in `_test_stats()': use total value for op rate instead of the average one
+        stats = dict(zip(self.PARAMS, [results.column("results", "stats_total", self.PARAMS[0])] + stats_average[1:]))
+        valid = [all(value not in (None, '') for value in row_stats) for row_stats in zip(*stats_average)]
+        rows = [row for row in (range(len(results)) if rows is None else rows)
+                if valid[row] and versions[row] is not None and stats[self.PARAMS[0]][row] is not None and
+                results.ids[row] != exclude_test_id]
+
+        def version_info(row):
+            formatted_date = datetime.strptime(dates[row], "%Y%m%d").strftime("%Y-%m-%d")
+            return {"commit": commits[row], "date": formatted_date}
+
+        group_by_version = {}
+        for version, version_rows in results.group_by(versions, rows).items():
+            stats_best, best_test_id = {}, {}
+            for param, values in stats.items():
+                stats_best[param] = best = functools.reduce(
+                    lambda best, value, param=param: self._get_best_value(param, value, best),
+                    (values[row] for row in version_rows), 0)
+                # the last of the best tests, as a sequential scan of the results would find
+                best_test_id[param] = version_info(max(row for row in version_rows if values[row] == best))
+            latest_row = max(version_rows, key=lambda row: (dates[row], row))
+            group_by_version[version] = {
+                "stats_best": stats_best,
+                "best_test_id": best_test_id,
+                "latest": {
+                    "test_stats": {param: values[latest_row] for param, values in stats.items()},
+                    "version": {param: version_info(latest_row) for param in self.PARAMS},
+                },
+            }
+        return group_by_version
+
     # pylint: disable=too-many-arguments
     def check_regression(self, test_id, is_gce=False, email_subject_postfix=None, use_wide_query=False, lastyear=False):
         """
@@ -583,8 +652,8 @@ class PerformanceResultsAnalyzer(BaseResultsAnalyzer):
         if not test_stats:
             return False
 
-        # filter tests
-        query = self._query_filter(doc, is_gce, use_wide_query, lastyear)
+        # filter tests; the last year bound moves every day, so it's applied to the cached results instead of the query
+        query = self._query_filter(doc, is_gce, use_wide_query)
         if not query:
             return False
         self.log.debug("Query to ES: %s", query)
@@ -593,87 +662,28 @@ class PerformanceResultsAnalyzer(BaseResultsAnalyzer):
                        'hits.hits._source.results.stats_total',
                        'hits.hits._source.results.throughput',
                        'hits.hits._source.versions']
-        tests_filtered = self._es.search(index=self._es_index, q=query, filter_path=filter_path,  # pylint: disable=unexpected-keyword-arg
-                                         size=self._limit, request_timeout=30)
-
-        if not tests_filtered:
+        results_cache = ResultsCache(es=self._es, index=self._es_index, query=query, filter_path=filter_path)
+        results_cache.sync()
+        results = results_cache.table
+        rows = range(len(results))
+        if lastyear:
+            year_ago = QueryFilter.last_year_start_date()
+            dates = results.column("versions", "scylla-server", "date")
+            rows = [row for row in rows if dates[row] is not None and str(dates[row]) > year_ago]
+        rows = results.latest_rows(rows, limit=self._limit)
+        if not rows:
             self.log.info('Cannot find tests with the same parameters as {}'.format(test_id))
             return False
         # get the best res for all versions of this job
-        group_by_version = {}
-        # Example:
-        # group_by_version = {
-        #     "2.3.rc1": {
-        #         "tests": {  # SortedDict(),
-        #             "20180726": {
-        #                 "latency 99th percentile": 10.3,
-        #                 "op rate": 15034.3
-        #                 #...
-        #             }
-        #         },
-        #
-        #         "stats_best": {
-        #             "op rate": 0,
-        #             "latency mean": 0,
-        #         },
-        #         "best_test_id": {
-        #             "op rate": {"commit": 9b4a0a287", "date": "2020.02.02"},
-        #             "latency mean": {"commit": 9b4a0a287", "date": "2020.02.02"},
-        #
-        #         }
-        #     }
-        # }
-        # Find best results for each version
-        for row in tests_filtered['hits']['hits']:
-            if row['_id'] == test_id:  # filter the current test
-                continue
-            if '_source' not in row:  # non-valid record?
-                self.log.error('Skip non-valid test: %s', row['_id'])
-                continue
-            version_info = self._test_version(row)
-            if not version_info:
-                continue
-            version = version_info['version']
-            curr_test_stats = self._test_stats(row)
-            if not curr_test_stats:
-                continue
-
-            formated_version_date = datetime.strptime(version_info['date'], "%Y%m%d").strftime("%Y-%m-%d")
-            version_info_data = {"commit": version_info['commit_id'], "date": formated_version_date}
-
-            if version not in group_by_version:
-                group_by_version[version] = {"tests": SortedDict(), "stats_best": {}, "best_test_id": {}}
-                group_by_version[version]['stats_best'] = {k: 0 for k in self.PARAMS}
-                group_by_version[version]['best_test_id'] = {
-                    k: version_info_data for k in self.PARAMS}
-            group_by_version[version]['tests'][version_info['date']] = {
-                "test_stats": curr_test_stats,
-                "version": {k: version_info_data for k in self.PARAMS}
-            }
-            old_best = group_by_version[version]['stats_best']
-            group_by_version[version]['stats_best'] =\
-                {k: self._get_best_value(k, curr_test_stats[k], old_best[k])
-                 for k in self.PARAMS if k in curr_test_stats and k in old_best}
-            # replace best test id if best value changed
-            for k in self.PARAMS:
-                if k in curr_test_stats and k in old_best and\
-                        group_by_version[version]['stats_best'][k] == curr_test_stats[k]:
-                    group_by_version[version]['best_test_id'][k] = version_info_data
+        group_by_version = self._best_results_per_version(results, rows=rows, exclude_test_id=test_id)
         res_list = []
         # compare with the best in the test version and all the previous versions
         test_version_info = self._test_version(doc)
         test_version = test_version_info['version']
 
         for version, group in group_by_version.items():
-            if version == test_version and not group_by_version[test_version]['tests']:
-                self.log.info('No previous tests in the current version {} to compare'.format(test_version))
-                continue
             cmp_res = self.cmp(test_stats, group['stats_best'], version, group['best_test_id'])
-            latest_version_test = group["tests"].peekitem(index=-1)[1]
-            latest_res = self.cmp(test_stats,
-                                  latest_version_test["test_stats"],
-                                  version,
-                                  latest_version_test["version"])
+            latest_res = self.cmp(test_stats, group['latest']['test_stats'], version, group['latest']['version'])
             res_list.append({"best": cmp_res, "last": latest_res})
         if not res_list:
             self.log.info('No test results to compare with')
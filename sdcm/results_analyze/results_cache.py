@@ -0,0 +1,241 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import gzip
+import json
+import time
+import heapq
+import hashlib
+import logging
+import contextlib
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+RESULTS_CACHE_DIR = os.path.expanduser("~/.cache/sct/results")
+RESULTS_CACHE_FORMAT_VERSION = 1
+START_TIME_FIELD = "test_details.start_time"
+SYNC_PAGE_SIZE = 1000
+SYNC_OVERLAP = 2 * 24 * 3600  # documents are updated till the end of a test, re-read ones of recently started tests
+RESULTS_CACHE_MAX_AGE = 30 * 24 * 3600  # cache files which weren't used for this time are removed
+
+LOGGER = logging.getLogger(__name__)
+
+FieldPath = Tuple[str, ...]
+
+
+def flatten_doc(doc: dict, prefix: FieldPath = ()) -> Iterator[Tuple[FieldPath, Any]]:
+    """Yield (path, value) for each leaf field of a document.  Lists are leaf values."""
+
+    for key, value in doc.items():
+        if isinstance(value, dict) and value:
+            yield from flatten_doc(value, prefix + (key, ))
+        else:
+            yield prefix + (key, ), value
+
+
+def unflatten_doc(fields: Iterable[Tuple[FieldPath, Any]]) -> dict:
+    doc = {}
+    for path, value in fields:
+        node = doc
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return doc
+
+
+def prune_results_cache(cache_dir: str, max_age: float = RESULTS_CACHE_MAX_AGE) -> None:
+    """Remove cache files which weren't used for `max_age' seconds."""
+
+    expire_time = time.time() - max_age
+    try:
+        entries = list(os.scandir(cache_dir))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        with contextlib.suppress(FileNotFoundError):
+            if entry.name.endswith(".json.gz") and entry.stat().st_mtime < expire_time:
+                LOGGER.debug("Remove unused results cache %s", entry.path)
+                os.remove(entry.path)
+
+
+class ResultsTable:
+    """Documents stored by columns: a list of values for each leaf field, with `None' for a missing field.
+
+    Rows are kept in the order documents were added, an updated document keeps its row.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.columns: Dict[FieldPath, list] = {}
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def upsert(self, doc_id: str, source: dict) -> None:
+        if (row := self._rows.get(doc_id)) is None:
+            row = self._rows[doc_id] = len(self.ids)
+            self.ids.append(doc_id)
+            for values in self.columns.values():
+                values.append(None)
+        else:
+            for values in self.columns.values():
+                values[row] = None
+        for path, value in flatten_doc(source):
+            if (values := self.columns.get(path)) is None:
+                values = self.columns[path] = [None] * len(self.ids)
+            values[row] = value
+
+    def column(self, *path: str) -> list:
+        if (values := self.columns.get(path)) is None:
+            return [None] * len(self.ids)
+        return values
+
+    def coalesce(self, *paths: FieldPath) -> list:
+        """Return a column of the first non-missing value of given fields in each row."""
+
+        values = self.column(*paths[0])
+        for path in paths[1:]:
+            values = [value if value is not None else other for value, other in zip(values, self.column(*path))]
+        return values
+
+    @staticmethod
+    def group_by(keys: list, rows: Iterable[int]) -> Dict[Any, List[int]]:
+        """Return rows grouped by a key column, groups are in the order of the first row of each."""
+
+        groups = defaultdict(list)
+        for row in rows:
+            groups[keys[row]].append(row)
+        return groups
+
+    def latest_rows(self, rows: Iterable[int], limit: int) -> List[int]:
+        """Return up to `limit' of given rows which have the latest start time, in the table order.
+
+        Rows without start time are the oldest ones.
+        """
+
+        start_times = self.column(*START_TIME_FIELD.split("."))
+        return sorted(heapq.nlargest(limit, rows, key=lambda row: (start_times[row] is not None,
+                                                                     start_times[row] or 0, row)))
+
+    def doc(self, row: int) -> dict:
+        return {"_id": self.ids[row],
+                "_source": unflatten_doc((path, values[row]) for path, values in self.columns.items()
+                                         if values[row] is not None)}
+
+    def to_dict(self) -> dict:
+        return {"ids": self.ids, "columns": [[list(path), values] for path, values in self.columns.items()]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResultsTable":
+        table = cls()
+        table.ids = data["ids"]
+        table.columns = {tuple(path): values for path, values in data["columns"]}
+        table._rows = {doc_id: row for row, doc_id in enumerate(table.ids)}  # pylint: disable=protected-access
+        return table
+
+
+class ResultsCache:
+    """Documents found by an Elasticsearch query, cached in a local file and synced by start time of tests.
+
+    Only documents of tests started since the last sync (with an overlap for tests which were still running) are
+    read from Elasticsearch.  Documents without `test_details.start_time' can't be synced this way, so they are read
+    again on each sync.
+
+    The query is a part of the cache file name, so it shouldn't have bounds which move with time (e.g., a date range
+    relative to today): apply them to the cached documents instead.  Cache files which weren't used for
+    RESULTS_CACHE_MAX_AGE are removed.
+    """
+
+    def __init__(self, es, index: str, query: str, filter_path: Optional[List[str]] = None,
+                 cache_dir: Optional[str] = None):
+        self.es = es  # pylint: disable=invalid-name
+        self.index = index
+        self.query = query
+        self.filter_path = filter_path
+        key = hashlib.sha1(json.dumps([index, query, filter_path]).encode()).hexdigest()
+        self.cache_dir = cache_dir or RESULTS_CACHE_DIR
+        self.path = os.path.join(self.cache_dir, f"{index}-{key}.json.gz")
+        self.table = ResultsTable()
+        self.synced_until: Optional[float] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignore broken results cache %s: %s", self.path, exc)
+            return
+        if data.get("version") != RESULTS_CACHE_FORMAT_VERSION:
+            return
+        self.table = ResultsTable.from_dict(data["table"])
+        self.synced_until = data["synced_until"]
+        with contextlib.suppress(OSError):
+            os.utime(self.path)  # mark the cache file as used
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as cache_file:
+            json.dump({"version": RESULTS_CACHE_FORMAT_VERSION,
+                       "synced_until": self.synced_until,
+                       "table": self.table.to_dict()}, cache_file)
+        os.replace(tmp_path, self.path)
+        prune_results_cache(self.cache_dir)
+
+    def _search(self, condition: str) -> List[dict]:
+        body = {
+            "query": {"query_string": {"query": f"({self.query}) AND {condition}"}},
+            "sort": [{START_TIME_FIELD: "asc"}],
+            "size": SYNC_PAGE_SIZE,
+        }
+        filter_path = self.filter_path and [*self.filter_path, "hits.hits._id", f"hits.hits._source.{START_TIME_FIELD}"]
+        result = self.es.search(index=self.index, body=body, filter_path=filter_path, request_timeout=30)
+        return result.get("hits", {}).get("hits", []) if result else []
+
+    def sync(self) -> int:
+        """Read new and recently updated documents from Elasticsearch and return the number of them."""
+
+        since = 0 if self.synced_until is None else self.synced_until - SYNC_OVERLAP
+        fetched = 0
+        while hits := self._search(f"{START_TIME_FIELD}:>={since}"):
+            for hit in hits:
+                self.table.upsert(hit["_id"], hit.get("_source", {}))
+            fetched += len(hits)
+            last_start_time = hits[-1]["_source"]["test_details"]["start_time"]
+            self.synced_until = max(self.synced_until or 0, last_start_time)
+            if len(hits) < SYNC_PAGE_SIZE:
+                break
+            if last_start_time == since:
+                LOGGER.warning("More than %s documents with the same start time %s, some of them are not cached",
+                               SYNC_PAGE_SIZE, since)
+                break
+            since = last_start_time
+        if hits := self._search(f"NOT _exists_:{START_TIME_FIELD}"):
+            if len(hits) == SYNC_PAGE_SIZE:
+                LOGGER.warning("More than %s documents without start time, some of them are not cached", SYNC_PAGE_SIZE)
+            for hit in hits:
+                self.table.upsert(hit["_id"], hit.get("_source", {}))
+            fetched += len(hits)
+        if fetched:
+            self._save()
+        LOGGER.debug("Read %s documents for the results cache %s (%s documents)", fetched, self.path, len(self.table))
+        return fetched
+
+    def docs(self) -> Iterator[dict]:
+        for row in range(len(self.table)):
+            yield {"_index": self.index, **self.table.doc(row)}
@@ -20,6 +20,7 @@ from sdcm.es import ES
 from test_lib.utils import get_class_by_path
 from .base import ClassBase, __DEFAULT__
 from .metrics import ScyllaTestMetrics
+from .results_cache import ResultsCache
 
 
 LOGGER = logging.getLogger(__name__)
@@ -559,13 +560,10 @@ class TestResultClass(ClassBase):
         output = []
         try:
             es_query = self.get_same_tests_query()
-            es_result = ES().search(  # pylint: disable=unexpected-keyword-arg; pylint doesn't understand Elasticsearch code
-                index=self._es_data['_index'],
-                q=es_query,
-                size=10000,
-                filter_path=filter_path,
-            )
-            es_result = es_result.get('hits', {}).get('hits', None) if es_result else None
+            results_cache = ResultsCache(
+                es=ES(), index=self._es_data['_index'], query=es_query, filter_path=filter_path)
+            results_cache.sync()
+            es_result = list(results_cache.docs())
         except Exception as exc:  # pylint: disable=broad-except
             LOGGER.warning("Unable to find ES data: %s", exc)
             es_result = None
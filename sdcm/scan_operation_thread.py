@@ -1,25 +1,211 @@
 import json
+import hashlib
 import logging
 import random
-import tempfile
 import threading
 import time
 from abc import abstractmethod
 from typing import Optional
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
 
 from cassandra import ConsistencyLevel
 from cassandra.cluster import ResponseFuture  # pylint: disable=no-name-in-module
+from cassandra.metadata import protect_name  # pylint: disable=no-name-in-module
 from cassandra.query import SimpleStatement  # pylint: disable=no-name-in-module
 
 from sdcm import wait
 from sdcm.cluster import BaseScyllaCluster, BaseCluster
-from sdcm.remote import LocalCmdRunner
 from sdcm.utils.common import get_partition_keys, get_table_clustering_order
 from sdcm.sct_events import Severity
 from sdcm.sct_events.database import FullScanEvent, FullPartitionScanReversedOrderEvent, FullPartitionScanEvent
 
 ERROR_SUBSTRINGS = ("timed out", "unpack requires", "timeout")
-LOCAL_CMD_RUNNER = LocalCmdRunner()
+MIN_TOKEN = -2 ** 63  # Murmur3Partitioner never returns it as a token of a partition
+MAX_TOKEN = 2 ** 63 - 1
+FULL_SCAN_TOKEN_RANGES = 64
+FULL_SCAN_MAX_IN_FLIGHT_PAGES = 8
+
+
+def split_token_ring(ranges_count: int) -> list[tuple[int, int]]:
+    """Split the token ring to `ranges_count' contiguous (start, end] ranges."""
+
+    step = (MAX_TOKEN - MIN_TOKEN) // ranges_count
+    bounds = [MIN_TOKEN + step * i for i in range(ranges_count)] + [MAX_TOKEN]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def get_partition_key_names(session, ks_cf: str) -> list[str]:
+    keyspace, table = (name.strip('"') for name in ks_cf.split(".", 1))
+    table_metadata = session.cluster.metadata.keyspaces[keyspace].tables[table]
+    return [protect_name(column.name) for column in table_metadata.partition_key]
+
+
+class LatencyHistogram:
+    """Histogram of latencies with power-of-two milliseconds buckets."""
+
+    def __init__(self):
+        self.buckets = Counter()  # upper bound of a bucket in ms -> number of samples
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, latency: float) -> None:
+        latency_ms = latency * 1000
+        self.buckets[1 << int(latency_ms).bit_length()] += 1
+        self.count += 1
+        self.max = max(self.max, latency_ms)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> int:
+        """Return the upper bound (in ms) of the bucket which contains the percentile."""
+
+        threshold = self.count * percent / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return bucket
+        return 0
+
+    def __str__(self):
+        buckets = ", ".join(f"<{bucket}ms: {self.buckets[bucket]}" for bucket in sorted(self.buckets))
+        return f"count={self.count} p50<{self.percentile(50)}ms p99<{self.percentile(99)}ms " \
+               f"max={self.max:.1f}ms [{buckets}]"
+
+
+@dataclass
+class TokenRangeStats:
+    start: int
+    end: int
+    rows: int = 0
+    pages: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+class TokenRangeScan:
+    """Full scan of a table split to token ranges which are queried concurrently.
+
+    Each of `max_in_flight_pages' workers pages through one range at a time, so no more than `max_in_flight_pages'
+    pages are requested at once.  Latency of each page is recorded to the histogram of its range.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, session, ks_cf: str, query_suffix: str = "", ranges_count: int = FULL_SCAN_TOKEN_RANGES,
+                 max_in_flight_pages: int = FULL_SCAN_MAX_IN_FLIGHT_PAGES, page_size: int = 10000,
+                 termination_event: threading.Event = None):
+        self.session = session
+        self.ks_cf = ks_cf
+        self.query_suffix = query_suffix
+        self.max_in_flight_pages = max_in_flight_pages
+        self.page_size = page_size
+        self.termination_event = termination_event or threading.Event()
+        self.ranges = [TokenRangeStats(start=start, end=end) for start, end in split_token_ring(ranges_count)]
+        self.pages = 0
+        self._token = None
+        self._max_pages = 0
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def rows(self) -> int:
+        return sum(token_range.rows for token_range in self.ranges)
+
+    @property
+    def latency(self) -> LatencyHistogram:
+        histogram = LatencyHistogram()
+        for token_range in self.ranges:
+            histogram.merge(token_range.latency)
+        return histogram
+
+    def range_query(self, token_range: TokenRangeStats) -> str:
+        token = self._token
+        return f"select * from {self.ks_cf} where {token} > {token_range.start} and {token} <= {token_range.end}" \
+               f"{self.query_suffix}"
+
+    def run(self, max_pages: int = 0) -> None:
+        """Scan all token ranges, or stop after `max_pages' pages in total if it's not 0."""
+
+        self._token = f"token({', '.join(get_partition_key_names(self.session, self.ks_cf))})"
+        self._max_pages = max_pages
+        with ThreadPoolExecutor(max_workers=self.max_in_flight_pages, thread_name_prefix="TokenRangeScan") as executor:
+            for _ in executor.map(self._scan_range, self.ranges):
+                pass
+
+    def _next_page_allowed(self) -> bool:
+        if self._stopped.is_set() or self.termination_event.is_set():
+            return False
+        with self._lock:
+            if self._max_pages and self.pages >= self._max_pages:
+                return False
+            self.pages += 1
+            return True
+
+    def _record_page(self, token_range: TokenRangeStats, result, start_time: float) -> None:
+        token_range.latency.record(time.perf_counter() - start_time)
+        token_range.pages += 1
+        token_range.rows += len(result.current_rows)
+
+    def _scan_range(self, token_range: TokenRangeStats) -> None:
+        if not self._next_page_allowed():
+            return
+        try:
+            start_time = time.perf_counter()
+            result = self.session.execute(SimpleStatement(
+                self.range_query(token_range),
+                fetch_size=self.page_size,
+                consistency_level=ConsistencyLevel.ONE))
+            self._record_page(token_range, result, start_time)
+            while result.has_more_pages and self._next_page_allowed():
+                start_time = time.perf_counter()
+                result.fetch_next_page()
+                self._record_page(token_range, result, start_time)
+        except Exception:
+            self._stopped.set()
+            raise
+
+
+class RowsDigest:
+    """Digest of a query output which is updated row by row.
+
+    Only a short hash of each row is kept, so the output can be reversed and compared with another one without
+    storing the rows.
+    """
+
+    hash_size = 8
+
+    def __init__(self, hashes: bytes = b""):
+        self.hashes = bytearray(hashes)
+
+    def add(self, row: str) -> None:
+        self.hashes += hashlib.blake2b(row.encode(), digest_size=self.hash_size).digest()
+
+    def __len__(self):
+        return len(self.hashes) // self.hash_size
+
+    def __eq__(self, other):
+        return isinstance(other, RowsDigest) and self.hashes == other.hashes
+
+    @property
+    def digest(self) -> str:
+        return hashlib.blake2b(self.hashes, digest_size=16).hexdigest()
+
+    def row_hash(self, index: int) -> bytes:
+        return bytes(self.hashes[index * self.hash_size:(index + 1) * self.hash_size])
+
+    def reversed(self, limit: int = None) -> "RowsDigest":
+        rows = [self.row_hash(index) for index in reversed(range(len(self)))]
+        return RowsDigest(b"".join(rows[:limit or None]))
+
+    def first_mismatch(self, other: "RowsDigest") -> Optional[int]:
+        for index in range(max(len(self), len(other))):
+            if self.row_hash(index) != other.row_hash(index):
+                return index
+        return None
 
 
 # pylint: disable=too-many-instance-attributes
@@ -144,13 +330,41 @@ class ScanOperationThread:
 
 
 class FullScanThread(ScanOperationThread):
+    """Run a full scan of a table split to token ranges, which are queried concurrently (see `TokenRangeScan'.)"""
 
-    def __init__(self, **kwargs):
+    def __init__(self, token_ranges: int = FULL_SCAN_TOKEN_RANGES,
+                 max_in_flight_pages: int = FULL_SCAN_MAX_IN_FLIGHT_PAGES, **kwargs):
         super().__init__(scan_event=FullScanEvent, **kwargs)
+        self.token_ranges = token_ranges
+        self.max_in_flight_pages = max_in_flight_pages
 
     def randomly_form_cql_statement(self) -> Optional[str]:
-        cmd = self.randomly_bypass_cache(cmd=self.basic_query).format(self.ks_cf)
-        return self.randomly_add_timeout(cmd)
+        return self.randomly_add_timeout(self.randomly_bypass_cache(cmd=self.basic_query.format(self.ks_cf)))
+
+    def execute_query(self, session, cmd: str) -> TokenRangeScan:
+        """Run the full scan query `cmd' as queries of token ranges with the same options (e.g., `bypass cache'.)"""
+
+        basic_query = self.basic_query.format(self.ks_cf)
+        if not cmd.startswith(basic_query):
+            raise ValueError(f'Full scan query should start with "{basic_query}": "{cmd}"')
+        self.log.info('Will run command "%s" split to %s token ranges', cmd, self.token_ranges)
+        return TokenRangeScan(session=session,
+                              ks_cf=self.ks_cf,
+                              query_suffix=cmd[len(basic_query):],
+                              ranges_count=self.token_ranges,
+                              max_in_flight_pages=self.max_in_flight_pages,
+                              page_size=self.page_size,
+                              termination_event=self.termination_event)
+
+    def fetch_result_pages(self, result: TokenRangeScan, read_pages):
+        self.log.debug('Will fetch up to %s result pages.."', read_pages)
+        result.run(max_pages=read_pages)
+        self.number_of_rows_read = result.rows
+        for token_range in result.ranges:
+            self.log.debug('Token range (%s, %s]: %s rows in %s pages, latency: %s',
+                           token_range.start, token_range.end, token_range.rows, token_range.pages,
+                           token_range.latency)
+        self.log.info('Fetched %s rows in %s pages, page latency: %s', result.rows, result.pages, result.latency)
 
 
 class FullPartitionScanThread(ScanOperationThread):
@@ -187,10 +401,8 @@ class FullPartitionScanThread(ScanOperationThread):
                                                'no_filter': {'count': 0, 'total_scan_duration': 0}}
         self.ck_filter = ''
         self.limit = ''
-        self.reversed_query_output = tempfile.NamedTemporaryFile(mode='w+', delete=False,  # pylint: disable=consider-using-with
-                                                                 encoding='utf-8')
-        self.normal_query_output = tempfile.NamedTemporaryFile(mode='w+', delete=False,  # pylint: disable=consider-using-with
-                                                               encoding='utf-8')
+        self.reversed_query_output = RowsDigest()
+        self.normal_query_output = RowsDigest()
 
     def get_table_clustering_order(self) -> str:
         for node in self.db_cluster.nodes:
@@ -294,46 +506,23 @@ class FullPartitionScanThread(ScanOperationThread):
         session.default_consistency_level = ConsistencyLevel.ONE
         return session.execute_async(cmd)
 
-    def reset_output_files(self):
-        self.normal_query_output.close()
-        self.reversed_query_output.close()
-        self.reversed_query_output = tempfile.NamedTemporaryFile(mode='w+', delete=False,  # pylint: disable=consider-using-with
-                                                                 encoding='utf-8')
-        self.normal_query_output = tempfile.NamedTemporaryFile(mode='w+', delete=False,  # pylint: disable=consider-using-with
-                                                               encoding='utf-8')
-
-    def _compare_output_files(self):
-        self.normal_query_output.flush()
-        self.reversed_query_output.flush()
-
-        with tempfile.NamedTemporaryFile(mode='w+', delete=True, encoding='utf-8') as reorder_normal_query_output:
-            cmd = f'tac {self.normal_query_output.name}'
-            if self.limit:
-                cmd += f' | head -n {self.limit}'
-            cmd += f' > {reorder_normal_query_output.name}'
-            LOCAL_CMD_RUNNER.run(cmd=cmd, ignore_status=True)
-            reorder_normal_query_output.flush()
-            LOCAL_CMD_RUNNER.run(cmd=f'cp {reorder_normal_query_output.name} {self.normal_query_output.name}',
-                                 ignore_status=True)
-            self.normal_query_output.flush()
-
-        file_names = f' {self.normal_query_output.name} {self.reversed_query_output.name}'
-        diff_cmd = f"diff -y --suppress-common-lines {file_names}"
-        self.log.info("Comparing scan queries output files by: %s", diff_cmd)
-        result = LOCAL_CMD_RUNNER.run(cmd=diff_cmd, ignore_status=True)
-        if not result.stderr:
-            if not result.stdout:
-                self.log.info("Compared output of normal and reversed queries is identical!")
-            else:
-                self.log.warning("Normal and reversed queries output differs: \n%s", result.stdout.strip())
-                ls_cmd = f"ls -alh {file_names}"
-                head_cmd = f"head {file_names}"
-                for cmd in [ls_cmd, head_cmd]:
-                    result = LOCAL_CMD_RUNNER.run(cmd=cmd, ignore_status=True)
-                    if result.stdout:
-                        stdout = result.stdout.strip()
-                        self.log.info("%s command output is: \n%s", cmd, stdout)
-        self.reset_output_files()
+    def reset_digests(self):
+        self.reversed_query_output = RowsDigest()
+        self.normal_query_output = RowsDigest()
+
+    def _compare_digests(self):
+        """Compare digests of the reversed query output and of the normal query output read backwards."""
+
+        normal_query_output = self.normal_query_output.reversed(limit=self.limit or None)
+        if normal_query_output == self.reversed_query_output:
+            self.log.info("Compared output of normal and reversed queries is identical!")
+        else:
+            self.log.warning("Normal and reversed queries output differs: normal query has %s rows (digest %s), "
+                             "reversed query has %s rows (digest %s), first different row is #%s",
+                             len(normal_query_output), normal_query_output.digest,
+                             len(self.reversed_query_output), self.reversed_query_output.digest,
+                             normal_query_output.first_mismatch(self.reversed_query_output))
+        self.reset_digests()
 
     def run_scan_operation(self, cmd: str = None, update_stats: bool = True):  # pylint: disable=too-many-locals
         queries = self.randomly_form_cql_statement()
@@ -351,7 +540,7 @@ class FullPartitionScanThread(ScanOperationThread):
             self.log.debug('Executing the normal query: %s', normal_query)
             self.scan_event = FullPartitionScanEvent
             super().run_scan_operation(cmd=normal_query)
-            self._compare_output_files()
+            self._compare_digests()
 
     def update_stats(self):
         if self.scan_event == FullPartitionScanReversedOrderEvent:
@@ -377,19 +566,19 @@ class PagedResultHandler:
         row_string += str(getattr(row, self.scan_operation_thread.ck_name))
         if include_data_column:
             row_string += str(getattr(row, self.scan_operation_thread.data_column_name))
-        return f'{row_string}\n'
+        return row_string
 
     def handle_page(self, rows):
         include_data_column = self.scan_operation_thread.full_partition_scan_params.get('include_data_column')
         if self.scan_operation_thread.scan_event == FullPartitionScanEvent:
             for row in rows:
-                self.scan_operation_thread.normal_query_output.write(
+                self.scan_operation_thread.normal_query_output.add(
                     self._row_to_string(row=row, include_data_column=include_data_column))
         elif self.scan_operation_thread.scan_event == FullPartitionScanReversedOrderEvent:
             self.scan_operation_thread.number_of_rows_read += len(rows)
             if self.scan_operation_thread.full_partition_scan_params['validate_data']:
                 for row in rows:
-                    self.scan_operation_thread.reversed_query_output.write(
+                    self.scan_operation_thread.reversed_query_output.add(
                         self._row_to_string(row=row, include_data_column=include_data_column))
 
         if self.future.has_more_pages and self.current_read_pages <= self.max_read_pages:
@@ -18,10 +18,12 @@ Handling Scylla-cluster-test configuration loading
 # pylint: disable=too-many-lines
 import os
 import ast
+import copy
+import hashlib
 import logging
 import getpass
 import pathlib
-from typing import List, Union, Set
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, Set
 
 from distutils.util import strtobool
 
@@ -97,6 +99,73 @@ def boolean(value):
         raise ValueError("{} isn't a boolean".format(type(value)))
 
 
+_CONFIG_FILES_CACHE: Dict[Tuple[Tuple[str, str], ...], dict] = {}
+
+
+def load_config_files(config_files: List[str]) -> dict:
+    """Load and merge config files using anyconfig.
+
+    Merged configs are cached by paths and content digests of the files, so the same files aren't parsed again
+    (e.g., `defaults/test_default.yaml' for each config linted by `sct.py lint-yamls'.)
+    """
+
+    try:
+        key = tuple((path, hashlib.sha1(pathlib.Path(path).read_bytes()).hexdigest()) for path in config_files)
+    except OSError:
+        return anyconfig.load(list(config_files))  # let anyconfig report the error
+    if key not in _CONFIG_FILES_CACHE:
+        _CONFIG_FILES_CACHE[key] = anyconfig.load(list(config_files))
+    return copy.deepcopy(_CONFIG_FILES_CACHE[key])
+
+
+class SCTConfigResolver:
+    """Lookups of cloud images and Scylla repos which are needed to resolve a configuration.
+
+    Results are memoized for the lifetime of the process, so the same lookup is done once for many configs (e.g.,
+    by `sct.py lint-yamls'.)  An object with the same methods can be passed to SCTConfiguration to stub them.
+    """
+
+    def __init__(self):
+        self._cache: Dict[tuple, Any] = {}
+
+    def _memoized(self, func: Callable, *args) -> Any:
+        # The function is a part of the key, so a result isn't reused if the function is patched (e.g., in a test.)
+        key = (func, *args)
+        if key not in self._cache:
+            self._cache[key] = func(*args)
+        return self._cache[key]
+
+    def get_scylla_ami_versions(self, region_name: str, arch: str) -> list:
+        return self._memoized(get_scylla_ami_versions, region_name, arch)
+
+    def get_branched_ami(self, scylla_version: str, region_name: str, arch: str) -> list:
+        return self._memoized(get_branched_ami, scylla_version, region_name, arch)
+
+    def get_scylla_gce_images_versions(self) -> list:
+        return self._memoized(get_scylla_gce_images_versions)
+
+    def get_branched_gce_images(self, scylla_version: str) -> list:
+        return self._memoized(get_branched_gce_images, scylla_version)
+
+    def get_scylla_azure_images(self, scylla_version: str, region_name: str) -> list:
+        return self._memoized(get_scylla_images, scylla_version, region_name)
+
+    def find_scylla_repo(self, scylla_version: str, dist_type: str, dist_version: Optional[str]) -> str:
+        return self._memoized(find_scylla_repo, scylla_version, dist_type, dist_version)
+
+    def resolve_latest_repo_symlink(self, url: str) -> str:
+        return self._memoized(resolve_latest_repo_symlink, url)
+
+    def get_branch_version(self, url: str) -> str:
+        return self._memoized(get_branch_version, url)
+
+    def ami_built_by_scylla(self, ami_id: str, region_name: str) -> bool:
+        return self._memoized(ami_built_by_scylla, ami_id, region_name)
+
+    def get_ami_tags(self, ami_id: str, region_name: str) -> dict:
+        return self._memoized(get_ami_tags, ami_id, region_name)
+
+
 class SCTConfiguration(dict):
     """
     Class the hold the SCT configuration
@@ -392,6 +461,11 @@ class SCTConfiguration(dict):
 
         dict(name="enable_test_profiling", env="SCT_ENABLE_TEST_PROFILING", type=bool,
              help="""Turn on sct profiling"""),
+        dict(name="test_profiling_mode", env="SCT_TEST_PROFILING_MODE", type=str,
+             choices=("cprofile", "sampling"),
+             help="""How to profile sct if `enable_test_profiling' is on: 'cprofile' traces all calls and is costly,
+                     'sampling' takes stacks of all threads every 10ms and dumps them as flamegraph
+                     collapsed stacks"""),
         dict(name="ssh_transport", env="SSH_TRANSPORT", type=str,
              help="""Set type of ssh library to use. Could be 'fabric' (default) or 'libssh2'"""),
         # should be removed once stress commands would be refactored
@@ -1400,10 +1474,20 @@ class SCTConfiguration(dict):
         'stress_cmd_lwt_d', 'stress_cmd_lwt_u', 'stress_cmd_lwt_i'
     ]
 
-    def __init__(self):
+    resolver = SCTConfigResolver()
+
+    def __init__(self, resolver: Optional[SCTConfigResolver] = None, resolve: bool = True):
+        """Load the configuration from config files and environment variables.
+
+        Cloud images and Scylla repos for `scylla_version', `oracle_scylla_version' and `new_version' are looked up
+        by `resolve()'.  Pass `resolve=False' to skip it if only the options from the files are needed.
+        """
+
         # pylint: disable=too-many-locals,too-many-branches,too-many-statements
         super().__init__()
         self.log = logging.getLogger(__name__)
+        if resolver is not None:
+            self.resolver = resolver
         env = self._load_environment_variables()
         config_files = env.get('config_files', [])
         config_files = [sct_abs_path(f) for f in config_files]
@@ -1415,11 +1499,11 @@ class SCTConfiguration(dict):
             backend_config_files += self.defaults_config_files[str(backend)]
 
         # 1) load the default backend config files
-        files = anyconfig.load(list(backend_config_files))
+        files = load_config_files(backend_config_files)
         anyconfig.merge(self, files)
 
         # 2) load the config files
-        files = anyconfig.load(list(config_files))
+        files = load_config_files(config_files)
         anyconfig.merge(self, files)
 
         regions_data = self.get('regions_data') or {}
@@ -1463,6 +1547,47 @@ class SCTConfiguration(dict):
                         else:
                             self[key] += " {}".format(value)
 
+        # 9) append username or ami_id_db_scylla_desc to the user_prefix
+        version_tag = self.get('ami_id_db_scylla_desc')
+        user_prefix = self.get('user_prefix')
+        if user_prefix:
+            if not version_tag:
+                version_tag = getpass.getuser()
+
+            self['user_prefix'] = "{}-{}".format(user_prefix, version_tag)[:35]
+
+        # 11) validate that supported instance_provision selected
+        if self.get('instance_provision') not in ['spot', 'on_demand', 'spot_fleet', 'spot_low_price', 'spot_duration']:
+            raise ValueError(f"Selected instance_provision type '{self.get('instance_provision')}' is not supported!")
+
+        # 12) spot_duration instance can be created for test duration
+        if self.get('instance_provision').lower() == "spot_duration":
+            test_duration = self.get('test_duration')
+            if test_duration:
+                assert test_duration <= MAX_SPOT_DURATION_TIME, \
+                    f'Test duration too long for spot_duration instance type. ' \
+                    f'Max possible test duration time for this instance type is {MAX_SPOT_DURATION_TIME} minutes'
+
+        # 13) validate authenticator parameters
+        if self.get('authenticator') and self.get('authenticator') == "PasswordAuthenticator":
+            authenticator_user = self.get("authenticator_user")
+            authenticator_password = self.get("authenticator_password")
+            if not (authenticator_password and authenticator_user):
+                raise ValueError("For PasswordAuthenticator authenticator authenticator_user and authenticator_password"
+                                 " have to be provided")
+
+        if resolve:
+            self.resolve()
+
+    def resolve(self):
+        """Look up cloud images and Scylla repos for the configured Scylla versions and export the configuration to
+        environment variables.
+        """
+
+        # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+        cluster_backend = self.get('cluster_backend')
+        region_names = self.region_names
+
         # 6) handle scylla_version if exists
         scylla_linux_distro = self.get('scylla_linux_distro')
         dist_type = scylla_linux_distro.split('-')[0]
@@ -1482,9 +1607,10 @@ class SCTConfiguration(dict):
                 ami_list = []
                 for region in region_names:
                     if ':' in scylla_version:
-                        ami = get_branched_ami(scylla_version=scylla_version, region_name=region, arch=aws_arch)[0]
+                        ami = self.resolver.get_branched_ami(scylla_version=scylla_version, region_name=region,
+                                                          arch=aws_arch)[0]
                     else:
-                        for ami in get_scylla_ami_versions(region_name=region, arch=aws_arch):
+                        for ami in self.resolver.get_scylla_ami_versions(region_name=region, arch=aws_arch):
                             if scylla_version_substr in ami.name:
                                 break
                         else:
@@ -1494,11 +1620,11 @@ class SCTConfiguration(dict):
                 self['ami_id_db_scylla'] = " ".join(ami.image_id for ami in ami_list)
             elif not self.get("gce_image_db") and self.get("cluster_backend") == "gce":
                 if ":" in scylla_version:
-                    gce_image = get_branched_gce_images(scylla_version=scylla_version)[0]
+                    gce_image = self.resolver.get_branched_gce_images(scylla_version=scylla_version)[0]
                 else:
                     # gce_image.name format examples: scylla-4-3-6 or scylla-enterprise-2021-1-2
                     scylla_version_substr = f"scylla-{scylla_version.replace('.', '-')}"
-                    for gce_image in get_scylla_gce_images_versions():
+                    for gce_image in self.resolver.get_scylla_gce_images_versions():
                         if gce_image.name.replace("-enterprise", "").startswith(scylla_version_substr):
                             break
                     else:
@@ -1508,13 +1634,14 @@ class SCTConfiguration(dict):
             elif not self.get("azure_image_db") and self.get("cluster_backend") == "azure":
                 scylla_azure_images = []
                 for region in self.get('azure_region_name'):
-                    azure_image = get_scylla_images(scylla_version, region)[0]
+                    azure_image = self.resolver.get_scylla_azure_images(scylla_version=scylla_version,
+                                                                        region_name=region)[0]
                     self.log.debug("Found AMI %s for scylla_version='%s' in %s",
                                    azure_image.name, scylla_version, region)
                     scylla_azure_images.append(azure_image)
                 self["azure_image_db"] = " ".join(image.id for image in scylla_azure_images)
             elif not self.get('scylla_repo'):
-                self['scylla_repo'] = find_scylla_repo(scylla_version, dist_type, dist_version)
+                self['scylla_repo'] = self.resolver.find_scylla_repo(scylla_version, dist_type, dist_version)
             else:
                 raise ValueError("'scylla_version' can't used together with 'ami_id_db_scylla', 'gce_image_db' "
                                  "or with 'scylla_repo'")
@@ -1531,7 +1658,7 @@ class SCTConfiguration(dict):
 
                 scylla_version_for_loader = "nightly" if scylla_version == "latest" else scylla_version
 
-                self['scylla_repo_loader'] = find_scylla_repo(scylla_version_for_loader,
+                self['scylla_repo_loader'] = self.resolver.find_scylla_repo(scylla_version_for_loader,
                                                               dist_type_loader,
                                                               dist_version_loader)
 
@@ -1544,10 +1671,10 @@ class SCTConfiguration(dict):
                 ami_list = []
                 for region in region_names:
                     if ':' in oracle_scylla_version:
-                        ami = get_branched_ami(
+                        ami = self.resolver.get_branched_ami(
                             scylla_version=oracle_scylla_version, region_name=region, arch=aws_arch)[0]
                     else:
-                        for ami in get_scylla_ami_versions(region_name=region, arch=aws_arch):
+                        for ami in self.resolver.get_scylla_ami_versions(region_name=region, arch=aws_arch):
                             if ami.name.endswith(suffix):
                                 break
                         else:
@@ -1566,41 +1693,12 @@ class SCTConfiguration(dict):
                 raise ValueError("'new_version' isn't supported for AWS AMIs")
 
             elif not self.get('new_scylla_repo'):
-                self['new_scylla_repo'] = find_scylla_repo(new_scylla_version, dist_type, dist_version)
+                self['new_scylla_repo'] = self.resolver.find_scylla_repo(new_scylla_version, dist_type, dist_version)
 
         # 8) resolve repo symlinks
         for repo_key in ("scylla_repo", "scylla_repo_loader", "new_scylla_repo",):
             if self.get(repo_key):
-                self[repo_key] = resolve_latest_repo_symlink(self[repo_key])
-
-        # 9) append username or ami_id_db_scylla_desc to the user_prefix
-        version_tag = self.get('ami_id_db_scylla_desc')
-        user_prefix = self.get('user_prefix')
-        if user_prefix:
-            if not version_tag:
-                version_tag = getpass.getuser()
-
-            self['user_prefix'] = "{}-{}".format(user_prefix, version_tag)[:35]
-
-        # 11) validate that supported instance_provision selected
-        if self.get('instance_provision') not in ['spot', 'on_demand', 'spot_fleet', 'spot_low_price', 'spot_duration']:
-            raise ValueError(f"Selected instance_provision type '{self.get('instance_provision')}' is not supported!")
-
-        # 12) spot_duration instance can be created for test duration
-        if self.get('instance_provision').lower() == "spot_duration":
-            test_duration = self.get('test_duration')
-            if test_duration:
-                assert test_duration <= MAX_SPOT_DURATION_TIME, \
-                    f'Test duration too long for spot_duration instance type. ' \
-                    f'Max possible test duration time for this instance type is {MAX_SPOT_DURATION_TIME} minutes'
-
-        # 13) validate authenticator parameters
-        if self.get('authenticator') and self.get('authenticator') == "PasswordAuthenticator":
-            authenticator_user = self.get("authenticator_user")
-            authenticator_password = self.get("authenticator_password")
-            if not (authenticator_password and authenticator_user):
-                raise ValueError("For PasswordAuthenticator authenticator authenticator_user and authenticator_password"
-                                 " have to be provided")
+                self[repo_key] = self.resolver.resolve_latest_repo_symlink(self[repo_key])
 
         self._update_environment_variables()
 
@@ -1636,7 +1734,7 @@ class SCTConfiguration(dict):
         if backend and include_backend:
             default_config_files += self.defaults_config_files[str(backend)]
 
-        return anyconfig.load(list(default_config_files)).get(key, None)
+        return load_config_files(default_config_files).get(key, None)
 
     def _load_environment_variables(self):
         environment_vars = {}
@@ -1763,7 +1861,7 @@ class SCTConfiguration(dict):
         # 10) update target_upgrade_version automatically
         new_scylla_repo = self.get('new_scylla_repo')
         if new_scylla_repo and not self.get('target_upgrade_version'):
-            self['target_upgrade_version'] = get_branch_version(new_scylla_repo)
+            self['target_upgrade_version'] = self.resolver.get_branch_version(new_scylla_repo)
 
     def _check_unexpected_sct_variables(self):
         # check if there are SCT_* environment variable which aren't documented
@@ -1896,9 +1994,9 @@ class SCTConfiguration(dict):
             for ami_list in [ami_id_db_scylla, ami_id_db_oracle]:
                 if ami_list:
                     for ami_id, region_name in zip(ami_list, region_names):
-                        if not ami_built_by_scylla(ami_id, region_name):
+                        if not self.resolver.ami_built_by_scylla(ami_id, region_name):
                             continue
-                        tags = get_ami_tags(ami_id, region_name)
+                        tags = self.resolver.get_ami_tags(ami_id, region_name)
                         assert 'user_data_format_version' in tags.keys(), \
                             f"\n\t'user_data_format_version' tag missing from [{ami_id}] on {region_name}\n\texisting " \
                             f"tags: {tags}"
@@ -15,10 +15,10 @@
 
 from __future__ import annotations
 
+import re
 import json
 import time
 import uuid
-import pickle
 import fnmatch
 import logging
 from enum import Enum
@@ -28,8 +28,8 @@ from typing import \
     Any, Optional, Type, Dict, List, Tuple, Callable, Generic, TypeVar, Protocol, runtime_checkable
 from keyword import iskeyword
 from weakref import proxy as weakproxy
-from datetime import datetime, timezone
-from functools import partialmethod
+from datetime import datetime, timezone, timedelta
+from functools import partialmethod, lru_cache
 
 import yaml
 import dateutil.parser
@@ -42,6 +42,45 @@ DEFAULT_SEVERITIES = sct_abs_path("defaults/severities.yaml")
 FILTER_EVENT_DECAY_TIME = 600.0
 LOGGER = logging.getLogger(__name__)
 
+# Timestamps of Scylla logs (ISO format, e.g., `2021-04-06T13:03:28.123456+00:00') and of syslog/stress tools logs
+# (e.g., `2021-04-06 13:03:28,123' or `2021/04/06 13:03:28'.)
+LOG_TIMESTAMP_RE = re.compile(r"(?P<seconds>\d{4}(?P<sep>[-/])\d\d(?P=sep)\d\d[T ]\d\d:\d\d:\d\d)"
+                              r"(?:[.,](?P<fraction>\d{1,6}))?(?P<tz>Z|[+-]\d\d:?\d\d)?")
+
+
+@lru_cache(maxsize=1024)
+def _log_timestamp_seconds(seconds: str, tz: Optional[str]) -> int:
+    if tz is None:
+        tzinfo = None
+    elif tz == "Z":
+        tzinfo = timezone.utc
+    else:
+        tzinfo = timezone((-1 if tz[0] == "-" else 1) * timedelta(hours=int(tz[1:3]), minutes=int(tz[-2:])))
+    return int(datetime(int(seconds[0:4]), int(seconds[5:7]), int(seconds[8:10]),
+                        int(seconds[11:13]), int(seconds[14:16]), int(seconds[17:19]), tzinfo=tzinfo).timestamp())
+
+
+def parse_log_timestamp(timestamp: str) -> float:
+    """Return the same value as `dateutil.parser.parse(timestamp).timestamp()', but much faster for known formats.
+
+    A log storm has many lines within the same second, so POSIX time of whole seconds is cached.
+    """
+
+    if match := LOG_TIMESTAMP_RE.fullmatch(timestamp):
+        seconds, _, fraction, tz = match.groups()
+        try:
+            whole_seconds = _log_timestamp_seconds(seconds, tz)
+        except ValueError:
+            pass  # let dateutil to decide.
+        else:
+            microseconds = int(fraction.ljust(6, "0")) if fraction else 0
+
+            # Same arithmetic as in `datetime.timestamp()' for aware and naive datetime objects.
+            if tz is None:
+                return whole_seconds + microseconds / 1e6
+            return (whole_seconds * 1_000_000 + microseconds) / 1_000_000
+    return dateutil.parser.parse(timestamp).timestamp()
+
 
 class SctEventTypesRegistry(Dict[str, Type["SctEvent"]]):  # pylint: disable=too-few-public-methods
     def __init__(self, severities_conf: str = DEFAULT_SEVERITIES):
@@ -342,6 +381,16 @@ class BaseFilter(SystemEvent, abstract=True):
     def eval_filter(self, event: SctEventProtocol) -> bool:
         raise NotImplementedError()
 
+    @property
+    def index_key(self) -> Optional[Tuple[str, Optional[str]]]:
+        """Events with other `base' or `type' can't be matched by the filter.
+
+        Return ("base", <event base>) or ("type", <event type>) to tell it to the filters index.  None means that
+        the filter should be evaluated for any event.
+        """
+
+        return None
+
 
 T_log_event = TypeVar("T_log_event", bound="LogEvent")  # pylint: disable=invalid-name
 
@@ -386,7 +435,7 @@ class LogEvent(Generic[T_log_event], InformationalEvent, abstract=True):
         """
 
         try:
-            splitted_line = line.split()
+            splitted_line = line.split(maxsplit=2)  # only first two words can be a timestamp
             if "T" in splitted_line[0]:
                 # Cover messages log time format. Example:
                 # 2021-04-06T13:03:28  ...
@@ -399,7 +448,7 @@ class LogEvent(Generic[T_log_event], InformationalEvent, abstract=True):
                 # 2021-04-06 13:03:28  ...
                 event_time = " ".join(splitted_line[:2])
 
-            self.source_timestamp = dateutil.parser.parse(event_time).timestamp()
+            self.source_timestamp = parse_log_timestamp(event_time)
         except ValueError:
             pass
         self.event_timestamp = time.time()
@@ -412,7 +461,16 @@ class LogEvent(Generic[T_log_event], InformationalEvent, abstract=True):
         return self
 
     def clone(self: T_log_event) -> T_log_event:
-        return pickle.loads(pickle.dumps(self))
+        """Make a copy of the event like `pickle.loads(pickle.dumps(self))' does, but much cheaper.
+
+        Values of the public attributes are shared with the original event, except containers which are copied
+        (one level deep.)
+        """
+
+        event = self.__class__.__new__(self.__class__)
+        event.__dict__.update({attr: value.copy() if isinstance(value, (list, dict, set)) else value
+                               for attr, value in self.__getstate__().items()})
+        return event
 
     @property
     def msgfmt(self):
@@ -0,0 +1,317 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+"""Compact binary serialization of SCT events.
+
+Values are encoded msgpack-style: a tag byte followed by a varint, a fixed-size number or a varint-prefixed
+sequence.  An event is encoded as its type id and its state (see `SctEvent.__getstate__()'.)  Both ids are generated
+from the SctEventTypesRegistry type tree, so they are the same in all SCT processes:
+
+  * type id is CRC32 of the event type name (e.g., `DatabaseLogEvent.BACKTRACE'),
+  * state field id is an index in the sorted list of public attribute names used by methods of the event type.
+
+Fields not known to the schema are encoded with their names.  Values of other types, events with own pickling
+protocol or events not in the registry are pickled.
+"""
+
+import zlib
+import pickle
+import struct
+import weakref
+from types import FunctionType
+from typing import Any, Optional, Tuple, Type, Union
+from functools import partialmethod
+
+from sdcm.sct_events import Severity
+from sdcm.sct_events.base import SctEvent
+
+
+NONE, FALSE, TRUE, INT, FLOAT, STR, BYTES, LIST, TUPLE, DICT, SEVERITY, EVENT, PICKLE = range(13)
+UNKNOWN_FIELD = 0  # followed by the name of the field
+
+DOUBLE = struct.Struct("!d")
+TYPE_ID = struct.Struct("!I")
+
+_METHOD_TYPES = (FunctionType, partialmethod, classmethod, staticmethod, property, )
+_SEVERITIES = tuple(sorted(Severity, key=lambda severity: severity.value))  # indexed by `value + 1'
+
+
+def attribute_names(event_t: Type[SctEvent]) -> Tuple[str, ...]:
+    """Public attribute names which can be set by methods of the event type (and some names which can't.)"""
+
+    names = set()
+    for klass in event_t.__mro__:
+        names.update(vars(klass).get("__annotations__", {}))
+        for attr in vars(klass).values():
+            if not isinstance(attr, _METHOD_TYPES):
+                continue
+            if isinstance(attr, property):
+                attr = attr.fset
+            elif isinstance(attr, partialmethod):
+                attr = attr.func
+            attr = getattr(attr, "__func__", attr)
+            if code := getattr(attr, "__code__", None):
+                names.update(code.co_names)
+    return tuple(sorted(name for name in names if not name.startswith("_")))
+
+
+class EventSchema:  # pylint: disable=too-few-public-methods
+    def __init__(self, event_t: Type[SctEvent]):
+        self.event_t = event_t
+        self.type_id = zlib.crc32(event_t.__name__.encode("utf-8"))
+        self.fields = attribute_names(event_t)
+        self.field_ids = {name: field_id for field_id, name in enumerate(self.fields, start=UNKNOWN_FIELD + 1)}
+
+
+_SCHEMAS: "weakref.WeakKeyDictionary[type, Optional[EventSchema]]" = weakref.WeakKeyDictionary()
+_SCHEMAS_BY_TYPE_ID: "weakref.WeakValueDictionary[int, EventSchema]" = weakref.WeakValueDictionary()
+
+
+def get_schema(event_t: Type[SctEvent]) -> Optional[EventSchema]:
+    """Return the schema of a registered event type or None if events of the type should be pickled."""
+
+    try:
+        return _SCHEMAS[event_t]
+    except KeyError:
+        pass
+    schema = None
+    registered_t = SctEvent._sct_event_types_registry.get(event_t.__name__)  # pylint: disable=protected-access
+    if registered_t is not None and registered_t.__mro__[0] is event_t and not event_t.is_abstract() \
+            and event_t.__reduce__ is object.__reduce__ and event_t.__reduce_ex__ is object.__reduce_ex__ \
+            and not hasattr(event_t, "__setstate__"):
+        schema = EventSchema(event_t)
+        if schema.type_id in _SCHEMAS_BY_TYPE_ID:  # CRC32 collision, fallback to pickle for the new type.
+            schema = None
+        else:
+            _SCHEMAS_BY_TYPE_ID[schema.type_id] = schema
+    _SCHEMAS[event_t] = schema
+    return schema
+
+
+def _get_schema_by_type_id(type_id: int) -> EventSchema:
+    if (schema := _SCHEMAS_BY_TYPE_ID.get(type_id)) is None:
+        for event_t in list(SctEvent._sct_event_types_registry.values()):  # pylint: disable=protected-access
+            try:
+                get_schema(event_t.__mro__[0])
+            except ReferenceError:
+                continue
+        if (schema := _SCHEMAS_BY_TYPE_ID.get(type_id)) is None:
+            raise ValueError(f"Unknown SCT event type id: {type_id:#010x}")
+    return schema
+
+
+def _encode_varint(out: bytearray, value: int) -> None:
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _encode_str(out: bytearray, value: str) -> None:
+    data = value.encode("utf-8", "surrogatepass")
+    _encode_varint(out, len(data))
+    out += data
+
+
+def _encode(out: bytearray, value: Any) -> None:  # pylint: disable=too-many-branches
+    value_t = type(value)
+    if value_t is str:
+        out.append(STR)
+        _encode_str(out, value)
+    elif value is None:
+        out.append(NONE)
+    elif value_t is int:
+        out.append(INT)
+        _encode_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)  # zigzag
+    elif value_t is float:
+        out.append(FLOAT)
+        out += DOUBLE.pack(value)
+    elif value_t is bool:
+        out.append(TRUE if value else FALSE)
+    elif value_t is Severity:
+        out.append(SEVERITY)
+        out.append(value.value + 1)  # Severity.DEBUG is -1
+    elif value_t is list or value_t is tuple:
+        out.append(LIST if value_t is list else TUPLE)
+        _encode_varint(out, len(value))
+        for item in value:
+            _encode(out, item)
+    elif value_t is dict:
+        out.append(DICT)
+        _encode_varint(out, len(value))
+        for key, item in value.items():
+            _encode(out, key)
+            _encode(out, item)
+    elif value_t is bytes:
+        out.append(BYTES)
+        _encode_varint(out, len(value))
+        out += value
+    elif isinstance(value, SctEvent) and (schema := get_schema(value_t)) is not None:
+        _encode_event(out, value, schema)
+    else:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        out.append(PICKLE)
+        _encode_varint(out, len(data))
+        out += data
+
+
+def _encode_event(out: bytearray, event: SctEvent, schema: EventSchema) -> None:
+    state = event.__getstate__()
+    out.append(EVENT)
+    out += TYPE_ID.pack(schema.type_id)
+    _encode_varint(out, len(state))
+    field_ids = schema.field_ids
+    for name, value in state.items():
+        if (field_id := field_ids.get(name)) is None:
+            out.append(UNKNOWN_FIELD)
+            _encode_str(out, name)
+        else:
+            _encode_varint(out, field_id)
+
+        # Inline encoding of most common values of event fields.
+        if type(value) is str and len(value) < 0x80 and value.isascii():  # pylint: disable=unidiomatic-typecheck
+            out.append(STR)
+            out.append(len(value))
+            out += value.encode("ascii")
+        elif value is None:
+            out.append(NONE)
+        elif type(value) is float:  # pylint: disable=unidiomatic-typecheck
+            out.append(FLOAT)
+            out += DOUBLE.pack(value)
+        elif type(value) is int and 0 <= value < 0x40:  # pylint: disable=unidiomatic-typecheck
+            out.append(INT)
+            out.append(value << 1)
+        else:
+            _encode(out, value)
+
+
+def _decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    value = byte & 0x7f
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _decode_str(data: bytes, pos: int) -> Tuple[str, int]:
+    size, pos = _decode_varint(data, pos)
+    end = pos + size
+    return data[pos:end].decode("utf-8", "surrogatepass"), end
+
+
+def _decode(data: bytes, pos: int) -> Tuple[Any, int]:  # pylint: disable=too-many-return-statements
+    tag = data[pos]
+    pos += 1
+    if tag == STR:
+        return _decode_str(data, pos)
+    if tag == NONE:
+        return None, pos
+    if tag == INT:
+        value, pos = _decode_varint(data, pos)
+        return (value >> 1) ^ -(value & 1), pos
+    if tag == FLOAT:
+        return DOUBLE.unpack_from(data, pos)[0], pos + DOUBLE.size
+    if tag == TRUE:
+        return True, pos
+    if tag == FALSE:
+        return False, pos
+    if tag == SEVERITY:
+        return _SEVERITIES[data[pos]], pos + 1
+    if tag == LIST or tag == TUPLE:  # pylint: disable=consider-using-in
+        size, pos = _decode_varint(data, pos)
+        items = []
+        for _ in range(size):
+            item, pos = _decode(data, pos)
+            items.append(item)
+        return (items if tag == LIST else tuple(items)), pos
+    if tag == DICT:
+        size, pos = _decode_varint(data, pos)
+        items = {}
+        for _ in range(size):
+            key, pos = _decode(data, pos)
+            items[key], pos = _decode(data, pos)
+        return items, pos
+    if tag == EVENT:
+        return _decode_event(data, pos)
+    if tag == BYTES or tag == PICKLE:  # pylint: disable=consider-using-in
+        size, pos = _decode_varint(data, pos)
+        end = pos + size
+        return (data[pos:end] if tag == BYTES else pickle.loads(data[pos:end])), end
+    raise ValueError(f"Unknown tag {tag} at position {pos - 1}")
+
+
+def _decode_event(data: bytes, pos: int) -> Tuple[SctEvent, int]:
+    schema = _get_schema_by_type_id(TYPE_ID.unpack_from(data, pos)[0])
+    pos += TYPE_ID.size
+    fields = schema.fields
+    size, pos = _decode_varint(data, pos)
+    state = {}
+    for _ in range(size):
+        field_id = data[pos]
+        if field_id < 0x80:
+            pos += 1
+        else:
+            field_id, pos = _decode_varint(data, pos)
+        if field_id == UNKNOWN_FIELD:
+            name, pos = _decode_str(data, pos)
+        else:
+            name = fields[field_id - 1]
+
+        # Inline decoding of most common values of event fields.
+        tag = data[pos]
+        if tag == STR and (str_size := data[pos + 1]) < 0x80:
+            pos += 2
+            state[name] = data[pos:pos + str_size].decode("utf-8", "surrogatepass")
+            pos += str_size
+        elif tag == NONE:
+            state[name] = None
+            pos += 1
+        elif tag == FLOAT:
+            state[name] = DOUBLE.unpack_from(data, pos + 1)[0]
+            pos += DOUBLE.size + 1
+        elif tag == SEVERITY:
+            state[name] = _SEVERITIES[data[pos + 1]]
+            pos += 2
+        elif tag == INT and (value := data[pos + 1]) < 0x80:
+            state[name] = (value >> 1) ^ -(value & 1)
+            pos += 2
+        else:
+            state[name], pos = _decode(data, pos)
+    event = schema.event_t.__new__(schema.event_t)
+    event.__dict__.update(state)
+    return event, pos
+
+
+def dumps(obj: Any) -> bytes:
+    out = bytearray()
+    _encode(out, obj)
+    return bytes(out)
+
+
+def loads(data: Union[bytes, memoryview]) -> Any:
+    data = bytes(data)  # indexing and slicing of bytes is faster than of memoryview, it's worth the copy.
+    obj, pos = _decode(data, 0)
+    if pos != len(data):
+        raise ValueError(f"Extra {len(data) - pos} bytes after the encoded object")
+    return obj
+
+
+__all__ = ("dumps", "loads", "get_schema", )
@@ -11,24 +11,23 @@
 #
 # Copyright (c) 2020 ScyllaDB
 
-# pylint: disable=no-member; disable `no-member' messages because of zmq.
-
 import time
 import queue
 import ctypes
 import pickle
 import logging
+import threading
 import multiprocessing
-from typing import Optional, Generator, Any, Tuple, Callable, cast, Dict
+from typing import Optional, Generator, Any, Tuple, Callable, cast, List
 from pathlib import Path
 from functools import cached_property, partial
-from uuid import UUID
-
-import zmq
 
+from sdcm.sct_events import events_codec
 from sdcm.sct_events.events_processes import \
     EVENTS_MAIN_DEVICE_ID, StopEvent, EventsProcessesRegistry, \
     start_events_process, get_events_process, verbose_suppress, suppress_interrupt
+from sdcm.sct_events.events_ring_buffer import \
+    EVENTS_RING_BUFFER_SIZE, EVENTS_RING_BUFFER_BACKPRESSURE_TIMEOUT, EventsRingBuffer
 
 
 EVENTS_DEVICE_START_DELAY: float = 0  # seconds
@@ -36,8 +35,14 @@ EVENTS_DEVICE_START_TIMEOUT: float = 30  # seconds
 SUB_POLLING_TIMEOUT: int = 1000  # milliseconds
 PUB_QUEUE_WAIT_TIMEOUT: float = 1  # seconds
 PUB_QUEUE_EVENTS_RATE: float = 0  # seconds
+PUB_BATCH_MAX_SIZE: int = 500  # events written to the ring buffer before subscribers are woken up
 PUBLISH_EVENT_TIMEOUT: float = 5  # seconds
-FILTERS_GC_PERIOD: float = 60  # Cleanup old filters once in a while
+DELIVERY_WATCHDOG_INTERVAL: float = 10  # seconds
+
+# Version of the format of serialized events in the ring buffer.  Increase it on changes of the format and keep
+# decoding of older versions in `decode_event()'.
+EVENTS_SCHEMA_VERSION: int = 2  # events_codec
+EVENTS_SCHEMA_VERSION_PICKLE: int = 1
 
 EVENTS_LOG_DIR: str = "events_log"
 RAW_EVENTS_LOG: str = "raw_events.log"
@@ -51,14 +56,19 @@ class EventsDevice(multiprocessing.Process):
     sub_polling_timeout = SUB_POLLING_TIMEOUT
     pub_queue_wait_timeout = PUB_QUEUE_WAIT_TIMEOUT
     pub_queue_events_rate = PUB_QUEUE_EVENTS_RATE
+    pub_batch_max_size = PUB_BATCH_MAX_SIZE
+    ring_buffer_size = EVENTS_RING_BUFFER_SIZE
+    ring_buffer_backpressure_timeout = EVENTS_RING_BUFFER_BACKPRESSURE_TIMEOUT
+    delivery_watchdog_interval = DELIVERY_WATCHDOG_INTERVAL
 
     def __init__(self, _registry: EventsProcessesRegistry):
         self._registry = _registry
         self._events_counter = multiprocessing.Value(ctypes.c_uint32, 0)
 
         self._running = multiprocessing.Event()
-        self._sub_port = multiprocessing.Value(ctypes.c_uint16, 0)
         self._queue = multiprocessing.Queue()
+        self._ring_buffer = EventsRingBuffer(size=self.ring_buffer_size,
+                                             backpressure_timeout=self.ring_buffer_backpressure_timeout)
         self._raw_events_lock = multiprocessing.RLock()
         self.events_log_base_dir.mkdir(parents=True, exist_ok=True)
 
@@ -80,43 +90,69 @@ class EventsDevice(multiprocessing.Process):
         self._running.clear()
         self.join(timeout)
 
-    @property
-    def subscribe_address(self) -> str:
-        if self._running.wait(timeout=self.start_timeout):
-            return f"tcp://localhost:{self._sub_port.value}"
-        raise RuntimeError("EventsDevice is not ready to send events.")
-
     def run(self):
         with suppress_interrupt(), verbose_suppress("EventsDevice failed"):
-            with zmq.Context() as ctx, ctx.socket(zmq.PUB) as pub, ctx.socket(zmq.SUB) as sub:
-                self._sub_port.value = pub.bind_to_random_port("tcp://*")
-                self._running.set()
+            self._running.set()
 
-                LOGGER.debug("EventsDevice listen on %s", self.subscribe_address)
+            LOGGER.debug("EventsDevice writes to ring buffer of %s bytes", self._ring_buffer.size)
 
-                # Delivery verification subscriber.
-                sub.connect(self.subscribe_address)
-                sub.subscribe(b"")
+            # Delivery verification is done by a separate thread, so the publisher never waits for it.
+            watchdog_stop_event = threading.Event()
+            watchdog = threading.Thread(target=self._delivery_watchdog,
+                                        kwargs={"stop_event": watchdog_stop_event},
+                                        name="EventsDeviceWatchdog",
+                                        daemon=True)
+            watchdog.start()
 
-                time.sleep(self.start_delay)
+            time.sleep(self.start_delay)
 
+            try:
                 while self._running.is_set() or not self._queue.empty():
-                    try:
-                        event = self._queue.get(timeout=self.pub_queue_wait_timeout)
-                        try:
-                            pub.send(event)
-                        except zmq.ZMQError:
-                            LOGGER.exception("EventsDevice failed to send %s", pickle.loads(event))
-                        else:
-                            try:
-                                if sub.poll(timeout=self.sub_polling_timeout) and sub.recv(zmq.NOBLOCK) == event:
-                                    continue  # everything is OK, we can go to send next event in the queue.
-                            except zmq.ZMQError:
-                                pass
-                            LOGGER.error("EventsDevice failed to verify delivery of %s", pickle.loads(event))
+                    if not (batch := self._get_batch()):
+                        continue
+                    for event in batch:
+                        self._ring_buffer.write(event, schema_version=EVENTS_SCHEMA_VERSION)
+                    self._ring_buffer.notify()
+                    if self.pub_queue_events_rate:
                         time.sleep(self.pub_queue_events_rate)
-                    except queue.Empty:
-                        pass
+            finally:
+                watchdog_stop_event.set()
+                watchdog.join(timeout=self.delivery_watchdog_interval)
+
+    def _get_batch(self) -> List[bytes]:
+        """Wait for the first event in the queue and take all available ones after it (up to the batch limit.)"""
+
+        try:
+            batch = [self._queue.get(timeout=self.pub_queue_wait_timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.pub_batch_max_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _delivery_watchdog(self, stop_event: threading.Event) -> None:
+        with verbose_suppress("EventsDevice delivery watchdog failed"):
+            reported = self._ring_buffer.overwritten_records
+            while not stop_event.wait(timeout=self.delivery_watchdog_interval):
+                reported = self._check_delivery(reported=reported)
+            self._check_delivery(reported=reported)
+
+    def _check_delivery(self, reported: List[int]) -> List[int]:
+        """Log events overwritten in the ring buffer since the previous check, per subscriber.
+
+        Return the current counters to be passed to the next check.
+        """
+
+        overwritten = self._ring_buffer.overwritten_records
+        for slot, (count, previous) in enumerate(zip(overwritten, reported)):
+            lost = count - previous if count >= previous else count  # the counter is reset for a new subscriber.
+            if lost:
+                LOGGER.error("EventsDevice delivery watchdog: %s events were overwritten before subscriber #%s "
+                             "read them (%s since it subscribed)", lost, slot, count)
+        return overwritten
 
     def publish_event(self, event, timeout=PUBLISH_EVENT_TIMEOUT) -> None:
         with verbose_suppress("%s: failed to write %s to %s", self, event, self.raw_events_log):
@@ -124,21 +160,14 @@ class EventsDevice(multiprocessing.Process):
                 log_file.write(event.to_json().encode("utf-8") + b"\n")
 
         with verbose_suppress("%s: failed to publish %s", self, event):
-            self._queue.put(pickle.dumps(event), timeout=timeout)
+            self._queue.put(events_codec.dumps(event), timeout=timeout)
             self._events_counter.value += 1
 
-    def _sub_socket(self, ctx: zmq.Context) -> zmq.Socket:
-        LOGGER.debug("Subscribe to %s", self.subscribe_address)
-        sub = ctx.socket(zmq.SUB)
-        sub.connect(self.subscribe_address)
-        sub.subscribe(b"")
-        return sub
-
     def inbound_events(self, stop_event: StopEvent) -> Generator[Any, None, None]:
-        with zmq.Context() as ctx, self._sub_socket(ctx) as sub:
-            while not stop_event.is_set():
-                while sub.poll(timeout=self.sub_polling_timeout):
-                    yield sub.recv_pyobj(flags=zmq.NOBLOCK)
+        yield from self._ring_buffer.read(stop_event=stop_event,
+                                          decode=decode_event,
+                                          polling_timeout=self.sub_polling_timeout / 1000,
+                                          receiver=self)
 
     # pylint: disable=import-outside-toplevel
     def outbound_events(self,
@@ -146,38 +175,28 @@ class EventsDevice(multiprocessing.Process):
                         events_counter: multiprocessing.Value) -> Generator[Tuple[str, Any], None, None]:
         from sdcm.sct_events.base import max_severity
         from sdcm.sct_events.system import SystemEvent
-        from sdcm.sct_events.filters import BaseFilter
+        from sdcm.sct_events.filters import BaseFilter, EventsFiltersIndex
 
-        filters: Dict[UUID, BaseFilter] = {}
-        filters_gc_next_hit = time.perf_counter() + FILTERS_GC_PERIOD
+        filters = EventsFiltersIndex()
 
         with suppress_interrupt():
             for events_counter.value, obj in enumerate(self.inbound_events(stop_event=stop_event), start=1):
-                if filters_gc_next_hit < time.perf_counter():
-                    # Run filter GC once in FILTERS_GC_PERIOD seconds
-                    for filter_key, filter_obj in list(filters.items()):
-                        if filter_obj.is_deceased():
-                            del filters[filter_key]
-                    filters_gc_next_hit = time.perf_counter() + FILTERS_GC_PERIOD
-
                 if isinstance(obj, BaseFilter):
                     if obj.clear_filter and not obj.expire_time:
                         LOGGER.debug("%s: delete filter with uuid=%s", self, obj.uuid)
-                        filters.pop(obj.uuid, None)
+                        filters.remove(obj.uuid)
                     elif obj.clear_filter and obj.expire_time and obj.uuid in filters:
                         LOGGER.debug("%s: set expire_time to %s for filter with uuid=%s",
                                      self, obj.expire_time, obj.uuid)
-                        filters[obj.uuid].expire_time = obj.expire_time
+                        filters.set_expire_time(obj.uuid, obj.expire_time)
                     else:
                         LOGGER.debug("%s: add filter %s with uuid=%s", self, obj, obj.uuid)
-                        filters[obj.uuid] = obj
+                        filters.add(obj)
 
                 if isinstance(obj, SystemEvent):
                     continue
 
-                obj_filtered = any(f.eval_filter(obj) for f in filters.values())
-
-                if obj_filtered:
+                if filters.eval_filters(obj):
                     continue
 
                 if (obj_max_severity := max_severity(obj)).value < obj.severity.value:
@@ -190,6 +209,14 @@ class EventsDevice(multiprocessing.Process):
         return self._running.is_set()
 
 
+def decode_event(schema_version: int, payload: memoryview) -> Any:
+    if schema_version == EVENTS_SCHEMA_VERSION:
+        return events_codec.loads(payload)
+    if schema_version == EVENTS_SCHEMA_VERSION_PICKLE:
+        return pickle.loads(payload)
+    raise ValueError(f"Unknown events schema version: {schema_version}")
+
+
 start_events_main_device = partial(start_events_process, EVENTS_MAIN_DEVICE_ID, EventsDevice)
 get_events_main_device = cast(Callable[..., EventsDevice], partial(get_events_process, EVENTS_MAIN_DEVICE_ID))
 
@@ -0,0 +1,256 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import time
+import ctypes
+import struct
+import logging
+import multiprocessing
+from typing import Any, Callable, Generator, List, Optional
+from contextlib import contextmanager
+from functools import cached_property
+
+from sdcm.sct_events.events_processes import StopEvent
+
+
+EVENTS_RING_BUFFER_SIZE: int = 16 * 1024 * 1024  # bytes
+EVENTS_RING_BUFFER_MAX_SUBSCRIBERS: int = 32
+EVENTS_RING_BUFFER_BACKPRESSURE_TIMEOUT: float = 1  # seconds
+EVENTS_RING_BUFFER_BACKPRESSURE_POLLING_INTERVAL: float = 0.001  # seconds
+
+# Header of each record: size of the payload, schema version of the payload and sequence number of the record.
+RECORD_HEADER = struct.Struct("=IIQ")
+RECORD_ALIGNMENT = 8
+WRAP_MARKER = 0xFFFFFFFF  # in place of the payload size: the next record is at the beginning of the buffer
+
+# Indexes in the shared positions array.  Positions are byte offsets which grow monotonically, an offset in the
+# buffer is a position modulo the buffer size.
+WRITE_POSITION = 0  # end of the last record
+TAIL_POSITION = 1  # beginning of the oldest record which is not overwritten yet
+NEXT_SEQUENCE = 2  # sequence number of the next record
+FIRST_CURSOR = 3  # read positions of subscribers
+FREE_CURSOR = 2 ** 64 - 1
+
+LOGGER = logging.getLogger(__name__)
+
+
+def aligned(size: int) -> int:
+    return (size + RECORD_ALIGNMENT - 1) & -RECORD_ALIGNMENT
+
+
+class EventsRingBuffer:
+    """Deliver serialized events from one writer to many subscribers in shared memory.
+
+    The buffer and all positions live in shared memory allocated before fork, so each event is written once and
+    every subscriber (a thread or a child process) decodes it in place, starting from its own cursor.
+
+    The writer waits up to `backpressure_timeout' seconds for subscribers which are too slow to free some space.
+    After that the oldest records are overwritten, the lagging subscriber skips to the oldest available record and
+    logs the number of lost events.  The writer doesn't wait again for a subscriber which is still behind the tail.
+    Records overwritten before a subscriber read them are counted per subscriber, see `overwritten_records'.
+    """
+
+    def __init__(self,
+                 size: int = EVENTS_RING_BUFFER_SIZE,
+                 max_subscribers: int = EVENTS_RING_BUFFER_MAX_SUBSCRIBERS,
+                 backpressure_timeout: float = EVENTS_RING_BUFFER_BACKPRESSURE_TIMEOUT):
+        if size % RECORD_ALIGNMENT or size < RECORD_HEADER.size * 4:
+            raise ValueError(f"Size of ring buffer should be a multiple of {RECORD_ALIGNMENT} "
+                             f"and at least {RECORD_HEADER.size * 4} bytes")
+        self.size = size
+        self.max_record_size = size // 4
+        self.backpressure_timeout = backpressure_timeout
+        self._data = multiprocessing.RawArray(ctypes.c_char, size)
+        self._positions = multiprocessing.RawArray(ctypes.c_uint64, FIRST_CURSOR + max_subscribers)
+        self._positions[FIRST_CURSOR:] = [FREE_CURSOR] * max_subscribers
+        self._overwritten = multiprocessing.RawArray(ctypes.c_uint64, max_subscribers)
+        self._cursors_lock = multiprocessing.Lock()
+        self._new_records = multiprocessing.Condition()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_buffer", None)
+        return state
+
+    @cached_property
+    def _buffer(self) -> memoryview:
+        return memoryview(self._data).cast("B")
+
+    @property
+    def write_position(self) -> int:
+        return self._positions[WRITE_POSITION]
+
+    @property
+    def subscribers_count(self) -> int:
+        return sum(1 for cursor in self._positions[FIRST_CURSOR:] if cursor != FREE_CURSOR)
+
+    @property
+    def overwritten_records(self) -> List[int]:
+        """Number of records overwritten before they were read, per subscriber slot.
+
+        A counter is reset when a new subscriber takes the slot.
+        """
+        return list(self._overwritten)
+
+    def write(self, payload: bytes, schema_version: int) -> bool:
+        """Append a record to the buffer.  Should be called by one writer only.
+
+        Subscribers are not woken up till `notify()' call, so it's cheaper to write a batch of records first.
+        """
+
+        payload_size = len(payload)
+        record_size = aligned(RECORD_HEADER.size + payload_size)
+        if record_size > self.max_record_size:
+            LOGGER.error("Record of %s bytes is larger than %s bytes allowed for ring buffer of %s bytes, skip it",
+                         payload_size, self.max_record_size, self.size)
+            return False
+        position = self._positions[WRITE_POSITION]
+        offset = position % self.size
+        padding = self.size - offset if offset + record_size > self.size else 0
+        end = position + padding + record_size
+        self._reserve(end)
+        buffer = self._buffer
+        if padding:
+            if padding >= RECORD_HEADER.size:
+                RECORD_HEADER.pack_into(buffer, offset, WRAP_MARKER, 0, 0)
+            offset = 0
+        sequence = self._positions[NEXT_SEQUENCE]
+        RECORD_HEADER.pack_into(buffer, offset, payload_size, schema_version, sequence)
+        offset += RECORD_HEADER.size
+        buffer[offset:offset + payload_size] = payload
+        self._positions[NEXT_SEQUENCE] = sequence + 1
+        self._positions[WRITE_POSITION] = end
+        return True
+
+    def notify(self) -> None:
+        with self._new_records:
+            self._new_records.notify_all()
+
+    def _reserve(self, end: int) -> None:
+        """Wait for subscribers to free the space up to `end' position and move the tail over overwritten records."""
+
+        deadline = None
+        while True:
+            tail = self._positions[TAIL_POSITION]
+            oldest_cursor = min((cursor for cursor in self._positions[FIRST_CURSOR:] if tail <= cursor != FREE_CURSOR),
+                                default=end)
+            if end - oldest_cursor <= self.size:
+                break
+            if deadline is None:
+                deadline = time.perf_counter() + self.backpressure_timeout
+            elif time.perf_counter() > deadline:
+                LOGGER.warning("Subscriber of ring buffer is too slow, overwrite %s bytes of unread records",
+                               end - oldest_cursor - self.size)
+                break
+            self.notify()
+            time.sleep(EVENTS_RING_BUFFER_BACKPRESSURE_POLLING_INTERVAL)
+
+        tail = self._positions[TAIL_POSITION]
+        cursors = None
+        while end - tail > self.size:
+            offset = tail % self.size
+            if self.size - offset < RECORD_HEADER.size:
+                tail += self.size - offset
+                continue
+            payload_size, _, _ = RECORD_HEADER.unpack_from(self._buffer, offset)
+            if payload_size == WRAP_MARKER:
+                tail += self.size - offset
+                continue
+            tail += aligned(RECORD_HEADER.size + payload_size)
+            if cursors is None:
+                cursors = self._positions[FIRST_CURSOR:]
+            for slot, cursor in enumerate(cursors):
+                if cursor < tail:  # the subscriber didn't read the record yet (a free cursor is never less.)
+                    self._overwritten[slot] += 1
+        self._positions[TAIL_POSITION] = tail
+
+    @contextmanager
+    def _cursor(self) -> Generator[int, None, None]:
+        with self._cursors_lock:
+            for index in range(FIRST_CURSOR, len(self._positions)):
+                if self._positions[index] == FREE_CURSOR:
+                    self._overwritten[index - FIRST_CURSOR] = 0
+                    self._positions[index] = self._positions[WRITE_POSITION]
+                    break
+            else:
+                raise RuntimeError(f"Ring buffer has no room for more than {len(self._positions) - FIRST_CURSOR} "
+                                   f"subscribers")
+        try:
+            yield index
+        finally:
+            self._positions[index] = FREE_CURSOR
+
+    def read(self,
+             stop_event: StopEvent,
+             decode: Callable[[int, memoryview], Any],
+             polling_timeout: float,
+             receiver: Any) -> Generator[Any, None, None]:
+        """Yield records written after the subscription, decoded by `decode(schema_version, payload)'.
+
+        The payload passed to `decode()' is a view of the shared buffer, so it shouldn't be kept after the call.
+        """
+
+        positions = self._positions
+        buffer = self._buffer
+        size = self.size
+        with self._cursor() as cursor:
+            position = positions[cursor]
+            next_sequence = None
+
+            def has_new_records():
+                return positions[WRITE_POSITION] != position
+
+            while not stop_event.is_set():
+                if not has_new_records():
+                    with self._new_records:
+                        self._new_records.wait_for(has_new_records, timeout=polling_timeout)
+                    continue
+                while position != positions[WRITE_POSITION]:
+                    position = max(position, positions[TAIL_POSITION])
+                    offset = position % size
+                    if size - offset < RECORD_HEADER.size:
+                        position += size - offset
+                        continue
+                    payload_size, schema_version, sequence = RECORD_HEADER.unpack_from(buffer, offset)
+                    if payload_size == WRAP_MARKER:
+                        position += size - offset
+                        continue
+                    offset += RECORD_HEADER.size
+                    try:
+                        record, error = decode(schema_version, buffer[offset:offset + payload_size]), None
+                    except Exception as exc:  # pylint: disable=broad-except
+                        record, error = None, exc
+                    if position < positions[TAIL_POSITION]:
+                        continue  # the record was overwritten while decoded, skip to the tail.
+                    next_sequence = check_sequence(sequence=sequence, expected=next_sequence, receiver=receiver)
+                    position += aligned(RECORD_HEADER.size + payload_size)
+                    positions[cursor] = position
+                    if error is not None:
+                        LOGGER.error("%s: failed to decode record #%s (schema version %s): %r",
+                                     receiver, sequence, schema_version, error)
+                        continue
+                    yield record
+
+
+def check_sequence(sequence: int, expected: Optional[int], receiver: Any) -> int:
+    """Log an error if some records were lost before the one with given sequence number and return the next one."""
+
+    if expected is not None and sequence != expected:
+        if sequence > expected:
+            LOGGER.error("%s: lost %s events (#%s..#%s)", receiver, sequence - expected, expected, sequence - 1)
+        else:
+            LOGGER.error("%s: got events out of order (expected #%s, got #%s)", receiver, expected, sequence)
+    return sequence + 1
+
+
+__all__ = ("EventsRingBuffer", "check_sequence", )
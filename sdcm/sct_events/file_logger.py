@@ -11,12 +11,15 @@
 #
 # Copyright (c) 2020 ScyllaDB
 
+import os
 import re
 import json
+import time
 import logging
+import threading
 import collections
 import multiprocessing
-from typing import Tuple, Optional, Callable, Any, Dict, List, cast
+from typing import Tuple, Optional, Callable, Any, Dict, List, BinaryIO, cast
 from pathlib import Path
 from functools import partial
 from itertools import chain
@@ -39,6 +42,11 @@ WARNING_LOG: str = "warning.log"
 NORMAL_LOG: str = "normal.log"
 DEBUG_LOG: str = "debug.log"
 
+EVENTS_LOG_BUFFER_SIZE: int = 256 * 1024  # bytes
+EVENTS_LOG_FLUSH_INTERVAL: float = 0.5  # seconds
+EVENTS_SUMMARY_WRITE_INTERVAL: float = 1  # seconds
+EVENTS_LOG_FLUSH_REQUEST_TIMEOUT: float = 5  # seconds
+
 LINE_START_RE = re.compile(r"^\d{4}-\d{2}-\d{2} ")  # date in YYYY-MM-DD format
 
 LOGGER = logging.getLogger(__name__)
@@ -57,6 +65,9 @@ class head(list):  # pylint: disable=invalid-name
 
 
 class EventsFileLogger(BaseEventsProcess[Tuple[str, Any], None], multiprocessing.Process):
+    flush_interval = EVENTS_LOG_FLUSH_INTERVAL
+    summary_write_interval = EVENTS_SUMMARY_WRITE_INTERVAL
+
     def __init__(self, _registry: EventsProcessesRegistry):
         base_dir: Path = get_events_main_device(_registry=_registry).events_log_base_dir
 
@@ -72,6 +83,16 @@ class EventsFileLogger(BaseEventsProcess[Tuple[str, Any], None], multiprocessing
         self.events_summary = collections.defaultdict(int)
         self.events_summary_log = base_dir / SUMMARY_LOG
 
+        # Log files are kept open and flushed by the flusher thread which runs in the logger process only.
+        # If `write_event()' called from another process then everything is flushed immediately.
+        self._log_files: Dict[Path, BinaryIO] = {}
+        self._log_files_lock = threading.RLock()
+        self._buffered = False
+        self._summary_changed = False
+        self._summary_written_at = 0.0
+        self._flush_requested = multiprocessing.Event()
+        self._flushed = multiprocessing.Event()
+
         super().__init__(_registry=_registry)
 
     def run(self) -> None:
@@ -80,10 +101,24 @@ class EventsFileLogger(BaseEventsProcess[Tuple[str, Any], None], multiprocessing
         for log_file in chain((self.events_log, self.events_summary_log, ), self.events_logs_by_severity.values(), ):
             log_file.touch()
 
-        for event_tuple in self.inbound_events():
-            with verbose_suppress("EventsFileLogger failed to process %s", event_tuple):
-                _, event = event_tuple  # try to unpack event from EventsDevice
-                self.write_event(event=event)
+        self._buffered = True
+        flusher = threading.Thread(target=self._flusher, name="EventsFileLoggerFlusher", daemon=True)
+        flusher.start()
+
+        try:
+            for event_tuple in self.inbound_events():
+                with verbose_suppress("EventsFileLogger failed to process %s", event_tuple):
+                    _, event = event_tuple  # try to unpack event from EventsDevice
+                    self.write_event(event=event)
+        finally:
+            self.stop_event.set()
+            flusher.join(timeout=self.flush_interval * 2)
+            with self._log_files_lock:
+                self._flush_files(summary=True)
+                for fobj in self._log_files.values():
+                    with verbose_suppress("%s: failed to close %s", self, fobj.name):
+                        fobj.close()
+                self._log_files.clear()
 
     def write_event(self, event: SctEvent) -> None:
         if event.source_timestamp:
@@ -100,24 +135,67 @@ class EventsFileLogger(BaseEventsProcess[Tuple[str, Any], None], multiprocessing
                 with verbose_suppress("%s: failed to tee %s to %s", self, event, tee):
                     tee(message)
 
-        # Write event to events.log file
-        if getattr(event, 'save_to_files', False):
-            with verbose_suppress("%s: failed to write %s to %s", self, event, self.events_log):
-                with self.events_log.open("ab+", buffering=0) as fobj:
-                    fobj.write(message_bin)
-
-            if log_file := self.events_logs_by_severity.get(event.severity):
-                with verbose_suppress("%s: failed to write %s to %s", self, event, log_file):
-                    with log_file.open("ab+", buffering=0) as fobj:
-                        fobj.write(message_bin)
+        with self._log_files_lock:
+            # Write event to events.log file
+            if getattr(event, 'save_to_files', False):
+                self._write(self.events_log, message_bin, event)
+                if log_file := self.events_logs_by_severity.get(event.severity):
+                    self._write(log_file, message_bin, event)
+
+            # Update summary (statistics.)  It's written to summary.log file by the flusher thread.
+            self.events_summary[Severity(event.severity).name] += 1
+            self._summary_changed = True
+
+            # Don't keep CRITICAL events in buffers: the test can be stopped right after such event.
+            if not self._buffered or event.severity == Severity.CRITICAL:
+                self._flush_files(summary=not self._buffered)
+
+    def _write(self, log_file: Path, data: bytes, event: SctEvent) -> None:
+        with verbose_suppress("%s: failed to write %s to %s", self, event, log_file):
+            if (fobj := self._log_files.get(log_file)) is None:
+                # pylint: disable=consider-using-with
+                fobj = self._log_files[log_file] = log_file.open("ab", buffering=EVENTS_LOG_BUFFER_SIZE)
+            fobj.write(data)
+
+    def _flush_files(self, summary: bool) -> None:
+        for fobj in self._log_files.values():
+            with verbose_suppress("%s: failed to flush %s", self, fobj.name):
+                fobj.flush()
+        if summary and self._summary_changed:
+            self._write_summary()
+
+    def _write_summary(self) -> None:
+        """Replace summary.log atomically, so readers never see a partially written file."""
 
-        # Update summary.log file (statistics.)
-        self.events_summary[Severity(event.severity).name] += 1
         with verbose_suppress("%s: failed to update %s", self, self.events_summary_log):
-            with self.events_summary_log.open("wb", buffering=0) as fobj:
-                fobj.write(json.dumps(dict(self.events_summary), indent=4).encode("utf-8"))
+            summary_tmp = self.events_summary_log.with_name(f".{self.events_summary_log.name}.tmp")
+            summary_tmp.write_text(json.dumps(dict(self.events_summary), indent=4), encoding="utf-8")
+            os.replace(summary_tmp, self.events_summary_log)
+            self._summary_changed = False
+            self._summary_written_at = time.perf_counter()
+
+    def _flusher(self) -> None:
+        while not self.stop_event.is_set():
+            if flush_requested := self._flush_requested.wait(timeout=self.flush_interval):
+                self._flush_requested.clear()
+            with self._log_files_lock:
+                self._flush_files(summary=flush_requested or
+                                  time.perf_counter() - self._summary_written_at >= self.summary_write_interval)
+            if flush_requested:
+                self._flushed.set()
+
+    def flush(self, timeout: float = EVENTS_LOG_FLUSH_REQUEST_TIMEOUT) -> None:
+        """Ask the logger process to flush all log files and summary.log and wait for it."""
+
+        if not self.is_alive():
+            return
+        self._flushed.clear()
+        self._flush_requested.set()
+        if not self._flushed.wait(timeout=timeout):
+            LOGGER.warning("%s: log files weren't flushed in %s seconds", self, timeout)
 
     def get_events_by_category(self, limit: Optional[int] = None) -> Dict[str, List[str]]:
+        self.flush()
         output = {}
         for severity, log_file in self.events_logs_by_severity.items():
             # Get first `limit' events with CRITICAL severity and last `limit' for other severities.
@@ -153,7 +231,9 @@ def get_events_grouped_by_category(limit: Optional[int] = None,
 
 
 def get_logger_event_summary(_registry: Optional[EventsProcessesRegistry] = None) -> dict:
-    events_summary_log = get_events_logger(_registry=_registry).events_summary_log
+    events_logger = get_events_logger(_registry=_registry)
+    events_logger.flush()
+    events_summary_log = events_logger.events_summary_log
     with verbose_suppress("Failed to read %s", events_summary_log):
         with events_summary_log.open() as fobj:
             return json.load(fobj)
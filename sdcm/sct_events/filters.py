@@ -13,11 +13,12 @@
 
 import re
 import time
-from typing import Optional, Type, Union
+import heapq
+from typing import Optional, Type, Union, Dict, List, Tuple
 from functools import cached_property
 
 from sdcm.sct_events import Severity
-from sdcm.sct_events.base import SctEvent, SctEventProtocol, BaseFilter, LogEventProtocol
+from sdcm.sct_events.base import SctEvent, SctEventProtocol, BaseFilter, LogEventProtocol, FILTER_EVENT_DECAY_TIME
 
 
 class DbEventsFilter(BaseFilter):
@@ -48,6 +49,10 @@ class DbEventsFilter(BaseFilter):
 
         return result
 
+    @property
+    def index_key(self) -> Tuple[str, Optional[str]]:
+        return "type", self.filter_type
+
     @property
     def msgfmt(self) -> str:
         output = ['{0.base}']
@@ -105,6 +110,10 @@ class EventsFilter(BaseFilter):
 
         return result
 
+    @property
+    def index_key(self) -> Optional[Tuple[str, Optional[str]]]:
+        return self.event_class and ("base", self.event_class.split(".", 1)[0])
+
     @property
     def msgfmt(self) -> str:
         output = ['{0.base}']
@@ -129,3 +138,72 @@ class EventsSeverityChangerFilter(EventsFilter):
         if super().eval_filter(event) and self.new_severity:
             event.severity = self.new_severity
         return False
+
+
+class EventsFiltersIndex:
+    """Active filters indexed by `BaseFilter.index_key'.
+
+    An event is evaluated only by filters with its base or type as a key and by the filters without a key.  Filters are
+    evaluated in the order they were added, same as it would be for a plain list of filters.  Expired filters removed
+    from the index once they become deceased (see `BaseFilter.is_deceased()'.)
+    """
+
+    def __init__(self):
+        self._filters: Dict[str, Tuple[int, BaseFilter]] = {}
+        self._by_key: Dict[Optional[Tuple[str, Optional[str]]], Dict[str, Tuple[int, BaseFilter]]] = {None: {}}
+        self._deceased_at: List[Tuple[float, str]] = []  # heap of (time, uuid)
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._filters)
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid in self._filters
+
+    def add(self, filter_obj: BaseFilter) -> None:
+        if (entry := self._filters.get(filter_obj.uuid)) is not None:
+            order = entry[0]  # keep the position of a replaced filter
+            self.remove(filter_obj.uuid)
+        else:
+            order = self._counter = self._counter + 1
+        self._filters[filter_obj.uuid] = entry = (order, filter_obj)
+        self._by_key.setdefault(filter_obj.index_key, {})[filter_obj.uuid] = entry
+        self._schedule_removal(filter_obj)
+
+    def remove(self, uuid: str) -> None:
+        if (entry := self._filters.pop(uuid, None)) is not None:
+            bucket = self._by_key[key := entry[1].index_key]
+            del bucket[uuid]
+            if not bucket and key is not None:
+                del self._by_key[key]
+
+    def set_expire_time(self, uuid: str, expire_time: float) -> None:
+        _, filter_obj = self._filters[uuid]
+        filter_obj.expire_time = expire_time
+        self._schedule_removal(filter_obj)
+
+    def _schedule_removal(self, filter_obj: BaseFilter) -> None:
+        if filter_obj.expire_time:
+            heapq.heappush(self._deceased_at, (filter_obj.expire_time + FILTER_EVENT_DECAY_TIME, filter_obj.uuid))
+
+    def remove_deceased(self) -> None:
+        now = time.time()
+        while self._deceased_at and self._deceased_at[0][0] <= now:
+            _, uuid = heapq.heappop(self._deceased_at)
+            if (entry := self._filters.get(uuid)) is not None and entry[1].is_deceased():
+                self.remove(uuid)
+
+    def eval_filters(self, event: SctEventProtocol) -> bool:
+        """Return True if any of filters matches the event."""
+
+        self.remove_deceased()
+        candidates = [bucket for bucket in (self._by_key[None],
+                                            self._by_key.get(("base", event.base)),
+                                            self._by_key.get(("type", event.type))) if bucket]
+        if not candidates:
+            return False
+        if len(candidates) == 1:
+            filters = candidates[0].values()
+        else:
+            filters = sorted(entry for bucket in candidates for entry in bucket.values())
+        return any(filter_obj.eval_filter(event) for _, filter_obj in filters)
@@ -24,10 +24,13 @@ from sdcm.prometheus import nemesis_metrics_obj
 from sdcm.sct_events import Severity
 from sdcm.sct_events.loaders import ScyllaBenchEvent, SCYLLA_BENCH_ERROR_EVENTS_PATTERNS
 from sdcm.utils.common import FileFollowerThread, generate_random_string, convert_metric_to_ms
-from sdcm.stress_thread import format_stress_cmd_error
+from sdcm.stress_thread import format_stress_cmd_error, collect_hdr_log, aggregate_hdr_logs
+from sdcm.utils.hdrhistogram import HdrHistogramsAggregator
 from sdcm.wait import wait_for
 
 
+SB_HDR_LOG_RE = re.compile(r"-hdr-latency-file[= ](\S+)")
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -122,6 +125,7 @@ class ScyllaBenchThread:  # pylint: disable=too-many-instance-attributes
         self.results_futures = []
         self.shell_marker = generate_random_string(20)
         self.max_workers = 0
+        self.hdr_log_files = []
         # Find stress mode:
         #    "scylla-bench -workload=sequential -mode=write -replication-factor=3 -partition-count=100"
         #    "scylla-bench -workload=uniform -mode=read -replication-factor=3 -partition-count=100"
@@ -129,6 +133,12 @@ class ScyllaBenchThread:  # pylint: disable=too-many-instance-attributes
         self.sb_workload: ScyllaBenchWorkloads = ScyllaBenchWorkloads(
             re.search(r"-workload=(.+?) ", stress_cmd).group(1))
 
+    @property
+    def latency_histograms(self) -> HdrHistogramsAggregator:
+        """Latency histograms merged from all loaders (only if `-hdr-latency-file' is used.)"""
+
+        return aggregate_hdr_logs(self.hdr_log_files)
+
     def verify_results(self):
         sb_summary = []
         results = []
@@ -177,6 +187,12 @@ class ScyllaBenchThread:  # pylint: disable=too-many-instance-attributes
         # Select first seed node to send the scylla-bench cmds
         ips = node_list[0].cql_ip_address
 
+        remote_hdr_log = None
+        if hdr_log_match := SB_HDR_LOG_RE.search(stress_cmd):
+            # Each scylla-bench process needs its own histograms log.
+            remote_hdr_log = f"{hdr_log_match.group(1)}-l{loader_idx}"
+            stress_cmd = stress_cmd.replace(hdr_log_match.group(0), f"-hdr-latency-file={remote_hdr_log}")
+
         with ScyllaBenchStressExporter(instance_name=node.cql_ip_address,
                                        metrics=nemesis_metrics_obj(),
                                        stress_operation=self.sb_mode,
@@ -203,6 +219,9 @@ class ScyllaBenchThread:  # pylint: disable=too-many-instance-attributes
 
                 scylla_bench_event.add_error([errors_str])
 
+        if remote_hdr_log and (hdr_log := collect_hdr_log(node, remote_hdr_log, log_file_name[:-4] + ".hdr")):
+            self.hdr_log_files.append(hdr_log)
+
         return node, result
 
     def run(self):
@@ -26,9 +26,12 @@ from sdcm.cluster import BaseLoaderSet
 from sdcm.prometheus import nemesis_metrics_obj
 from sdcm.sct_events import Severity
 from sdcm.utils.common import FileFollowerThread, generate_random_string, get_profile_content
+from sdcm.utils.hdrhistogram import HdrHistogramsAggregator
 from sdcm.sct_events.loaders import CassandraStressEvent, CS_ERROR_EVENTS_PATTERNS, CS_NORMAL_EVENTS_PATTERNS
 
 
+CS_HDR_LOG_RE = re.compile(r"hdrfile=(\S+)")
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -40,6 +43,24 @@ def format_stress_cmd_error(exc: Exception) -> str:
     return f"Stress command execution failed with: {exc}"
 
 
+def collect_hdr_log(node: Any, remote_path: str, local_path: str) -> str | None:
+    """Download a latency histograms log written by a stress tool on a loader."""
+
+    try:
+        node.remoter.receive_files(src=remote_path, dst=local_path)
+    except Exception as exc:  # pylint: disable=broad-except
+        LOGGER.warning("Failed to collect latency histograms log %s from %s: %s", remote_path, node, exc)
+        return None
+    return local_path
+
+
+def aggregate_hdr_logs(paths: list[str]) -> HdrHistogramsAggregator:
+    histograms = HdrHistogramsAggregator()
+    for path in paths:
+        histograms.add_log_file(path)
+    return histograms
+
+
 class CassandraStressEventsPublisher(FileFollowerThread):
     def __init__(self, node: Any, cs_log_filename: str, event_id: str = None):
         super().__init__()
@@ -90,6 +111,7 @@ class CassandraStressThread:  # pylint: disable=too-many-instance-attributes
         self.shell_marker = generate_random_string(20)
         #  This marker is used to mark shell commands, in order to be able to kill them later
         self.max_workers = 0
+        self.hdr_log_files = []
 
     def create_stress_cmd(self, node, loader_idx, keyspace_idx):
         stress_cmd = self.stress_cmd
@@ -165,6 +187,12 @@ class CassandraStressThread:  # pylint: disable=too-many-instance-attributes
         # Do it this way because stress_cmd can contain env variables before `cassandra-stress'.
         stress_cmd_opt = stress_cmd.split("cassandra-stress", 1)[1].split(None, 1)[0]
 
+        remote_hdr_log = None
+        if hdr_log_match := CS_HDR_LOG_RE.search(stress_cmd):
+            # Each cassandra-stress process needs its own histograms log.
+            remote_hdr_log = f"{hdr_log_match.group(1)}-l{loader_idx}-c{cpu_idx}-k{keyspace_idx}"
+            stress_cmd = stress_cmd.replace(hdr_log_match.group(0), f"hdrfile={remote_hdr_log}")
+
         LOGGER.info('Stress command:\n%s', stress_cmd)
 
         os.makedirs(node.logdir, exist_ok=True)
@@ -203,6 +231,9 @@ class CassandraStressThread:  # pylint: disable=too-many-instance-attributes
                 cs_stress_event.severity = Severity.CRITICAL if self.stop_test_on_failure else Severity.ERROR
                 cs_stress_event.add_error(errors=[format_stress_cmd_error(exc)])
 
+        if remote_hdr_log and (hdr_log := collect_hdr_log(node, remote_hdr_log, log_file_name[:-4] + ".hdr")):
+            self.hdr_log_files.append(hdr_log)
+
         return node, result, cs_stress_event
 
     def run(self):
@@ -241,6 +272,12 @@ class CassandraStressThread:  # pylint: disable=too-many-instance-attributes
                                timeout=self.timeout,
                                ignore_status=True)
 
+    @property
+    def latency_histograms(self) -> HdrHistogramsAggregator:
+        """Latency histograms merged from all stress processes (only if `-log hdrfile=...' is used.)"""
+
+        return aggregate_hdr_logs(self.hdr_log_files)
+
     def get_results(self) -> list[dict | None]:
         ret = []
         results = []
@@ -68,6 +68,7 @@ from sdcm.utils.ldap import LDAP_USERS, LDAP_PASSWORD, LDAP_ROLE, LDAP_BASE_OBJE
     LdapConfigurationError, LdapServerType
 from sdcm.utils.log import configure_logging, handle_exception
 from sdcm.db_stats import PrometheusDBStats
+from sdcm.es import ESBulkWriter
 from sdcm.results_analyze import PerformanceResultsAnalyzer, SpecifiedStatsPerformanceAnalyzer, \
     LatencyDuringOperationsPerformanceAnalyzer
 from sdcm.sct_config import init_and_verify_sct_config
@@ -284,7 +285,8 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
 
         self._profile_factory = None
         if self.params.get('enable_test_profiling'):
-            self._profile_factory = ProfilerFactory(os.path.join(self.logdir, 'profile.stats'))
+            self._profile_factory = ProfilerFactory(os.path.join(self.logdir, 'profile.stats'),
+                                                    mode=self.params.get('test_profiling_mode'))
             self._profile_factory.activate()
 
         ip_ssh_connections = self.params.get(key='ip_ssh_connections')
@@ -1828,6 +1830,7 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
             results, errors = cs_thread_pool.verify_results()
         if results and self.create_stats:
             self.update_stress_results(results)
+            self.update_latency_histograms(getattr(cs_thread_pool, "latency_histograms", None))
         if not results:
             self.log.warning('There is no stress results, probably stress thread has failed.')
         # Sometimes, we might have an epic error messages list
@@ -1843,12 +1846,14 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
         results = queue.get_results()
         if store_results and self.create_stats:
             self.update_stress_results(results)
+            self.update_latency_histograms(getattr(queue, "latency_histograms", None))
         return results
 
     def get_stress_results_bench(self, queue):
         results = queue.get_stress_results_bench()
         if self.create_stats:
             self.update_stress_results(results)
+            self.update_latency_histograms(getattr(queue, "latency_histograms", None))
         return results
 
     def verify_cdclog_reader_results(self, cdcreadstessors_queue, update_es=False):
@@ -2570,6 +2575,7 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
         self.save_email_data()
         self.destroy_localhost()
         self.send_email()
+        self.flush_es_bulk_writers()
         self.stop_event_device()
         if self.params.get('collect_logs'):
             self.collect_sct_logs()
@@ -2659,6 +2665,12 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
             if self.create_stats:
                 self.update({'test_details': {'log_files': {'job_log': s3_link}}})
 
+    @silence()
+    def flush_es_bulk_writers(self):
+        # Errors of buffered test stats are published as events, so flush them while the events device is running.
+        self.flush_stats()
+        ESBulkWriter.close_all()
+
     @silence()
     def stop_event_device(self):  # pylint: disable=no-self-use
         stop_events_device(_registry=self.events_processes_registry)
@@ -2827,6 +2839,7 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
             results_analyzer.check_regression(test_id=self._test_id, data=latency_results)
 
     def check_regression(self):
+        self.flush_stats()
         results_analyzer = PerformanceResultsAnalyzer(es_index=self._test_index,
                                                       es_doc_type=self._es_doc_type,
                                                       email_recipients=self.params.get('email_recipients'),
@@ -2843,6 +2856,7 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
             self.log.exception('Failed to check regression: %s', ex)
 
     def check_regression_with_baseline(self, subtest_baseline):
+        self.flush_stats()
         results_analyzer = PerformanceResultsAnalyzer(es_index=self._test_index,
                                                       es_doc_type=self._es_doc_type,
                                                       email_recipients=self.params.get('email_recipients'),
@@ -2861,6 +2875,7 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
 
     def check_regression_multi_baseline(self, subtests_info=None,  # pylint: disable=inconsistent-return-statements
                                         metrics=None, email_subject=None):
+        self.flush_stats()
         results_analyzer = PerformanceResultsAnalyzer(es_index=self._test_index,
                                                       es_doc_type=self._es_doc_type,
                                                       email_recipients=self.params.get('email_recipients'),
@@ -2885,6 +2900,7 @@ class ClusterTester(db_stats.TestStatsMixin, unittest.TestCase):  # pylint: disa
             return False
 
     def check_specified_stats_regression(self, stats):
+        self.flush_stats()
         perf_analyzer = SpecifiedStatsPerformanceAnalyzer(es_index=self._test_index,
                                                           es_doc_type=self._es_doc_type,
                                                           email_recipients=self.params.get('email_recipients'),
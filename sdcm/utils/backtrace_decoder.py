@@ -0,0 +1,99 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ADDR2LINE_MAX_ADDRESSES = 1000  # per one addr2line call, to keep the command line reasonably short
+DECODING_BATCH_SIZE = 500  # backtraces taken from the decoding queue at once
+INLINED_FRAME_PREFIX = " (inlined by) "
+
+LOGGER = logging.getLogger(__name__)
+
+
+def split_addr2line_output(output: str) -> List[str]:
+    """Split output of `addr2line -Cpife' to frames, one for each address.
+
+    With `-i', an address can be decoded to several lines: the function itself and functions inlined into it.
+    """
+
+    frames = []
+    for line in output.splitlines(keepends=True):
+        if line.startswith(INLINED_FRAME_PREFIX) and frames:
+            frames[-1] += line
+        else:
+            frames.append(line)
+    return frames
+
+
+class BacktraceDecoder:
+    """Decode raw backtraces of events with addr2line on a node (usually, the monitor node.)
+
+    All backtraces of a batch are decoded using a single addr2line call for addresses which weren't seen before.
+    Decoded frames are memoized per build, and debug info files are copied to the node only once per build.
+
+    The node is expected to provide `copy_scylla_debug_info()' and `decode_raw_backtrace()' methods of `BaseNode'.
+    """
+
+    def __init__(self, node, max_addresses: int = ADDR2LINE_MAX_ADDRESSES):
+        self._node = node
+        self._max_addresses = max_addresses
+        self._debug_files: Dict[str, str] = {}  # build id (or debug info file on a db node) -> file on the node
+        self._frames: Dict[str, Dict[str, str]] = defaultdict(dict)  # build id -> address -> decoded frame
+        self.addr2line_calls = 0
+
+    def get_debug_file(self, node_name: str, debug_file: str, build_id: Optional[str] = None) -> str:
+        key = build_id or debug_file
+        if key not in self._debug_files:
+            self._debug_files[key] = self._node.copy_scylla_debug_info(node_name, debug_file)
+        return self._debug_files[key]
+
+    def _addr2line(self, debug_file: str, addresses: List[str]) -> str:
+        self.addr2line_calls += 1
+        return self._node.decode_raw_backtrace(debug_file, " ".join(addresses)).stdout
+
+    def _decode_addresses(self, key: str, debug_file: str, addresses: List[str]) -> None:
+        frames = self._frames[key]
+        for start in range(0, len(addresses), self._max_addresses):
+            chunk = addresses[start:start + self._max_addresses]
+            decoded = split_addr2line_output(self._addr2line(debug_file, chunk))
+            if len(decoded) != len(chunk):
+                LOGGER.warning("addr2line returned %d frames for %d addresses, decode backtraces one by one",
+                               len(decoded), len(chunk))
+                return
+            frames.update(zip(chunk, decoded))
+
+    def decode(self, items: List[dict]) -> None:
+        """Set `backtrace' attribute of events from `DECODING_QUEUE' items.
+
+        Each item is a dict with `node', `debug_file', `event' and, optionally, `build_id' keys.
+        """
+
+        batches = defaultdict(list)
+        for item in items:
+            debug_file = self.get_debug_file(item["node"], item["debug_file"], item.get("build_id"))
+            batches[(item.get("build_id") or item["debug_file"], debug_file)].append(item["event"])
+
+        for (key, debug_file), events in batches.items():
+            frames = self._frames[key]
+            addresses = [(event, event.raw_backtrace.split()) for event in events]
+            if new_addresses := list(dict.fromkeys(address
+                                                   for _, event_addresses in addresses
+                                                   for address in event_addresses if address not in frames)):
+                self._decode_addresses(key, debug_file, new_addresses)
+            for event, event_addresses in addresses:
+                if all(address in frames for address in event_addresses):
+                    event.backtrace = "".join(frames[address] for address in event_addresses)
+                else:
+                    event.backtrace = self._addr2line(debug_file, event_addresses)
@@ -37,7 +37,7 @@ import uuid
 import zipfile
 import io
 import tempfile
-from typing import Iterable, List, Callable, Optional, Dict, Union, Literal, Any
+from typing import Iterable, Iterator, List, Callable, Optional, Dict, Union, Literal, Any
 from urllib.parse import urlparse
 from unittest.mock import Mock
 from textwrap import dedent
@@ -1385,6 +1385,20 @@ class FileFollowerThread():
     def follow_file(self, filename):
         return FileFollowerIterator(filename, self)
 
+    def follow_file_chunks(self, filename: str, interval: float = 1) -> Iterator[List[str]]:
+        """Yield lists of complete lines appended to the file, at most once per `interval' seconds."""
+
+        with open(filename, encoding="utf-8") as input_file:
+            tail = ''
+            while not self.stopped():
+                lines = (tail + input_file.read()).split('\n')
+                tail = lines.pop()
+                if lines:
+                    yield lines
+                self._stop_event.wait(interval)
+            if tail:
+                yield [tail]
+
 
 class ScyllaCQLSession:
     def __init__(self, session, cluster, verbose=True):
@@ -2283,6 +2297,10 @@ def parse_nodetool_listsnapshots(listsnapshots_output: str) -> defaultdict:
     return snapshots_content
 
 
+# Suffix of a metric value -> (multiplier, divisor) to convert it to ms.
+METRIC_UNITS_TO_MS = {"ms": (1, 1), "µs": (1, 1000), "s": (1000, 1), "": (1, 1)}
+
+
 def convert_metric_to_ms(metric: str) -> float:
     """
     Convert metric value to ms and float.
@@ -2297,6 +2315,14 @@ def convert_metric_to_ms(metric: str) -> float:
         "30ms"
     """
 
+    # Fast path for simple values (all of them, except durations with hours or minutes.)
+    units = metric.lstrip("0123456789.")
+    if (scale := METRIC_UNITS_TO_MS.get(units)) and len(units) < len(metric):
+        try:
+            return float(metric[:len(metric) - len(units)]) * scale[0] / scale[1]
+        except ValueError:
+            pass
+
     def _convert_to_ms(units, value):
         if not value:
             return 0
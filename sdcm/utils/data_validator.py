@@ -13,10 +13,9 @@
 
 # Data validation module may be used with cassandra-stress user profile only
 #
-# **************** Caution **************************************************************
-# BE AWARE: During data validation all materialized views/expected table rows will be read into the memory
-#           Be sure your dataset will be less then 2Gb.
-# ****************************************************************************************
+# During data validation materialized views/expected table rows are read page by page and only digests of them are
+# kept in the memory (see `PartitionsDigest'.)  Rows of mismatched partitions are read once more and saved to a report
+# in the test log directory.
 #
 # Here is described Data validation module and requirements for user profile.
 # Please, read the explanation and requirements
@@ -132,17 +131,78 @@
 #     running stress.
 #
 
+import os
 import re
 import logging
-from sdcm.sct_events import Severity
+from typing import Iterator, Optional
+from operator import attrgetter
+from collections import Counter, defaultdict
+
+from cassandra import ConsistencyLevel
+from cassandra.query import SimpleStatement  # pylint: disable=no-name-in-module
 
+from sdcm.sct_events import Severity
 from sdcm.utils.common import get_profile_content
 from sdcm.sct_events.health import DataValidatorEvent
 
+DIGEST_BUCKETS = 2 ** 16
+MAX_REPORTED_BUCKETS = 100
 
 LOGGER = logging.getLogger(__name__)
 
 
+def row_hash(row) -> int:
+    try:
+        return hash(row)
+    except TypeError:  # a row has a column of a collection type
+        return hash(repr(row))
+
+
+class PartitionsDigest:
+    """Order-independent digest of rows which are added page by page.
+
+    Rows are spread to buckets by their partition key, and each bucket keeps the number of its rows and the sum of
+    their hashes.  So, rows of a partition always land to the same bucket in any order, and memory used by the digest
+    doesn't depend on the table size.  Two row sets are equal if all their buckets are equal; mismatched buckets
+    point to the partitions which should be checked row by row.
+    """
+
+    def __init__(self, partition_keys: Optional[list[str]] = None, buckets: int = DIGEST_BUCKETS):
+        assert buckets & (buckets - 1) == 0, "number of buckets should be a power of two"
+        self.partition_key = attrgetter(*partition_keys) if partition_keys else lambda row: row
+        self.rows_count = 0
+        self.counts = [0] * buckets
+        self.sums = [0] * buckets
+
+    def bucket(self, row) -> int:
+        return row_hash(self.partition_key(row)) & (len(self.counts) - 1)
+
+    def add_rows(self, rows: list) -> None:
+        partition_key, mask = self.partition_key, len(self.counts) - 1
+        try:
+            hashes = [(hash(partition_key(row)) & mask, hash(row)) for row in rows]
+        except TypeError:
+            hashes = [(self.bucket(row), row_hash(row)) for row in rows]
+        counts, sums = self.counts, self.sums
+        for bucket, row_hash_value in hashes:
+            counts[bucket] += 1
+            sums[bucket] += row_hash_value
+        self.rows_count += len(hashes)
+
+    def merge(self, other: "PartitionsDigest") -> None:
+        for bucket, (count, hashes_sum) in enumerate(zip(other.counts, other.sums)):
+            self.counts[bucket] += count
+            self.sums[bucket] += hashes_sum
+        self.rows_count += other.rows_count
+
+    def mismatched_buckets(self, other: "PartitionsDigest") -> list[int]:
+        return [bucket for bucket in range(len(self.counts))
+                if self.counts[bucket] != other.counts[bucket] or self.sums[bucket] != other.sums[bucket]]
+
+    def __eq__(self, other):
+        return isinstance(other, PartitionsDigest) and self.counts == other.counts and self.sums == other.sums
+
+
 # pylint: disable=too-many-instance-attributes
 class LongevityDataValidator:
     SUFFIX_FOR_VIEW_AFTER_UPDATE = '_after_update'
@@ -306,6 +366,60 @@ class LongevityDataValidator:
         find_mv_name = re.search(r'materialized view (.*%s.*) as' % name_substr, mv_create_cmd, re.I)
         return find_mv_name.group(1) if find_mv_name else None
 
+    def fetch_pages(self, session, statement: str, verbose: bool = True) -> Iterator[list]:
+        if verbose:
+            LOGGER.debug("Fetch rows page by page by statement: %s", statement)
+        result = session.execute(SimpleStatement(statement,
+                                                 fetch_size=self.DEFAULT_FETCH_SIZE,
+                                                 consistency_level=ConsistencyLevel.QUORUM))
+        while True:
+            yield result.current_rows
+            if not result.has_more_pages:
+                break
+            result.fetch_next_page()
+
+    def count_rows(self, session, statement: str, verbose: bool = True) -> int:
+        return sum(len(page) for page in self.fetch_pages(session=session, statement=statement, verbose=verbose))
+
+    def digest_rows(self, session, statements: list[str], partition_keys: Optional[list[str]] = None,
+                    verbose: bool = True) -> PartitionsDigest:
+        digest = PartitionsDigest(partition_keys=partition_keys)
+        for statement in statements:
+            for page in self.fetch_pages(session=session, statement=statement, verbose=verbose):
+                digest.add_rows(page)
+        return digest
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def report_mismatched_partitions(self, session, name: str, actual_statements: list[str],
+                                     expected_statements: list[str], actual: PartitionsDigest,
+                                     expected: PartitionsDigest) -> str:
+        """Read rows of mismatched buckets once more and save differences per partition to a report file.
+
+        Only first `MAX_REPORTED_BUCKETS' mismatched buckets are reported to keep memory usage bounded.
+        """
+
+        buckets = set(actual.mismatched_buckets(expected)[:MAX_REPORTED_BUCKETS])
+        partitions = defaultdict(Counter)  # partition key -> row -> (actual count - expected count)
+        for statements, sign in ((actual_statements, 1), (expected_statements, -1), ):
+            for statement in statements:
+                for page in self.fetch_pages(session=session, statement=statement, verbose=False):
+                    for row in page:
+                        if actual.bucket(row) in buckets:
+                            partitions[repr(actual.partition_key(row))][repr(row)] += sign
+        report_path = os.path.join(self.longevity_self_object.logdir, f"data_validation_{name}.log")
+        with open(report_path, "w", encoding="utf-8") as report:
+            for partition_key, rows in partitions.items():
+                if not any(rows.values()):
+                    continue
+                report.write(f"Partition {partition_key}:\n")
+                for row, count in rows.items():
+                    if count > 0:
+                        report.write(f"  unexpected ({count}): {row}\n")
+                    elif count < 0:
+                        report.write(f"  missing ({-count}): {row}\n")
+        LOGGER.debug("Mismatched partitions of %s are saved to %s", name, report_path)
+        return report_path
+
     def copy_immutable_expected_data(self):
         # Create expected data for immutable rows
         if self._validate_not_updated_data:
@@ -381,11 +495,10 @@ class LongevityDataValidator:
         pk_name = self.base_table_partition_keys[0]
         with self.longevity_self_object.db_cluster.cql_connection_patient(
                 self.longevity_self_object.db_cluster.nodes[0], keyspace=self.keyspace_name) as session:
-            rows_before_deletion = self.longevity_self_object.fetch_all_rows(
-                session=session, default_fetch_size=self.DEFAULT_FETCH_SIZE,
-                statement=f"SELECT {pk_name} FROM {self.view_name_for_deletion_data}")
+            rows_before_deletion = self.count_rows(
+                session=session, statement=f"SELECT {pk_name} FROM {self.view_name_for_deletion_data}")
             if rows_before_deletion:
-                self.rows_before_deletion = len(rows_before_deletion)
+                self.rows_before_deletion = rows_before_deletion
                 LOGGER.debug("%s rows for deletion", self.rows_before_deletion)
 
     def validate_range_not_expected_to_change(self, session, during_nemesis=False):
@@ -407,11 +520,12 @@ class LongevityDataValidator:
         if not during_nemesis:
             LOGGER.debug('Verify immutable rows')
 
-        actual_result = self.longevity_self_object.fetch_all_rows(
-            session=session, default_fetch_size=self.DEFAULT_FETCH_SIZE,
-            statement=f"SELECT * FROM {self.view_name_for_not_updated_data}",
-            verbose=not during_nemesis)
-        if not actual_result:
+        actual_statements = [f"SELECT * FROM {self.view_name_for_not_updated_data}"]
+        actual_result = self.digest_rows(session=session,
+                                         statements=actual_statements,
+                                         partition_keys=self.base_table_partition_keys,
+                                         verbose=not during_nemesis)
+        if not actual_result.rows_count:
             DataValidatorEvent.ImmutableRowsValidator(
                 severity=Severity.WARNING,
                 message=f"Can't validate immutable rows. "
@@ -420,11 +534,12 @@ class LongevityDataValidator:
             ).publish()
             return
 
-        expected_result = self.longevity_self_object.fetch_all_rows(
-            session=session, default_fetch_size=self.DEFAULT_FETCH_SIZE,
-            statement=f"SELECT * FROM {self.expected_data_table_name}",
-            verbose=not during_nemesis)
-        if not expected_result:
+        expected_statements = [f"SELECT * FROM {self.expected_data_table_name}"]
+        expected_result = self.digest_rows(session=session,
+                                           statements=expected_statements,
+                                           partition_keys=self.base_table_partition_keys,
+                                           verbose=not during_nemesis)
+        if not expected_result.rows_count:
             DataValidatorEvent.ImmutableRowsValidator(
                 severity=Severity.WARNING,
                 message=f"Can't validate immutable rows. Fetch all rows from {self.expected_data_table_name} failed. "
@@ -434,21 +549,26 @@ class LongevityDataValidator:
 
         # Issue https://github.com/scylladb/scylla/issues/6181
         # Not fail the test if unexpected additional rows where found in actual result table
-        if len(actual_result) > len(expected_result):
+        if actual_result.rows_count > expected_result.rows_count:
             DataValidatorEvent.ImmutableRowsValidator(
                 severity=Severity.WARNING,
-                message=f"Actual dataset length more then expected ({len(actual_result)} > {len(expected_result)}). "
-                        f"Issue #6181"
+                message=f"Actual dataset length more then expected "
+                        f"({actual_result.rows_count} > {expected_result.rows_count}). Issue #6181"
             ).publish()
         else:
             if not during_nemesis:
-                assert len(actual_result) == len(expected_result), \
+                assert actual_result.rows_count == expected_result.rows_count, \
                     'One or more rows are not as expected, suspected LWT wrong update. ' \
-                    'Actual dataset length: {}, Expected dataset length: {}'.format(len(actual_result),
-                                                                                    len(expected_result))
+                    'Actual dataset length: {}, Expected dataset length: {}'.format(actual_result.rows_count,
+                                                                                    expected_result.rows_count)
 
-                assert actual_result == expected_result, \
-                    'One or more rows are not as expected, suspected LWT wrong update'
+                if actual_result != expected_result:
+                    report_path = self.report_mismatched_partitions(
+                        session=session, name=self.view_name_for_not_updated_data,
+                        actual_statements=actual_statements, expected_statements=expected_statements,
+                        actual=actual_result, expected=expected_result)
+                    raise AssertionError('One or more rows are not as expected, suspected LWT wrong update. '
+                                         f'See mismatched partitions in {report_path}')
 
                 # Raise info event at the end of the test only.
                 DataValidatorEvent.ImmutableRowsValidator(
@@ -456,17 +576,17 @@ class LongevityDataValidator:
                     message="Validation immutable rows finished successfully"
                 ).publish()
             else:
-                if len(actual_result) < len(expected_result):
+                if actual_result.rows_count < expected_result.rows_count:
                     DataValidatorEvent.ImmutableRowsValidator(
                         severity=Severity.ERROR,
                         error=f"Verify immutable rows. "
                               f"One or more rows not found as expected, suspected LWT wrong update. "
-                              f"Actual dataset length: {len(actual_result)}, "
-                              f"Expected dataset length: {len(expected_result)}"
+                              f"Actual dataset length: {actual_result.rows_count}, "
+                              f"Expected dataset length: {expected_result.rows_count}"
                     ).publish()
                 else:
                     LOGGER.debug('Verify immutable rows. Actual dataset length: %s, Expected dataset length: %s',
-                                 len(actual_result), len(expected_result))
+                                 actual_result.rows_count, expected_result.rows_count)
 
     def validate_range_expected_to_change(self, session, during_nemesis=False):
         """
@@ -515,11 +635,10 @@ class LongevityDataValidator:
                 ).publish()
                 return
 
-            before_update_rows = self.longevity_self_object.fetch_all_rows(
-                session=session, default_fetch_size=self.DEFAULT_FETCH_SIZE,
-                statement=f"SELECT {partition_keys} FROM {views_set[0]}",
-                verbose=not during_nemesis)
-            if not before_update_rows:
+            before_update_rows = self.digest_rows(session=session,
+                                                  statements=[f"SELECT {partition_keys} FROM {views_set[0]}"],
+                                                  verbose=not during_nemesis)
+            if not before_update_rows.rows_count:
                 DataValidatorEvent.UpdatedRowsValidator(
                     severity=Severity.WARNING,
                     message=f"Can't validate updated rows. Fetch all rows from {views_set[0]} failed. "
@@ -527,11 +646,10 @@ class LongevityDataValidator:
                 ).publish()
                 return
 
-            after_update_rows = self.longevity_self_object.fetch_all_rows(
-                session=session, default_fetch_size=self.DEFAULT_FETCH_SIZE,
-                statement=f"SELECT {partition_keys} FROM {views_set[1]}",
-                verbose=not during_nemesis)
-            if not after_update_rows:
+            after_update_rows = self.digest_rows(session=session,
+                                                 statements=[f"SELECT {partition_keys} FROM {views_set[1]}"],
+                                                 verbose=not during_nemesis)
+            if not after_update_rows.rows_count:
                 DataValidatorEvent.UpdatedRowsValidator(
                     severity=Severity.WARNING,
                     message=f"Can't validate updated rows. Fetch all rows from {views_set[1]} failed. "
@@ -539,11 +657,10 @@ class LongevityDataValidator:
                 ).publish()
                 return
 
-            expected_rows = self.longevity_self_object.fetch_all_rows(
-                session=session, default_fetch_size=self.DEFAULT_FETCH_SIZE,
-                statement=f"SELECT {partition_keys} FROM {views_set[2]}",
-                verbose=not during_nemesis)
-            if not expected_rows:
+            expected_rows = self.digest_rows(session=session,
+                                             statements=[f"SELECT {partition_keys} FROM {views_set[2]}"],
+                                             verbose=not during_nemesis)
+            if not expected_rows.rows_count:
                 DataValidatorEvent.UpdatedRowsValidator(
                     severity=Severity.WARNING,
                     message=f"Can't validate updated row. Fetch all rows from {views_set[2]} failed. "
@@ -551,27 +668,35 @@ class LongevityDataValidator:
                 ).publish()
                 return
 
+            actual_data = before_update_rows
+            actual_data.merge(after_update_rows)
+
             # Issue https://github.com/scylladb/scylla/issues/6181
             # Not fail the test if unexpected additional rows where found in actual result table
-            if len(before_update_rows) + len(after_update_rows) > len(expected_rows):
+            if actual_data.rows_count > expected_rows.rows_count:
                 DataValidatorEvent.UpdatedRowsValidator(
                     severity=Severity.WARNING,
                     message=f"View {views_set[0]}. "
-                            f"Actual dataset length {len(before_update_rows) + len(after_update_rows)} "
-                            f"more then expected dataset length: {len(expected_rows)}. "
+                            f"Actual dataset length {actual_data.rows_count} "
+                            f"more then expected dataset length: {expected_rows.rows_count}. "
                             f"Issue #6181"
                 ).publish()
             else:
-                actual_data = sorted(before_update_rows+after_update_rows)
-                expected_data = sorted(expected_rows)
                 if not during_nemesis:
-                    assert actual_data == expected_data,\
-                        'One or more rows are not as expected, suspected LWT wrong update'
-
-                    assert len(before_update_rows) + len(after_update_rows) == len(expected_rows), \
+                    if actual_data != expected_rows:
+                        report_path = self.report_mismatched_partitions(
+                            session=session, name=views_set[0],
+                            actual_statements=[f"SELECT {partition_keys} FROM {views_set[0]}",
+                                               f"SELECT {partition_keys} FROM {views_set[1]}"],
+                            expected_statements=[f"SELECT {partition_keys} FROM {views_set[2]}"],
+                            actual=actual_data, expected=expected_rows)
+                        raise AssertionError('One or more rows are not as expected, suspected LWT wrong update. '
+                                             f'See mismatched partitions in {report_path}')
+
+                    assert actual_data.rows_count == expected_rows.rows_count, \
                         'One or more rows are not as expected, suspected LWT wrong update. '\
-                        f'Actual dataset length: {len(before_update_rows) + len(after_update_rows)}, ' \
-                        f'Expected dataset length: {len(expected_rows)}'
+                        f'Actual dataset length: {actual_data.rows_count}, ' \
+                        f'Expected dataset length: {expected_rows.rows_count}'
 
                     # raise info event in the end of test only
                     DataValidatorEvent.UpdatedRowsValidator(
@@ -581,7 +706,7 @@ class LongevityDataValidator:
                 else:
                     LOGGER.debug('Validation updated rows.  View %s. Actual dataset length %s, '
                                  'Expected dataset length: %s.',
-                                 views_set[0], len(before_update_rows) + len(after_update_rows), len(expected_rows))
+                                 views_set[0], actual_data.rows_count, expected_rows.rows_count)
 
     def validate_deleted_rows(self, session, during_nemesis=False):
         """
@@ -601,18 +726,10 @@ class LongevityDataValidator:
         if not during_nemesis:
             LOGGER.debug('Verify deleted rows')
 
-        actual_result = self.longevity_self_object.fetch_all_rows(session=session, default_fetch_size=self.DEFAULT_FETCH_SIZE,
-                                                                  statement=f"SELECT {pk_name} FROM {self.view_name_for_deletion_data}",
-                                                                  verbose=not during_nemesis)
-        if actual_result is None:
-            DataValidatorEvent.DeletedRowsValidator(
-                severity=Severity.ERROR,
-                error=f"Can't validate deleted rows. Fetch all rows from {self.view_name_for_deletion_data} failed. "
-                      f"See error above in the sct.log"
-            ).publish()
-            return
-
-        if len(actual_result) < self.rows_before_deletion:
+        actual_result = self.count_rows(session=session,
+                                        statement=f"SELECT {pk_name} FROM {self.view_name_for_deletion_data}",
+                                        verbose=not during_nemesis)
+        if actual_result < self.rows_before_deletion:
             if not during_nemesis:
                 # raise info event in the end of test only
                 DataValidatorEvent.DeletedRowsValidator(
@@ -623,5 +740,5 @@ class LongevityDataValidator:
                 LOGGER.debug('Validation deleted rows finished successfully')
         else:
             LOGGER.warning('Deleted row were not found. May be issue #6181. '
-                           'Actual dataset length: {}, Expected dataset length: {}'.format(len(actual_result),
+                           'Actual dataset length: {}, Expected dataset length: {}'.format(actual_result,
                                                                                            self.rows_before_deletion))
@@ -41,9 +41,12 @@ class QueryFilter:
         return test_details
 
     @staticmethod
-    def filter_test_for_last_year():
-        year_ago = (datetime.today() - timedelta(days=365)).date().strftime("%Y%m%d")
-        return f"versions.scylla-server.date:{{{year_ago} TO *}}"
+    def last_year_start_date():
+        return (datetime.today() - timedelta(days=365)).date().strftime("%Y%m%d")
+
+    @classmethod
+    def filter_test_for_last_year(cls):
+        return f"versions.scylla-server.date:{{{cls.last_year_start_date()} TO *}}"
 
     def test_cmd_details(self):
         raise NotImplementedError('Derived classes must implement this method.')
@@ -0,0 +1,353 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+"""HdrHistogram (http://hdrhistogram.org) compatible latency histograms.
+
+Histograms can be decoded from and encoded to the V2 compressed format used in histogram logs, like the ones written
+by `cassandra-stress ... -log hdrfile=<file>' and `scylla-bench -hdr-latency-file=<file>'.  Memory used by a histogram
+depends on the range of trackable values and the precision only, not on the number of recorded values, so it's cheap
+to merge histograms of all loaders and all intervals of a long stress run.
+"""
+
+import math
+import zlib
+import base64
+import struct
+import logging
+from array import array
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+
+ENCODING_COOKIE = 0x1c849303 | 0x10  # V2, counts are ZigZag LEB128 encoded
+COMPRESSED_ENCODING_COOKIE = 0x1c849304 | 0x10
+ENCODING_HEADER = struct.Struct(">iiiiqqd")  # cookie, payload length, normalizing index offset, significant figures,
+#                                              lowest and highest trackable values, integer to double conversion ratio
+COMPRESSED_HEADER = struct.Struct(">ii")  # cookie, compressed payload length
+
+NS_PER_MS = 1_000_000
+SUMMARY_PERCENTILES = (50, 90, 95, 99, 99.9, 99.99)
+DEFAULT_TAG = "latency"  # for intervals without a tag in histogram logs
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _encode_zigzag(values: Iterable[int]) -> bytes:
+    result = bytearray()
+    for value in values:
+        value = ((value << 1) ^ (value >> 63)) & 0xFFFFFFFFFFFFFFFF
+        for _ in range(8):
+            if value < 0x80:
+                break
+            result.append(value & 0x7F | 0x80)
+            value >>= 7
+        result.append(value)
+    return bytes(result)
+
+
+def _decode_zigzag(data: bytes) -> Iterator[int]:
+    index, size = 0, len(data)
+    while index < size:
+        value = shift = 0
+        while True:
+            if index == size:
+                raise ValueError("Truncated ZigZag LEB128 encoded value")
+            byte = data[index]
+            index += 1
+            if shift == 56:  # the 9th byte holds all 8 bits
+                value |= byte << 56
+                break
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        yield (value >> 1) ^ -(value & 1)
+
+
+class HdrHistogram:  # pylint: disable=too-many-instance-attributes
+    """A histogram of integer values with a fixed relative precision.
+
+    :param lowest_trackable_value: the lowest value which can be distinguished from 0
+    :param highest_trackable_value: the highest value to be recorded
+    :param significant_figures: number of significant decimal digits to which values are kept (1..5)
+    """
+
+    def __init__(self, lowest_trackable_value: int = 1, highest_trackable_value: int = 3600 * 1000 * NS_PER_MS,
+                 significant_figures: int = 3):
+        if lowest_trackable_value < 1 or highest_trackable_value < 2 * lowest_trackable_value:
+            raise ValueError(f"Invalid range of trackable values: {lowest_trackable_value}..{highest_trackable_value}")
+        if not 1 <= significant_figures <= 5:
+            raise ValueError(f"Invalid number of significant figures: {significant_figures}")
+        self.lowest_trackable_value = lowest_trackable_value
+        self.highest_trackable_value = highest_trackable_value
+        self.significant_figures = significant_figures
+
+        largest_value_with_single_unit_resolution = 2 * 10 ** significant_figures
+        sub_bucket_count_magnitude = math.ceil(math.log2(largest_value_with_single_unit_resolution))
+        self.sub_bucket_half_count_magnitude = max(sub_bucket_count_magnitude - 1, 0)
+        self.unit_magnitude = int(math.log2(lowest_trackable_value))
+        self.sub_bucket_count = 2 ** (self.sub_bucket_half_count_magnitude + 1)
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.sub_bucket_mask = (self.sub_bucket_count - 1) << self.unit_magnitude
+
+        smallest_untrackable_value = self.sub_bucket_count << self.unit_magnitude
+        self.bucket_count = 1
+        while smallest_untrackable_value <= highest_trackable_value:
+            smallest_untrackable_value <<= 1
+            self.bucket_count += 1
+        self.counts = array("q", bytes(8 * (self.bucket_count + 1) * self.sub_bucket_half_count))
+        self.total_count = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} count={self.total_count}>"
+
+    def __eq__(self, other):
+        return isinstance(other, HdrHistogram) and self.layout == other.layout and self.counts == other.counts
+
+    @property
+    def layout(self) -> tuple:
+        return self.unit_magnitude, self.sub_bucket_half_count_magnitude, len(self.counts)
+
+    def copy(self) -> "HdrHistogram":
+        histogram = self.__class__(self.lowest_trackable_value, self.highest_trackable_value, self.significant_figures)
+        histogram.add(self)
+        return histogram
+
+    def _counts_index(self, value: int) -> int:
+        bucket_index = (value | self.sub_bucket_mask).bit_length() - self.unit_magnitude \
+            - (self.sub_bucket_half_count_magnitude + 1)
+        sub_bucket_index = value >> (bucket_index + self.unit_magnitude)
+        return (((bucket_index + 1) << self.sub_bucket_half_count_magnitude)
+                + sub_bucket_index - self.sub_bucket_half_count)
+
+    def _index_range(self, index: int) -> tuple[int, int]:
+        """Return the lowest equivalent value and the size of the range of values for a counts index."""
+
+        bucket_index = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self.sub_bucket_half_count
+            bucket_index = 0
+        return sub_bucket_index << (bucket_index + self.unit_magnitude), 1 << (bucket_index + self.unit_magnitude)
+
+    def record_value(self, value: int, count: int = 1) -> None:
+        if value < 0 or value > self.highest_trackable_value:
+            raise ValueError(f"Value {value} is out of the trackable range 0..{self.highest_trackable_value}")
+        self.counts[self._counts_index(value)] += count
+        self.total_count += count
+
+    def add(self, other: "HdrHistogram") -> None:
+        """Merge counts of another histogram into this one."""
+
+        if other.layout == self.layout:
+            for index, count in enumerate(other.counts):
+                if count:
+                    self.counts[index] += count
+            self.total_count += other.total_count
+            return
+        for index, count in enumerate(other.counts):
+            if count:
+                lowest, size = other._index_range(index)  # pylint: disable=protected-access
+                self.record_value(min(lowest + size // 2, self.highest_trackable_value), count)
+
+    def _nonzero(self) -> Iterator[tuple[int, int, int]]:
+        for index, count in enumerate(self.counts):
+            if count:
+                yield (*self._index_range(index), count)
+
+    @property
+    def min(self) -> int:
+        return next((lowest for lowest, _, _ in self._nonzero()), 0)
+
+    @property
+    def max(self) -> int:
+        highest = 0
+        for lowest, size, _ in self._nonzero():
+            highest = lowest + size - 1
+        return highest
+
+    @property
+    def mean(self) -> float:
+        if not self.total_count:
+            return 0.0
+        return sum((lowest + size // 2) * count for lowest, size, count in self._nonzero()) / self.total_count
+
+    @property
+    def stdev(self) -> float:
+        if not self.total_count:
+            return 0.0
+        mean = self.mean
+        return math.sqrt(sum((lowest + size // 2 - mean) ** 2 * count
+                             for lowest, size, count in self._nonzero()) / self.total_count)
+
+    def get_value_at_percentile(self, percentile: float) -> int:
+        """Return the highest value equivalent to the value at the percentile (like HdrHistogram does.)"""
+
+        count_at_percentile = max(int(min(percentile, 100) / 100 * self.total_count + 0.5), 1)
+        total = 0
+        for lowest, size, count in self._nonzero():
+            total += count
+            if total >= count_at_percentile:
+                return lowest + size - 1
+        return 0
+
+    def encode(self) -> str:
+        """Encode the histogram to a base64 string of V2 compressed format."""
+
+        counts = self.counts
+        counts_limit = max((index for index, count in enumerate(counts) if count), default=-1) + 1
+        values = []
+        index = 0
+        while index < counts_limit:
+            count = counts[index]
+            index += 1
+            if count:
+                values.append(count)
+                continue
+            zeros = 1
+            while index < counts_limit and not counts[index]:
+                zeros += 1
+                index += 1
+            values.append(-zeros if zeros > 1 else 0)
+        payload = _encode_zigzag(values)
+        encoded = ENCODING_HEADER.pack(ENCODING_COOKIE, len(payload), 0, self.significant_figures,
+                                       self.lowest_trackable_value, self.highest_trackable_value, 1.0) + payload
+        compressed = zlib.compress(encoded)
+        header = COMPRESSED_HEADER.pack(COMPRESSED_ENCODING_COOKIE, len(compressed))
+        return base64.b64encode(header + compressed).decode()
+
+    @classmethod
+    def decode(cls, encoded: str) -> "HdrHistogram":
+        """Decode a histogram from a base64 string of V2 compressed format.
+
+        Raise ValueError if the string is not a valid encoded histogram.
+        """
+
+        try:
+            data = base64.b64decode(encoded)
+            cookie, length = COMPRESSED_HEADER.unpack_from(data)
+            if cookie & ~0xf0 != COMPRESSED_ENCODING_COOKIE & ~0xf0:
+                raise ValueError(f"Unsupported compressed histogram encoding: {cookie:#x}")
+            data = zlib.decompress(data[COMPRESSED_HEADER.size:COMPRESSED_HEADER.size + length])
+            cookie, payload_length, _, significant_figures, lowest, highest, _ = ENCODING_HEADER.unpack_from(data)
+            payload = data[ENCODING_HEADER.size:ENCODING_HEADER.size + payload_length]
+        except (zlib.error, struct.error) as exc:
+            raise ValueError(f"Malformed histogram: {exc}") from exc
+        if cookie & ~0xf0 != ENCODING_COOKIE & ~0xf0:
+            raise ValueError(f"Unsupported histogram encoding: {cookie:#x}")
+        histogram = cls(lowest, highest, significant_figures)
+        counts, counts_len = histogram.counts, len(histogram.counts)
+        index = 0
+        for value in _decode_zigzag(payload):
+            if value < 0:
+                index -= value
+            elif index < counts_len:
+                counts[index] = value
+                histogram.total_count += value
+                index += 1
+            else:
+                raise ValueError(f"Malformed histogram: count #{index} is out of the range of values "
+                                 f"{lowest}..{highest}")
+        return histogram
+
+    def summary(self, units_per_ms: float = NS_PER_MS) -> dict:
+        """Return count and latency stats in ms."""
+
+        return {
+            "count": self.total_count,
+            "min": round(self.min / units_per_ms, 3),
+            "max": round(self.max / units_per_ms, 3),
+            "mean": round(self.mean / units_per_ms, 3),
+            "stdev": round(self.stdev / units_per_ms, 3),
+            **{f"percentile_{str(percentile).replace('.', '_')}":
+               round(self.get_value_at_percentile(percentile) / units_per_ms, 3) for percentile in SUMMARY_PERCENTILES},
+        }
+
+
+class HdrLogInterval(NamedTuple):
+    tag: str
+    start: float
+    length: float
+    histogram: HdrHistogram
+
+
+def parse_hdr_log(lines: Iterable[str]) -> Iterator[HdrLogInterval]:
+    """Parse lines of a histogram log (https://github.com/HdrHistogram/HdrHistogram/blob/master/GoogleChartsExample)
+
+    Example:
+        #[Histogram log format version 1.3]
+        #[StartTime: 1441812279.474 (seconds since epoch), Wed Sep 09 08:24:39 PDT 2015]
+        "StartTimestamp","Interval_Length","Interval_Max","Interval_Compressed_Histogram"
+        Tag=WRITE-st,0.127,1.007,2.769,HISTFAAAAEV42pNpmSzMwMCgyAABTBDKT4GBgdnNYMcCBvsPEBEJISEuATEZMQ4uASkhIR4uAQ...
+    """
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(("#", '"')):
+            continue
+        tag = DEFAULT_TAG
+        if line.startswith("Tag="):
+            tag, line = line[4:].split(",", 1)
+        try:
+            start, length, _, encoded = line.split(",")
+            yield HdrLogInterval(tag=tag, start=float(start), length=float(length),
+                                 histogram=HdrHistogram.decode(encoded))
+        except ValueError as exc:
+            LOGGER.warning("Failed to parse a histogram log line `%s...': %s", line[:80], exc)
+
+
+class HdrHistogramsAggregator:
+    """Merge histograms of intervals of all loaders into a cluster-wide histogram per tag (e.g., `WRITE-st'.)"""
+
+    def __init__(self, units_per_ms: float = NS_PER_MS):
+        self.units_per_ms = units_per_ms
+        self.histograms: Dict[str, HdrHistogram] = {}
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+
+    def __bool__(self):
+        return bool(self.histograms)
+
+    def add(self, tag: str, histogram: HdrHistogram) -> None:
+        if (current := self.histograms.get(tag)) is None \
+                or histogram.highest_trackable_value > current.highest_trackable_value:
+            self.histograms[tag] = histogram.copy()
+            if current is not None:
+                self.histograms[tag].add(current)
+        else:
+            current.add(histogram)
+
+    def add_interval(self, interval: HdrLogInterval) -> None:
+        self.add(interval.tag, interval.histogram)
+        self.start = interval.start if self.start is None else min(self.start, interval.start)
+        self.end = max(self.end or 0, interval.start + interval.length)
+
+    def add_log_file(self, path: str) -> None:
+        with open(path, encoding="utf-8") as hdr_log:
+            for interval in parse_hdr_log(hdr_log):
+                self.add_interval(interval)
+
+    def merge(self, other: "HdrHistogramsAggregator") -> None:
+        for tag, histogram in other.histograms.items():
+            self.add(tag, histogram)
+
+    def to_dict(self) -> dict:
+        """Return stats and the encoded merged histogram for each tag, to be stored in a stats document."""
+
+        return {tag: {**histogram.summary(units_per_ms=self.units_per_ms), "histogram": histogram.encode()}
+                for tag, histogram in self.histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict, units_per_ms: float = NS_PER_MS) -> "HdrHistogramsAggregator":
+        aggregator = cls(units_per_ms=units_per_ms)
+        for tag, stats in data.items():
+            aggregator.add(tag, HdrHistogram.decode(stats["histogram"]))
+        return aggregator
@@ -0,0 +1,114 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import logging
+from typing import Optional
+
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+WATCH_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+INOTIFY_EVENT = struct.Struct("iIII")  # struct inotify_event without the name: wd, mask, cookie, len
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = (ctypes.c_int, )
+        libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+    except (OSError, AttributeError):  # not Linux
+        return None
+    return libc
+
+
+class FileChangesWatcher:
+    """Wait for changes of a file using inotify(7).
+
+    The directory of the file is watched, so creation, rotation and removal of the file are noticed too.  If inotify
+    is not available, `wait()' just sleeps and reports a possible change.
+
+    Example:
+    >>> watcher = FileChangesWatcher("/var/log/system.log")
+    >>> while True:
+    ...     if watcher.wait(timeout=1):
+    ...         read_appended_lines()
+    """
+
+    def __init__(self, path: str):
+        self.directory, name = os.path.split(os.path.abspath(path))
+        self._name = name.encode()
+        self._libc = _load_libc()
+        self._fd = None
+
+    def _add_watch(self) -> bool:
+        if self._fd is not None:
+            return True
+        if self._libc is None:
+            return False
+        if (fd := self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)) < 0:
+            LOGGER.debug("inotify is not available: %s", os.strerror(ctypes.get_errno()))
+            self._libc = None
+            return False
+        if self._libc.inotify_add_watch(fd, self.directory.encode(), WATCH_MASK) < 0:
+            # Most likely, the directory doesn't exist yet.  Try again on the next call.
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout' seconds and return True if the file could be changed."""
+
+        if self._fd is None:
+            # Changes made before the watch is added are not reported, so the file could be changed anyway.
+            if not self._add_watch():
+                time.sleep(timeout)
+            return True
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return bool(readable) and self._read_events()
+
+    def _read_events(self) -> bool:
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                _, mask, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                if mask & (IN_Q_OVERFLOW | IN_IGNORED) or data[offset:offset + name_len].rstrip(b"\0") == self._name:
+                    changed = True
+                if mask & IN_IGNORED:  # the directory was removed: watch it again when it is recreated
+                    self.close()
+                    return True
+                offset += name_len
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
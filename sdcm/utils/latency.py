@@ -26,12 +26,13 @@ def collect_latency(monitor_node, start, end, load_type, cluster, nodes_list):
     cassandra_stress_precision = ['99', '95']  # in the future should include also 'max'
     scylla_precision = ['99']  # in the future should include also '95', '5'
 
+    queries = []
     for precision in cassandra_stress_precision:
-        metric = f'c-s {precision}' if precision == 'max' else f'c-s P{precision}'
         if not precision == 'max':
             precision = f'perc_{precision}'
-        query = f'collectd_cassandra_stress_{load_type}_gauge{{type="lat_{precision}"}}'
-        query_res = prometheus.query(query, start, end)
+        queries.append(f'collectd_cassandra_stress_{load_type}_gauge{{type="lat_{precision}"}}')
+    for precision, query_res in zip(cassandra_stress_precision, prometheus.query_many(queries, start, end)):
+        metric = f'c-s {precision}' if precision == 'max' else f'c-s P{precision}'
         latency_values_lst = []
         max_latency_values_lst = []
         for entry in query_res:
@@ -53,29 +54,28 @@ def collect_latency(monitor_node, start, end, load_type, cluster, nodes_list):
     else:
         load_type = [load_type]
 
-    for load in load_type:
-        for precision in scylla_precision:
-            query = f'histogram_quantile(0.{precision},sum(rate(scylla_storage_proxy_coordinator_{load}_' \
-                    f'latency_bucket{{}}[{duration}s])) by (instance, le))'
-            query_res = prometheus.query(query, start, end)
-            for entry in query_res:
-                node_ip = entry['metric']['instance'].replace('[', '').replace(']', '')
-                node = cluster.get_node_by_ip(node_ip)
-                if not node:
-                    for db_node in nodes_list:
-                        if db_node.ip_address == node_ip:
-                            node = db_node
-                if node:
-                    node_idx = node.name.split('-')[-1]
-                else:
-                    continue
-                node_name = f'node-{node_idx}'
-                metric = f"Scylla P{precision}_{load} - {node_name}"
-                if not entry['values']:
-                    continue
-                sequence = [float(val[-1]) for val in entry['values'] if not val[-1].lower() == 'nan']
-                if sequence:
-                    res[metric] = float(format(avg(sequence) / 1000, '.2f'))
+    load_precisions = [(load, precision) for load in load_type for precision in scylla_precision]
+    queries = [f'histogram_quantile(0.{precision},sum(rate(scylla_storage_proxy_coordinator_{load}_'
+               f'latency_bucket{{}}[{duration}s])) by (instance, le))' for load, precision in load_precisions]
+    for (load, precision), query_res in zip(load_precisions, prometheus.query_many(queries, start, end)):
+        for entry in query_res:
+            node_ip = entry['metric']['instance'].replace('[', '').replace(']', '')
+            node = cluster.get_node_by_ip(node_ip)
+            if not node:
+                for db_node in nodes_list:
+                    if db_node.ip_address == node_ip:
+                        node = db_node
+            if node:
+                node_idx = node.name.split('-')[-1]
+            else:
+                continue
+            node_name = f'node-{node_idx}'
+            metric = f"Scylla P{precision}_{load} - {node_name}"
+            if not entry['values']:
+                continue
+            sequence = [float(val[-1]) for val in entry['values'] if not val[-1].lower() == 'nan']
+            if sequence:
+                res[metric] = float(format(avg(sequence) / 1000, '.2f'))
 
     return res
 
@@ -0,0 +1,129 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import re
+from typing import Iterable, List, FrozenSet, Set, Tuple, Dict
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse  # pylint: disable=deprecated-module
+
+REPEAT_OPCODES = tuple(op for op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT,
+                                     getattr(sre_parse, "POSSESSIVE_REPEAT", None)) if op is not None)
+ATOMIC_GROUP_OPCODE = getattr(sre_parse, "ATOMIC_GROUP", None)
+
+# Each match of a regex contains at least one literal from every set.
+RequiredLiterals = List[FrozenSet[str]]
+
+
+def _most_selective(required: RequiredLiterals) -> FrozenSet[str]:
+    return max(required, key=lambda literals: min(map(len, literals)))
+
+
+def _drop_redundant(literals: Iterable[str]) -> FrozenSet[str]:
+    """Keep only the shortest literals: if `a' is a part of `b' then `b' can't appear in a line without `a'."""
+
+    literals = set(literals)
+    return frozenset(lit for lit in literals if not any(other != lit and other in lit for other in literals))
+
+
+def required_literals(parsed: Iterable[Tuple]) -> RequiredLiterals:
+    """Find lowercased ASCII literals which are required to be in a line for a parsed regex to match it.
+
+    Everything which is not obviously required (character classes, optional repeats, lookarounds, etc.)
+    is just skipped, so it's safe to use the result as a prefilter.
+    """
+
+    result = []
+    run = []
+
+    def flush_run():
+        if run:
+            result.append(frozenset(("".join(run), )))
+            run.clear()
+
+    for opcode, arg in parsed:
+        if opcode is sre_parse.LITERAL and arg < 128:
+            run.append(chr(arg).lower())
+            continue
+        flush_run()
+        if opcode is sre_parse.SUBPATTERN:
+            result.extend(required_literals(arg[-1]))
+        elif opcode is sre_parse.BRANCH:
+            branches = [required_literals(branch) for branch in arg[1]]
+            if all(branches):
+                result.append(_drop_redundant(lit for branch in branches for lit in _most_selective(branch)))
+        elif opcode in REPEAT_OPCODES:
+            min_repeat, _, item = arg
+            if min_repeat:
+                result.extend(required_literals(item))
+        elif opcode is ATOMIC_GROUP_OPCODE:
+            result.extend(required_literals(arg))
+    flush_run()
+
+    return result
+
+
+class MultiPatternMatcher:
+    """Select regexes which can match a line using a cheap literals prefilter.
+
+    All patterns are analyzed once on creation: for each of them we collect sets of literals which should be present
+    in a line for the pattern to match.  For a line we do a single pass over all known literals (using a plain
+    substring search in a lowercased line) and return patterns which have all of their required literals in it.
+    Only these patterns need to run their regex for the line.
+
+    Lines with non-ASCII characters skip the prefilter because of Unicode case-folding rules of `re.IGNORECASE'.
+    """
+
+    def __init__(self, patterns: Iterable[re.Pattern]):
+        self.patterns = tuple(patterns)
+        self._pattern_clauses: Dict[re.Pattern, Set[Tuple[re.Pattern, int]]] = {}
+        self._literal_clauses: Dict[str, List[Tuple[re.Pattern, int]]] = {}
+        self._unconditional = frozenset(pattern for pattern in self.patterns if not self._add_pattern(pattern))
+
+    def _add_pattern(self, pattern: re.Pattern) -> bool:
+        if not isinstance(pattern.pattern, str):
+            return False
+        if not (required := required_literals(sre_parse.parse(pattern.pattern, pattern.flags))):
+            return False
+        clauses = self._pattern_clauses.setdefault(pattern, set())
+        for alternatives in required:
+            clause = (pattern, len(clauses))
+            clauses.add(clause)
+            for literal in _drop_redundant(alternatives):
+                self._literal_clauses.setdefault(literal, []).append(clause)
+        return True
+
+    @property
+    def literals(self) -> Tuple[str, ...]:
+        return tuple(self._literal_clauses)
+
+    def candidates(self, line: str) -> Set[re.Pattern]:
+        """Return patterns which can match the line."""
+
+        if not line.isascii():
+            return set(self.patterns)
+        line = line.lower()
+        satisfied = set()
+        for literal, clauses in self._literal_clauses.items():
+            if literal in line:
+                satisfied.update(clauses)
+        candidates = set(self._unconditional)
+        for pattern, _ in satisfied:
+            if pattern not in candidates and self._pattern_clauses[pattern] <= satisfied:
+                candidates.add(pattern)
+        return candidates
+
+
+__all__ = ("MultiPatternMatcher", "required_literals", )
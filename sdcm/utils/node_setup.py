@@ -0,0 +1,93 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import time
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class NodeSetupPhase(NamedTuple):
+    name: str
+    func: Callable[[Any], None]  # called with a node
+    exclusive: bool = False  # run on one node at a time, in the order of nodes
+
+
+class NodeSetupScheduler:
+    """Set up nodes concurrently, phase by phase.
+
+    Each node goes through the phases in order, independently of other nodes, except for exclusive phases: a node
+    starts an exclusive phase only after all previous nodes in the list finished it (e.g., Scylla nodes should join
+    the ring one by one, while packages can be installed on all nodes at the same time.)
+
+    When setup of a node is done, `(node, None)' is put to `results' queue, and `(node, (error, traceback))' if it
+    failed.  After a failure, nodes don't start exclusive phases anymore and report an error instead.
+    """
+
+    def __init__(self, nodes: list, phases: List[NodeSetupPhase]):
+        self.nodes = list(nodes)
+        self.phases = phases
+        self.results: "queue.Queue[Tuple[Any, Optional[Tuple[str, str]]]]" = queue.Queue()
+        self.timings: Dict[Any, Dict[str, float]] = {node: {} for node in self.nodes}  # node -> phase -> seconds
+        self._finished = {phase.name: 0 for phase in phases if phase.exclusive}  # number of nodes for each phase
+        self._condition = threading.Condition()
+        self._failed = False
+
+    def start(self) -> None:
+        for index, node in enumerate(self.nodes):
+            threading.Thread(target=self._setup_node, args=(index, node), name=f"NodeSetupThread-{index}",
+                             daemon=True).start()
+
+    def _wait_for_turn(self, phase: NodeSetupPhase, index: int) -> bool:
+        with self._condition:
+            self._condition.wait_for(lambda: self._failed or self._finished[phase.name] == index)
+            return not self._failed
+
+    def _phase_finished(self, phase: NodeSetupPhase) -> None:
+        with self._condition:
+            self._finished[phase.name] += 1
+            self._condition.notify_all()
+
+    def _setup_node(self, index: int, node: Any) -> None:
+        try:
+            for phase in self.phases:
+                if phase.exclusive:
+                    start_time = time.perf_counter()
+                    if not self._wait_for_turn(phase, index):
+                        self.results.put((node, (f"setup stopped before `{phase.name}' phase because of a failure "
+                                                 f"on another node", "")))
+                        return
+                    self.timings[node][f"{phase.name} (waiting)"] = time.perf_counter() - start_time
+                start_time = time.perf_counter()
+                try:
+                    phase.func(node)
+                finally:
+                    self.timings[node][phase.name] = time.perf_counter() - start_time
+                if phase.exclusive:
+                    self._phase_finished(phase)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.results.put((node, (str(exc), traceback.format_exc())))  # report it before stopped nodes do
+            with self._condition:
+                self._failed = True
+                self._condition.notify_all()
+        else:
+            self.results.put((node, None))
+
+    def timings_summary(self) -> str:
+        summary = []
+        for phase in dict.fromkeys(phase for timings in self.timings.values() for phase in timings):
+            durations = [timings[phase] for timings in self.timings.values() if phase in timings]
+            summary.append(f"{phase}: min {min(durations):.1f}s, max {max(durations):.1f}s, "
+                           f"total {sum(durations):.1f}s")
+        return "; ".join(summary)
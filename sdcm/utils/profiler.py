@@ -13,6 +13,8 @@
 #
 
 import os
+import re
+import sys
 import threading
 import multiprocessing
 import pstats
@@ -21,7 +23,8 @@ import shutil
 import atexit
 import marshal
 import time
-from typing import List
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
 
 
 TIMERS = {
@@ -29,6 +32,8 @@ TIMERS = {
     'monotonic': time.monotonic,
     'proc': time.process_time,
 }
+PROFILING_MODES = ('cprofile', 'sampling', )
+SAMPLING_INTERVAL = 0.01  # seconds
 
 
 class ProfileableProcess(multiprocessing.Process):
@@ -295,6 +300,119 @@ class ProcessProfile(ProfileBase):
         return output
 
 
+class StackSampler:
+    """Take stacks of all threads of the current process every `interval' seconds.
+
+    Samples are aggregated per thread: {thread name: Counter({stack: count})}, where a stack is a tuple of code
+    objects from the innermost frame.  Names of threads of a child process are prefixed with `process_name' and
+    stacks of its main thread are stored under `process_name' itself, like ProfileableProcess groups cProfile stats.
+    """
+
+    def __init__(self, interval: float = SAMPLING_INTERVAL, process_name: Optional[str] = None):
+        self.interval = interval
+        self.process_name = process_name
+        self.samples: Dict[str, Counter] = defaultdict(Counter)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        main_ident = threading.main_thread().ident
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                if ident == own_ident:
+                    continue
+                if (name := names.get(ident)) is None:
+                    names = self._thread_names(main_ident)
+                    name = names.get(ident, f"Thread-{ident}")
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                self.samples[name][tuple(stack)] += 1
+            del frame
+
+    def _thread_names(self, main_ident: int) -> Dict[int, str]:
+        if self.process_name is None:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            names[main_ident] = "main"
+        else:
+            names = {thread.ident: f"{self.process_name}:{thread.name}" for thread in threading.enumerate()}
+            names[main_ident] = self.process_name
+        return names
+
+    def collapsed_stacks(self) -> Dict[str, Counter]:
+        """Return samples as {thread name: Counter({"outermost;...;innermost": count})}, which is the format of
+        `flamegraph.pl' input.
+        """
+
+        labels = {}
+        output = {}
+        for name, stacks in self.samples.items():
+            output[name] = collapsed = Counter()
+            for stack, count in stacks.items():
+                for code in stack:
+                    if code not in labels:
+                        labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                collapsed[";".join(labels[code] for code in reversed(stack))] += count
+        return output
+
+
+class SamplingProfile(ProcessProfile):
+    """A statistical profile of all threads of a process, which is cheap enough to keep on during a long test.
+
+    Stats of a profile are collapsed stacks per thread (see StackSampler.)  Like cProfile stats of ProcessProfile,
+    stats of forked profiles are sent to the main process via the queue.
+    """
+
+    def __init__(self, *args, interval: float = SAMPLING_INTERVAL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._interval = interval
+        self._sampler = None
+        self.stats = None
+
+    def fork(self) -> 'SamplingProfile':
+        return self.__class__(*self._args, queue=self._queue, interval=self._interval, **self._kwargs)
+
+    def enable(self, subcalls=None, builtins=None):
+        if not self._enabled:
+            process_name = multiprocessing.current_process().name if self._main_profile is self else None
+            self._sampler = StackSampler(interval=self._interval, process_name=process_name)
+            self._sampler.start()
+            self._enabled = True
+
+    def disable(self):
+        if self._enabled:
+            self._enabled = False
+            self._sampler.stop()
+
+    def create_stats(self):
+        if self._stat_created or self._sampler is None:
+            return
+        self._stat_created = True
+        self.disable()
+        self.stats = self._sampler.collapsed_stacks()
+        if self._main_profile is self:
+            self.send_stats_to_main_process(self.stats)
+
+    def get_stats_holders(self) -> List[StatsHolder]:
+        output = super().get_stats_holders()
+        if self.stats:
+            output.append(StatsHolder(self.stats))
+        return output
+
+
 class ProfilerFactory:
     """A class that manages profiling on different levels - main thread, Threads, Processes.
 
@@ -322,24 +440,34 @@ class ProfilerFactory:
         gprof2dot -f pstats /tmp/123/stats.bin | dot -Tpng -o /tmp/123/stats.callgraph.png
     Or you can need summarized call graph:
         tuna /tmp/123/stats.bin
+
+    cProfile slows down the code a lot.  With `mode='sampling'' stacks of all threads are sampled every
+    `sampling_interval' seconds instead, and collapsed stacks are dumped per thread to `stacks.collapsed' files:
+        flamegraph.pl /tmp/123/stacks.collapsed > /tmp/123/flamegraph.svg
     """
 
-    def __init__(self, target_dir: str, subcalls=True, builtins=True, timer: str = 'proc'):
+    # pylint: disable=too-many-arguments
+    def __init__(self, target_dir: str, subcalls=True, builtins=True, timer: str = 'proc',
+                 mode: str = 'cprofile', sampling_interval: float = SAMPLING_INTERVAL):
+        if mode not in PROFILING_MODES:
+            raise ValueError(f"Unknown profiling mode `{mode}', should be one of {PROFILING_MODES}")
         self._profiles = {}
         self._subcalls = subcalls
         self._builtins = builtins
         self._target_dir = target_dir
         self._timer = timer
+        self._mode = mode
+        self._sampling_interval = sampling_interval
 
     def activate(self, main=True, processes=True, threads=True, autodump=True):
         if processes:
             ProfileableProcess.set_global_profile_factory(self)
             ProfileableProcess.activate()
-        if threads:
+        if threads and self._mode == 'cprofile':  # a sampling profile of a process covers all its threads
             ProfileableThread.set_global_profile_factory(self)
             ProfileableThread.activate()
         if main:
-            self.get_profile('main').enable()
+            self.get_profile('main', is_process=self._mode == 'sampling').enable()
         if autodump:
             atexit.register(self.stop_and_dump)
 
@@ -349,7 +477,9 @@ class ProfilerFactory:
         ProfileableProcess.deactivate()
 
     def get_profile(self, group_name, is_process=False):
-        if is_process:
+        if self._mode == 'sampling':
+            profile = SamplingProfile(group_name=group_name, interval=self._sampling_interval)
+        elif is_process:
             profile = ProcessProfile(timer=self._timer, subcalls=self._subcalls,
                                      builtins=self._builtins, group_name=group_name)
         else:
@@ -395,7 +525,39 @@ class ProfilerFactory:
         dst.write("=============== cumtime ===============\n")
         self._dump_stats(*stat_holders, dst=dst, binary=False, sort='cumtime')
 
+    def _thread_dir(self, thread_name: str) -> Optional[str]:
+        """Directory for stacks of a thread or None if the thread name doesn't map to a subdirectory of target dir."""
+        target_dir = os.path.realpath(self._target_dir)
+        thread_dir = os.path.realpath(os.path.join(target_dir, re.sub(r"[^\w.-]", "_", thread_name)))
+        if os.path.dirname(thread_dir) != target_dir:
+            return None
+        return thread_dir
+
+    def dump_collapsed_stacks(self):
+        stacks = defaultdict(Counter)
+        for profiles in self._profiles.values():
+            for profile in profiles:
+                for stats_holder in profile.get_stats_holders():
+                    for thread_name, thread_stacks in stats_holder.stats.items():
+                        stacks[thread_name].update(thread_stacks)
+        os.makedirs(self._target_dir, exist_ok=True)
+        with open(os.path.join(self._target_dir, 'stacks.collapsed'), 'w', encoding="utf-8") as total_file:
+            for thread_name, thread_stacks in stacks.items():
+                for stack, count in thread_stacks.most_common():
+                    total_file.write(f"{thread_name};{stack} {count}\n")
+                if (group_dir := self._thread_dir(thread_name)) is None:
+                    continue
+                if os.path.exists(group_dir):
+                    shutil.rmtree(group_dir, ignore_errors=True)
+                os.makedirs(group_dir, exist_ok=True)
+                with open(os.path.join(group_dir, 'stacks.collapsed'), 'w', encoding="utf-8") as stacks_file:
+                    for stack, count in thread_stacks.most_common():
+                        stacks_file.write(f"{stack} {count}\n")
+
     def dump_stats(self):
+        if self._mode == 'sampling':
+            self.dump_collapsed_stacks()
+            return
         stats_holders = {}
         for group_name, profiles in self._profiles.items():
             stats_holders[group_name] = group_bucket = []
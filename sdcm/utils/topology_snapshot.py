@@ -0,0 +1,67 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import time
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Tuple
+
+# Should be shorter than CHECK_NODE_HEALTH_RETRY_DELAY to have a fresh view on each retry of a node health check.
+TOPOLOGY_SNAPSHOT_INTERVAL = 30
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only copy of a structure of dicts and lists."""
+
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class TopologySnapshotCache:
+    """Results of cluster topology queries (`nodetool status', `nodetool gossipinfo', etc.) made from nodes.
+
+    A result is reused for `interval' seconds, or until `invalidate()' is called by an operation which changes the
+    topology of the cluster.  Results are frozen, so all callers read the same view.  Failed queries (which return an
+    empty result) are not cached.
+    """
+
+    def __init__(self, interval: float = TOPOLOGY_SNAPSHOT_INTERVAL):
+        self.interval = interval
+        self.loads = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._snapshots: Dict[Tuple[str, Any], Tuple[float, Any]] = {}  # (query, node) -> (load time, result)
+
+    def get(self, query: str, node: Any, load: Callable[[], Any]) -> Any:
+        key = (query, node)
+        with self._lock:
+            load_time = time.monotonic()
+            if (snapshot := self._snapshots.get(key)) and load_time - snapshot[0] < self.interval:
+                self.hits += 1
+                return snapshot[1]
+            generation = self._generation
+        result = freeze(load())
+        with self._lock:
+            self.loads += 1
+            if result and generation == self._generation:  # don't keep a result of a query started before invalidation
+                self._snapshots[key] = (load_time, result)
+        return result
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshots.clear()
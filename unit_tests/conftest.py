@@ -29,11 +29,22 @@ from sdcm.utils.docker_remote import RemoteDocker
 
 from unit_tests.dummy_remote import LocalNode, LocalScyllaClusterDummy
 
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER, BenchmarkResultsHandler
 from unit_tests.lib.events_utils import EventsUtilsMixin
 from unit_tests.lib.fake_provisioner import FakeProvisioner
 from unit_tests.lib.fake_region_definition_builder import FakeDefinitionBuilder
 from unit_tests.lib.fake_remoter import FakeRemoter
 
+BENCHMARK_RESULTS = BenchmarkResultsHandler()
+BENCHMARK_LOGGER.addHandler(BENCHMARK_RESULTS)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if BENCHMARK_RESULTS.results:
+        terminalreporter.section("benchmark results")
+        for result in BENCHMARK_RESULTS.results:
+            terminalreporter.write_line(result)
+
 
 @pytest.fixture(scope='session')
 def events():
@@ -0,0 +1,29 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import logging
+from typing import List
+
+# Benchmarks (tests marked by `@pytest.mark.benchmark') log their results to this logger, and the results are shown
+# in `benchmark results' section of pytest terminal summary.
+BENCHMARK_LOGGER = logging.getLogger("benchmark")
+BENCHMARK_LOGGER.setLevel(logging.INFO)
+
+
+class BenchmarkResultsHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.results: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.results.append(self.format(record))
@@ -0,0 +1,99 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import time
+import socket
+import threading
+import subprocess
+
+import paramiko
+
+
+class InProcessSSHServer(paramiko.ServerInterface):
+    """SSH server which accepts any public key and runs exec requests using local shell.
+
+    Example:
+    >>> with InProcessSSHServer() as server:
+    ...     remoter = RemoteCmdRunner(hostname="127.0.0.1", port=server.port, user="root", key_file=server.key_file)
+    """
+
+    def __init__(self, key_file: str):
+        self.key_file = key_file
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.host_key.write_private_key_file(key_file)
+        self.handshakes = 0
+        self.channels = 0
+        self._lock = threading.Lock()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.listen(128)
+        self.port = self._socket.getsockname()[1]
+        self._transports = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stopped.set()
+        self._socket.close()
+        for transport in self._transports:
+            transport.close()
+
+    def _accept(self):
+        while not self._stopped.is_set():
+            try:
+                client, _ = self._socket.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            self._transports.append(transport)
+            with self._lock:
+                self.handshakes += 1
+            transport.start_server(server=self)
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            with self._lock:
+                self.channels += 1
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_env_request(self, channel, name, value):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self._exec, args=(channel, command), daemon=True).start()
+        return True
+
+    @staticmethod
+    def _exec(channel, command):
+        # Paramiko replies to the exec request after this method is called, don't close the channel before that.
+        time.sleep(0.01)
+        try:
+            proc = subprocess.run(command.decode(), shell=True, capture_output=True, check=False)
+            channel.sendall(proc.stdout)
+            channel.sendall_stderr(proc.stderr)
+            channel.send_exit_status(proc.returncode)
+        finally:
+            channel.close()
@@ -0,0 +1,170 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import sys
+import time
+import random
+import tempfile
+import unittest
+from textwrap import dedent
+from types import SimpleNamespace
+
+import pytest
+
+from sdcm.remote import LocalCmdRunner
+from sdcm.utils.backtrace_decoder import BacktraceDecoder, split_addr2line_output
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+# Decodes each address to a frame, every third address gets an inlined frame too.  Each call is logged.
+FAKE_ADDR2LINE = dedent("""\
+    #!{python}
+    import sys
+    with open({calls_log!r}, "a") as calls_log:
+        calls_log.write(" ".join(sys.argv[1:]) + "\\n")
+    debug_file, addresses = sys.argv[2], sys.argv[3:]
+    for address in addresses:
+        try:
+            value = int(address, 16)
+        except ValueError:
+            print("?? ??:0")
+            continue
+        print(f"func_{{value:x}}() at {{debug_file}}/src_{{value % 7}}.cc:{{value % 1000}}")
+        if value % 3 == 0:
+            print(f" (inlined by) inlined_{{value:x}}() at {{debug_file}}/src.hh:{{value % 100}}")
+""")
+
+
+class FakeMonitorNode:
+    def __init__(self, addr2line):
+        self.remoter = LocalCmdRunner()
+        self.addr2line = addr2line
+        self.copied = []
+
+    def copy_scylla_debug_info(self, node_name, debug_file):
+        self.copied.append((node_name, debug_file))
+        return f"/tmp/{os.path.basename(debug_file)}"
+
+    def decode_raw_backtrace(self, scylla_debug_file, raw_backtrace):
+        return self.remoter.run(f"{self.addr2line} -Cpife {scylla_debug_file} {raw_backtrace}", verbose=False)
+
+
+def backtrace_storm(count, seed=0, addresses_pool=300, frames=30):
+    """Backtraces of reactor stalls which repeat the same code paths over and over, like in a real log."""
+
+    rnd = random.Random(seed)
+    pool = [hex(0x1000000 + rnd.randrange(0x2000000)) for _ in range(addresses_pool)]
+    pool.append("/opt/scylladb/libreloc/libc.so.6+0x94e1")
+    return [dict(node=f"node-{index % 3}", debug_file="/usr/lib/debug/bin/scylla.debug", build_id="abcdef",
+                 event=SimpleNamespace(raw_backtrace="\n".join(rnd.sample(pool, frames)), backtrace=None))
+            for index in range(count)]
+
+
+class BacktraceDecoderTestBase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.calls_log = os.path.join(self.tmp_dir.name, "calls.log")
+        addr2line = os.path.join(self.tmp_dir.name, "addr2line")
+        with open(addr2line, "w", encoding="utf-8") as script:
+            script.write(FAKE_ADDR2LINE.format(python=sys.executable, calls_log=self.calls_log))
+        os.chmod(addr2line, 0o755)
+        self.node = FakeMonitorNode(addr2line=addr2line)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @property
+    def addr2line_calls(self):
+        if not os.path.exists(self.calls_log):
+            return []
+        with open(self.calls_log, encoding="utf-8") as calls_log:
+            return calls_log.read().splitlines()
+
+    def decode_one_by_one(self, items):
+        """The way backtraces were decoded before: one addr2line call for each backtrace."""
+
+        for item in items:
+            item["event"].backtrace = self.node.decode_raw_backtrace(
+                "/tmp/scylla.debug", " ".join(item["event"].raw_backtrace.split("\n"))).stdout
+
+
+class TestBacktraceDecoder(BacktraceDecoderTestBase):
+    def test_split_addr2line_output(self):
+        self.assertEqual(split_addr2line_output("a at x.cc:1\n (inlined by) b at y.hh:2\n?? ??:0\nc at z.cc:3"),
+                         ["a at x.cc:1\n (inlined by) b at y.hh:2\n", "?? ??:0\n", "c at z.cc:3"])
+
+    def test_backtrace_storm(self):
+        items = backtrace_storm(60)
+        expected = backtrace_storm(60)
+        self.decode_one_by_one(expected)
+        os.remove(self.calls_log)
+
+        decoder = BacktraceDecoder(node=self.node)
+        for start in range(0, len(items), 20):
+            decoder.decode(items[start:start + 20])
+
+        self.assertEqual([item["event"].backtrace for item in items], [item["event"].backtrace for item in expected])
+        self.assertIn(" (inlined by) ", items[0]["event"].backtrace)
+        self.assertEqual(self.node.copied, [("node-0", "/usr/lib/debug/bin/scylla.debug")])
+        # Only addresses which weren't decoded before are passed to addr2line.
+        calls = self.addr2line_calls
+        self.assertEqual(len(calls), decoder.addr2line_calls)
+        self.assertLessEqual(len(calls), 3)
+        addresses = [address for call in calls for address in call.split()[2:]]
+        self.assertEqual(len(addresses), len(set(addresses)))
+
+    def test_max_addresses(self):
+        decoder = BacktraceDecoder(node=self.node, max_addresses=7)
+        items = backtrace_storm(1, frames=20)
+        decoder.decode(items)
+        self.assertEqual([len(call.split()) - 2 for call in self.addr2line_calls], [7, 7, 6])
+        self.assertEqual(len(split_addr2line_output(items[0]["event"].backtrace)), 20)
+
+    def test_debug_file_per_build(self):
+        items = backtrace_storm(2)
+        items[1].update(node="node-3", debug_file="/usr/lib/debug/.build-id/12/3456.debug", build_id="123456")
+        decoder = BacktraceDecoder(node=self.node)
+        decoder.decode(items)
+        self.assertEqual(self.node.copied, [("node-0", "/usr/lib/debug/bin/scylla.debug"),
+                                            ("node-3", "/usr/lib/debug/.build-id/12/3456.debug")])
+        self.assertEqual(decoder.addr2line_calls, 2)
+        self.assertIn("/tmp/3456.debug/src_", items[1]["event"].backtrace)
+
+    def test_fallback_to_one_by_one(self):
+        # addr2line output which can't be split to frames: decode each backtrace separately, as is.
+        self.node.decode_raw_backtrace = lambda debug_file, raw_backtrace: SimpleNamespace(stdout=raw_backtrace)
+        items = backtrace_storm(3)
+        decoder = BacktraceDecoder(node=self.node)
+        decoder.decode(items)
+        self.assertEqual(decoder.addr2line_calls, 4)
+        self.assertEqual([item["event"].backtrace for item in items],
+                         [" ".join(item["event"].raw_backtrace.split()) for item in items])
+
+
+@pytest.mark.benchmark
+class TestBacktraceDecoderBenchmark(BacktraceDecoderTestBase):
+    def test_benchmark(self):
+        items = backtrace_storm(2000)
+        start = time.perf_counter()
+        self.decode_one_by_one(items)
+        BENCHMARK_LOGGER.info("One by one: %s backtraces in %.2fs, %s addr2line calls", len(items),
+                              time.perf_counter() - start, len(self.addr2line_calls))
+        os.remove(self.calls_log)
+
+        decoder = BacktraceDecoder(node=self.node)
+        start = time.perf_counter()
+        for start_index in range(0, len(items), 100):
+            decoder.decode(items[start_index:start_index + 100])
+        BENCHMARK_LOGGER.info("Batched: %s backtraces in %.2fs, %s addr2line calls", len(items),
+                              time.perf_counter() - start, len(self.addr2line_calls))
@@ -137,6 +137,7 @@ class TestBaseNode(unittest.TestCase, EventsUtilsMixin):
             self._read_and_publish_events()
 
         time.sleep(0.1)
+        self.get_events_logger().flush()
         with self.get_events_logger().events_logs_by_severity[Severity.ERROR].open() as events_file:
             cdc_err_events = [line for line in events_file if 'cdc - Could not retrieve CDC streams' in line]
             assert cdc_err_events != []
@@ -153,6 +154,7 @@ class TestBaseNode(unittest.TestCase, EventsUtilsMixin):
         ).publish()
 
         time.sleep(0.1)
+        self.get_events_logger().flush()
         with self.get_events_logger().events_logs_by_severity[Severity.WARNING].open() as events_file:
             events = [line for line in events_file if 'Powering Off' in line]
             assert events
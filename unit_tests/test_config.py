@@ -12,13 +12,21 @@
 # Copyright (c) 2020 ScyllaDB
 
 import os
+import re
+import time
 import logging
+import tempfile
 import itertools
 import unittest
 from collections import namedtuple
+from pathlib import Path
+
+import pytest
 
 from sdcm import sct_config
 
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
 RPM_URL = 'https://s3.amazonaws.com/downloads.scylladb.com/enterprise/rpm/unstable/centos/' \
           '9f724fedb93b4734fcfaec1156806921ff46e956-2bdfa9f7ef592edaf15e028faf3b7f695f39ebc1' \
           '-525a0255f73d454f8f97f32b8bdd71c8dec35d3d-a6b2b2355c666b1893f702a587287da978aeec22/71/scylla.repo'
@@ -577,5 +585,106 @@ class ConfigurationTests(unittest.TestCase):  # pylint: disable=too-many-public-
             conf.verify_configuration()
 
 
+Image = namedtuple("Image", "name image_id")
+
+
+def fake_scylla_ami_versions(region_name, arch):  # pylint: disable=unused-argument
+    return [Image(name="ScyllaDB 4.4.4", image_id=f"ami-{region_name}-new"),
+            Image(name="ScyllaDB 4.4.3", image_id=f"ami-{region_name}")]
+
+
+class NoNetworkResolver:  # pylint: disable=too-few-public-methods
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected lookup: {name}")
+
+
+class ConfigurationResolutionTests(unittest.TestCase):
+    def setUp(self):
+        ConfigurationTests.clear_sct_env_variables()
+        os.environ['SCT_CLUSTER_BACKEND'] = 'aws'
+        os.environ['SCT_SCYLLA_VERSION'] = '4.4.3'
+        os.environ['SCT_CONFIG_FILES'] = 'internal_test_data/multi_region_dc_test_case.yaml'
+
+    def tearDown(self):
+        ConfigurationTests.clear_sct_env_variables()
+        ConfigurationTests.setup_default_env()
+
+    def test_lookups_are_memoized(self):
+        resolver = sct_config.SCTConfigResolver()
+        with unittest.mock.patch.object(sct_config, 'get_scylla_ami_versions',
+                                        side_effect=fake_scylla_ami_versions) as get_scylla_ami_versions:
+            for _ in range(3):
+                conf = sct_config.SCTConfiguration(resolver=resolver)
+                conf.verify_configuration()
+                self.assertEqual(conf.get('ami_id_db_scylla'), 'ami-eu-west-1 ami-us-east-1')
+                os.environ.pop('SCT_AMI_ID_DB_SCYLLA')
+        self.assertEqual(get_scylla_ami_versions.call_count, 2)
+
+    def test_deferred_resolution(self):
+        conf = sct_config.SCTConfiguration(resolver=NoNetworkResolver(), resolve=False)
+        self.assertFalse(conf.get('ami_id_db_scylla'))
+        self.assertNotIn('SCT_AMI_ID_DB_SCYLLA', os.environ)
+
+        conf.resolver = sct_config.SCTConfigResolver()
+        with unittest.mock.patch.object(sct_config, 'get_scylla_ami_versions', side_effect=fake_scylla_ami_versions):
+            conf.resolve()
+        self.assertEqual(conf.get('ami_id_db_scylla'), 'ami-eu-west-1 ami-us-east-1')
+        self.assertEqual(os.environ['SCT_AMI_ID_DB_SCYLLA'], 'ami-eu-west-1 ami-us-east-1')
+
+    def test_config_files_cache(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml") as config_file:
+            config_file.write("n_db_nodes: 3\nregion_name: 'eu-west-1'\n")
+            config_file.flush()
+            config = sct_config.load_config_files([config_file.name])
+            config["n_db_nodes"] = 6
+            self.assertEqual(sct_config.load_config_files([config_file.name]),
+                             {"n_db_nodes": 3, "region_name": "eu-west-1"})
+
+            config_file.write("n_loaders: 2\n")
+            config_file.flush()
+            self.assertEqual(sct_config.load_config_files([config_file.name])["n_loaders"], 2)
+
+
+LINT_EXCLUDE = re.compile("multi-dc|multiDC|multidc|multiple-dc|rolling|docker|artifacts|private-repo|ics/long|"
+                          "scylla-operator|gce|jepsen|repair-based-operations")
+
+
+@pytest.mark.benchmark
+class LintYamlsBenchmark(unittest.TestCase):
+    """Lint test cases like `utils/lint_test_cases.sh' does for AWS backend, with stubbed AMI lookups."""
+
+    def lint_test_cases(self, cold: bool):
+        from sct import _run_yaml_test  # pylint: disable=import-outside-toplevel
+
+        env = {**{key: value for key, value in os.environ.items() if not key.startswith("SCT_")},
+               "SCT_SCYLLA_VERSION": "4.4.3"}
+        test_cases = sorted(str(path) for path in Path(sct_config.sct_abs_path("test-cases")).rglob("*.yaml")
+                            if not LINT_EXCLUDE.search(str(path)))
+        errors = 0
+        start = time.perf_counter()
+        with unittest.mock.patch.object(sct_config, 'get_scylla_ami_versions', side_effect=fake_scylla_ami_versions):
+            for test_case in test_cases:
+                if cold:  # every config is loaded and resolved from scratch, as before the caching
+                    sct_config._CONFIG_FILES_CACHE.clear()  # pylint: disable=protected-access
+                    sct_config.SCTConfiguration.resolver = sct_config.SCTConfigResolver()
+                error, _ = _run_yaml_test("aws", test_case, env)
+                errors += error
+        return len(test_cases), errors, time.perf_counter() - start
+
+    def test_benchmark(self):
+        original_env, original_resolver = {**os.environ}, sct_config.SCTConfiguration.resolver
+        try:
+            count, cold_errors, cold = self.lint_test_cases(cold=True)
+            _, warm_errors, warm = self.lint_test_cases(cold=False)
+        finally:
+            os.environ.clear()
+            os.environ.update(original_env)
+            sct_config.SCTConfiguration.resolver = original_resolver
+            logging.getLogger().disabled = False
+        BENCHMARK_LOGGER.info("lint-yamls of %s test cases (%s failed): uncached %.1fs, cached %.1fs", count,
+                              cold_errors, cold, warm)
+        self.assertEqual(cold_errors, warm_errors)
+
+
 if __name__ == "__main__":
     unittest.main()
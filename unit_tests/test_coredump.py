@@ -1,11 +1,21 @@
 import unittest
 import os
 import time
+import zlib
+import hashlib
 import tempfile
+import threading
 from abc import abstractmethod
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from invoke import UnexpectedExit
 
 from sdcm.cluster import BaseNode
+from sdcm.remote import LocalCmdRunner
 from sdcm.coredump import CoredumpExportSystemdThread, CoreDumpInfo, CoredumpExportFileThread, CoredumpThreadBase
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
 from unit_tests.lib.data_pickle import Pickler
 from unit_tests.lib.mock_remoter import MockRemoter
 
@@ -195,3 +205,181 @@ class CoredumpExportFileTest(CoredumpExportTestBase):
 
     def test_fail_get_list_test(self):
         self._run_coredump_with_fake_remoter('fail_get_list_test')
+
+
+class UploadStandInHandler(BaseHTTPRequestHandler):
+    """Accept PUT requests like upload.scylladb.com does."""
+
+    protocol_version = "HTTP/1.1"
+
+    def read_body(self):
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            return self.rfile.read(int(self.headers["Content-Length"]))
+        body = bytearray()
+        while chunk_size := int(self.rfile.readline().split(b";")[0], 16):
+            body += self.rfile.read(chunk_size)
+            self.rfile.readline()
+        while self.rfile.readline() not in (b"\r\n", b"\n", b""):  # skip trailers
+            pass
+        return bytes(body)
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        body = self.read_body()
+        with self.server.lock:
+            if self.server.fail_requests[self.path] > 0:
+                self.server.fail_requests[self.path] -= 1
+                status = 403
+            else:
+                self.server.objects[self.path] = body
+                status = 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class UploadStandIn(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), UploadStandInHandler)
+        self.lock = threading.Lock()
+        self.objects = {}
+        self.fail_requests = Counter()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+def make_sparse_core(path, size):
+    """Most of a real core is zero pages, write some random data at few offsets of a sparse file."""
+
+    with open(path, "wb") as core:
+        core.truncate(size)
+        for offset in range(0, size, size // 8):
+            core.seek(offset)
+            core.write(os.urandom(64 * 1024))
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fobj:
+        while chunk := fobj.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def gunzip_digest(data):
+    decompressor = zlib.decompressobj(wbits=31)
+    digest = hashlib.sha256(decompressor.decompress(data))
+    digest.update(decompressor.flush())
+    assert decompressor.eof, "uploaded object should be a complete gzip stream"
+    return digest.hexdigest()
+
+
+class CoredumpStreamingUploadTestThread(CoredumpExportFileThread):
+    compressor = "gzip --fast"
+
+    def __init__(self, node, upload_endpoint):
+        self.upload_endpoint = upload_endpoint
+        super().__init__(node, max_core_upload_limit=5, coredump_directories=[])
+        self.__dict__["_is_pigz_installed"] = True
+
+    def _upload_cmd(self, coredump, upload_url, compress):
+        return super()._upload_cmd(coredump=coredump, upload_url=upload_url, compress=compress).removeprefix("sudo ")
+
+
+class CoredumpStreamingUploadTest(unittest.TestCase):
+    core_size = 128 * 1024 * 1024
+    core_name = "45d8a24d50d3-5711-0-0-6-1600105104.core"
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.corefile = os.path.join(self.temp_dir.name, self.core_name)
+        make_sparse_core(self.corefile, self.core_size)
+        self.server = UploadStandIn()
+        self.thread = CoredumpStreamingUploadTestThread(
+            node=FakeNode(LocalCmdRunner(), os.path.join(self.temp_dir.name, "logs")),
+            upload_endpoint=self.server.endpoint)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def test_streaming_upload(self):
+        core_info = CoreDumpInfo(pid="5711", corefile=self.corefile)
+        self.assertTrue(self.thread.upload_coredump(core_info))
+
+        object_path = f"/{self.core_name}/{self.core_name}.gz"
+        self.assertEqual(list(self.server.objects), [object_path], "coredump should be uploaded as a single object")
+        self.assertEqual(gunzip_digest(self.server.objects[object_path]), file_digest(self.corefile))
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), [self.core_name, "logs"],
+                         "compressed copy should be removed once uploaded")
+        self.assertEqual(core_info.download_url, f"https://storage.cloud.google.com/upload.scylladb.com{object_path}")
+        self.assertEqual(core_info.download_instructions,
+                         f"gsutil cp gs://upload.scylladb.com{object_path} .\ngunzip {self.corefile}.gz")
+
+    def test_failed_upload(self):
+        self.server.fail_requests[f"/{self.core_name}/{self.core_name}.gz"] = 1
+        core_info = CoreDumpInfo(pid="5711", corefile=self.corefile)
+        with self.assertRaises(UnexpectedExit):
+            self.thread.upload_coredump(core_info)
+        self.assertEqual(core_info.download_instructions, "failed to upload core")
+        self.assertEqual(self.server.objects, {})
+
+    def test_retry_uploads_compressed_copy(self):
+        object_path = f"/{self.core_name}/{self.core_name}.gz"
+        self.server.fail_requests[object_path] = 1
+        core_info = CoreDumpInfo(pid="5711", corefile=self.corefile)
+        with self.assertRaises(UnexpectedExit):
+            self.thread.upload_coredump(core_info)
+        self.assertTrue(os.path.exists(self.corefile + ".gz"), "compressed copy should be kept for a retry")
+
+        core_digest = file_digest(self.corefile)
+        with open(self.corefile, "wb"):  # the retry shouldn't compress the coredump again
+            pass
+        self.assertTrue(self.thread.upload_coredump(core_info))
+        self.assertEqual(list(self.server.objects), [object_path])
+        self.assertEqual(gunzip_digest(self.server.objects[object_path]), core_digest)
+        self.assertFalse(os.path.exists(self.corefile + ".gz"), "compressed copy should be removed once uploaded")
+
+    def test_compressed_core_uploaded_as_is(self):
+        corefile = self.corefile + ".zst"
+        with open(corefile, "wb") as core:
+            core.write(os.urandom(600 * 1024))
+        core_info = CoreDumpInfo(pid="5711", corefile=corefile)
+        self.assertTrue(self.thread.upload_coredump(core_info))
+        with open(corefile, "rb") as core:
+            self.assertEqual(list(self.server.objects.values()), [core.read()])
+
+
+@pytest.mark.benchmark
+class CoredumpStreamingUploadBenchmark(CoredumpStreamingUploadTest):
+    core_size = 4 * 1024 * 1024 * 1024
+
+    def test_streaming_upload(self):
+        start = time.perf_counter()
+        self.thread.upload_coredump(CoreDumpInfo(pid="5711", corefile=self.corefile))
+        streaming = time.perf_counter() - start
+
+        # The way it was done before: compress to a file next to the core and upload the file.
+        start = time.perf_counter()
+        LocalCmdRunner().run(f"gzip --fast --keep {self.corefile} && "
+                             f"curl --request PUT --fail --silent --show-error --upload-file {self.corefile}.gz "
+                             f"{self.server.endpoint}/two-pass/core.gz")
+        two_pass = time.perf_counter() - start
+        BENCHMARK_LOGGER.info("Upload of %sGiB sparse core: streaming %.1fs, compress to a file and upload %.1fs "
+                              "(%sMiB written to the disk)",
+                              self.core_size >> 30, streaming, two_pass, os.path.getsize(self.corefile + '.gz') >> 20)
+
+    def test_failed_upload(self):
+        pass
+
+    def test_retry_uploads_compressed_copy(self):
+        pass
+
+    def test_compressed_core_uploaded_as_is(self):
+        pass
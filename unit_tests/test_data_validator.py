@@ -0,0 +1,216 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import re
+import time
+import random
+import resource
+import tempfile
+import unittest
+import unittest.mock
+from itertools import islice
+from types import SimpleNamespace
+from collections import namedtuple
+
+import pytest
+
+from sdcm.sct_events import Severity
+from sdcm.sct_events.health import DataValidatorEvent
+from sdcm.utils.data_validator import LongevityDataValidator, PartitionsDigest
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+Row = namedtuple("Row", ["domain", "published_date", "lwt_indicator", "author"])
+KeyRow = namedtuple("KeyRow", ["domain", "published_date"])
+
+
+def generate_rows(count, seed=0, update=lambda row: row):
+    rnd = random.Random(seed)
+    for index in range(count):
+        yield update(Row(f"domain{index}", 1600000000000 + index, rnd.randint(1000001, 19999999), "text"))
+
+
+class FakeResultSet:
+    def __init__(self, rows, fetch_size):
+        self.rows = rows
+        self.fetch_size = fetch_size
+        self.current_rows = []
+        self.has_more_pages = True
+        self.fetch_next_page()
+
+    def fetch_next_page(self):
+        self.current_rows = list(islice(self.rows, self.fetch_size))
+        self.has_more_pages = len(self.current_rows) == self.fetch_size
+
+
+class FakeSession:
+    """Session which serves `SELECT <columns> FROM <table>' queries with synthetic pages of rows."""
+
+    def __init__(self, tables):
+        self.tables = tables  # table name -> callable which returns an iterator of rows
+        self.queries = []
+
+    def execute(self, statement):
+        self.queries.append(statement.query_string)
+        columns, table = re.match(r"SELECT (.*) FROM (\w+)", statement.query_string).groups()
+        rows = self.tables[table]()
+        if columns != "*":
+            rows = (KeyRow(row.domain, row.published_date) for row in rows)
+        return FakeResultSet(rows=rows, fetch_size=statement.fetch_size)
+
+
+class TestPartitionsDigest(unittest.TestCase):
+    def test_order_independent(self):
+        rows = list(generate_rows(1000))
+        digest = PartitionsDigest(partition_keys=["domain", "published_date"], buckets=64)
+        digest.add_rows(rows)
+        shuffled = PartitionsDigest(partition_keys=["domain", "published_date"], buckets=64)
+        shuffled.add_rows(rows[500:])
+        shuffled.add_rows(list(reversed(rows[:500])))
+        self.assertEqual(digest, shuffled)
+        self.assertEqual(digest.rows_count, 1000)
+
+    def test_mismatched_buckets(self):
+        rows = list(generate_rows(1000))
+        digest = PartitionsDigest(partition_keys=["domain", "published_date"], buckets=64)
+        digest.add_rows(rows)
+        other = PartitionsDigest(partition_keys=["domain", "published_date"], buckets=64)
+        other.add_rows(rows[:10] + [rows[10]._replace(author="other")] + rows[11:])
+        self.assertEqual(digest.mismatched_buckets(other), [digest.bucket(rows[10])])
+
+    def test_merge(self):
+        rows = list(generate_rows(100))
+        digest = PartitionsDigest()
+        digest.add_rows(rows)
+        merged = PartitionsDigest()
+        merged.add_rows(rows[:30])
+        other = PartitionsDigest()
+        other.add_rows(rows[30:])
+        merged.merge(other)
+        self.assertEqual(digest, merged)
+        self.assertEqual(merged.rows_count, 100)
+
+
+class DataValidatorTestBase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.validator = LongevityDataValidator(longevity_self_object=SimpleNamespace(logdir=self.tmp_dir.name),
+                                                user_profile_name="c-s_lwt",
+                                                base_table_partition_keys=["domain", "published_date"])
+        # pylint: disable=protected-access
+        self.validator._keyspace_name = "cqlstress_lwt_example"
+        self.validator._mv_for_not_updated_data = "blogposts_not_updated_lwt_indicator"
+        self.validator._mvs_for_updated_data = ["blogposts_update_one_column_lwt_indicator"]
+        self.validator._mvs_after_updated_data = ["blogposts_update_one_column_lwt_indicator_after_update"]
+        self.validator._validate_updated_per_view = [True]
+        self.events = []
+        publish_patcher = unittest.mock.patch.object(DataValidatorEvent, "publish", autospec=True,
+                                                     side_effect=self.events.append)
+        publish_patcher.start()
+        self.addCleanup(publish_patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+class TestLongevityDataValidator(DataValidatorTestBase):
+    def test_not_updated_rows_identical(self):
+        session = FakeSession({
+            "blogposts_not_updated_lwt_indicator": lambda: generate_rows(20000),
+            "blogposts_not_updated_lwt_indicator_expect": lambda: generate_rows(20000),
+        })
+        self.validator.validate_range_not_expected_to_change(session=session)
+        self.assertEqual([event.severity for event in self.events], [Severity.NORMAL])
+        self.assertEqual(self.events[0].message, "Validation immutable rows finished successfully")
+        self.assertEqual(len(session.queries), 2)
+
+    def test_not_updated_rows_mismatch_reported(self):
+        def changed(row):
+            return row._replace(author="updated") if row.domain in ("domain7", "domain12345") else row
+
+        session = FakeSession({
+            "blogposts_not_updated_lwt_indicator": lambda: generate_rows(20000, update=changed),
+            "blogposts_not_updated_lwt_indicator_expect": lambda: generate_rows(20000),
+        })
+        with self.assertRaisesRegex(AssertionError, "See mismatched partitions in (.*)") as error:
+            self.validator.validate_range_not_expected_to_change(session=session)
+        report_path = re.search(r"See mismatched partitions in (.*)", str(error.exception)).group(1)
+        with open(report_path, encoding="utf-8") as report:
+            report = report.read()
+        self.assertEqual(report.count("Partition "), 2)
+        self.assertEqual(report.count("unexpected (1): Row("), 2)
+        self.assertEqual(report.count("missing (1): Row("), 2)
+        self.assertIn("('domain7', 1600000000007)", report)
+        self.assertIn("('domain12345', 1600000012345)", report)
+        self.assertEqual(len(session.queries), 4)
+
+    def test_not_updated_rows_missing_during_nemesis(self):
+        session = FakeSession({
+            "blogposts_not_updated_lwt_indicator": lambda: generate_rows(19999),
+            "blogposts_not_updated_lwt_indicator_expect": lambda: generate_rows(20000),
+        })
+        self.validator.validate_range_not_expected_to_change(session=session, during_nemesis=True)
+        self.assertEqual(len(self.events), 1)
+        self.assertIn("Actual dataset length: 19999, Expected dataset length: 20000", self.events[0].error)
+
+    def test_updated_rows(self):
+        session = FakeSession({
+            "blogposts_update_one_column_lwt_indicator": lambda: islice(generate_rows(20000), 0, 20000, 2),
+            "blogposts_update_one_column_lwt_indicator_after_update": lambda: islice(generate_rows(20000), 1, 20000, 2),
+            "blogposts_update_one_column_lwt_indicator_expect": lambda: generate_rows(20000),
+        })
+        self.validator.validate_range_expected_to_change(session=session)
+        self.assertEqual(len(self.events), 1)
+        self.assertIn("Validation updated rows finished successfully", self.events[0].message)
+
+    def test_updated_rows_mismatch_reported(self):
+        session = FakeSession({
+            "blogposts_update_one_column_lwt_indicator": lambda: islice(generate_rows(20000), 0, 20000, 2),
+            "blogposts_update_one_column_lwt_indicator_after_update": lambda: islice(generate_rows(20000), 3, 20000, 2),
+            "blogposts_update_one_column_lwt_indicator_expect": lambda: generate_rows(20001),
+        })
+        with self.assertRaisesRegex(AssertionError, "See mismatched partitions in") as error:
+            self.validator.validate_range_expected_to_change(session=session)
+        report_path = re.search(r"See mismatched partitions in (.*)", str(error.exception)).group(1)
+        with open(report_path, encoding="utf-8") as report:
+            self.assertEqual(report.read().count("missing (1): KeyRow("), 2)
+
+
+@pytest.mark.benchmark
+class TestDataValidatorBenchmark(DataValidatorTestBase):
+    rows_count = 10_000_000
+
+    def test_benchmark(self):
+        session = FakeSession({
+            "blogposts_not_updated_lwt_indicator": lambda: generate_rows(self.rows_count),
+            "blogposts_not_updated_lwt_indicator_expect": lambda: generate_rows(self.rows_count),
+        })
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        self.validator.validate_range_not_expected_to_change(session=session)
+        BENCHMARK_LOGGER.info("Streaming digests: %s rows in %.1fs, max RSS grew by %sMB", self.rows_count,
+                              time.perf_counter() - start,
+                              (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - max_rss) // 1024)
+
+        # The way it was done before: fetch all rows to the memory and compare the lists.
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        actual = [row for page in self.validator.fetch_pages(
+            session, "SELECT * FROM blogposts_not_updated_lwt_indicator") for row in page]
+        expected = [row for page in self.validator.fetch_pages(
+            session, "SELECT * FROM blogposts_not_updated_lwt_indicator_expect") for row in page]
+        self.assertEqual(actual, expected)
+        BENCHMARK_LOGGER.info("Fetch all rows: %s rows in %.1fs, max RSS grew by %sMB", self.rows_count,
+                              time.perf_counter() - start,
+                              (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - max_rss) // 1024)
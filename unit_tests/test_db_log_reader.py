@@ -0,0 +1,213 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import time
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from sdcm.db_log_reader import DbLogReader
+from sdcm.sct_events.database import SYSTEM_ERROR_EVENTS_PATTERNS
+from sdcm.utils.inotify import FileChangesWatcher
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+LOG_LINE = "2022-01-01T00:00:{:02d}+00:00 db-node-1     !INFO | scylla[1234]:  [shard 0] compaction - [Compact ks.cf " \
+           "{}] Compacted 2 sstables to [/var/lib/scylla/data/ks/cf/md-{}-big-Data.db:level=0]. 1MB to 1MB (~100%)\n"
+
+
+class RecordingDbLogReader(DbLogReader):
+    def __init__(self, system_log, system_event_patterns=()):
+        super().__init__(system_log=system_log, remoter=None, node_name="db-node-1",
+                         system_event_patterns=list(system_event_patterns), decoding_queue=None, log_lines=False)
+        self.lines = []
+
+    def _process_lines(self, lines, backtraces):
+        self.lines.extend(enumerate(lines, start=self._last_line_no + 1))
+        super()._process_lines(lines, backtraces)
+
+
+class TestDbLogReaderTailing(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.system_log = os.path.join(self.tmp_dir.name, "system.log")
+        self.reader = RecordingDbLogReader(system_log=self.system_log)
+
+    def tearDown(self):
+        self.reader._close_system_log()  # pylint: disable=protected-access
+        self.tmp_dir.cleanup()
+
+    def write(self, data, mode="a"):
+        with open(self.system_log, mode, encoding="utf-8") as log_file:
+            log_file.write(data)
+
+    def read(self):
+        self.reader.lines.clear()
+        self.reader._read_and_publish_events()  # pylint: disable=protected-access
+        return self.reader.lines
+
+    def test_appended_lines(self):
+        self.assertEqual(self.read(), [])
+        self.write("line 0\nline 1\nline")
+        self.assertEqual(self.read(), [(0, "line 0"), (1, "line 1")])
+        self.assertEqual(self.read(), [])
+        self.write(" 2\nline 3 ✓\n")
+        self.assertEqual(self.read(), [(2, "line 2"), (3, "line 3 ✓")])
+
+    @patch("sdcm.db_log_reader.PARTIAL_LINE_TIMEOUT", 0.2)
+    def test_line_without_ending_processed_eventually(self):
+        self.write("line 0\nline 1")
+        self.assertEqual(self.read(), [(0, "line 0")])
+        self.assertEqual(self.read(), [])
+        time.sleep(0.2)
+        self.assertEqual(self.read(), [(1, "line 1")])
+
+    @patch("sdcm.db_log_reader.PARTIAL_LINE_TIMEOUT", 0.2)
+    def test_finished_line_is_not_postponed(self):
+        self.write("line 0\nline")
+        self.assertEqual(self.read(), [(0, "line 0")])
+        time.sleep(0.1)
+        self.write(" 1\nline 2")
+        self.assertEqual(self.read(), [(1, "line 1")])
+        time.sleep(0.1)
+        self.assertEqual(self.read(), [])
+        time.sleep(0.1)
+        self.assertEqual(self.read(), [(2, "line 2")])
+
+    def test_lines_longer_than_buffer(self):
+        long_line = "x" * (3 * 1024 * 1024 + 17)
+        self.write(f"line 0\n{long_line}\n\xffé\nline 3\n")
+        self.assertEqual(self.read(), [(0, "line 0"), (1, long_line), (2, "\xffé"), (3, "line 3")])
+
+    def test_invalid_utf8(self):
+        with open(self.system_log, "wb") as log_file:
+            log_file.write(b"line \xff 0\nline 1\n")
+        self.assertEqual(self.read(), [(0, "line � 0"), (1, "line 1")])
+
+    def test_truncated_log(self):
+        self.write("line 0\nline 1\n")
+        self.read()
+        self.write("new 0\n", mode="w")
+        self.assertEqual(self.read(), [(2, "new 0")])
+
+    def test_rotated_log(self):
+        self.write("line 0\nline 1\n")
+        self.read()
+        self.write("line 2\n")
+        os.rename(self.system_log, self.system_log + ".1")
+        self.write("new 0\n")
+        self.assertEqual(self.read(), [(2, "line 2"), (3, "new 0")])
+        self.write("new 1\n")
+        self.assertEqual(self.read(), [(4, "new 1")])
+
+    def test_log_file_is_not_reopened(self):
+        self.write("line 0\n")
+        self.read()
+        db_file = self.reader._db_file  # pylint: disable=protected-access
+        self.write("line 1\n")
+        self.read()
+        self.assertIs(self.reader._db_file, db_file)  # pylint: disable=protected-access
+
+    def test_run_wakes_up_on_changes(self):
+        self.write("line 0\n")
+        thread = threading.Thread(target=self.reader.run)
+        thread.start()
+        try:
+            self.assertTrue(self.wait_for_lines(1))
+            self.write("line 1\n")
+            self.assertTrue(self.wait_for_lines(2))
+            self.assertEqual(self.reader.lines, [(0, "line 0"), (1, "line 1")])
+        finally:
+            self.reader.stop()
+            thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+    @patch("sdcm.db_log_reader.PARTIAL_LINE_TIMEOUT", 0.5)
+    def test_run_processes_line_without_ending(self):
+        self.write("line 0\nline 1")
+        thread = threading.Thread(target=self.reader.run)
+        thread.start()
+        try:
+            self.assertTrue(self.wait_for_lines(2))
+            self.assertEqual(self.reader.lines, [(0, "line 0"), (1, "line 1")])
+            self.write(" and line 2")
+        finally:
+            self.reader.stop()
+            thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.reader.lines, [(0, "line 0"), (1, "line 1"), (2, " and line 2")])
+
+    def wait_for_lines(self, count, timeout=5):
+        deadline = time.perf_counter() + timeout
+        while len(self.reader.lines) < count and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        return len(self.reader.lines) >= count
+
+
+class TestFileChangesWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.tmp_dir.name, "system.log")
+        self.watcher = FileChangesWatcher(self.path)
+        if self.watcher._libc is None:  # pylint: disable=protected-access
+            self.skipTest("inotify is not available")
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp_dir.cleanup()
+
+    def test_changes(self):
+        self.assertTrue(self.watcher.wait(timeout=0.01))  # the watch is added just now
+        self.assertFalse(self.watcher.wait(timeout=0.01))
+        with open(os.path.join(self.tmp_dir.name, "other.log"), "w", encoding="utf-8") as other_file:
+            other_file.write("other")
+        self.assertFalse(self.watcher.wait(timeout=0.01))
+
+        with open(self.path, "w", encoding="utf-8") as log_file:
+            self.assertTrue(self.watcher.wait(timeout=0.01))  # created
+            log_file.write("line\n")
+            log_file.flush()
+            self.assertTrue(self.watcher.wait(timeout=0.01))  # modified
+            self.assertFalse(self.watcher.wait(timeout=0.01))
+        os.rename(self.path, self.path + ".1")
+        self.assertTrue(self.watcher.wait(timeout=0.01))  # rotated
+
+
+@pytest.mark.benchmark
+class TestDbLogReaderBenchmark(unittest.TestCase):
+    log_size = 2 * 1024 ** 3
+
+    def test_replay_log(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            system_log = os.path.join(tmp_dir, "system.log")
+            block = "".join(LOG_LINE.format(index % 60, index, index) for index in range(5000)).encode()
+            with open(system_log, "wb") as log_file:
+                for _ in range(self.log_size // len(block)):
+                    log_file.write(block)
+            lines_count = self.log_size // len(block) * 5000
+
+            reader = DbLogReader(system_log=system_log, remoter=None, node_name="db-node-1",
+                                 system_event_patterns=SYSTEM_ERROR_EVENTS_PATTERNS, decoding_queue=None,
+                                 log_lines=False)
+            start_time, start_cpu_time = time.perf_counter(), time.process_time()
+            reader._read_and_publish_events()  # pylint: disable=protected-access
+            elapsed, cpu_time = time.perf_counter() - start_time, time.process_time() - start_cpu_time
+            reader._close_system_log()  # pylint: disable=protected-access
+
+            self.assertEqual(reader._last_line_no, lines_count - 1)  # pylint: disable=protected-access
+            BENCHMARK_LOGGER.info("%s lines (%sMB) in %.1fs: %.0f lines/s, CPU time %.1fs", lines_count,
+                                  self.log_size // 1024 ** 2, elapsed, lines_count / elapsed, cpu_time)
@@ -0,0 +1,113 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import re
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from sdcm.db_stats import PrometheusDBStats, PROMETHEUS_QUERY_INDEX_LABEL
+
+PROMETHEUS_CONFIG = "scrape_configs:\n- job_name: scylla\n  scrape_interval: 20s\n"
+
+
+class FakePrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        url = urlparse(self.path)
+        if url.path == "/api/v1/status/config":
+            data = {"yaml": PROMETHEUS_CONFIG}
+        else:
+            self.server.queries.append(parse_qs(url.query))
+            time.sleep(self.server.delay)
+            data = {"resultType": "matrix", "result": self.server.range_result(parse_qs(url.query))}
+        body = json.dumps({"status": "success", "data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class FakePrometheus(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakePrometheusHandler)
+        self.queries = []
+        self.delay = 0
+
+    @staticmethod
+    def range_result(params):
+        start, end, step = (float(params[name][0]) for name in ("start", "end", "step"))
+        values = [[start + i * step, str(start + i * step)] for i in range(int((end - start) // step) + 1)]
+        indexes = re.findall(rf'"{PROMETHEUS_QUERY_INDEX_LABEL}", "(\d+)"', params["query"][0]) or [None]
+        result = []
+        for index in indexes:
+            metric = {"instance": "10.0.0.1"}
+            if index is not None:
+                metric[PROMETHEUS_QUERY_INDEX_LABEL] = index
+            result.append({"metric": metric, "values": values})
+        return result
+
+
+class TestPrometheusDBStats(unittest.TestCase):
+    def setUp(self):
+        PrometheusDBStats.query_cache.clear()
+        self.server = FakePrometheus()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.prometheus = PrometheusDBStats(host="127.0.0.1", port=self.server.server_port)
+        self.end = int(time.time()) - 3600
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_overlapping_windows_cached(self):
+        first = self.prometheus.query("up", start=self.end - 600, end=self.end)
+        second = self.prometheus.query("up", start=self.end - 590, end=self.end - 5)
+        self.assertEqual(len(self.server.queries), 1)
+        self.assertTrue(all(self.end - 600 <= ts <= self.end for ts, _ in first[0]["values"]))
+        self.assertTrue(all(self.end - 590 <= ts <= self.end - 5 for ts, _ in second[0]["values"]))
+        self.prometheus.query("up", start=self.end - 600, end=self.end, scrap_metrics_step=60)
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_recent_ranges_expire(self):
+        end = time.time()
+        self.prometheus.query("up", start=end - 600, end=end, scrap_metrics_step=1)
+        time.sleep(2)
+        self.prometheus.query("up", start=end - 600, end=end, scrap_metrics_step=1)
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_concurrent_queries_coalesced(self):
+        self.server.delay = 0.5
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: self.prometheus.query("up", self.end - 600, self.end), range(8)))
+        self.assertEqual(len(self.server.queries), 1)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_query_many_one_round_trip(self):
+        self.prometheus.query("a", start=self.end - 600, end=self.end)
+        results = self.prometheus.query_many(["a", "b", "c"], start=self.end - 600, end=self.end)
+        self.assertEqual(len(self.server.queries), 2)
+        self.assertEqual(self.server.queries[1]["query"][0].count("label_replace"), 2)
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertEqual(len(result), 1)
+            self.assertEqual(result[0]["metric"], {"instance": "10.0.0.1"})
+        self.assertEqual(self.prometheus.query("c", start=self.end - 600, end=self.end), results[2])
+        self.assertEqual(len(self.server.queries), 2)
@@ -0,0 +1,157 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import elasticsearch
+
+from sdcm.es import ESBulkWriter, ESBulkError
+
+
+class FakeElasticsearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.reply(200, {"version": {"number": "7.17.0", "build_flavor": "default"}, "tagline": "You Know, for Search"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        actions = [json.loads(line) for line in body.splitlines() if line]
+        if self.server.statuses:
+            status = self.server.statuses.pop(0)
+        else:
+            status = 200
+        if status != 200:
+            self.reply(status, {"error": "overloaded", "status": status})
+            return
+        self.server.payloads.append(actions)
+        if self.server.items_statuses:
+            items_statuses = self.server.items_statuses.pop(0)
+        else:
+            items_statuses = [200] * (len(actions) // 2)
+        items = [{next(iter(action)): {"status": status} if status == 200 else
+                  {"status": status, "error": {"type": "document_missing_exception" if status == 404 else "rejected"}}}
+                 for action, status in zip(actions[::2], items_statuses)]
+        self.reply(200, {"took": 1, "errors": any(status != 200 for status in items_statuses), "items": items})
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class FakeElasticsearch(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeElasticsearchHandler)
+        self.payloads = []
+        self.statuses = []
+        self.items_statuses = []
+
+
+class TestESBulkWriter(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeElasticsearch()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = elasticsearch.Elasticsearch(hosts=[f"http://127.0.0.1:{self.server.server_port}"])
+
+    def tearDown(self):
+        ESBulkWriter.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_flush_by_size(self):
+        writer = ESBulkWriter(client=self.client, max_actions=3, flush_interval=3600)
+        writer.upsert(index="test", doc_type="test_stats", doc_id="id1", body={"a": 1})
+        writer.update(index="test", doc_type="test_stats", doc_id="id1", body={"b": 2})
+        self.assertEqual(self.server.payloads, [])
+        writer.index(index="nemesis_data", doc_type="nemesis", body={"c": 3})
+        self.assertEqual(self.server.payloads, [[
+            {"update": {"_index": "test", "_type": "test_stats", "_id": "id1"}},
+            {"doc": {"a": 1}, "doc_as_upsert": True},
+            {"update": {"_index": "test", "_type": "test_stats", "_id": "id1"}},
+            {"doc": {"b": 2}},
+            {"index": {"_index": "nemesis_data", "_type": "nemesis"}},
+            {"c": 3},
+        ]])
+
+    def test_flush_by_time(self):
+        writer = ESBulkWriter(client=self.client, flush_interval=0.1)
+        writer.upsert(index="test", doc_type=None, doc_id="id1", body={"a": 1})
+        deadline = time.time() + 5
+        while not self.server.payloads and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.server.payloads, [[{"update": {"_index": "test", "_id": "id1"}},
+                                                 {"doc": {"a": 1}, "doc_as_upsert": True}]])
+
+    def test_retry_with_backoff(self):
+        writer = ESBulkWriter(client=self.client, flush_interval=3600, max_retries=2, initial_backoff=0.01)
+        self.server.statuses = [429, 503]
+        writer.update(index="test", doc_type=None, doc_id="id1", body={"a": 1})
+        writer.flush()
+        self.assertEqual(len(self.server.payloads), 1)
+
+    def test_failed_actions_kept(self):
+        writer = ESBulkWriter(client=self.client, flush_interval=3600, max_retries=1, initial_backoff=0.01)
+        self.server.statuses = [429, 429]
+        writer.update(index="test", doc_type=None, doc_id="id1", body={"a": 1})
+        with self.assertRaises(elasticsearch.TransportError):
+            writer.flush()
+        self.assertEqual(self.server.payloads, [])
+        writer.update(index="test", doc_type=None, doc_id="id1", body={"b": 2})
+        ESBulkWriter.flush_all()
+        self.assertEqual(self.server.payloads, [[{"update": {"_index": "test", "_id": "id1"}}, {"doc": {"a": 1}},
+                                                 {"update": {"_index": "test", "_id": "id1"}}, {"doc": {"b": 2}}]])
+
+    def test_rejected_actions_reported(self):
+        writer = ESBulkWriter(client=self.client, flush_interval=3600, max_retries=2, initial_backoff=0.01)
+        self.server.items_statuses = [[200, 404, 429], [200]]
+        writer.upsert(index="test", doc_type=None, doc_id="id1", body={"a": 1})
+        writer.update(index="test", doc_type=None, doc_id="id2", body={"b": 2})
+        writer.update(index="test", doc_type=None, doc_id="id3", body={"c": 3})
+        with self.assertRaises(ESBulkError) as error:
+            writer.flush()
+        self.assertEqual([(action[0], error) for action, error in error.exception.errors],
+                         [({"update": {"_index": "test", "_id": "id2"}}, {"type": "document_missing_exception"})])
+        self.assertEqual(self.server.payloads[1], [{"update": {"_index": "test", "_id": "id3"}}, {"doc": {"c": 3}}])
+        writer.flush()  # the error is reported once
+
+    def test_rejected_actions_reported_after_background_flush(self):
+        writer = ESBulkWriter(client=self.client, flush_interval=0.1)
+        self.server.items_statuses = [[404]]
+        writer.update(index="test", doc_type=None, doc_id="id1", body={"a": 1})
+        deadline = time.time() + 5
+        while not writer._failed and time.time() < deadline:  # pylint: disable=protected-access
+            time.sleep(0.05)
+        with self.assertRaises(ESBulkError):
+            writer.flush()
+
+    def test_close(self):
+        writer = ESBulkWriter(client=self.client, flush_interval=3600)
+        writer.update(index="test", doc_type=None, doc_id="id1", body={"a": 1})
+        writer.close()
+        self.assertFalse(writer._flusher.is_alive())  # pylint: disable=protected-access
+        self.assertNotIn(writer, ESBulkWriter._instances)  # pylint: disable=protected-access
+        self.assertEqual(len(self.server.payloads), 1)
+        writer.update(index="test", doc_type=None, doc_id="id1", body={"b": 2})
+        self.assertEqual(len(self.server.payloads), 2)
@@ -51,6 +51,7 @@ class BaseEventsTest(unittest.TestCase, EventsUtilsMixin):
 
     @classmethod
     def get_event_log_file(cls, name: str) -> str:
+        cls.get_events_logger().flush()
         if (log_file := Path(cls.temp_dir, "events_log", name)).exists():
             return log_file.read_text(encoding="utf-8")
         return ""
@@ -0,0 +1,180 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import time
+import zlib
+import base64
+import random
+import tempfile
+import unittest
+
+import pytest
+
+from sdcm.utils.hdrhistogram import (
+    HdrHistogram, HdrHistogramsAggregator, parse_hdr_log, NS_PER_MS, ENCODING_COOKIE, ENCODING_HEADER,
+    COMPRESSED_ENCODING_COOKIE, COMPRESSED_HEADER, _encode_zigzag, _decode_zigzag)
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+LOADERS = 4
+INTERVALS = 10
+SAMPLES_PER_INTERVAL = 5000
+
+
+def latency_samples(seed, count, mu=14.0, sigma=0.8):
+    """Lognormal latencies in ns, median is about 1.2ms with a long tail."""
+
+    rnd = random.Random(seed)
+    return [int(rnd.lognormvariate(mu, sigma)) + 1 for _ in range(count)]
+
+
+def exact_percentile(sorted_samples, percentile):
+    index = max(0, int(percentile / 100 * len(sorted_samples) + 0.5) - 1)
+    return sorted_samples[index]
+
+
+def hdr_log_lines(tag, intervals):
+    lines = ["#[Histogram log format version 1.3]",
+             "#[StartTime: 1641000000.000 (seconds since epoch), Sat Jan 01 00:00:00 UTC 2022]",
+             '"StartTimestamp","Interval_Length","Interval_Max","Interval_Compressed_Histogram"']
+    for index, samples in enumerate(intervals):
+        histogram = HdrHistogram()
+        for value in samples:
+            histogram.record_value(value)
+        lines.append(f"Tag={tag},{index:.3f},1.000,{histogram.max / NS_PER_MS:.3f},{histogram.encode()}")
+    return lines
+
+
+class TestHdrHistogram(unittest.TestCase):
+    def test_zigzag_roundtrip(self):
+        values = [0, 1, -1, 63, -64, 64, 127, 128, -129, 2 ** 31, -2 ** 40, 2 ** 62]
+        self.assertEqual(list(_decode_zigzag(_encode_zigzag(values))), values)
+
+    def test_encode_decode(self):
+        histogram = HdrHistogram()
+        for value in latency_samples(seed=1, count=1000) + [1, 3600 * 1000 * NS_PER_MS]:
+            histogram.record_value(value)
+        decoded = HdrHistogram.decode(histogram.encode())
+        self.assertEqual(decoded, histogram)
+        self.assertEqual(decoded.total_count, 1002)
+        self.assertEqual(decoded.min, 1)
+
+    def test_decode_malformed(self):
+        histogram = HdrHistogram(1, 1000, 2)
+
+        def encode(payload):
+            data = zlib.compress(ENCODING_HEADER.pack(ENCODING_COOKIE, len(payload), 0, 2, 1, 1000, 1.0) + payload)
+            return base64.b64encode(COMPRESSED_HEADER.pack(COMPRESSED_ENCODING_COOKIE, len(data)) + data).decode()
+
+        self.assertEqual(HdrHistogram.decode(encode(_encode_zigzag([-(len(histogram.counts) - 1), 5]))).max, 1023)
+        for encoded in (encode(_encode_zigzag([-len(histogram.counts), 5])),  # out of the range of values
+                        encode(_encode_zigzag([2 ** 40])[:-1]),  # truncated value
+                        histogram.encode()[:-8],  # truncated compressed data
+                        "HISTFAAA"):  # truncated header
+            with self.subTest(encoded=encoded), self.assertRaises(ValueError):
+                HdrHistogram.decode(encoded)
+
+    def test_percentiles_precision(self):
+        samples = sorted(latency_samples(seed=2, count=20000))
+        histogram = HdrHistogram()
+        for value in samples:
+            histogram.record_value(value)
+        for percentile in (50, 90, 99, 99.9):
+            self.assertAlmostEqual(histogram.get_value_at_percentile(percentile),
+                                   exact_percentile(samples, percentile),
+                                   delta=exact_percentile(samples, percentile) * 0.002)
+        self.assertAlmostEqual(histogram.mean, sum(samples) / len(samples), delta=sum(samples) / len(samples) * 0.002)
+
+    def test_add_with_different_layout(self):
+        samples = latency_samples(seed=3, count=1000)
+        small, large = HdrHistogram(highest_trackable_value=10 ** 9), HdrHistogram(significant_figures=2)
+        for value in samples[:500]:
+            small.record_value(value)
+        for value in samples[500:]:
+            large.record_value(value)
+        large.add(small)
+        self.assertEqual(large.total_count, 1000)
+        self.assertAlmostEqual(large.get_value_at_percentile(50), exact_percentile(sorted(samples), 50),
+                               delta=exact_percentile(sorted(samples), 50) * 0.02)
+
+
+class TestHdrHistogramsAggregator(unittest.TestCase):
+    def test_merge_loaders_intervals(self):
+        all_samples = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            aggregator = HdrHistogramsAggregator()
+            for loader in range(LOADERS):
+                # Loaders see somewhat different latencies.
+                intervals = [
+                    latency_samples(seed=loader * 100 + index, count=SAMPLES_PER_INTERVAL, mu=14.0 + loader / 4)
+                    for index in range(INTERVALS)]
+                all_samples.extend(value for samples in intervals for value in samples)
+                hdr_log = os.path.join(tmp_dir, f"cassandra-stress-l{loader}.hdr")
+                with open(hdr_log, "w", encoding="utf-8") as log_file:
+                    log_file.write("\n".join(hdr_log_lines("WRITE-st", intervals)) + "\n")
+                aggregator.add_log_file(hdr_log)
+
+        all_samples.sort()
+        stats = aggregator.to_dict()
+        self.assertEqual(list(stats), ["WRITE-st"])
+        self.assertEqual(stats["WRITE-st"]["count"], LOADERS * INTERVALS * SAMPLES_PER_INTERVAL)
+        self.assertEqual((aggregator.start, aggregator.end), (0.0, float(INTERVALS)))
+        for percentile in ("50", "90", "95", "99", "99_9"):
+            expected = exact_percentile(all_samples, float(percentile.replace("_", "."))) / NS_PER_MS
+            self.assertAlmostEqual(stats["WRITE-st"][f"percentile_{percentile}"], expected, delta=expected * 0.002)
+        self.assertAlmostEqual(stats["WRITE-st"]["max"], all_samples[-1] / NS_PER_MS,
+                               delta=all_samples[-1] / NS_PER_MS * 0.002)
+
+        # Histograms stored in a stats document can be merged with histograms of the following stress runs.
+        restored = HdrHistogramsAggregator.from_dict(stats)
+        restored.merge(aggregator)
+        self.assertEqual(restored.histograms["WRITE-st"].total_count, 2 * LOADERS * INTERVALS * SAMPLES_PER_INTERVAL)
+        self.assertEqual(restored.to_dict()["WRITE-st"]["percentile_99"], stats["WRITE-st"]["percentile_99"])
+
+    def test_untagged_and_broken_lines(self):
+        lines = hdr_log_lines("READ-rt", [latency_samples(seed=5, count=10)])
+        lines.append(lines[-1].split(",", 1)[1])  # no tag
+        lines.append("Tag=READ-rt,1.000,1.000,1.000,HISTFAAAAbroken")
+        with self.assertLogs("sdcm.utils.hdrhistogram", level="WARNING"):
+            intervals = list(parse_hdr_log(lines))
+        self.assertEqual([interval.tag for interval in intervals], ["READ-rt", "latency"])
+
+    def test_empty(self):
+        aggregator = HdrHistogramsAggregator()
+        self.assertFalse(aggregator)
+        self.assertEqual(aggregator.to_dict(), {})
+
+
+@pytest.mark.benchmark
+class TestHdrHistogramsAggregatorBenchmark(unittest.TestCase):
+    def test_merge_intervals(self):
+        intervals = list(parse_hdr_log(hdr_log_lines(
+            "WRITE-st", [latency_samples(seed=index, count=SAMPLES_PER_INTERVAL) for index in range(60)])))
+        samples = [value for index in range(60) for value in latency_samples(seed=index, count=SAMPLES_PER_INTERVAL)]
+
+        start = time.perf_counter()
+        aggregator = HdrHistogramsAggregator()
+        for _ in range(10):
+            for interval in intervals:
+                aggregator.add_interval(interval)
+        merged = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sorted(samples * 10)
+        sorting = time.perf_counter() - start
+
+        BENCHMARK_LOGGER.info("Merged %s intervals (%s samples) in %.3fs, keeping %s counters; "
+                              "sorting raw samples took %.3fs keeping %s values",
+                              len(intervals) * 10, len(samples) * 10, merged,
+                              len(aggregator.histograms['WRITE-st'].counts), sorting, len(samples) * 10)
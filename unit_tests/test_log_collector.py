@@ -11,12 +11,20 @@
 #
 # Copyright (c) 2022 ScyllaDB
 # pylint: disable=redefined-outer-name
+import os
+import time
 import uuid
+import shutil
+import tarfile
+import subprocess
 
 import pytest
 
-from sdcm.logcollector import Collector
+from sdcm.logcollector import Collector, LogCollector, CommandLog, FileLog, DirLog, ParallelTarGzArchive
+from sdcm.remote import LocalCmdRunner
+from sdcm.utils.common import ParallelObject
 from sdcm.provision import provisioner_factory
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
 from unit_tests.lib.fake_resources import prepare_fake_region
 
 
@@ -47,3 +55,106 @@ def test_create_collecting_nodes(test_id, tmp_path_factory):
     assert len(collector.monitor_set) == len(monitor_nodes)
     for collecting_node, v_m in zip(collector.monitor_set, monitor_nodes):
         assert collecting_node.name == v_m.name
+
+
+class LocalNode:  # pylint: disable=too-few-public-methods
+    def __init__(self, name):
+        self.name = name
+        self.remoter = LocalCmdRunner()
+
+
+def generate_log_file(path, size_mb):
+    line = "2022-01-01T00:00:00+00:00 node scylla[1234]:  [shard 0] storage_proxy - {} some log message\n"
+    with open(path, "w", encoding="utf-8") as log_file:
+        for index in range(size_mb * 1024 * 1024 // len(line)):
+            log_file.write(line.format(index))
+
+
+def archive_members(archive_name):
+    with tarfile.open(archive_name, "r:gz") as tar:
+        return {member.name: tar.extractfile(member).read() if member.isfile() else None for member in tar}
+
+
+def test_parallel_tar_gz_archive(tmp_path):
+    for name in ("node1", "node2", "node3"):
+        (tmp_path / "logs" / name / "sub").mkdir(parents=True)
+        (tmp_path / "logs" / name / "system.log").write_text(f"{name} log\n" * 1000)
+        (tmp_path / "logs" / name / "sub" / "file").write_text(name)
+
+    archive = ParallelTarGzArchive(str(tmp_path / "logs.tar.gz"))
+    ParallelObject(["node1", "node2", "node3"], num_workers=3, timeout=60).run(
+        lambda name: archive.add(str(tmp_path / "logs" / name), arcname=f"logs/{name}"))
+    assert len(archive.parts) == 3
+    assert archive.close() == str(tmp_path / "logs.tar.gz")
+    assert not list(tmp_path.glob("*.part"))
+
+    members = archive_members(archive.archive_name)
+    assert members["logs/node2/system.log"] == b"node2 log\n" * 1000
+    assert members["logs/node3/sub/file"] == b"node3"
+    assert "logs/node1/sub" in members
+    listing = subprocess.run(["tar", "tzf", archive.archive_name], capture_output=True, check=True, text=True).stdout
+    assert sorted(listing.split()) == sorted(f"{name}/" if members[name] is None else name for name in members)
+
+
+def test_collect_logs_from_nodes_in_parallel(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_log_file(tmp_path / "big.log", size_mb=4)
+
+    class LocalLogCollector(LogCollector):
+        cluster_log_type = "db-cluster"
+        node_remote_dir = str(tmp_path / "remote")
+        log_entities = [CommandLog(name="big.log", command=f"cat {tmp_path / 'big.log'}"),
+                        FileLog(name="system.log", command="echo system log"),
+                        DirLog(name="nothing/*", search_locally=True)]
+
+    uploaded = []
+
+    def upload_archive_to_s3(archive_path, storing_path):
+        shutil.copy(archive_path, tmp_path / "uploaded.tar.gz")
+        uploaded.append(storing_path)
+        return f"https://s3/{storing_path}/{os.path.basename(archive_path)}"
+
+    monkeypatch.setattr("sdcm.logcollector.upload_archive_to_s3", upload_archive_to_s3)
+    nodes = [LocalNode(name=f"node{index}") for index in range(4)]
+    collector = LocalLogCollector(nodes=nodes, test_id="2a1b3c4d-test", storage_dir=str(tmp_path / "collected"),
+                                  params={})
+    links = collector.collect_logs()
+
+    dir_name = os.path.basename(collector.local_dir)
+    assert links == [f"https://s3/2a1b3c4d-test/{collector.current_run}/{dir_name}.tar.gz"]
+    assert not os.path.exists(collector.local_dir)
+    assert not os.path.exists(f"{dir_name}.tar.gz")
+    members = archive_members(tmp_path / "uploaded.tar.gz")
+    big_log = (tmp_path / "big.log").read_bytes()
+    for node in nodes:
+        assert members[f"{dir_name}/{node.name}/big.log"] == big_log
+        assert members[f"{dir_name}/{node.name}/system.log"] == b"system log\n"
+        for entity in ("big.log", "system.log", "nothing/*", "archive"):
+            assert collector.collect_times[(node.name, entity)] >= 0
+
+
+@pytest.mark.benchmark
+def test_collect_logs_benchmark(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_log_file(tmp_path / "big.log", size_mb=64)
+
+    class LocalLogCollector(LogCollector):
+        node_remote_dir = str(tmp_path / "remote")
+        log_entities = [CommandLog(name="big.log", command=f"cat {tmp_path / 'big.log'}")]
+
+    monkeypatch.setattr("sdcm.logcollector.upload_archive_to_s3", lambda archive_path, storing_path: archive_path)
+    nodes = [LocalNode(name=f"node{index}") for index in range(8)]
+    collector = LocalLogCollector(nodes=nodes, test_id="2a1b3c4d-test", storage_dir=str(tmp_path / "new"), params={})
+    start = time.perf_counter()
+    collector.collect_logs()
+    BENCHMARK_LOGGER.info("Parallel per-node archives: %.1fs", time.perf_counter() - start)
+
+    # The way it was done before: copy logs of all nodes and then compress them to one archive.
+    local_dir = tmp_path / "old"
+    start = time.perf_counter()
+    ParallelObject(nodes, num_workers=4, timeout=600).run(
+        lambda node: LocalLogCollector.log_entities[0].collect(node, str(local_dir / node.name),
+                                                               str(tmp_path / "remote")))
+    with tarfile.open(tmp_path / "old.tar.gz", "w:gz") as tar:
+        tar.add(local_dir, arcname="old")
+    BENCHMARK_LOGGER.info("Copy all logs, then one archive: %.1fs", time.perf_counter() - start)
@@ -0,0 +1,105 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import re
+import json
+import random
+import unittest
+from pathlib import Path
+
+from sdcm.sct_events.database import SYSTEM_ERROR_EVENTS_PATTERNS, BACKTRACE_RE, get_pattern_to_event_to_func_mapping
+from sdcm.utils.multi_pattern_matcher import MultiPatternMatcher, required_literals
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse  # pylint: disable=deprecated-module
+
+
+TEST_DATA_DIR = Path(__file__).parent / "test_data"
+GOLDEN_FILE = TEST_DATA_DIR / "test_multi_pattern_matcher" / "system_log_events.json"
+
+
+def literals_of(regex: str, flags: int = 0):
+    return [sorted(alternatives) for alternatives in required_literals(sre_parse.parse(regex, flags))]
+
+
+class TestRequiredLiterals(unittest.TestCase):
+    def test_plain_literal(self):
+        self.assertEqual(literals_of("Reactor stalled"), [["reactor stalled"]])
+
+    def test_branches(self):
+        self.assertEqual(literals_of(r"(^ERROR|!\s*?ERR).*\[shard.*\]"), [["err"], ["[shard"], ["]"]])
+        self.assertEqual(literals_of("(mutation_write_|Operation timed out)"),
+                         [["mutation_write_", "operation timed out"]])
+
+    def test_optional_parts_skipped(self):
+        self.assertEqual(literals_of("abc?d*(ef)?[gh]+ij"), [["ab"], ["ij"]])
+        self.assertEqual(literals_of("(ab|c?)"), [])
+
+    def test_repeats(self):
+        self.assertEqual(literals_of("(abc){2,}x"), [["abc"], ["x"]])
+
+
+class TestMultiPatternMatcher(unittest.TestCase):
+    def setUp(self):
+        self.patterns = [
+            BACKTRACE_RE,
+            *(item.pattern for item in get_pattern_to_event_to_func_mapping(node="node1")),
+            *(pattern for pattern, _ in SYSTEM_ERROR_EVENTS_PATTERNS),
+        ]
+        self.matcher = MultiPatternMatcher(self.patterns)
+
+    def check_line(self, line):
+        candidates = self.matcher.candidates(line)
+        for pattern in self.patterns:
+            if pattern.search(line):
+                self.assertIn(pattern, candidates, f"{pattern.pattern!r} filtered out for {line!r}")
+
+    def test_candidates_of_recorded_logs(self):
+        for path in TEST_DATA_DIR.glob("*.log"):
+            for line in path.read_text(encoding="utf-8").splitlines(keepends=True):
+                self.check_line(line)
+
+    def test_candidates_of_generated_lines(self):
+        rand = random.Random(0)
+        words = [*self.matcher.literals, "ERROR", "WARNING", "!ERR", "[shard 1]", "0x1f", "Scylla",
+                 "\u00e9", "\u212a", " ", "|", "-", ":"]
+        for _ in range(20_000):
+            line = "".join(rand.choice(words) for _ in range(rand.randint(1, 12)))
+            self.check_line(rand.choice((line, line.upper(), line.title())))
+
+    def test_non_ascii_lines_skip_prefilter(self):
+        self.assertEqual(self.matcher.candidates("\u212aernel callstack: 0x"), set(self.patterns))
+
+    def test_not_str_patterns_are_unconditional(self):
+        matcher = MultiPatternMatcher([re.compile(b"abc"), re.compile("abc"), re.compile(".*")])
+        self.assertEqual(matcher.candidates("xyz"), {re.compile(b"abc"), re.compile(".*")})
+
+    def test_golden_system_log_events(self):
+        """Event types and severities found by first-match over the candidates are the same as recorded."""
+
+        golden = json.loads(GOLDEN_FILE.read_text(encoding="utf-8"))
+        matcher = MultiPatternMatcher(pattern for pattern, _ in SYSTEM_ERROR_EVENTS_PATTERNS)
+        for path in sorted(TEST_DATA_DIR.glob("*.log")):
+            events = []
+            for index, line in enumerate(path.read_text(encoding="utf-8").splitlines(keepends=True)):
+                candidates = matcher.candidates(line)
+                for pattern, event in SYSTEM_ERROR_EVENTS_PATTERNS:
+                    if pattern in candidates and pattern.search(line):
+                        cloned_event = event.clone().add_info(node="node1", line=line, line_number=index)
+                        cloned_event.dont_publish()
+                        events.append([index, cloned_event.type, cloned_event.severity.name])
+                        break
+            with self.subTest(log=path.name):
+                self.assertEqual(events, golden[path.name])
@@ -0,0 +1,140 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+# pylint: disable=too-few-public-methods
+
+import time
+import threading
+import unittest
+
+from sdcm.cluster import BaseCluster, BaseScyllaCluster
+from sdcm.remote import LocalCmdRunner
+from sdcm.utils.node_setup import NodeSetupPhase, NodeSetupScheduler
+
+
+class FakeNode:
+    def __init__(self, name):
+        self.name = name
+        self.remoter = LocalCmdRunner()
+
+    def __str__(self):
+        return self.name
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = {}
+
+    def phase(self, name, command="sleep 0.3", fail_on=None):
+        def func(node):
+            with self.lock:
+                self.running += 1
+                self.max_running[name] = max(self.max_running.get(name, 0), self.running)
+                self.events.append((name, "start", node.name))
+            try:
+                if node.name == fail_on:
+                    raise RuntimeError(f"{name} failed on {node.name}")
+                node.remoter.run(command)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.events.append((name, "end", node.name))
+        return func
+
+
+def wait_for_results(scheduler, count, timeout=30):
+    return [scheduler.results.get(timeout=timeout) for _ in range(count)]
+
+
+class TestNodeSetupScheduler(unittest.TestCase):
+    def setUp(self):
+        self.nodes = [FakeNode(f"node-{index}") for index in range(4)]
+        self.recorder = Recorder()
+
+    def test_concurrent_and_exclusive_phases(self):
+        scheduler = NodeSetupScheduler(nodes=self.nodes, phases=[
+            NodeSetupPhase(name="prepare", func=self.recorder.phase("prepare", "sleep 1")),
+            NodeSetupPhase(name="join", func=self.recorder.phase("join", "echo join"), exclusive=True),
+            NodeSetupPhase(name="finalize", func=self.recorder.phase("finalize")),
+        ])
+        start_time = time.perf_counter()
+        scheduler.start()
+        results = wait_for_results(scheduler, len(self.nodes))
+        elapsed = time.perf_counter() - start_time
+
+        self.assertCountEqual(results, [(node, None) for node in self.nodes])
+        self.assertLess(elapsed, 2.5, "prepare phase should run on all nodes at once")
+        self.assertEqual(self.recorder.max_running["prepare"], len(self.nodes))
+
+        joins = [event for event in self.recorder.events if event[0] == "join"]
+        self.assertEqual(joins, [("join", step, node.name) for node in self.nodes for step in ("start", "end")])
+
+        for node in self.nodes:
+            self.assertEqual(list(scheduler.timings[node]), ["prepare", "join (waiting)", "join", "finalize"])
+            self.assertGreaterEqual(scheduler.timings[node]["prepare"], 1)
+        self.assertIn("join (waiting): min", scheduler.timings_summary())
+
+    def test_failure_stops_exclusive_phases(self):
+        scheduler = NodeSetupScheduler(nodes=self.nodes, phases=[
+            NodeSetupPhase(name="prepare", func=self.recorder.phase("prepare", fail_on="node-2")),
+            NodeSetupPhase(name="join", func=self.recorder.phase("join", "sleep 0.5"), exclusive=True),
+        ])
+        scheduler.start()
+        results = dict(wait_for_results(scheduler, len(self.nodes)))
+
+        self.assertEqual(len(results), len(self.nodes))
+        self.assertIn("prepare failed on node-2", results[self.nodes[2]][0])
+        self.assertIn("RuntimeError", results[self.nodes[2]][1])
+        self.assertNotIn(("join", "start", "node-3"), self.recorder.events)
+        self.assertIn("setup stopped before `join' phase", results[self.nodes[3]][0])
+        self.assertNotIn("join", scheduler.timings[self.nodes[3]])
+
+    def test_failure_in_exclusive_phase(self):
+        scheduler = NodeSetupScheduler(nodes=self.nodes, phases=[
+            NodeSetupPhase(name="join", func=self.recorder.phase("join", "echo join", fail_on="node-1"),
+                           exclusive=True),
+        ])
+        scheduler.start()
+        results = dict(wait_for_results(scheduler, len(self.nodes)))
+
+        self.assertIsNone(results[self.nodes[0]])
+        self.assertIn("join failed on node-1", results[self.nodes[1]][0])
+        self.assertIn("setup stopped", results[self.nodes[2]][0])
+        self.assertEqual([event[2] for event in self.recorder.events if event[1] == "start"], ["node-0", "node-1"])
+
+
+class CustomSetupScyllaCluster(BaseScyllaCluster, BaseCluster):  # pylint: disable=abstract-method
+    def __init__(self):  # pylint: disable=super-init-not-called
+        pass
+
+    def node_setup(self, node, verbose=False, timeout=3600):
+        pass
+
+
+class DefaultSetupScyllaCluster(BaseScyllaCluster, BaseCluster):  # pylint: disable=abstract-method
+    def __init__(self):  # pylint: disable=super-init-not-called
+        pass
+
+
+class TestScyllaClusterNodeSetupPhases(unittest.TestCase):
+    def test_default_phases(self):
+        phases = DefaultSetupScyllaCluster().node_setup_phases(timeout=10)
+        self.assertEqual([(phase.name, phase.exclusive) for phase in phases],
+                         [("prepare", False), ("join", True), ("finalize", False)])
+
+    def test_custom_node_setup_is_exclusive(self):
+        phases = CustomSetupScyllaCluster().node_setup_phases(timeout=10)
+        self.assertEqual([(phase.name, phase.exclusive) for phase in phases], [("setup", True)])
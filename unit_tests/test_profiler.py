@@ -20,8 +20,13 @@ from multiprocessing import Process
 import unittest
 import os.path
 import shutil
+import tempfile
+
+import pytest
+
 from sdcm.utils.common import generate_random_string
 from sdcm.prometheus import PrometheusAlertManagerListener
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
 from unit_tests.lib.test_profiler.lib import LibMultiprocessingProcessCustomClass, LibProcessCustomClass, \
     LibMultiprocessingProcessCustomClassWithRun, LibProcessCustomClassWithRun, LibThreadCustomClass, \
     LibThreadCustomClassWithRun, LibThreadingThreadCustomClass, LibThreadingThreadCustomClassWithRun, LibThread, LibProcess
@@ -31,6 +36,9 @@ from unit_tests.lib.test_profiler.lib2 import LibProfileableProcessCustomClass,
     LibProfileableThread, LibProfileableProcess
 
 from sdcm.utils.profiler import ProfilerFactory, ProfileableProcess as pp, ProfileableThread as pt  # pylint: disable=ungrouped-imports
+from sdcm.sct_events.system import InfoEvent  # pylint: disable=ungrouped-imports
+from sdcm.sct_events.setup import EVENTS_SUBSCRIBERS_START_DELAY  # pylint: disable=ungrouped-imports
+from unit_tests.lib.events_utils import EventsUtilsMixin
 
 
 def function_sleep():
@@ -309,3 +317,111 @@ class TestProfileFactory(unittest.TestCase):
             name="ProfilerableProcess.CustomClassWithRun", daemon=False))
         self._subroutines.append(LibProfileableProcessCustomClassWithRun(
             name="lib.ProfilerableProcess.CustomClassWithRun", daemon=False))
+
+
+def function_while_short():
+    end_time = time.time() + 1
+    while time.time() <= end_time:
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_collapsed_stacks(self):
+        pr_factory = ProfilerFactory(self.tmpdir, mode='sampling', sampling_interval=0.005)
+        pr_factory.activate(autodump=False)
+        try:
+            subroutines = [
+                threading.Thread(target=function_while_short, name="sampled.Thread"),
+                multiprocessing.Process(target=function_while_short, name="sampled.Process"),
+            ]
+            for sub in subroutines:
+                sub.start()
+            function_while_short()
+            for sub in subroutines:
+                sub.join()
+        finally:
+            pr_factory.stop_and_dump()
+
+        for group_name in ("main", "sampled.Thread", "sampled.Process", ):
+            with open(os.path.join(self.tmpdir, group_name, "stacks.collapsed"), encoding="utf-8") as stacks_file:
+                stacks = stacks_file.read().splitlines()
+            self.assertTrue(stacks, group_name)
+            for line in stacks:
+                self.assertRegex(line, r"^\S.* \d+$")
+            self.assertTrue(any("function_while_short (test_profiler.py:" in line for line in stacks), group_name)
+        with open(os.path.join(self.tmpdir, "stacks.collapsed"), encoding="utf-8") as total_file:
+            total = total_file.read().splitlines()
+        self.assertTrue(any(line.startswith("sampled.Process;") for line in total))
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "stats.bin")))
+
+    def test_thread_names_are_sanitized(self):
+        target_dir = os.path.join(self.tmpdir, "profile")
+        outside_file = os.path.join(self.tmpdir, "outside", "keep.txt")
+        os.makedirs(os.path.dirname(outside_file))
+        with open(outside_file, "w", encoding="utf-8") as fobj:
+            fobj.write("keep")
+        pr_factory = ProfilerFactory(target_dir, mode='sampling', sampling_interval=0.005)
+        pr_factory.activate(autodump=False)
+        try:
+            subroutines = [threading.Thread(target=function_while_short, name=name)
+                           for name in ("../outside", "..", "a/b c", )]
+            for sub in subroutines:
+                sub.start()
+            for sub in subroutines:
+                sub.join()
+        finally:
+            pr_factory.stop_and_dump()
+
+        self.assertTrue(os.path.exists(outside_file))
+        self.assertTrue(os.path.exists(os.path.join(target_dir, ".._outside", "stacks.collapsed")))
+        self.assertTrue(os.path.exists(os.path.join(target_dir, "a_b_c", "stacks.collapsed")))
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ["outside", "profile"])
+        with open(os.path.join(target_dir, "stacks.collapsed"), encoding="utf-8") as total_file:
+            total = total_file.read()
+        self.assertIn("\n..;", "\n" + total)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            ProfilerFactory(self.tmpdir, mode='perf')
+
+
+@pytest.mark.benchmark
+class TestProfilerOverheadBenchmark(unittest.TestCase, EventsUtilsMixin):
+    events_count = 3000
+
+    def publish_events(self, mode=None):
+        """Publish events through the whole events pipeline and return time till the last one is logged."""
+
+        tmpdir = tempfile.mkdtemp()
+        pr_factory = None
+        if mode:
+            pr_factory = ProfilerFactory(tmpdir, mode=mode)
+            pr_factory.activate(autodump=False)
+        try:
+            self.setup_events_processes(events_device=True, events_main_device=False, registry_patcher=True)
+            time.sleep(EVENTS_SUBSCRIBERS_START_DELAY)
+            file_logger = self.get_events_logger()
+            start = time.perf_counter()
+            with self.wait_for_n_events(file_logger, count=self.events_count, timeout=300,
+                                        last_event_processing_delay=0):
+                for index in range(self.events_count):
+                    InfoEvent(message=f"message {index}").publish()
+            elapsed = time.perf_counter() - start
+            self.teardown_events_processes()
+        finally:
+            if pr_factory:
+                pr_factory.stop_and_dump()
+            shutil.rmtree(tmpdir)
+        return elapsed
+
+    def test_benchmark(self):
+        results = {mode: self.publish_events(mode) for mode in (None, "cprofile", "sampling", )}
+        for mode, elapsed in results.items():
+            BENCHMARK_LOGGER.info("profiler %s: %s events in %.2fs (overhead %.0f%%)", mode or 'off', self.events_count,
+                                  elapsed, (elapsed / results[None] - 1) * 100)
@@ -0,0 +1,153 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import json
+import time
+import uuid
+import random
+import resource
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from sdcm.parallel_timeline_report.generate_pt_report import ParallelTimelinesReportGenerator, TimelineLane
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+NODE = "Node longevity-10gb-3h-master-db-node-6fb3995d-{} [13.49.80.25 | 10.0.1.221] (seed: True)"
+START_TIME = 1650000000.0
+
+
+def event(base, timestamp, **kwargs):
+    return {"base": base, "type": kwargs.pop("type", "default"), "subtype": None, "event_id": str(uuid.uuid4()),
+            "event_timestamp": timestamp, "severity": "NORMAL", **kwargs}
+
+
+def continuous_event(base, begin, end=None, **kwargs):
+    """Return `begin' record and `end' record (if `end' timestamp is given) of a continuous event."""
+
+    records = [event(base, None, period_type="begin", begin_timestamp=begin, end_timestamp=None, **kwargs)]
+    if end is not None:
+        records.append({**records[0], "period_type": "end", "end_timestamp": end})
+    return records
+
+
+def write_events(path, events):
+    with open(path, "w", encoding="utf-8") as file:
+        for record in events:
+            file.write(json.dumps(record) + "\n")
+
+
+def rendered_chart_data(report_file):
+    html = Path(report_file).read_text(encoding="utf-8")
+    chart_data = html.split("eventsData = ", 1)[1]
+    return json.loads(chart_data[:chart_data.index("];") + 1])
+
+
+class TestParallelTimelinesReport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.events_file = Path(self.temp_dir.name) / "raw_events.log"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_report(self):
+        write_events(self.events_file, [
+            event("InfoEvent", START_TIME, message="TEST_START test_id=fe9c9218-367f-47ba-b59f-0d06c0e81c30"),
+            *continuous_event("ScyllaServerStatusEvent", START_TIME + 1, node=NODE.format(10)),
+            *continuous_event("DisruptionEvent", START_TIME + 2, START_TIME + 5, node=NODE.format(2),
+                              nemesis_name="StopStartService"),
+            *continuous_event("DisruptionEvent", START_TIME + 2, START_TIME + 50, node=NODE.format(2),
+                              nemesis_name="RunUniqueSequence"),
+            *continuous_event("RepairEvent", START_TIME + 3, node=NODE.format(2), shard=1),
+            event("DatabaseLogEvent", START_TIME + 4, node=NODE.format(1), type="RUNTIME_ERROR"),
+            event("SoftTimeoutEvent", START_TIME + 100),
+            event("DatabaseLogEvent", START_TIME + 7, type="RUNTIME_ERROR"),
+            event("CassandraStressLogEvent", START_TIME + 6, node="loader-node-1"),
+        ])
+        generator = ParallelTimelinesReportGenerator(events_file=self.events_file)
+        generator.generate_full_report()
+
+        self.assertEqual(generator.test_id, "fe9c9218-367f-47ba-b59f-0d06c0e81c30")
+        self.assertEqual(generator.cluster_name, "longevity-10gb-3h-master-db-cluster-6fb3995d")
+        report_file = self.events_file.parent / "longevity-10gb-3h-master-6fb3995d-parallel-timelines-report.html"
+        chart_data = {group["group"]: {lane["label"]: lane["data"] for lane in group["data"]}
+                      for group in rendered_chart_data(report_file)}
+
+        self.assertEqual(list(chart_data), ["node-1", "node-2", "node-10", "no node", "SCT events",
+                                           "Stress events"])
+        self.assertEqual(chart_data["node-1"], {
+            "DatabaseLogEvent": [{"timeRange": [(START_TIME + 4) * 1000] * 2, "val": "type: RUNTIME_ERROR"}]})
+        self.assertEqual(chart_data["node-2"], {
+            "DisruptionEvent, nemesis: StopStartService": [
+                {"timeRange": [(START_TIME + 2) * 1000, (START_TIME + 5) * 1000], "val": "nemesis: StopStartService"}],
+            "RepairEvent, shard: 1": [{"timeRange": [(START_TIME + 3) * 1000] * 2, "val": "RepairEvent"}],
+        })
+        self.assertEqual(list(chart_data["no node"]), ["DatabaseLogEvent"])
+        # Server is up till the end of the test.
+        self.assertEqual(chart_data["node-10"]["ScyllaServerStatusEvent"][0]["timeRange"],
+                         [(START_TIME + 1) * 1000, (START_TIME + 100) * 1000])
+        self.assertEqual(list(chart_data["Stress events"]), ["loader-node-1"])
+
+    def test_lane_downsampling(self):
+        lane = TimelineLane(label="DatabaseLogEvent", sort_key=(), max_segments=10)
+        for second in range(1000):
+            lane.add(begin=(START_TIME + second) * 1000, end=(START_TIME + second) * 1000,
+                     value="type: ERROR" if second % 2 else "type: WARNING")
+        segments = lane.chart_data()["data"]
+
+        self.assertEqual(lane.events_count, 1000)
+        self.assertLessEqual(len(segments), 10)
+        self.assertEqual({segment["val"] for segment in segments}, {"type: ERROR", "type: WARNING"})
+        self.assertEqual(min(segment["timeRange"][0] for segment in segments), START_TIME * 1000)
+        self.assertEqual(max(segment["timeRange"][1] for segment in segments), (START_TIME + 999) * 1000)
+
+
+@pytest.mark.benchmark
+class TestParallelTimelinesReportBenchmark(unittest.TestCase):
+    events_count = 5_000_000
+
+    def test_benchmark(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            events_file = Path(temp_dir) / "raw_events.log"
+            rand = random.Random(0)
+            with open(events_file, "w", encoding="utf-8") as file:
+                for index in range(self.events_count):
+                    timestamp = START_TIME + index / 10  # about 6 days of events
+                    if index % 1000:
+                        record = event("DatabaseLogEvent", timestamp, node=NODE.format(rand.randint(1, 6)),
+                                       type=rand.choice(["RUNTIME_ERROR", "BACKTRACE", "WARNING", "SUPPRESSED"]),
+                                       line=f"[shard {index % 14}] compaction - Compacted sstables" * 3)
+                    else:
+                        _, record = continuous_event("CompactionEvent", timestamp, timestamp + 30,
+                                                     node=NODE.format(index % 6 + 1), shard=index % 14,
+                                                     table="keyspace1.standard1")
+                    file.write(json.dumps(record) + "\n")
+            file_size = events_file.stat().st_size
+
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            generator = ParallelTimelinesReportGenerator(events_file=events_file)
+            generator.generate_full_report()
+            elapsed = time.perf_counter() - start
+            max_rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - max_rss
+            report_size = sum(path.stat().st_size for path in Path(temp_dir).glob("*.html"))
+
+        BENCHMARK_LOGGER.info("%s events (%sMiB): report generated in %.1fs (%.0f events/s), "
+                              "max RSS growth %sMiB, report size %sKiB",
+                              self.events_count, file_size >> 20, elapsed, self.events_count / elapsed,
+                              max_rss_growth >> 10, report_size >> 10)
+        self.assertEqual(generator.events_count, self.events_count)
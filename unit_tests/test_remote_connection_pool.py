@@ -0,0 +1,165 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sdcm.remote import RemoteCmdRunner, RemoteLibSSH2CmdRunner
+from sdcm.remote.connection_pool import SSHConnectionPool
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+from unit_tests.lib.ssh_server import InProcessSSHServer
+
+
+class FakeConnection:
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        self.closed += 1
+
+
+class TestSSHConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SSHConnectionPool(max_channels=2, max_idle=1)
+        self.created = []
+
+    def create_connection(self):
+        self.created.append(FakeConnection())
+        return self.created[-1]
+
+    def lease(self, generation=0):
+        return self.pool.lease(owner="remoter", generation=generation, create_connection=self.create_connection,
+                               retryable=(EOFError, ))
+
+    def test_channels_multiplexed(self):
+        with self.lease() as conn1, self.lease() as conn2, self.lease() as conn3:
+            self.assertIs(conn1, conn2)
+            self.assertIsNot(conn1, conn3)
+        self.assertEqual(self.pool.opened, 2)
+        self.assertEqual(sorted(conn.closed for conn in self.created), [0, 1])  # only one idle connection is kept
+        with self.lease() as conn:
+            self.assertEqual(conn.closed, 0)
+        self.assertEqual(self.pool.connections_count("remoter"), 1)
+
+    def test_retryable_error_retires_connection(self):
+        with self.assertRaises(EOFError):
+            with self.lease() as conn1, self.lease() as conn2:
+                self.assertIs(conn1, conn2)
+                raise EOFError()
+        self.assertEqual(self.created[0].closed, 1)
+        with self.lease() as conn:
+            self.assertIsNot(conn, self.created[0])
+
+        with self.assertRaises(ValueError):
+            with self.lease():
+                raise ValueError()
+        with self.lease() as conn:
+            self.assertIs(conn, self.created[1])
+
+    def test_generation_change(self):
+        with self.lease() as conn1:
+            with self.lease(generation=1) as conn2:
+                self.assertIsNot(conn1, conn2)
+            self.assertEqual(conn1.closed, 0)
+        self.assertEqual(conn1.closed, 1)
+
+    def test_retire_all(self):
+        with self.lease() as conn:
+            self.pool.retire_all(owner="remoter")
+            self.assertEqual(conn.closed, 0)
+        self.assertEqual(conn.closed, 1)
+        self.assertEqual(self.pool.connections_count("remoter"), 0)
+
+
+class RemotersTestBase(unittest.TestCase):
+    remoter_class = RemoteCmdRunner
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.server = InProcessSSHServer(key_file=str(Path(self.tmp_dir.name) / "key")).__enter__()
+        self.remoter = self.remoter_class(
+            hostname="127.0.0.1", port=self.server.port, user="root", key_file=self.server.key_file)
+        if isinstance(self.remoter, RemoteCmdRunner):
+            # SSH ping thread uses a separate connection for each ping, don't count these handshakes.
+            self.remoter.stop_ssh_up_thread()
+            self.remoter.ssh_is_up.set()
+        self.assertTrue(self.remoter.is_up(timeout=30))
+
+    def tearDown(self):
+        self.remoter.stop()
+        self.server.__exit__()
+        self.tmp_dir.cleanup()
+
+    def run_fan_out(self, rounds, threads):
+        """Run commands from new threads in each round, like `ParallelObject' does."""
+
+        latencies = []
+
+        def run(index):
+            start = time.perf_counter()
+            result = self.remoter.run(f"echo {index}", verbose=False)
+            latencies.append(time.perf_counter() - start)
+            return result.stdout
+
+        for _ in range(rounds):
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                self.assertEqual(list(executor.map(run, range(threads * 2))),
+                                 [f"{index}\n" for index in range(threads * 2)])
+        return sorted(latencies)
+
+
+class TestRemoteCmdRunnerPool(RemotersTestBase):
+    def test_one_transport_for_all_threads(self):
+        handshakes = self.server.handshakes
+        self.run_fan_out(rounds=3, threads=4)
+        self.assertLessEqual(self.server.handshakes - handshakes, 1)
+
+    def test_reconnect(self):
+        self.remoter.run("true")
+        handshakes = self.server.handshakes
+        self.remoter._reconnect()  # pylint: disable=protected-access
+        self.assertEqual(self.remoter.run("echo 1").stdout, "1\n")
+        self.assertEqual(self.server.handshakes - handshakes, 1)
+
+
+class TestRemoteLibSSH2CmdRunnerPool(RemotersTestBase):
+    remoter_class = RemoteLibSSH2CmdRunner
+
+    def test_sessions_reused_by_new_threads(self):
+        handshakes = self.server.handshakes
+        self.run_fan_out(rounds=3, threads=4)
+        self.assertLessEqual(self.server.handshakes - handshakes, 4)
+
+
+@pytest.mark.benchmark
+class TestConnectionPoolBenchmark(RemotersTestBase):
+    def test_benchmark(self):
+        for remoter_class in (RemoteCmdRunner, RemoteLibSSH2CmdRunner):
+            remoter = self.remoter_class = remoter_class
+            self.tearDown()
+            self.setUp()
+            handshakes = self.server.handshakes
+            start = time.perf_counter()
+            latencies = self.run_fan_out(rounds=10, threads=8)
+            BENCHMARK_LOGGER.info("%s: %s commands in %.2fs, %s handshakes, p50=%.1fms p99=%.1fms", remoter.__name__,
+                                  len(latencies), time.perf_counter() - start, self.server.handshakes - handshakes,
+                                  latencies[len(latencies) // 2] * 1000, latencies[len(latencies) * 99 // 100] * 1000)
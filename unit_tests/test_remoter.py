@@ -12,7 +12,10 @@
 # Copyright (c) 2020 ScyllaDB
 
 import os
+import stat
+import shutil
 import getpass
+import tempfile
 import unittest
 import threading
 from typing import Union, Optional
@@ -24,7 +27,8 @@ from sdcm.remote import RemoteLibSSH2CmdRunner, RemoteCmdRunner, LocalCmdRunner,
     SSHConnectTimeoutError, shell_script_cmd
 from sdcm.remote.kubernetes_cmd_runner import KubernetesCmdRunner
 from sdcm.remote.base import CommandRunner, Result
-from sdcm.remote.remote_file import remote_file
+from sdcm.remote.remote_file import remote_file, remote_files, yaml_file_to_dict, dict_to_yaml_file, \
+    INLINE_CONTENT_LIMIT
 from sdcm.cluster_k8s import KubernetesCluster
 
 
@@ -405,86 +409,143 @@ class TestSudoAndRunShellScript(unittest.TestCase):
         self.assertEqual(shell_script_cmd("true"), 'bash -cxe "true"')
 
 
-class TestRemoteFile(unittest.TestCase):
-    @classmethod
-    def setUpClass(cls) -> None:
-        class _Runner:
-            sf_data = sf_src = sf_dst = rf_src = rf_dst = None
-            hostname = "localhost"
-            command_to_run = ""
-            rf_data = 'new'
+class RoundTripsCountingRunner(LocalCmdRunner):
+    """Record commands and file transfers, each of them is a round trip to a remote host."""
 
-            def run(self, cmd, *_, **__):
-                self.command_to_run = cmd
-                if cmd == "mktemp":
-                    return Result(stdout="temporary\n")
-                elif 'stat -c "%U:%G"' in cmd:
-                    return Result(stdout="bentsi:bentsi")
-                elif 'stat -c "%a"' in cmd:
-                    return Result(stdout="644")
-                return Result(stdout="", stderr="")
-
-            def send_files(self, src: str, dst: str, *_, **__) -> bool:
-                with open(src, encoding="utf-8") as fobj:
-                    self.sf_data = fobj.read()
-                self.sf_src = src
-                self.sf_dst = dst
-                return True
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.round_trips = []
+        self.sudo_commands = []
+        self._transferring = False
 
-            def receive_files(self, src: str, dst: str, *_, **__) -> bool:
-                with open(dst, "w", encoding="utf-8") as fobj:
-                    fobj.write(self.rf_data)
-                self.rf_src = src
-                self.rf_dst = dst
-                return True
+    def run(self, cmd, *args, **kwargs):  # pylint: disable=arguments-differ
+        if not self._transferring:
+            self.round_trips.append(("run", cmd))
+        return super().run(cmd, *args, **kwargs)
 
-            def sudo(self, cmd, *_, **__):
-                return self.run(cmd)
+    def sudo(self, cmd, *args, user="root", **kwargs):  # pylint: disable=arguments-differ
+        """Run the command as is, so tests don't depend on sudo configuration of the host."""
+
+        self.sudo_commands.append(cmd)
+        return self.run(cmd, *args, **kwargs)
+
+    def send_files(self, src, dst, *args, **kwargs):  # pylint: disable=arguments-differ
+        self.round_trips.append(("send_files", dst))
+        self._transferring = True
+        try:
+            return super().send_files(src, dst, *args, **kwargs)
+        finally:
+            self._transferring = False
+
+    def receive_files(self, src, dst, *args, **kwargs):  # pylint: disable=arguments-differ
+        self.round_trips.append(("receive_files", src))
+        self._transferring = True
+        try:
+            return super().receive_files(src, dst, *args, **kwargs)
+        finally:
+            self._transferring = False
 
-        cls.remoter_cls = _Runner
+
+class TestRemoteFile(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.some_file = os.path.join(self.temp_dir, "some file.yaml")
+        with open(self.some_file, "w", encoding="utf-8") as fobj:
+            fobj.write("old data\n")
+        os.chmod(self.some_file, 0o640)
+        self.remoter = RoundTripsCountingRunner()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def read_some_file(self):
+        with open(self.some_file, encoding="utf-8") as fobj:
+            return fobj.read()
 
     def test_remote_file(self):
-        remoter = self.remoter_cls()
-        some_file = "/some/path/some.file"
-        with remote_file(remoter=remoter, remote_path=some_file,
-                         preserve_ownership=False, preserve_permissions=False) as fobj:
+        with remote_file(remoter=self.remoter, remote_path=self.some_file) as fobj:
+            self.assertEqual(fobj.getvalue(), "old data\n")
             fobj.write("test data")
-        self.assertEqual(remoter.rf_src, some_file)
-        self.assertEqual(remoter.sf_dst, "temporary")
-        self.assertTrue(remoter.rf_dst.startswith("/tmp/sct"))
-        self.assertTrue(remoter.rf_dst.endswith(os.path.basename(some_file)))
-        self.assertEqual(remoter.rf_dst, remoter.sf_src)
-        self.assertEqual(remoter.sf_data, "test data")
-        self.assertFalse(os.path.exists(remoter.sf_src))
-        self.assertEqual(remoter.command_to_run, f"mv 'temporary' '{some_file}'")
-
-    def test_remote_file_preserve_ownership(self):
-        remoter = self.remoter_cls()
-        some_file = "/some/path/some.file"
-        with remote_file(remoter=remoter, remote_path=some_file,
-                         preserve_ownership=True, preserve_permissions=False) as fobj:
+        self.assertEqual(self.read_some_file(), "test data")
+        self.assertEqual(len(self.remoter.round_trips), 2)
+        self.assertEqual(self.remoter.sudo_commands, [], "user's own file should be edited without sudo")
+        self.assertEqual(os.listdir(self.temp_dir), ["some file.yaml"])
+
+    def test_remote_file_sudo(self):
+        with remote_file(remoter=self.remoter, remote_path=self.some_file, sudo=True) as fobj:
             fobj.write("test data")
-            assert remoter.command_to_run == f'stat -c "%U:%G" {some_file}'
-        assert f"chown bentsi:bentsi {some_file}" == remoter.command_to_run
-
-    def test_remote_file_preserve_permissions(self):
-        remoter = self.remoter_cls()
-        some_file = "/some/path/some.file"
-        with remote_file(remoter=remoter, remote_path=some_file,
-                         preserve_ownership=False, preserve_permissions=True) as fobj:
+        self.assertEqual(self.read_some_file(), "test data")
+        self.assertEqual(self.remoter.sudo_commands, [cmd for _, cmd in self.remoter.round_trips])
+
+    def test_remote_file_preserve_ownership_and_permissions(self):
+        file_stat = os.stat(self.some_file)
+        with remote_file(remoter=self.remoter, remote_path=self.some_file) as fobj:
+            fobj.write("test data")
+        new_file_stat = os.stat(self.some_file)
+        self.assertNotEqual(new_file_stat.st_ino, file_stat.st_ino, "file should be replaced atomically")
+        self.assertEqual((new_file_stat.st_uid, new_file_stat.st_gid), (file_stat.st_uid, file_stat.st_gid))
+        self.assertEqual(stat.S_IMODE(new_file_stat.st_mode), 0o640)
+        self.assertNotIn("chown", self.remoter.round_trips[-1][1], "new file is owned by the user already")
+        self.assertIn("chmod 640", self.remoter.round_trips[-1][1])
+
+    @unittest.skipIf(os.geteuid() != 0, "only root can create a file owned by another user")
+    def test_remote_file_preserve_another_user_ownership(self):
+        os.chown(self.some_file, 65534, 65534)
+        with remote_file(remoter=self.remoter, remote_path=self.some_file) as fobj:
             fobj.write("test data")
-            assert remoter.command_to_run == f'stat -c "%a" {some_file}'
-        assert f"chmod 644 {some_file}" == remoter.command_to_run
+        new_file_stat = os.stat(self.some_file)
+        self.assertEqual((new_file_stat.st_uid, new_file_stat.st_gid), (65534, 65534))
+        self.assertIn("chown", self.remoter.round_trips[-1][1])
+        self.assertEqual(self.remoter.sudo_commands, [self.remoter.round_trips[-1][1]],
+                         "only writing of the file should need sudo")
+
+    def test_remote_file_dont_preserve_permissions(self):
+        with remote_file(remoter=self.remoter, remote_path=self.some_file,
+                         preserve_ownership=False, preserve_permissions=False) as fobj:
+            fobj.write("test data")
+        self.assertNotIn("chown", self.remoter.round_trips[-1][1])
+        self.assertNotIn("chmod", self.remoter.round_trips[-1][1])
+        self.assertEqual(stat.S_IMODE(os.stat(self.some_file).st_mode), 0o600)  # as created by mktemp
 
     def test_remote_file_preserve_readonly(self):
-        remoter = self.remoter_cls()
-        some_file = "/some/path/some.file"
-        with remote_file(remoter=remoter, remote_path=some_file,
-                         preserve_ownership=False, preserve_permissions=True) as fobj:
-            fobj.write(remoter.rf_data)
-            assert remoter.command_to_run == f'stat -c "%a" {some_file}'
-
-        self.assertEqual(remoter.rf_src, some_file)
-        self.assertTrue(remoter.rf_dst.startswith("/tmp/sct"))
-        self.assertTrue(remoter.rf_dst.endswith(os.path.basename(some_file)))
-        self.assertEqual(remoter.sf_data, None)
+        file_stat = os.stat(self.some_file)
+        with remote_file(remoter=self.remoter, remote_path=self.some_file) as fobj:
+            fobj.read()
+        self.assertEqual(os.stat(self.some_file).st_ino, file_stat.st_ino)
+        self.assertEqual(len(self.remoter.round_trips), 1)
+
+    def test_remote_file_exception(self):
+        with self.assertRaises(ValueError), remote_file(remoter=self.remoter, remote_path=self.some_file) as fobj:
+            fobj.write("test data")
+            raise ValueError()
+        self.assertEqual(self.read_some_file(), "old data\n")
+        self.assertEqual(len(self.remoter.round_trips), 1)
+
+    def test_remote_file_large_content(self):
+        content = "".join(f"line {index}\n" for index in range(INLINE_CONTENT_LIMIT // 5))
+        with remote_file(remoter=self.remoter, remote_path=self.some_file) as fobj:
+            fobj.truncate(0)
+            fobj.seek(0)
+            fobj.write(content)
+        self.assertEqual(self.read_some_file(), content)
+        self.assertEqual([kind for kind, _ in self.remoter.round_trips], ["run", "send_files", "run"])
+        self.assertFalse(os.path.exists(self.remoter.round_trips[1][1]))
+        self.assertEqual(stat.S_IMODE(os.stat(self.some_file).st_mode), 0o640)
+
+    def test_remote_files(self):
+        files = []
+        for index in range(3):
+            path = os.path.join(self.temp_dir, f"scylla-{index}.yaml")
+            with open(path, "w", encoding="utf-8") as fobj:
+                fobj.write(f"num_tokens: {index}\ncluster_name: test\n")
+            files.append((RoundTripsCountingRunner(), path))
+
+        with remote_files(files=files, serializer=dict_to_yaml_file, deserializer=yaml_file_to_dict) as yamls:
+            self.assertEqual([data["num_tokens"] for data in yamls], [0, 1, 2])
+            yamls[0]["num_tokens"] = 256
+            yamls[2]["num_tokens"] = 256
+
+        for (remoter, path), expected_round_trips in zip(files, (2, 1, 2)):
+            self.assertEqual(len(remoter.round_trips), expected_round_trips)
+            with open(path, encoding="utf-8") as fobj:
+                self.assertEqual(yaml_file_to_dict(fobj)["num_tokens"], 256 if expected_round_trips == 2 else 1)
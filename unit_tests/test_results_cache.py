@@ -0,0 +1,357 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import re
+import json
+import time
+import bisect
+import random
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+from datetime import datetime
+
+import pytest
+from sortedcontainers import SortedDict
+
+from sdcm.results_analyze import PerformanceResultsAnalyzer
+from sdcm.results_analyze.results_cache import \
+    ResultsCache, ResultsTable, SYNC_OVERLAP, RESULTS_CACHE_MAX_AGE, prune_results_cache
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+TEST_DATA = Path(__file__).parent / "test_data" / "test_results_analyze"
+HISTORY_SIZE = 100_000
+TESTS_INTERVAL = 600
+
+
+def load_test_doc():
+    return json.loads((TEST_DATA / "perf_regression_test.json").read_text(encoding="utf-8"))
+
+
+def generate_history(count, seed=0):
+    """Documents of previous runs of the test from the fixture: a few runs a day for many Scylla versions."""
+
+    test_doc = load_test_doc()
+    rnd = random.Random(seed)
+    versions = [f"{major}.{minor}.{patch}" for major in (4, 5) for minor in range(5) for patch in range(4)]
+    docs = []
+    for index in range(count):
+        start_time = test_doc["_source"]["test_details"]["start_time"] - (count - index) * TESTS_INTERVAL
+        version = versions[min(len(versions) - 1, max(0, index * len(versions) // count + rnd.randrange(-1, 2)))]
+        source = {
+            "test_details": {"test_name": test_doc["_source"]["test_details"]["test_name"], "start_time": start_time},
+            "versions": {"scylla-server": {
+                "version": version,
+                "date": datetime.utcfromtimestamp(start_time - rnd.randrange(3) * 24 * 3600).strftime("%Y%m%d"),
+                "commit_id": f"{rnd.getrandbits(36):09x}",
+            }},
+            "results": {
+                "stats_average": {
+                    "op rate": round(rnd.gauss(60000, 3000), -2),
+                    "latency mean": round(rnd.gauss(3, 0.3), 1) if rnd.random() > 0.001 else 0,
+                    "latency 99th percentile": round(rnd.gauss(11, 1), 1) if rnd.random() > 0.01 else '',
+                    "loader_idx": 1.5,
+                },
+                "stats_total": {"op rate": round(rnd.gauss(240000, 12000), -3), "Total errors": 0},
+            },
+        }
+        if rnd.random() < 0.005:
+            del source["versions"]
+        docs.append({"_index": test_doc["_index"], "_id": f"test-{index:06d}", "_source": source})
+    return docs
+
+
+class FakeES:
+    query_since_re = re.compile(r"test_details\.start_time:>=(\S+)$")
+
+    def __init__(self, docs, test_doc=None):
+        self._conf = {"kibana_url": "http://kibana"}
+        self.docs = []
+        self.start_times = []
+        self.docs_without_start_time = []
+        self.test_doc = test_doc
+        self.searches = []
+        for doc in docs:
+            self.add(doc)
+
+    def add(self, doc):
+        if (start_time := doc["_source"]["test_details"].get("start_time")) is None:
+            self.docs_without_start_time.append(doc)
+            return
+        index = bisect.bisect_right(self.start_times, start_time)
+        self.start_times.insert(index, start_time)
+        self.docs.insert(index, doc)
+
+    def search(self, index, body, filter_path=None, request_timeout=None):  # pylint: disable=unused-argument
+        if body["query"]["query_string"]["query"].endswith(" AND NOT _exists_:test_details.start_time"):
+            return {"hits": {"hits": self.docs_without_start_time}} if self.docs_without_start_time else {}
+        since = float(self.query_since_re.search(body["query"]["query_string"]["query"]).group(1))
+        self.searches.append(since)
+        start = bisect.bisect_left(self.start_times, since)
+        hits = self.docs[start:start + body["size"]]
+        return {"hits": {"hits": hits}} if hits else {}
+
+    def exists(self, index, doc_type, id):  # pylint: disable=redefined-builtin,unused-argument
+        return id == self.test_doc["_id"]
+
+    def get(self, index, doc_type, id):  # pylint: disable=redefined-builtin,unused-argument
+        return self.test_doc
+
+
+def best_results_per_version_one_by_one(analyzer, hits, test_id):
+    """The way the best results were found before: all documents were processed one by one in Python."""
+
+    # pylint: disable=protected-access
+    group_by_version = {}
+    for row in hits:
+        if row['_id'] == test_id:
+            continue
+        version_info = analyzer._test_version(row)
+        if not version_info:
+            continue
+        version = version_info['version']
+        results = row['_source']['results']
+        try:
+            curr_test_stats = analyzer._test_stats({'_id': row['_id'], '_source': {'results': {
+                'stats_average': dict(results['stats_average']), 'stats_total': results['stats_total']}}})
+        except KeyError:
+            continue
+        if not curr_test_stats:
+            continue
+        formated_version_date = datetime.strptime(version_info['date'], "%Y%m%d").strftime("%Y-%m-%d")
+        version_info_data = {"commit": version_info['commit_id'], "date": formated_version_date}
+        if version not in group_by_version:
+            group_by_version[version] = {"tests": SortedDict(), "stats_best": {}, "best_test_id": {}}
+            group_by_version[version]['stats_best'] = {k: 0 for k in analyzer.PARAMS}
+            group_by_version[version]['best_test_id'] = {k: version_info_data for k in analyzer.PARAMS}
+        group_by_version[version]['tests'][version_info['date']] = {
+            "test_stats": curr_test_stats,
+            "version": {k: version_info_data for k in analyzer.PARAMS}
+        }
+        old_best = group_by_version[version]['stats_best']
+        group_by_version[version]['stats_best'] = \
+            {k: analyzer._get_best_value(k, curr_test_stats[k], old_best[k])
+             for k in analyzer.PARAMS if k in curr_test_stats and k in old_best}
+        for k in analyzer.PARAMS:
+            if k in curr_test_stats and k in old_best and \
+                    group_by_version[version]['stats_best'][k] == curr_test_stats[k]:
+                group_by_version[version]['best_test_id'][k] = version_info_data
+    return group_by_version
+
+
+class ResultsCacheTestBase(unittest.TestCase):
+    history = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.history = generate_history(HISTORY_SIZE)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.test_doc = load_test_doc()
+        self.es = FakeES(self.history, test_doc=self.test_doc)  # pylint: disable=invalid-name
+
+    def create_analyzer(self):
+        with unittest.mock.patch("sdcm.results_analyze.ES", return_value=self.es):
+            return PerformanceResultsAnalyzer(es_index="performanceregressiontest", es_doc_type="test_stats")
+
+    def create_cache(self):
+        return ResultsCache(es=self.es, index="performanceregressiontest", query="test_details.job_name: *",
+                            filter_path=["hits.hits._source.results"], cache_dir=self.tmp_dir.name)
+
+
+class TestResultsTable(unittest.TestCase):
+    def test_columns(self):
+        table = ResultsTable()
+        table.upsert("a", {"versions": {"scylla-server": {"version": "5.0"}}, "results": {"stats": [1, 2]}})
+        table.upsert("b", {"versions": {"version": "4.6"}, "results": {}})
+        table.upsert("c", {"versions": {"scylla-server": {"version": "5.0"}}})
+        table.upsert("a", {"versions": {"scylla-server": {"version": "5.1"}}})
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.column("results", "stats"), [None, None, None])
+        self.assertEqual(table.column("missing"), [None, None, None])
+        versions = table.coalesce(("versions", "scylla-server", "version"), ("versions", "version"))
+        self.assertEqual(versions, ["5.1", "4.6", "5.0"])
+        self.assertEqual(table.group_by(versions, [2, 1, 0]), {"5.0": [2], "4.6": [1], "5.1": [0]})
+        self.assertEqual(table.doc(1), {"_id": "b", "_source": {"versions": {"version": "4.6"}, "results": {}}})
+        self.assertEqual(ResultsTable.from_dict(json.loads(json.dumps(table.to_dict()))).doc(0), table.doc(0))
+
+    def test_latest_rows(self):
+        table = ResultsTable()
+        for doc_id, start_time in (("a", 30), ("b", None), ("c", 10), ("d", 20), ):
+            table.upsert(doc_id, {"test_details": {"start_time": start_time}})
+        self.assertEqual(table.latest_rows(range(len(table)), limit=2), [0, 3])
+        self.assertEqual(table.latest_rows([1, 2], limit=10), [1, 2])
+        self.assertEqual(table.latest_rows([1, 2], limit=1), [2])
+
+
+class TestResultsCache(ResultsCacheTestBase):
+    def test_sync_incrementally(self):
+        cache = self.create_cache()
+        self.assertGreaterEqual(cache.sync(), HISTORY_SIZE)  # the last hits of a page are read again with the next one
+        self.assertEqual(len(cache.table), HISTORY_SIZE)
+        self.assertEqual(cache.table.ids, [doc["_id"] for doc in self.history])
+
+        # A test which was running during the last sync, and new tests.
+        running_test = json.loads(json.dumps(self.es.docs[-1]))
+        running_test["_source"]["results"]["stats_total"]["op rate"] = 1.0
+        self.es.docs[-1] = running_test
+        for doc in generate_history(10, seed=1):
+            doc["_id"] = doc["_id"].replace("test", "new")
+            self.es.add(doc)
+        self.es.add(self.test_doc)
+
+        self.es.searches.clear()
+        cache = self.create_cache()
+        self.assertEqual(len(cache.table), HISTORY_SIZE)
+        since = running_test["_source"]["test_details"]["start_time"] - SYNC_OVERLAP
+        self.assertEqual(cache.sync(), len(self.es.docs) - bisect.bisect_left(self.es.start_times, since))
+        self.assertEqual(self.es.searches, [since])
+        self.assertEqual(len(cache.table), HISTORY_SIZE + 11)
+        self.assertEqual(cache.table.column("results", "stats_total", "op rate")[HISTORY_SIZE - 1], 1.0)
+        self.assertEqual(cache.table.ids[-1], self.test_doc["_id"])
+
+        self.es.searches.clear()
+        self.create_cache().sync()
+        self.assertEqual(self.es.searches, [self.test_doc["_source"]["test_details"]["start_time"] - SYNC_OVERLAP])
+
+    def test_docs_without_start_time(self):
+        doc = json.loads(json.dumps(self.history[0]))
+        doc["_id"] = "no-start-time"
+        del doc["_source"]["test_details"]["start_time"]
+        self.es.add(doc)
+        cache = self.create_cache()
+        cache.sync()
+        self.assertEqual(len(cache.table), HISTORY_SIZE + 1)
+        self.assertIn("no-start-time", cache.table.ids)
+
+        doc["_source"]["results"]["stats_total"]["op rate"] = 1.0
+        cache = self.create_cache()
+        cache.sync()
+        self.assertEqual(len(cache.table), HISTORY_SIZE + 1)
+        row = cache.table.ids.index("no-start-time")
+        self.assertEqual(cache.table.column("results", "stats_total", "op rate")[row], 1.0,
+                         "documents without start time should be read again on each sync")
+
+    def test_prune_unused_cache_files(self):
+        cache = self.create_cache()
+        cache.sync()
+        unused_path = Path(self.tmp_dir.name) / "performanceregressiontest-unused.json.gz"
+        unused_path.write_bytes(b"")
+        old_time = time.time() - RESULTS_CACHE_MAX_AGE - 1
+        os.utime(unused_path, (old_time, old_time))
+        os.utime(cache.path, (old_time, old_time))
+
+        self.assertEqual(len(self.create_cache().table), HISTORY_SIZE)  # loading marks the cache file as used
+        prune_results_cache(self.tmp_dir.name)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [os.path.basename(cache.path)])
+
+    def test_broken_cache_file(self):
+        cache = self.create_cache()
+        Path(cache.path).write_bytes(b"garbage")
+        with self.assertLogs("sdcm.results_analyze.results_cache", level="WARNING"):
+            self.assertEqual(len(self.create_cache().table), 0)
+
+    def test_best_results_per_version(self):
+        cache = self.create_cache()
+        cache.sync()
+        analyzer = self.create_analyzer()
+        excluded_id = self.history[500]["_id"]
+        expected = best_results_per_version_one_by_one(analyzer, self.history, test_id=excluded_id)
+
+        group_by_version = analyzer._best_results_per_version(  # pylint: disable=protected-access
+            cache.table, exclude_test_id=excluded_id)
+
+        self.assertEqual(list(group_by_version), list(expected))
+        for version, group in group_by_version.items():
+            self.assertEqual(group["stats_best"], expected[version]["stats_best"])
+            self.assertEqual(group["best_test_id"], expected[version]["best_test_id"])
+            latest = expected[version]["tests"].peekitem(index=-1)[1]
+            self.assertEqual(group["latest"]["version"], latest["version"])
+            self.assertEqual(group["latest"]["test_stats"], {param: latest["test_stats"][param]
+                                                             for param in analyzer.PARAMS})
+
+    def check_regression(self, analyzer, lastyear=False):
+        with unittest.mock.patch("sdcm.results_analyze.results_cache.RESULTS_CACHE_DIR", self.tmp_dir.name), \
+                unittest.mock.patch("sdcm.results_analyze.TestConfig.logdir", return_value=self.tmp_dir.name):
+            self.assertTrue(analyzer.check_regression(self.test_doc["_id"], lastyear=lastyear))
+        with open(Path(self.tmp_dir.name) / "email_data.json", encoding="utf-8") as email_data:
+            (subject, email), = json.load(email_data).items()
+        self.assertIn("Performance Regression Compare Results - PerformanceRegressionTest.test_write - 5.0.0",
+                      subject)
+        return email
+
+    def assert_res_list(self, analyzer, email, history):
+        test_stats = analyzer._test_stats(self.test_doc)  # pylint: disable=protected-access
+        expected = best_results_per_version_one_by_one(analyzer, history, test_id=self.test_doc["_id"])
+        self.assertEqual(email["email_body"]["res_list"], [
+            {"best": analyzer.cmp(test_stats, group["stats_best"], version, group["best_test_id"]),
+             "last": analyzer.cmp(test_stats, group["tests"].peekitem(index=-1)[1]["test_stats"], version,
+                                  group["tests"].peekitem(index=-1)[1]["version"])}
+            for version, group in expected.items()])
+
+    def test_check_regression(self):
+        analyzer = self.create_analyzer()
+        analyzer._limit = HISTORY_SIZE  # pylint: disable=protected-access
+        self.assert_res_list(analyzer, self.check_regression(analyzer), self.history)
+
+    def test_check_regression_limit(self):
+        analyzer = self.create_analyzer()
+        limit = analyzer._limit  # pylint: disable=protected-access
+        self.assertLess(limit, HISTORY_SIZE)
+        self.assert_res_list(analyzer, self.check_regression(analyzer), self.history[-limit:])
+
+    def test_check_regression_last_year(self):
+        analyzer = self.create_analyzer()
+        analyzer._limit = HISTORY_SIZE  # pylint: disable=protected-access
+        year_ago = self.history[HISTORY_SIZE // 2]["_source"]["versions"]["scylla-server"]["date"]
+        with unittest.mock.patch("sdcm.utils.es_queries.QueryFilter.last_year_start_date", return_value=year_ago):
+            email = self.check_regression(analyzer, lastyear=True)
+        self.assert_res_list(analyzer, email, [
+            doc for doc in self.history
+            if doc["_source"].get("versions", {}).get("scylla-server", {}).get("date", "") > year_ago])
+
+        # The date bound isn't a part of the cache key: the same cache file is used with and without it.
+        self.check_regression(analyzer)
+        self.assertEqual(len([name for name in os.listdir(self.tmp_dir.name) if name.endswith(".json.gz")]), 1)
+
+
+@pytest.mark.benchmark
+class TestResultsCacheBenchmark(ResultsCacheTestBase):
+    def test_benchmark(self):
+        analyzer = self.create_analyzer()
+        start = time.perf_counter()
+        best_results_per_version_one_by_one(analyzer, self.history, test_id=None)
+        one_by_one = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cache = self.create_cache()
+        cache.sync()
+        full_sync = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cache = self.create_cache()
+        cache.sync()
+        incremental_sync = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyzer._best_results_per_version(cache.table)  # pylint: disable=protected-access
+        columnar = time.perf_counter() - start
+
+        BENCHMARK_LOGGER.info("%s documents: one by one %.2fs, columnar %.2fs; "
+                              "full sync %.2fs, load and incremental sync %.2fs",
+                              HISTORY_SIZE, one_by_one, columnar, full_sync, incremental_sync)
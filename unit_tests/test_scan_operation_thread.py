@@ -0,0 +1,167 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import re
+import time
+import threading
+import unittest
+from types import SimpleNamespace
+
+from sdcm.scan_operation_thread import \
+    MIN_TOKEN, MAX_TOKEN, FullScanThread, LatencyHistogram, RowsDigest, TokenRangeScan, split_token_ring
+
+TOKEN_RE = re.compile(r"token\(pk\) > (-?\d+) and token\(pk\) <= (-?\d+)")
+
+
+class FakeResultSet:
+    def __init__(self, session, pages):
+        self.session = session
+        self.pages = pages
+        self.current_rows = pages.pop(0)
+
+    @property
+    def has_more_pages(self):
+        return bool(self.pages)
+
+    def fetch_next_page(self):
+        self.current_rows = self.session.fetch_page(self.pages)
+
+
+class FakeSession:
+    """Session which yields synthetic pages of rows with tokens spread evenly over the ring."""
+
+    def __init__(self, rows_count=10000, page_size=100, delay=0.001, fail_on=None):
+        step = (MAX_TOKEN - MIN_TOKEN) // rows_count
+        self.tokens = [MIN_TOKEN + 1 + step * index for index in range(rows_count)]
+        self.page_size = page_size
+        self.delay = delay
+        self.fail_on = fail_on
+        self.queries = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        partition_key = [SimpleNamespace(name="pk")]
+        self.cluster = SimpleNamespace(metadata=SimpleNamespace(keyspaces={
+            "ks": SimpleNamespace(tables={"cf": SimpleNamespace(partition_key=partition_key)})}))
+
+    def fetch_page(self, pages):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return pages.pop(0)
+
+    def execute(self, statement):
+        self.queries.append(statement.query_string)
+        start, end = map(int, TOKEN_RE.search(statement.query_string).groups())
+        if self.fail_on is not None and start < self.fail_on <= end:
+            raise TimeoutError("Operation timed out")
+        rows = [token for token in self.tokens if start < token <= end]
+        pages = [rows[index:index + self.page_size] for index in range(0, len(rows), self.page_size)] or [[]]
+        result = FakeResultSet(self, [[]] + pages)
+        result.fetch_next_page()
+        return result
+
+
+class TestTokenRangeScan(unittest.TestCase):
+    def test_split_token_ring(self):
+        ranges = split_token_ring(7)
+        self.assertEqual(len(ranges), 7)
+        self.assertEqual(ranges[0][0], MIN_TOKEN)
+        self.assertEqual(ranges[-1][1], MAX_TOKEN)
+        self.assertTrue(all(prev[1] == cur[0] for prev, cur in zip(ranges, ranges[1:])))
+
+    def test_all_rows_read_once(self):
+        session = FakeSession()
+        scan = TokenRangeScan(session=session, ks_cf="ks.cf", query_suffix=" bypass cache", ranges_count=16,
+                              max_in_flight_pages=4, page_size=100)
+        scan.run()
+        self.assertEqual(scan.rows, len(session.tokens))
+        self.assertEqual(len(session.queries), 16)
+        self.assertTrue(all(query.startswith("select * from ks.cf where token(pk) > ") and
+                            query.endswith(" bypass cache") for query in session.queries))
+        self.assertLessEqual(session.max_in_flight, 4)
+        self.assertEqual(scan.latency.count, scan.pages)
+        self.assertEqual(sum(token_range.pages for token_range in scan.ranges), scan.pages)
+        self.assertTrue(all(token_range.latency.count == token_range.pages for token_range in scan.ranges))
+
+    def test_max_pages(self):
+        scan = TokenRangeScan(session=FakeSession(), ks_cf="ks.cf", ranges_count=16, max_in_flight_pages=4)
+        scan.run(max_pages=10)
+        self.assertEqual(scan.pages, 10)
+        self.assertEqual(scan.rows, 1000)
+
+    def test_error_stops_scan(self):
+        session = FakeSession(fail_on=0)
+        scan = TokenRangeScan(session=session, ks_cf="ks.cf", ranges_count=64, max_in_flight_pages=1)
+        with self.assertRaisesRegex(TimeoutError, "timed out"):
+            scan.run()
+        self.assertEqual(len(session.queries), 33)
+
+    def test_termination_event(self):
+        termination_event = threading.Event()
+        termination_event.set()
+        session = FakeSession()
+        TokenRangeScan(session=session, ks_cf="ks.cf", termination_event=termination_event).run()
+        self.assertEqual(session.queries, [])
+
+
+class TestFullScanThread(unittest.TestCase):
+    def test_query_options_passed_to_token_ranges(self):
+        thread = FullScanThread(db_cluster=None, duration=0, interval=0, termination_event=threading.Event(),
+                                ks_cf="ks.cf", token_ranges=4)
+        scan = thread.execute_query(session=FakeSession(), cmd="select * from ks.cf bypass cache USING TIMEOUT 2s")
+        self.assertEqual(scan.query_suffix, " bypass cache USING TIMEOUT 2s")
+        self.assertEqual(len(scan.ranges), 4)
+        with self.assertRaises(ValueError):
+            thread.execute_query(session=FakeSession(), cmd="select * from ks.other")
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for latency_ms in range(1, 101):
+            histogram.record(latency_ms / 1000)
+        other = LatencyHistogram()
+        other.record(1.5)
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 101)
+        self.assertEqual(histogram.percentile(50), 64)
+        self.assertEqual(histogram.percentile(99), 128)
+        self.assertEqual(histogram.percentile(100), 2048)
+        self.assertEqual(histogram.max, 1500)
+        self.assertIn("<2048ms: 1", str(histogram))
+
+
+class TestRowsDigest(unittest.TestCase):
+    @staticmethod
+    def digest(rows):
+        digest = RowsDigest()
+        for row in rows:
+            digest.add(str(row))
+        return digest
+
+    def test_reversed_with_limit(self):
+        normal = self.digest(range(100))
+        self.assertEqual(len(normal), 100)
+        self.assertEqual(normal.reversed(), self.digest(reversed(range(100))))
+        self.assertEqual(normal.reversed(limit=10), self.digest(range(99, 89, -1)))
+        self.assertEqual(normal.reversed().digest, self.digest(reversed(range(100))).digest)
+
+    def test_first_mismatch(self):
+        self.assertIsNone(self.digest(range(10)).first_mismatch(self.digest(range(10))))
+        self.assertEqual(self.digest(range(10)).first_mismatch(self.digest([0, 1, 2, 4])), 3)
+        self.assertEqual(self.digest(range(10)).first_mismatch(self.digest(range(5))), 5)
+        self.assertNotEqual(self.digest(range(10)).digest, self.digest(range(5)).digest)
@@ -12,15 +12,24 @@
 # Copyright (c) 2020 ScyllaDB
 
 import os
+import time
 import pickle
+import random
 import tempfile
 import unittest
 from typing import Optional, Type, Protocol, runtime_checkable
 from unittest.mock import patch
 
+import pytest
+import dateutil.parser
+
 from sdcm.sct_events import Severity, SctEventProtocol
 from sdcm.sct_events.base import \
-    SctEvent, SctEventTypesRegistry, BaseFilter, LogEvent, LogEventProtocol
+    SctEvent, SctEventTypesRegistry, BaseFilter, LogEvent, LogEventProtocol, parse_log_timestamp, \
+    _log_timestamp_seconds
+from sdcm.sct_events.database import DatabaseLogEvent
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
 
 
 Y = None  # define a global name for pickle.
@@ -553,6 +562,21 @@ class TestLogEvent(SctEventTestCase):
         self.assertEqual(z.line_number, 1)
         self.assertTrue(z._ready_to_publish)
 
+    def test_clone_copies_containers(self):
+        global Y  # pylint: disable=global-variable-not-assigned; assigned by class definition
+
+        class Y(LogEvent):
+            pass
+
+        z = Y(regex="regex1")
+        z.errors = ["error1"]
+        y = z.clone()
+        y.errors.append("error2")
+        self.assertEqual(z.errors, ["error1"])
+        self.assertEqual(y.errors, ["error1", "error2"])
+        self.assertEqual(y.event_id, z.event_id)
+        self.assertEqual(pickle.loads(pickle.dumps(z)).__dict__, z.clone().__dict__)
+
     def test_msgfmt(self):
         class Y(LogEvent):
             T: Type[LogEventProtocol]
@@ -578,3 +602,80 @@ class TestLogEvent(SctEventTestCase):
         self.assertEqual(str(y), "(Y Severity.ERROR) period_type=one-time "
                                  "event_id=04ace3fb-b9bc-4c86-bfb2-2ffae18bb72e: type=T regex=r1 line_number=1 "
                                  "node=n1\nl1\nb1")
+
+
+def generate_log_timestamp(rand: random.Random) -> str:
+    sep = rand.choice("-/")
+    timestamp = f"{rand.randint(1970, 2037):04}{sep}{rand.randint(1, 12):02}{sep}{rand.randint(1, 31):02}" \
+                f"{rand.choice('T ')}{rand.randint(0, 23):02}:{rand.randint(0, 59):02}:{rand.randint(0, 59):02}"
+    if digits := rand.randint(0, 9):
+        timestamp += rand.choice(".,") + "".join(rand.choice("0123456789") for _ in range(digits))
+    timezone_format = rand.choice(("", "Z", "+00:00", "{sign}{hours:02}:{minutes:02}", "{sign}{hours:02}{minutes:02}"))
+    timestamp += timezone_format.format(sign=rand.choice("+-"), hours=rand.randint(0, 14), minutes=rand.choice((0, 30)))
+    return timestamp
+
+
+def dateutil_timestamp(timestamp: str):
+    try:
+        return dateutil.parser.parse(timestamp).timestamp()
+    except (ValueError, OverflowError) as exc:
+        return type(exc)
+
+
+def fast_timestamp(timestamp: str):
+    try:
+        return parse_log_timestamp(timestamp)
+    except (ValueError, OverflowError) as exc:
+        return type(exc)
+
+
+class TestParseLogTimestamp(unittest.TestCase):
+    def test_known_formats(self):
+        self.assertEqual(parse_log_timestamp("2021-04-06T13:03:28.123456+00:00"), 1617714208.123456)
+        self.assertEqual(parse_log_timestamp("2021-04-06T13:03:28+03:00"), 1617703408.0)
+        self.assertEqual(parse_log_timestamp("2021/04/06 13:03:28,5Z"), 1617714208.5)
+
+    def test_fallback_to_dateutil(self):
+        self.assertEqual(parse_log_timestamp("Apr 06 2021 13:03:28 UTC"), 1617714208.0)
+        self.assertRaises(ValueError, parse_log_timestamp, "2021-02-30T13:03:28")
+        self.assertRaises(ValueError, parse_log_timestamp, "node1")
+
+    def test_equivalence_with_dateutil(self):
+        rand = random.Random(2022)
+        timestamps = [generate_log_timestamp(rand) for _ in range(10_000)]
+        tz_bu = os.environ.get("TZ")
+        try:
+            for tz in ("UTC", "Asia/Jerusalem", "America/New_York", ):
+                os.environ["TZ"] = tz
+                time.tzset()
+                _log_timestamp_seconds.cache_clear()
+                for timestamp in timestamps:
+                    with self.subTest(tz=tz, timestamp=timestamp):
+                        self.assertEqual(fast_timestamp(timestamp), dateutil_timestamp(timestamp))
+        finally:
+            if tz_bu is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = tz_bu
+            time.tzset()
+            _log_timestamp_seconds.cache_clear()
+
+
+@pytest.mark.benchmark
+class TestParseLogTimestampBenchmark(unittest.TestCase):
+    lines_number = 100_000
+
+    def test_add_info_vs_dateutil(self):
+        lines = [f"2021-04-06T13:{index // 6000 % 60:02}:{index // 100 % 60:02}.{index:06}+00:00 node1 !ERR | "
+                 f"scylla: error #{index}" for index in range(self.lines_number)]
+        event = DatabaseLogEvent.DATABASE_ERROR()
+        event.dont_publish()
+        for name, parse in (("dateutil", lambda line: dateutil.parser.parse(line.split(maxsplit=1)[0]).timestamp()),
+                            ("parse_log_timestamp", lambda line: parse_log_timestamp(line.split(maxsplit=1)[0])),
+                            ("LogEvent.add_info", lambda line: event.add_info(node="node1", line=line,
+                                                                              line_number=1).source_timestamp), ):
+            start_time = time.perf_counter()
+            results = [parse(line) for line in lines]
+            duration = time.perf_counter() - start_time
+            self.assertEqual(results[-1], dateutil.parser.parse(lines[-1].split()[0]).timestamp())
+            BENCHMARK_LOGGER.info("%s: %.2fus per line", name, duration / self.lines_number * 1e6)
@@ -0,0 +1,134 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import time
+import pickle
+import pkgutil
+import unittest
+import importlib
+from datetime import datetime, timezone
+
+import pytest
+
+import sdcm.sct_events
+from sdcm.sct_events import Severity, events_codec
+from sdcm.sct_events.base import SctEvent
+from sdcm.sct_events.database import DatabaseLogEvent
+from sdcm.sct_events.system import InfoEvent
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+# Register all event types.
+for module in pkgutil.iter_modules(sdcm.sct_events.__path__):
+    importlib.import_module(f"{sdcm.sct_events.__name__}.{module.name}")
+
+EVENT_TYPES_WITH_OWN_PICKLING = {"TestResultEvent", }
+STATE = {
+    "event_id": "b4d0a5e4-0f7a-4f5b-8a6e-0f1a8b9a7c35",
+    "event_timestamp": 1650000000.123,
+    "source_timestamp": None,
+    "severity": Severity.DEBUG,
+    "log_level": 40,
+    "period_type": "one-time",
+    "node": "Node longevity-10gb-3h-master-db-node-6fb3995d-1 [13.49.80.25 | 10.0.1.221] (seed: True)",
+    "line": "2021-04-06T13:03:28+00:00 node1 !ERR | scylla: ошибка \udcff" + "x" * 200,
+    "line_number": -123456789012345678901234567890,
+    "test_status": "SUCCESS",
+    "events": {"CRITICAL": ["event1"], 3: (1.5, True, False, b"\x00\xff")},
+    "errors": [],
+    "unknown_to_schema": datetime(2022, 4, 15, tzinfo=timezone.utc),
+}
+
+
+def database_log_event(line_number=1):
+    event = DatabaseLogEvent.DATABASE_ERROR().add_info(
+        node="node1", line=f"2021-04-06T13:03:28+00:00 node1 !ERR | scylla: error #{line_number}",
+        line_number=line_number)
+    event.dont_publish()
+    return event
+
+
+class TestEventsCodec(unittest.TestCase):
+    def test_round_trip_of_all_event_types(self):
+        event_types = [event_t.__mro__[0]
+                       for event_t in SctEvent._sct_event_types_registry.values()  # pylint: disable=protected-access
+                       if not event_t.is_abstract()]
+        self.assertGreater(len(event_types), 100)
+        for event_t in event_types:
+            with self.subTest(event_type=event_t.__name__):
+                event = event_t.__new__(event_t)
+                event.__dict__.update(STATE)
+                decoded = events_codec.loads(events_codec.dumps(event))
+                self.assertIs(type(decoded), event_t)
+                if event_t.__name__ in EVENT_TYPES_WITH_OWN_PICKLING:
+                    self.assertIsNone(events_codec.get_schema(event_t))
+                else:
+                    self.assertIsNotNone(events_codec.get_schema(event_t))
+                    self.assertEqual(decoded.__dict__, STATE)
+                    self.assertFalse(decoded._ready_to_publish)  # pylint: disable=protected-access
+
+    def test_round_trip_of_values(self):
+        event = database_log_event()
+        values = [None, True, 0, 63, 64, -1, 2 ** 70, -2 ** 70, 0.1, "", "abc", "é" * 100, b"", [], (), {},
+                  [1, (2, [3])], {"a": {"b": event}}, Severity.CRITICAL, datetime.now(), event]
+        self.assertEqual(events_codec.loads(events_codec.dumps(values)), values)
+        self.assertEqual(events_codec.loads(memoryview(events_codec.dumps(values))), values)
+
+    def test_compact(self):
+        event = database_log_event()
+        data = events_codec.dumps(event)
+        self.assertLess(len(data), len(pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)) / 2)
+        self.assertEqual(events_codec.loads(data), event)
+
+    def test_unknown_type_id(self):
+        event = InfoEvent(message="m1")
+        event.dont_publish()
+        data = bytearray(events_codec.dumps(event))
+        data[1:5] = b"\xff\xff\xff\xff"
+        self.assertRaisesRegex(ValueError, "Unknown SCT event type id: 0xffffffff", events_codec.loads, data)
+
+    def test_extra_bytes(self):
+        self.assertRaisesRegex(ValueError, "Extra 1 bytes", events_codec.loads, events_codec.dumps(1) + b"\x00")
+
+
+@pytest.mark.benchmark
+class TestEventsCodecBenchmark(unittest.TestCase):
+    events_number = 100_000
+
+    @staticmethod
+    def timeit(func, items):
+        start_time = time.perf_counter()
+        results = [func(item) for item in items]
+        return time.perf_counter() - start_time, results
+
+    def test_codec_vs_pickle(self):
+        events = [database_log_event(line_number) for line_number in range(self.events_number)]
+
+        def pickle_dumps(event):
+            return pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+
+        for name, dumps, loads in (("pickle", pickle_dumps, pickle.loads),
+                                   ("events_codec", events_codec.dumps, events_codec.loads), ):
+            dumps_time, encoded = self.timeit(dumps, events)
+            loads_time, decoded = self.timeit(loads, encoded)
+            self.assertEqual(decoded[-1], events[-1])
+            BENCHMARK_LOGGER.info("%s: %.0f bytes per event, dumps %.2fus, loads %.2fus", name,
+                                  sum(map(len, encoded)) / len(encoded), dumps_time / self.events_number * 1e6,
+                                  loads_time / self.events_number * 1e6)
+
+    def test_clone_vs_pickle(self):
+        event = database_log_event()
+        pickle_time, _ = self.timeit(lambda _: pickle.loads(pickle.dumps(event)), range(self.events_number))
+        clone_time, _ = self.timeit(lambda _: event.clone(), range(self.events_number))
+        BENCHMARK_LOGGER.info("LogEvent clone: pickle %.2fus, clone() %.2fus", pickle_time / self.events_number * 1e6,
+                              clone_time / self.events_number * 1e6)
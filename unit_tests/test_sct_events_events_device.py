@@ -11,18 +11,28 @@
 #
 # Copyright (c) 2020 ScyllaDB
 
+import time
 import ctypes
+import pickle
 import shutil
 import tempfile
 import unittest
 import threading
 import multiprocessing
 
+import pytest
+
 from sdcm.sct_events.health import ClusterHealthValidatorEvent
-from sdcm.sct_events.events_device import EventsDevice, start_events_main_device, get_events_main_device
+from sdcm.sct_events.database import DatabaseLogEvent
+from sdcm.sct_events.events_device import \
+    EVENTS_SCHEMA_VERSION, EVENTS_SCHEMA_VERSION_PICKLE, EventsDevice, start_events_main_device, \
+    get_events_main_device, decode_event
 from sdcm.sct_events.events_processes import EventsProcessesRegistry
+from sdcm.sct_events import events_codec
 from sdcm.wait import wait_for
 
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
 
 class TestEventsDevice(unittest.TestCase):
     temp_dir = None
@@ -86,6 +96,122 @@ class TestEventsDevice(unittest.TestCase):
             self.assertIsInstance(events_device, EventsDevice)
             self.assertEqual(events_device.events_counter, 0)
             self.assertTrue(events_device.is_alive())
-            self.assertTrue(events_device.subscribe_address)
         finally:
             events_device.stop(timeout=1)
+
+    def test_check_delivery(self):
+        # pylint: disable=protected-access
+        overwritten = self.events_device._ring_buffer._overwritten
+        reported = self.events_device._check_delivery(reported=[0] * len(overwritten))
+        self.assertEqual(reported, [0] * len(overwritten))
+        overwritten[0] = 5
+        overwritten[3] = 2
+        with self.assertLogs("sdcm.sct_events.events_device", level="ERROR") as logs:
+            reported = self.events_device._check_delivery(reported=reported)
+            overwritten[0] = 7
+            overwritten[3] = 1  # a new subscriber took the slot.
+            reported = self.events_device._check_delivery(reported=reported)
+        self.assertEqual(reported[:4], [7, 0, 0, 1])
+        self.assertEqual([line.split("watchdog: ")[1] for line in logs.output], [
+            "5 events were overwritten before subscriber #0 read them (5 since it subscribed)",
+            "2 events were overwritten before subscriber #3 read them (2 since it subscribed)",
+            "2 events were overwritten before subscriber #0 read them (7 since it subscribed)",
+            "1 events were overwritten before subscriber #3 read them (1 since it subscribed)",
+        ])
+
+    def test_decode_event(self):
+        event = ClusterHealthValidatorEvent.NodeStatus()
+        self.assertEqual(decode_event(EVENTS_SCHEMA_VERSION, memoryview(events_codec.dumps(event))), event)
+        self.assertEqual(decode_event(EVENTS_SCHEMA_VERSION_PICKLE, memoryview(pickle.dumps(event))), event)
+        self.assertRaisesRegex(ValueError, "Unknown events schema version",
+                               decode_event, EVENTS_SCHEMA_VERSION + 1, memoryview(events_codec.dumps(event)))
+
+
+@pytest.mark.benchmark
+class TestEventsDeviceBenchmark(unittest.TestCase):
+    events_number = 100_000
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.events_device = EventsDevice(_registry=EventsProcessesRegistry(log_dir=self.temp_dir))
+
+    def tearDown(self):
+        self.events_device.stop(timeout=5)
+        shutil.rmtree(self.temp_dir)
+
+    def test_database_log_events_throughput(self):
+        events = []
+        for line_number in range(self.events_number):
+            event = DatabaseLogEvent.DATABASE_ERROR().add_info(
+                node="node1", line=f"2021-04-06T13:03:28+00:00 node1 !ERR | scylla: error #{line_number}",
+                line_number=line_number)
+            event.dont_publish()
+            events.append(event)
+
+        published_at = {}
+        delivery_latencies = []
+        stop_event = threading.Event()
+
+        def consume():
+            for event in self.events_device.inbound_events(stop_event=stop_event):
+                delivery_latencies.append(time.perf_counter() - published_at[event.event_id])
+                if len(delivery_latencies) == self.events_number:
+                    break
+
+        self.events_device.start()
+        consumer = threading.Thread(target=consume, daemon=True)
+        consumer.start()
+        time.sleep(1)  # let the subscriber to connect.
+
+        start_time = time.perf_counter()
+        for event in events:
+            published_at[event.event_id] = time.perf_counter()
+            self.events_device.publish_event(event)
+        consumer.join(timeout=300)
+        total_time = time.perf_counter() - start_time
+        stop_event.set()
+
+        self.assertEqual(len(delivery_latencies), self.events_number)
+        self.assertEqual(self.events_device.events_counter, self.events_number)
+        delivery_latencies.sort()
+        BENCHMARK_LOGGER.info("%s events delivered in %.2fs (%.0f events/s), p50 latency: %.2fms, p99 latency: %.2fms",
+                              self.events_number, total_time, self.events_number / total_time,
+                              delivery_latencies[len(delivery_latencies) // 2] * 1000,
+                              delivery_latencies[int(len(delivery_latencies) * 0.99)] * 1000)
+
+    def test_database_log_events_throughput_with_four_subscribers(self):
+        subscribers_number = 4
+        events = []
+        for line_number in range(self.events_number):
+            event = DatabaseLogEvent.DATABASE_ERROR().add_info(
+                node="node1", line=f"2021-04-06T13:03:28+00:00 node1 !ERR | scylla: error #{line_number}",
+                line_number=line_number)
+            event.dont_publish()
+            events.append(event)
+
+        stop_event = multiprocessing.Event()
+        received = [multiprocessing.Value(ctypes.c_uint32, 0) for _ in range(subscribers_number)]
+
+        def consume(counter):
+            for _ in self.events_device.inbound_events(stop_event=stop_event):
+                counter.value += 1
+                if counter.value == self.events_number:
+                    break
+
+        self.events_device.start()
+        subscribers = [multiprocessing.Process(target=consume, args=(counter, ), daemon=True) for counter in received]
+        for subscriber in subscribers:
+            subscriber.start()
+        time.sleep(1)  # let the subscribers to connect.
+
+        start_time = time.perf_counter()
+        for event in events:
+            self.events_device.publish_event(event)
+        for subscriber in subscribers:
+            subscriber.join(timeout=300)
+        total_time = time.perf_counter() - start_time
+        stop_event.set()
+
+        self.assertEqual([counter.value for counter in received], [self.events_number] * subscribers_number)
+        BENCHMARK_LOGGER.info("%s events delivered to %s subscribers in %.2fs (%.0f events/s)", self.events_number,
+                              subscribers_number, total_time, self.events_number / total_time)
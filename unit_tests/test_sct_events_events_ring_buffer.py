@@ -0,0 +1,166 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import time
+import unittest
+import threading
+import multiprocessing
+
+from sdcm.sct_events.events_ring_buffer import EventsRingBuffer, check_sequence
+
+
+def decode(schema_version, payload):
+    if schema_version != 1:
+        raise ValueError(f"unknown schema version {schema_version}")
+    return bytes(payload)
+
+
+def wait_for_subscribers(ring_buffer, count, timeout=10):
+    end_time = time.perf_counter() + timeout
+    while ring_buffer.subscribers_count < count:
+        assert time.perf_counter() < end_time, f"{count} subscribers didn't subscribe in {timeout} seconds"
+        time.sleep(0.01)
+
+
+class Subscriber(threading.Thread):
+    def __init__(self, ring_buffer, count, resume_after=None):
+        super().__init__(daemon=True)
+        self.ring_buffer = ring_buffer
+        self.count = count
+        self.resume_after = resume_after  # wait for `resume' event after this number of records.
+        self.resume = threading.Event()
+        self.stop_event = threading.Event()
+        self.records = []
+
+    def run(self):
+        for record in self.ring_buffer.read(stop_event=self.stop_event,
+                                            decode=decode, polling_timeout=0.01, receiver="test"):
+            self.records.append(record)
+            if len(self.records) == self.count:
+                break
+            if len(self.records) == self.resume_after:
+                self.resume.wait(timeout=10)
+
+    def __enter__(self):
+        self.start()
+        wait_for_subscribers(self.ring_buffer, 1)
+        return self
+
+    def __exit__(self, *_):
+        self.resume.set()
+        self.join(timeout=10)
+        self.stop_event.set()
+
+
+class TestEventsRingBuffer(unittest.TestCase):
+    def test_write_read(self):
+        ring_buffer = EventsRingBuffer(size=1024)
+        payloads = [f"record #{index}".encode() * (index % 7 + 1) for index in range(100)]
+        with Subscriber(ring_buffer, count=len(payloads)) as subscriber:
+            for payload in payloads:  # wrap the buffer around several times.
+                self.assertTrue(ring_buffer.write(payload, schema_version=1))
+                ring_buffer.notify()
+        self.assertEqual(subscriber.records, payloads)
+        self.assertEqual(ring_buffer.subscribers_count, 0)
+
+    def test_subscribers_in_processes(self):
+        ring_buffer = EventsRingBuffer(size=4096)
+        stop_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        payloads = [f"record #{index:04}".encode() for index in range(1000)]  # ~8 times the buffer size.
+
+        def consume():
+            records = ring_buffer.read(stop_event=stop_event, decode=decode, polling_timeout=0.01, receiver="test")
+            results.put([record for _, record in zip(payloads, records)])
+
+        subscribers = [multiprocessing.Process(target=consume, daemon=True) for _ in range(3)]
+        for subscriber in subscribers:
+            subscriber.start()
+        wait_for_subscribers(ring_buffer, len(subscribers))
+        for payload in payloads:
+            ring_buffer.write(payload, schema_version=1)
+            ring_buffer.notify()
+        for _ in subscribers:
+            self.assertEqual(results.get(timeout=30), payloads)
+        stop_event.set()
+        for subscriber in subscribers:
+            subscriber.join(timeout=5)
+
+    def test_slow_subscriber(self):
+        ring_buffer = EventsRingBuffer(size=1024, backpressure_timeout=0.01)
+        payloads = [b"%03d" % index for index in range(100)]
+        with self.assertLogs("sdcm.sct_events.events_ring_buffer") as logs, \
+                Subscriber(ring_buffer, count=len(payloads), resume_after=1) as subscriber:
+            for payload in payloads:
+                ring_buffer.write(payload, schema_version=1)
+                ring_buffer.notify()
+            subscriber.resume.set()
+            wait_for_subscribers(ring_buffer, 0)
+
+        # The first record is read before the slow down, older records are overwritten and newer ones are kept.
+        self.assertEqual(subscriber.records[0], payloads[0])
+        lost = len(payloads) - len(subscriber.records)
+        self.assertGreater(lost, 0)
+        self.assertEqual(subscriber.records[1:], payloads[lost + 1:])
+        self.assertIn("WARNING:sdcm.sct_events.events_ring_buffer:Subscriber of ring buffer is too slow",
+                      logs.output[0])
+        self.assertIn(f"ERROR:sdcm.sct_events.events_ring_buffer:test: lost {lost} events (#1..#{lost})", logs.output)
+        self.assertEqual(ring_buffer.overwritten_records[0], lost)
+
+    def test_overwritten_records(self):
+        ring_buffer = EventsRingBuffer(size=1024, max_subscribers=2, backpressure_timeout=0.01)
+        payloads = [b"%03d" % index for index in range(100)]
+        with Subscriber(ring_buffer, count=len(payloads)) as subscriber:
+            for payload in payloads:
+                ring_buffer.write(payload, schema_version=1)
+                ring_buffer.notify()
+        self.assertEqual(subscriber.records, payloads)
+        self.assertEqual(ring_buffer.overwritten_records, [0, 0], "records read in time are not counted")
+
+        with self.assertLogs("sdcm.sct_events.events_ring_buffer"), \
+                Subscriber(ring_buffer, count=2, resume_after=1):
+            for payload in payloads:
+                ring_buffer.write(payload, schema_version=1)
+            overwritten = ring_buffer.overwritten_records[0]
+            self.assertGreater(overwritten, 0)
+            self.assertEqual(ring_buffer.overwritten_records[1], 0)
+
+        with Subscriber(ring_buffer, count=1) as subscriber:
+            self.assertEqual(ring_buffer.overwritten_records, [0, 0], "counter is reset for a new subscriber")
+            ring_buffer.write(b"last", schema_version=1)
+            ring_buffer.notify()
+        self.assertEqual(subscriber.records, [b"last"])
+
+    def test_skip_bad_records(self):
+        ring_buffer = EventsRingBuffer(size=1024)
+        with self.assertLogs("sdcm.sct_events.events_ring_buffer", level="ERROR") as logs, \
+                Subscriber(ring_buffer, count=2) as subscriber:
+            ring_buffer.write(b"first", schema_version=1)
+            self.assertFalse(ring_buffer.write(b"x" * 512, schema_version=1))
+            ring_buffer.write(b"second", schema_version=2)
+            ring_buffer.write(b"third", schema_version=1)
+            ring_buffer.notify()
+        self.assertEqual(subscriber.records, [b"first", b"third"])
+        self.assertIn("Record of 512 bytes is larger than 256 bytes allowed", logs.output[0])
+        self.assertIn("test: failed to decode record #1 (schema version 2)", logs.output[1])
+
+    def test_check_sequence(self):
+        with self.assertLogs("sdcm.sct_events.events_ring_buffer", level="ERROR") as logs:
+            self.assertEqual(check_sequence(0, expected=None, receiver="test"), 1)
+            self.assertEqual(check_sequence(1, expected=1, receiver="test"), 2)
+            self.assertEqual(check_sequence(7, expected=2, receiver="test"), 8)
+            self.assertEqual(check_sequence(3, expected=8, receiver="test"), 4)
+        self.assertEqual(logs.output, [
+            "ERROR:sdcm.sct_events.events_ring_buffer:test: lost 5 events (#2..#6)",
+            "ERROR:sdcm.sct_events.events_ring_buffer:test: got events out of order (expected #8, got #3)",
+        ])
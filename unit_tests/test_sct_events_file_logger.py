@@ -11,15 +11,27 @@
 #
 # Copyright (c) 2020 ScyllaDB
 
+import os
+import json
 import time
+import shutil
+import tempfile
 import unittest
+import unittest.mock
+import collections
+from pathlib import Path
+
+import pytest
 
 from sdcm.sct_events import Severity
 from sdcm.sct_events.system import SpotTerminationEvent
 from sdcm.sct_events.setup import EVENTS_SUBSCRIBERS_START_DELAY
+from sdcm.sct_events import file_logger as file_logger_module
 from sdcm.sct_events.file_logger import \
     EventsFileLogger, start_events_logger, get_events_logger, get_events_grouped_by_category, get_logger_event_summary
+from sdcm.sct_events.events_processes import EventsProcessesRegistry
 
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
 from unit_tests.lib.events_utils import EventsUtilsMixin
 
 
@@ -104,3 +116,97 @@ class TestFileLogger(unittest.TestCase, EventsUtilsMixin):
             self.assertEqual(len(group), 5)
             for num, event in enumerate(group, start=0 if severity == Severity.CRITICAL.name else 5):
                 self.assertIn(f"m-{num}-{severity}", event)
+
+
+class TestFileLoggerBuffering(unittest.TestCase, EventsUtilsMixin):
+    # pylint: disable=protected-access
+    def setUp(self) -> None:
+        self.setup_events_processes(events_device=False, events_main_device=True, registry_patcher=False)
+        self.file_logger = EventsFileLogger(_registry=self.events_processes_registry)  # not started, used in-process
+        self.file_logger._buffered = True
+
+    def tearDown(self) -> None:
+        self.teardown_events_processes()
+
+    def test_flush_on_critical(self):
+        event = SpotTerminationEvent(node="n1", message="m1")
+        event.severity = Severity.ERROR
+        self.file_logger.write_event(event)
+        self.assertEqual(self.file_logger.events_logs_by_severity[Severity.ERROR].read_text(), "")
+        self.assertFalse(self.file_logger.events_summary_log.exists())
+
+        event.severity = Severity.CRITICAL
+        self.file_logger.write_event(event)
+        self.assertEqual(len(self.file_logger.events_log.read_text().splitlines()), 2)
+        self.assertIn("m1", self.file_logger.events_logs_by_severity[Severity.ERROR].read_text())
+        self.assertIn("m1", self.file_logger.events_logs_by_severity[Severity.CRITICAL].read_text())
+
+        self.file_logger._flush_files(summary=True)
+        self.assertEqual(json.loads(self.file_logger.events_summary_log.read_text()),
+                         {Severity.ERROR.name: 1, Severity.CRITICAL.name: 1})
+
+    def test_not_buffered_outside_of_logger_process(self):
+        self.file_logger._buffered = False
+        event = SpotTerminationEvent(node="n1", message="m1")
+        event.severity = Severity.WARNING
+        self.file_logger.write_event(event)
+        self.assertIn("m1", self.file_logger.events_logs_by_severity[Severity.WARNING].read_text())
+        self.assertEqual(json.loads(self.file_logger.events_summary_log.read_text()), {Severity.WARNING.name: 1})
+
+
+@pytest.mark.benchmark
+class TestFileLoggerBenchmark(unittest.TestCase):
+    events_number = 50_000
+
+    def setUp(self) -> None:
+        self.temp_dir = Path(tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def generate_events(self):
+        severities = [Severity.NORMAL, Severity.WARNING, Severity.ERROR, Severity.DEBUG]
+        for num in range(self.events_number):
+            event = SpotTerminationEvent(node="node", message=f"message #{num}")
+            event.severity = severities[num % len(severities)]
+            yield event
+
+    def write_events_reopening_files(self, log_dir: Path) -> float:
+        """Write events the same way as EventsFileLogger did before it started to keep files opened."""
+
+        summary = collections.defaultdict(int)
+        start_time = time.perf_counter()
+        for event in self.generate_events():
+            message_bin = f"{event.formatted_event_timestamp}: {str(event).strip()}".encode("utf-8") + b"\n"
+            for name in ("events.log", f"{event.severity.name.lower()}.log"):
+                with (log_dir / name).open("ab+", buffering=0) as fobj:
+                    fobj.write(message_bin)
+            summary[event.severity.name] += 1
+            with (log_dir / "summary.log").open("wb", buffering=0) as fobj:
+                fobj.write(json.dumps(dict(summary), indent=4).encode("utf-8"))
+        return time.perf_counter() - start_time
+
+    def write_events_buffered(self, log_dir: Path) -> float:
+        with unittest.mock.patch("sdcm.sct_events.file_logger.get_events_main_device") as main_device:
+            main_device.return_value.events_log_base_dir = log_dir
+            file_logger = EventsFileLogger(_registry=EventsProcessesRegistry(log_dir=log_dir))
+        file_logger._buffered = True  # pylint: disable=protected-access
+        start_time = time.perf_counter()
+        with unittest.mock.patch.object(file_logger_module.LOGGER, "disabled", True):  # don't measure console output
+            for event in self.generate_events():
+                file_logger.write_event(event)
+        file_logger._flush_files(summary=True)  # pylint: disable=protected-access
+        return time.perf_counter() - start_time
+
+    def test_events_per_second(self):
+        (old_dir := self.temp_dir / "old").mkdir()
+        (new_dir := self.temp_dir / "new").mkdir()
+        old_time = self.write_events_reopening_files(old_dir)
+        new_time = self.write_events_buffered(new_dir)
+
+        self.assertEqual((old_dir / "events.log").read_text().count("\n"), self.events_number)
+        self.assertEqual((new_dir / "events.log").read_text().count("\n"), self.events_number)
+        self.assertEqual(json.loads((old_dir / "summary.log").read_text()),
+                         json.loads((new_dir / "summary.log").read_text()))
+        BENCHMARK_LOGGER.info("EventsFileLogger on %s: reopening files: %.0f events/s, buffered: %.0f events/s",
+                              self.temp_dir, self.events_number / old_time, self.events_number / new_time)
@@ -12,11 +12,13 @@
 # Copyright (c) 2020 ScyllaDB
 
 import re
+import time
 import pickle
 import unittest
 
 from sdcm.sct_events import Severity
-from sdcm.sct_events.filters import DbEventsFilter, EventsFilter, EventsSeverityChangerFilter
+from sdcm.sct_events.base import FILTER_EVENT_DECAY_TIME
+from sdcm.sct_events.filters import DbEventsFilter, EventsFilter, EventsSeverityChangerFilter, EventsFiltersIndex
 from sdcm.sct_events.database import DatabaseLogEvent
 
 
@@ -125,3 +127,60 @@ class TestEventsSeverityChangerFilter(unittest.TestCase):
         self.assertEqual(event.severity, Severity.ERROR)
         db_events_filter.eval_filter(event)
         self.assertEqual(event.severity, Severity.NORMAL)
+
+
+class TestEventsFiltersIndex(unittest.TestCase):
+    def test_index_key(self):
+        self.assertEqual(DbEventsFilter(db_event=DatabaseLogEvent.BAD_ALLOC).index_key, ("type", "BAD_ALLOC"))
+        self.assertEqual(EventsFilter(event_class=DatabaseLogEvent.BAD_ALLOC).index_key, ("base", "DatabaseLogEvent"))
+        self.assertIsNone(EventsFilter(regex="lalala").index_key)
+
+    def test_eval_filters(self):
+        filters = EventsFiltersIndex()
+        filters.add(DbEventsFilter(db_event=DatabaseLogEvent.BAD_ALLOC))
+        filters.add(EventsFilter(event_class=DatabaseLogEvent.NO_SPACE_ERROR, regex=".*xyz.*"))
+        self.assertEqual(len(filters), 2)
+        self.assertTrue(filters.eval_filters(DatabaseLogEvent.BAD_ALLOC()))
+        self.assertFalse(filters.eval_filters(DatabaseLogEvent.DATABASE_ERROR()))
+        self.assertTrue(filters.eval_filters(
+            DatabaseLogEvent.NO_SPACE_ERROR().add_info(node="node1", line="xyz", line_number=1)))
+        self.assertFalse(filters.eval_filters(
+            DatabaseLogEvent.NO_SPACE_ERROR().add_info(node="node1", line="abc", line_number=1)))
+
+    def test_eval_filters_order(self):
+        filters = EventsFiltersIndex()
+        first = EventsSeverityChangerFilter(new_severity=Severity.WARNING, event_class=DatabaseLogEvent)
+        filters.add(first)
+        filters.add(EventsSeverityChangerFilter(new_severity=Severity.NORMAL, regex=".*BAD_ALLOC.*"))
+        filters.add(EventsSeverityChangerFilter(new_severity=Severity.CRITICAL, event_class=DatabaseLogEvent.BAD_ALLOC))
+        event = DatabaseLogEvent.BAD_ALLOC()
+        self.assertFalse(filters.eval_filters(event))
+        self.assertEqual(event.severity, Severity.CRITICAL)
+
+        # Re-added filter keeps its position.
+        first.new_severity = Severity.ERROR
+        filters.add(first)
+        event = DatabaseLogEvent.BAD_ALLOC()
+        self.assertFalse(filters.eval_filters(event))
+        self.assertEqual(event.severity, Severity.CRITICAL)
+
+    def test_remove(self):
+        filters = EventsFiltersIndex()
+        db_filter = DbEventsFilter(db_event=DatabaseLogEvent.BAD_ALLOC)
+        filters.add(db_filter)
+        self.assertIn(db_filter.uuid, filters)
+        filters.remove(db_filter.uuid)
+        filters.remove(db_filter.uuid)
+        self.assertNotIn(db_filter.uuid, filters)
+        self.assertFalse(filters.eval_filters(DatabaseLogEvent.BAD_ALLOC()))
+
+    def test_remove_deceased(self):
+        filters = EventsFiltersIndex()
+        db_filter = DbEventsFilter(db_event=DatabaseLogEvent.BAD_ALLOC)
+        filters.add(db_filter)
+        filters.set_expire_time(db_filter.uuid, time.time() + 3600)
+        filters.remove_deceased()
+        self.assertIn(db_filter.uuid, filters)
+        filters.set_expire_time(db_filter.uuid, time.time() - FILTER_EVENT_DECAY_TIME - 1)
+        filters.remove_deceased()
+        self.assertNotIn(db_filter.uuid, filters)
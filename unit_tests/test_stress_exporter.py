@@ -0,0 +1,160 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+import os
+import re
+import time
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+
+from sdcm.loader import (
+    StressExporter, CassandraStressExporter, ScyllaBenchStressExporter, CassandraHarryStressExporter)
+from sdcm.utils.common import convert_metric_to_ms
+
+from unit_tests.lib.benchmark import BENCHMARK_LOGGER
+
+TEST_DATA = Path(__file__).parent / "test_data" / "test_stress_exporter"
+
+
+class FakeMetrics:
+    def __init__(self):
+        self.registry = CollectorRegistry()
+
+    def create_gauge(self, name, desc, param_list):
+        return Gauge(name, desc, param_list, registry=self.registry)
+
+
+def read_lines(name):
+    return (TEST_DATA / name).read_text(encoding="utf-8").splitlines()
+
+
+class StressExporterTestBase(unittest.TestCase):
+    def setUp(self):
+        gauges_patcher = unittest.mock.patch.dict(StressExporter.METRICS_GAUGES, clear=True)
+        gauges_patcher.start()
+        self.addCleanup(gauges_patcher.stop)
+        self.metrics = FakeMetrics()
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.stress_log = os.path.join(self.tmp_dir.name, "stress.log")
+
+    def create_exporter(self, exporter_class):
+        return exporter_class(instance_name="10.0.1.10", metrics=self.metrics, stress_operation="write",
+                              stress_log_filename=self.stress_log, loader_idx=1, cpu_idx=0)
+
+    def get_metrics(self, exporter):
+        gauge_name, = StressExporter.METRICS_GAUGES
+        labels = {label: str(value) for label, value in zip(
+            exporter.stress_metric._labelnames,  # pylint: disable=protected-access
+            (0, exporter.instance_name, exporter.loader_idx, exporter.cpu_idx, None, exporter.keyspace))}
+        metrics = {}
+        for metric_name in ("ops", "lat_mean", "lat_med", "lat_perc_95", "lat_perc_99", "lat_perc_999", "lat_max",
+                            "errors"):
+            labels["type"] = metric_name
+            metrics[metric_name] = self.metrics.registry.get_sample_value(gauge_name, labels)
+        return metrics
+
+
+class TestStressExporters(StressExporterTestBase):
+    def test_cassandra_stress(self):
+        exporter = self.create_exporter(CassandraStressExporter)
+        lines = read_lines("cassandra_stress.log")
+        exporter.process_lines(lines[:100])
+        self.assertEqual(exporter.keyspace, "keyspace1")
+        exporter.process_lines(lines[100:])
+        self.assertEqual(self.get_metrics(exporter), {
+            "ops": 76611.0, "lat_mean": 3.6, "lat_med": 13.2, "lat_perc_95": 83.3, "lat_perc_99": 102.0,
+            "lat_perc_999": 122.8, "lat_max": 125.4, "errors": 0.0})
+
+    def test_scylla_bench(self):
+        exporter = self.create_exporter(ScyllaBenchStressExporter)
+        lines = read_lines("scylla_bench.log")
+        exporter.process_lines(lines[:20])
+        exporter.process_lines(lines[20:])  # results summary at the end has no metrics line
+        last_line = [line for line in lines if re.match(r"\d+\.\d+s ", line)][-1].split()
+        self.assertEqual(self.get_metrics(exporter), {
+            "ops": float(last_line[1]), "errors": float(last_line[3]), "lat_max": convert_metric_to_ms(last_line[4]),
+            "lat_perc_999": convert_metric_to_ms(last_line[5]), "lat_perc_99": convert_metric_to_ms(last_line[6]),
+            "lat_perc_95": convert_metric_to_ms(last_line[7]), "lat_med": convert_metric_to_ms(last_line[9]),
+            "lat_mean": convert_metric_to_ms(last_line[10])})
+
+    def test_cassandra_harry(self):
+        exporter = self.create_exporter(CassandraHarryStressExporter)
+        exporter.process_lines(["INFO  Reorder buffer size has grown up to 10"])
+        exporter.clear_metrics()
+        self.assertEqual(exporter.metrics_columns, [])
+
+    def test_follow_stress_log(self):
+        lines = read_lines("cassandra_stress.log")
+        with open(self.stress_log, "w", encoding="utf-8") as stress_log, \
+                unittest.mock.patch("sdcm.loader.STRESS_LOG_READ_INTERVAL", 0.01):
+            stress_log.write("\n".join(lines[:-1]) + "\n" + lines[-1][:30])
+            stress_log.flush()
+            with self.create_exporter(CassandraStressExporter) as exporter:
+                time.sleep(0.2)
+                self.assertEqual(self.get_metrics(exporter)["ops"], 67787.0)
+                stress_log.write(lines[-1][30:] + "\n")
+                stress_log.flush()
+                time.sleep(0.2)
+                self.assertEqual(self.get_metrics(exporter)["ops"], 76611.0)
+            exporter.future.result(timeout=5)
+
+
+@pytest.mark.benchmark
+class TestStressExportersBenchmark(StressExporterTestBase):
+    replays = 1000
+
+    @staticmethod
+    def process_line_by_line(exporter, lines):
+        """The way the output was processed before: every line was split and all gauges were set."""
+
+        for line in lines:
+            if exporter.skip_line(line=line):
+                continue
+            cols = exporter.split_line(line=line)
+            for metric in ['lat_mean', 'lat_med', 'lat_perc_95', 'lat_perc_99', 'lat_perc_999', 'lat_max']:
+                if metric_value := cols[getattr(exporter.metrics_positions, metric)]:
+                    exporter.set_metric(metric, convert_metric_to_ms(metric_value))
+            if ops := cols[exporter.metrics_positions.ops]:
+                exporter.set_metric('ops', float(ops))
+            if errors := cols[exporter.metrics_positions.errors]:
+                exporter.set_metric('errors', int(errors))
+
+    def test_benchmark(self):
+        for exporter_class, fixture in ((CassandraStressExporter, "cassandra_stress.log"),
+                                        (ScyllaBenchStressExporter, "scylla_bench.log")):
+            StressExporter.METRICS_GAUGES.clear()
+            self.metrics = FakeMetrics()
+            exporter = self.create_exporter(exporter_class)
+            lines = read_lines(fixture)
+            lines_count = len(lines) * self.replays
+
+            start = time.perf_counter()
+            for _ in range(self.replays):
+                self.process_line_by_line(exporter, lines)
+            line_by_line = time.perf_counter() - start
+            expected = self.get_metrics(exporter)
+
+            start = time.perf_counter()
+            for _ in range(self.replays):
+                exporter.process_lines(lines)
+            batched = time.perf_counter() - start
+            self.assertEqual(self.get_metrics(exporter), expected)
+
+            BENCHMARK_LOGGER.info("%s: line by line %.0f lines/s, batched %.0f lines/s", exporter_class.__name__,
+                                  lines_count / line_by_line, lines_count / batched)
@@ -0,0 +1,136 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+#
+# See LICENSE for more details.
+#
+# Copyright (c) 2022 ScyllaDB
+
+# pylint: disable=too-few-public-methods
+
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+from invoke import Result
+
+from sdcm.cluster import BaseNode, BaseCluster, BaseScyllaCluster
+from sdcm.utils.topology_snapshot import TopologySnapshotCache
+
+NODES_IPS = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+SCHEMA = "3f1a0e6c-9a48-3a5e-8c9b-4b6b0b0a9a11"
+
+NODETOOL_STATUS = "\n".join([
+    "Datacenter: eu-north",
+    "====================",
+    "Status=Up/Down",
+    "|/ State=Normal/Leaving/Joining/Moving",
+    "--  Address   Load       Tokens       Owns    Host ID                               Rack",
+    *(f"UN  {ip}  1.1 GB   256          ?       e5bcb094-e4de-43aa-8dc9-b1bf74b3b34{index}  1a"
+      for index, ip in enumerate(NODES_IPS)),
+])
+
+NODETOOL_GOSSIPINFO = "\n".join(
+    f"/{ip}\n  generation:1\n  heartbeat:100\n  STATUS:NORMAL,-1\n  SCHEMA:{SCHEMA}\n  DC:eu-north\n"
+    f"  RPC_ADDRESS:{ip}" for ip in NODES_IPS)
+
+
+def peers_lines(current_ip):
+    return [f" {ip} | eu-north | e5bcb094-e4de-43aa-8dc9-b1bf74b3b34{index} | 1a | 3.0.8 | {ip} | {SCHEMA} | {{}}"
+            for index, ip in enumerate(NODES_IPS) if ip != current_ip]
+
+
+class CannedOutputNode(BaseNode):  # pylint: disable=abstract-method
+    def __init__(self, name, ip, parent_cluster):  # pylint: disable=super-init-not-called
+        self.name = name
+        self.ip = ip
+        self.parent_cluster = parent_cluster
+        self._running_nemesis = None
+        self.commands = Counter()
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def ip_address(self):
+        return self.ip
+
+    def get_all_ip_addresses(self):
+        return [self.ip]
+
+    def run_nodetool(self, sub_cmd, *args, **kwargs):  # pylint: disable=unused-argument,arguments-differ
+        self.commands[f"nodetool {sub_cmd}"] += 1
+        return Result(exited=0, stderr="", stdout={"status": NODETOOL_STATUS,
+                                                   "gossipinfo": NODETOOL_GOSSIPINFO}[sub_cmd])
+
+    def run_cqlsh(self, cmd, *args, **kwargs):  # pylint: disable=unused-argument,arguments-differ
+        self.commands["cqlsh"] += 1
+        return peers_lines(self.ip)
+
+
+class CannedOutputScyllaCluster(BaseScyllaCluster, BaseCluster):  # pylint: disable=abstract-method
+    def __init__(self, interval):  # pylint: disable=super-init-not-called
+        self.name = "canned_cluster"
+        self.nodes = [CannedOutputNode(f"node-{index}", ip, self) for index, ip in enumerate(NODES_IPS)]
+        self.dead_nodes_list = []
+        self.topology_snapshot = TopologySnapshotCache(interval=interval)
+
+    def commands_count(self):
+        return sum(sum(node.commands.values()) for node in self.nodes)
+
+
+def run_health_checks(cluster, rounds):
+    for _ in range(rounds):
+        for node in cluster.nodes:
+            assert not list(node.node_health_events()), "canned cluster should be healthy"
+            assert node.host_id.startswith("e5bcb094")
+
+
+class TestTopologySnapshotCache(unittest.TestCase):
+    def test_remote_commands_reduction(self):
+        uncached = CannedOutputScyllaCluster(interval=0)
+        run_health_checks(uncached, rounds=5)
+
+        cached = CannedOutputScyllaCluster(interval=600)
+        run_health_checks(cached, rounds=5)
+
+        # Each node runs `nodetool status' twice (nodes status and host ID), `nodetool gossipinfo' and a CQL query.
+        self.assertEqual(uncached.commands_count(), 5 * 4 * len(NODES_IPS))
+        self.assertEqual(cached.commands_count(), 4 * len(NODES_IPS))
+        self.assertEqual((cached.topology_snapshot.loads, cached.topology_snapshot.hits),
+                         (4 * len(NODES_IPS), 4 * 4 * len(NODES_IPS)))
+
+    def test_invalidate(self):
+        cluster = CannedOutputScyllaCluster(interval=600)
+        run_health_checks(cluster, rounds=2)
+        cluster.topology_snapshot.invalidate()
+        run_health_checks(cluster, rounds=2)
+        self.assertEqual(cluster.commands_count(), 2 * 4 * len(NODES_IPS))
+
+    def test_interval(self):
+        cache = TopologySnapshotCache(interval=30)
+        with patch("sdcm.utils.topology_snapshot.time.monotonic", side_effect=[100, 120, 131]):
+            results = [cache.get("query", "node", lambda: {"key": ["value"]}) for _ in range(3)]
+        self.assertEqual((cache.loads, cache.hits), (2, 1))
+        self.assertIs(results[0], results[1])
+        self.assertEqual(results[2], {"key": ("value", )})
+
+    def test_immutable_view(self):
+        cluster = CannedOutputScyllaCluster(interval=600)
+        node = cluster.nodes[0]
+        status = cluster.topology_snapshot.get("nodes_status", node, node.get_nodes_status)
+        self.assertEqual({other.name: properties["status"] for other, properties in status.items()},
+                         {"node-0": "UN", "node-1": "UN", "node-2": "UN"})
+        with self.assertRaises(TypeError):
+            status[node]["status"] = "DN"
+
+    def test_failed_query_is_not_cached(self):
+        cache = TopologySnapshotCache(interval=600)
+        self.assertIsNone(cache.get("gossip_info", "node", lambda: None))
+        self.assertEqual(cache.get("gossip_info", "node", lambda: {"node": {}}), {"node": {}})
+        self.assertEqual(cache.loads, 2)